@@ -216,17 +216,38 @@ const RecruiterBulkUpload = () => {
         `⏱️  Starting upload of ${selectedFiles.length} files (~${estimatedMinutes} min)`,
       );
 
-      const response = await axios.post(
-        "https://resume-parser-and-manager.onrender.com/api/recruiter/bulk-parse-resume",
-        formData,
-        {
-          headers: {
-            "Content-Type": "multipart/form-data",
-            Authorization: `Bearer ${token}`,
-          },
-          timeout: 600000, // 10 minutes for large batches
+      const jobsUrl =
+        "https://resume-parser-and-manager.onrender.com/api/recruiter/bulk-parse-jobs";
+      const authHeaders = { Authorization: `Bearer ${token}` };
+
+      // Queue the upload, then poll the job until every file is processed
+      const jobResponse = await axios.post(jobsUrl, formData, {
+        headers: {
+          "Content-Type": "multipart/form-data",
+          ...authHeaders,
         },
-      );
+        timeout: 120000,
+      });
+      const jobId = jobResponse.data.job_id;
+      console.log(`📥 Bulk job queued: ${jobId}`);
+
+      let response;
+      while (true) {
+        await new Promise((resolve) => setTimeout(resolve, 3000));
+        response = await axios.get(`${jobsUrl}/${jobId}`, {
+          headers: authHeaders,
+          timeout: 30000,
+        });
+        const { status, summary } = response.data;
+        console.log(
+          `📊 Job ${status}: ${summary.processed}/${summary.total} processed`,
+        );
+        if (status === "completed" || status === "failed") break;
+      }
+
+      if (response.data.status === "failed") {
+        throw new Error(response.data.error || "Bulk upload job failed");
+      }
 
       console.log("✅ Upload complete:", response.data);
 
@@ -42,6 +42,7 @@ import {
 import { useNavigate } from "react-router-dom";
 
 const API_BASE_URL = "https://resume-parser-and-manager.onrender.com";
+const PAGE_SIZE = 50;
 
 // Helper function to get value regardless of case
 const getValue = (obj, key) => {
@@ -89,6 +90,62 @@ const hasValidSkills = (skills) => {
   );
 };
 
+// Drop repeated candidates (same id, email, phone or name), keeping the first
+const dedupeCandidates = (candidates) => {
+  const uniqueCandidates = [];
+  const seenEmails = new Set();
+  const seenPhones = new Set();
+  const seenNames = new Set();
+  const seenIds = new Set();
+
+  candidates.forEach((candidate) => {
+    const parsed = candidate.parsed_data || {};
+    const id = candidate._id;
+
+    const email = parsed.email ? parsed.email.trim().toLowerCase() : null;
+    let phone = parsed.phone ? parsed.phone.toString().replace(/\D/g, "") : null;
+    if (phone && phone.length < 6) phone = null;
+    const name = parsed.name ? parsed.name.trim().toLowerCase() : null;
+
+    let isDuplicate = false;
+
+    if (seenIds.has(id)) {
+      isDuplicate = true;
+    }
+
+    if (!isDuplicate && email && email !== "no email") {
+      if (seenEmails.has(email)) {
+        isDuplicate = true;
+      } else {
+        seenEmails.add(email);
+      }
+    }
+
+    if (!isDuplicate && phone) {
+      if (seenPhones.has(phone)) {
+        isDuplicate = true;
+      } else {
+        seenPhones.add(phone);
+      }
+    }
+
+    if (!isDuplicate && name && name !== "unknown candidate") {
+      if (seenNames.has(name)) {
+        isDuplicate = true;
+      } else {
+        seenNames.add(name);
+      }
+    }
+
+    if (!isDuplicate) {
+      seenIds.add(id);
+      uniqueCandidates.push(candidate);
+    }
+  });
+
+  return uniqueCandidates;
+};
+
 const hasValidLanguages = (languages) => {
   if (!languages || !Array.isArray(languages) || languages.length === 0)
     return false;
@@ -109,39 +166,21 @@ const RecruiterCandidates = () => {
   const [showDetailModal, setShowDetailModal] = useState(false);
   const [deleteConfirm, setDeleteConfirm] = useState(null);
   const [deleting, setDeleting] = useState(false);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
-  // Fetch candidates on mount
+  // First page on mount, and again (debounced) whenever the search changes
   useEffect(() => {
-    fetchCandidates();
-  }, []);
+    const timer = setTimeout(() => fetchCandidates(), searchQuery ? 300 : 0);
+    return () => clearTimeout(timer);
+  }, [searchQuery]);
 
-  // Filter candidates based on search
+  // Search runs on the server, so the loaded pages are already filtered
   useEffect(() => {
-    if (!searchQuery.trim()) {
-      setFilteredCandidates(candidates);
-      return;
-    }
-
-    const query = searchQuery.toLowerCase();
-    const filtered = candidates.filter((candidate) => {
-      const data = candidate.parsed_data || {};
-      const name = (data.name || "").toLowerCase();
-      const email = (data.email || "").toLowerCase();
-      const skills = (data.skills || []).join(" ").toLowerCase();
-      const derivedSkills = (data.derived_skills || []).join(" ").toLowerCase();
-
-      return (
-        name.includes(query) ||
-        email.includes(query) ||
-        skills.includes(query) ||
-        derivedSkills.includes(query)
-      );
-    });
+    setFilteredCandidates(candidates);
+  }, [candidates]);
 
-    setFilteredCandidates(filtered);
-  }, [searchQuery, candidates]);
-
-  const fetchCandidates = async () => {
+  const fetchCandidates = async (cursor = null) => {
     try {
       const token = localStorage.getItem("token");
       if (!token) {
@@ -149,11 +188,18 @@ const RecruiterCandidates = () => {
         return;
       }
 
-      const response = await fetch(`${API_BASE_URL}/api/recruiter/candidates`, {
-        headers: {
-          Authorization: `Bearer ${token}`,
+      const params = new URLSearchParams({ view: "list", limit: PAGE_SIZE });
+      if (cursor) params.set("cursor", cursor);
+      if (searchQuery.trim()) params.set("q", searchQuery.trim());
+
+      const response = await fetch(
+        `${API_BASE_URL}/api/recruiter/candidates?${params}`,
+        {
+          headers: {
+            Authorization: `Bearer ${token}`,
+          },
         },
-      });
+      );
 
       if (!response.ok) {
         throw new Error("Failed to fetch candidates");
@@ -161,62 +207,10 @@ const RecruiterCandidates = () => {
 
       const data = await response.json();
 
-      // Deduplication logic
-      const uniqueCandidates = [];
-      const seenEmails = new Set();
-      const seenPhones = new Set();
-      const seenNames = new Set();
-      const seenIds = new Set();
-
-      data.forEach((candidate) => {
-        const parsed = candidate.parsed_data || {};
-        const id = candidate._id;
-
-        const email = parsed.email ? parsed.email.trim().toLowerCase() : null;
-        let phone = parsed.phone
-          ? parsed.phone.toString().replace(/\D/g, "")
-          : null;
-        if (phone && phone.length < 6) phone = null;
-        const name = parsed.name ? parsed.name.trim().toLowerCase() : null;
-
-        let isDuplicate = false;
-
-        if (seenIds.has(id)) {
-          isDuplicate = true;
-        }
-
-        if (!isDuplicate && email && email !== "no email") {
-          if (seenEmails.has(email)) {
-            isDuplicate = true;
-          } else {
-            seenEmails.add(email);
-          }
-        }
-
-        if (!isDuplicate && phone) {
-          if (seenPhones.has(phone)) {
-            isDuplicate = true;
-          } else {
-            seenPhones.add(phone);
-          }
-        }
-
-        if (!isDuplicate && name && name !== "unknown candidate") {
-          if (seenNames.has(name)) {
-            isDuplicate = true;
-          } else {
-            seenNames.add(name);
-          }
-        }
-
-        if (!isDuplicate) {
-          seenIds.add(id);
-          uniqueCandidates.push(candidate);
-        }
-      });
-
-      setCandidates(uniqueCandidates);
-      setFilteredCandidates(uniqueCandidates);
+      setCandidates((prev) =>
+        dedupeCandidates(cursor ? [...prev, ...data.items] : data.items),
+      );
+      setNextCursor(data.next_cursor);
     } catch (err) {
       setError(err.message);
     } finally {
@@ -224,6 +218,13 @@ const RecruiterCandidates = () => {
     }
   };
 
+  const loadMoreCandidates = async () => {
+    if (!nextCursor || loadingMore) return;
+    setLoadingMore(true);
+    await fetchCandidates(nextCursor);
+    setLoadingMore(false);
+  };
+
   const viewCandidateDetails = async (resumeId) => {
     try {
       const token = localStorage.getItem("token");
@@ -359,7 +360,8 @@ const RecruiterCandidates = () => {
               <div>
                 <h1 className="text-3xl font-bold text-white">My Candidates</h1>
                 <p className="text-white/60 text-sm mt-1">
-                  {filteredCandidates.length} candidate
+                  {filteredCandidates.length}
+                  {nextCursor ? "+" : ""} candidate
                   {filteredCandidates.length !== 1 ? "s" : ""} found
                 </p>
               </div>
@@ -426,8 +428,15 @@ const RecruiterCandidates = () => {
               const phone = data.phone || "No phone";
               const skills = data.skills || [];
               const derivedSkills = data.derived_skills || [];
-              const experience = data.experience || [];
-              const education = data.education || [];
+              // List view trims the arrays; the server sends their full sizes
+              const counts = candidate.counts || {};
+              const experienceCount =
+                counts.experience ?? (data.experience || []).length;
+              const educationCount =
+                counts.education ?? (data.education || []).length;
+              const skillCount =
+                (counts.skills ?? skills.length) +
+                (counts.derived_skills ?? derivedSkills.length);
 
               return (
                 <Card
@@ -484,24 +493,22 @@ const RecruiterCandidates = () => {
 
                     {/* Quick Stats */}
                     <div className="flex items-center gap-3 pt-2 border-t border-white/10">
-                      {experience.length > 0 && (
+                      {experienceCount > 0 && (
                         <div className="flex items-center gap-1 text-white/60 text-xs">
                           <Briefcase className="w-3.5 h-3.5 text-green-400" />
-                          <span>{experience.length} exp</span>
+                          <span>{experienceCount} exp</span>
                         </div>
                       )}
-                      {education.length > 0 && (
+                      {educationCount > 0 && (
                         <div className="flex items-center gap-1 text-white/60 text-xs">
                           <GraduationCap className="w-3.5 h-3.5 text-indigo-400" />
-                          <span>{education.length} edu</span>
+                          <span>{educationCount} edu</span>
                         </div>
                       )}
-                      {(skills.length > 0 || derivedSkills.length > 0) && (
+                      {skillCount > 0 && (
                         <div className="flex items-center gap-1 text-white/60 text-xs">
                           <Code className="w-3.5 h-3.5 text-orange-400" />
-                          <span>
-                            {skills.length + derivedSkills.length} skills
-                          </span>
+                          <span>{skillCount} skills</span>
                         </div>
                       )}
                     </div>
@@ -520,9 +527,9 @@ const RecruiterCandidates = () => {
                                 {skill}
                               </span>
                             ))}
-                          {skills.length + derivedSkills.length > 3 && (
+                          {skillCount > 3 && (
                             <span className="px-2 py-1 bg-white/5 rounded text-white/60 text-xs">
-                              +{skills.length + derivedSkills.length - 3} more
+                              +{skillCount - 3} more
                             </span>
                           )}
                         </div>
@@ -543,6 +550,18 @@ const RecruiterCandidates = () => {
             })}
           </div>
         )}
+
+        {nextCursor && (
+          <div className="flex justify-center mt-8">
+            <Button
+              className="bg-white/10 hover:bg-white/20 text-white border border-white/20"
+              onClick={loadMoreCandidates}
+              disabled={loadingMore}
+            >
+              {loadingMore ? "Loading..." : "Load More"}
+            </Button>
+          </div>
+        )}
       </div>
 
       {/* Delete Confirmation Modal */}
@@ -0,0 +1,242 @@
+"""
+Micro-benchmark: re-parsing experience `Years` text on every ranking pass
+vs reading the record services/experience_normalizer.py stores at ingest.
+
+Generates synthetic experience sections (year ranges, month ranges, numeric
+MM/YYYY ranges, ongoing roles, bare durations, overlapping roles), then times
+what one chatbot query used to do per candidate (the original
+calculate_total_experience) against what it does now (experience_totals on
+the stored record; the feature index caches even that). It also reports how
+many totals changed, either because overlapping roles are no longer counted
+twice or because month-level ranges are no longer rounded to whole years.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_experience [--candidates 2000] [--repeat 5]
+"""
+import argparse
+import random
+import re
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+from services.experience_normalizer import experience_totals, normalize_experience
+
+MONTH_NAMES = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+
+def legacy_calculate_total_experience(experiences: List[Dict]) -> Dict[str, Any]:
+    """Original per-query implementation, kept verbatim for comparison"""
+    if not experiences:
+        return {
+            'total_years': 0.0,
+            'total_months': 0,
+            'total_years_display': 'No experience',
+            'calculation_method': 'no_data',
+            'details': []
+        }
+
+    total_months = 0
+    calculation_details = []
+    current_year = datetime.now().year
+
+    for exp in experiences:
+        years_str = exp.get("Years", "")
+        company = exp.get("Company", "Unknown")
+        role = exp.get("Role", "Unknown")
+
+        if not years_str:
+            continue
+
+        years_str = str(years_str).strip()
+        months_for_this_role = 0
+        method = "unknown"
+
+        # Method 1: Explicit year ranges (e.g., "2020 - 2023" or "2020-2023")
+        date_range_match = re.search(r'(\d{4})\s*[-–to]\s*(\d{4}|present|current)', years_str, re.IGNORECASE)
+        if date_range_match:
+            start_year = int(date_range_match.group(1))
+            end_str = date_range_match.group(2).lower()
+
+            if end_str in ['present', 'current']:
+                end_year = current_year
+            else:
+                end_year = int(end_str)
+
+            if 1970 <= start_year <= current_year and start_year <= end_year <= current_year + 1:
+                years_diff = end_year - start_year
+                months_for_this_role = years_diff * 12
+                method = f"date_range ({start_year}-{end_year})"
+
+        # Method 2: Explicit months
+        if months_for_this_role == 0:
+            months_match = re.search(r'(\d+)\s*month', years_str, re.IGNORECASE)
+            if months_match:
+                months_for_this_role = int(months_match.group(1))
+                method = "explicit_months"
+
+        # Method 3: Explicit years
+        if months_for_this_role == 0:
+            years_match = re.search(r'(\d+\.?\d*)\s*year', years_str, re.IGNORECASE)
+            if years_match:
+                years_val = float(years_match.group(1))
+                months_for_this_role = int(years_val * 12)
+                method = "explicit_years"
+
+        # Method 4: Month ranges
+        if months_for_this_role == 0:
+            month_names = r'(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*'
+            month_range_match = re.search(
+                rf'{month_names}\s*(\d{{4}})\s*[-–to]\s*{month_names}\s*(\d{{4}}|present)',
+                years_str,
+                re.IGNORECASE
+            )
+            if month_range_match:
+                start_year = int(month_range_match.group(2))
+                end_str = month_range_match.group(4)
+
+                if end_str.lower() in ['present', 'current']:
+                    end_year = current_year
+                else:
+                    end_year = int(end_str)
+
+                if 1970 <= start_year <= current_year and start_year <= end_year <= current_year + 1:
+                    years_diff = end_year - start_year
+                    months_for_this_role = max(1, years_diff * 12)
+                    method = f"month_range ({start_year}-{end_year})"
+
+        # FIX: Method 5 - Improved fallback that doesn't confuse years with duration
+        if months_for_this_role == 0:
+            numbers = re.findall(r'(\d+\.?\d*)', years_str)
+            if numbers:
+                valid_duration_found = False
+                for num_str in numbers:
+                    num = float(num_str)
+                    # Skip if it looks like a year (1970-2030)
+                    if 1970 <= num <= 2030:
+                        continue
+                    # Only accept reasonable duration values (0.5 to 40 years)
+                    if 0.5 <= num <= 40:
+                        months_for_this_role = int(num * 12)
+                        method = "fallback_duration"
+                        valid_duration_found = True
+                        break
+
+                # If no valid duration found, try to infer from year pairs
+                if not valid_duration_found and len(numbers) >= 2:
+                    year_nums = [float(n) for n in numbers if 1970 <= float(n) <= 2030]
+                    if len(year_nums) == 2:
+                        start_year = int(min(year_nums))
+                        end_year = int(max(year_nums))
+                        if start_year < end_year:
+                            years_diff = end_year - start_year
+                            months_for_this_role = years_diff * 12
+                            method = f"inferred_range ({start_year}-{end_year})"
+
+        # Cap at 15 years (180 months) for any single role
+        months_for_this_role = min(months_for_this_role, 180)
+
+        if months_for_this_role > 0:
+            total_months += months_for_this_role
+            calculation_details.append({
+                'company': company,
+                'role': role,
+                'raw_duration': years_str,
+                'calculated_months': months_for_this_role,
+                'method': method
+            })
+
+    total_years = total_months / 12.0
+
+    if total_months == 0:
+        display = "New Graduate / Intern"
+    elif total_months < 12:
+        display = f"{total_months} months"
+    elif total_months < 24:
+        years_part = total_months // 12
+        months_part = total_months % 12
+        if months_part > 0:
+            display = f"{years_part} year {months_part} months"
+        else:
+            display = f"{years_part} year"
+    else:
+        years_part = total_months // 12
+        months_part = total_months % 12
+        if months_part >= 6:
+            display = f"{years_part}.{months_part // 6 * 5} years"
+        else:
+            display = f"{years_part} years"
+
+    return {
+        'total_years': total_years,
+        'total_months': total_months,
+        'total_years_display': display,
+        'calculation_method': 'multi_method',
+        'details': calculation_details
+    }
+
+
+def make_years(rng: random.Random) -> str:
+    start = rng.randint(2012, 2024)
+    end = min(start + rng.randint(0, 4), datetime.now().year)
+    month, end_month = rng.choice(MONTH_NAMES), rng.choice(MONTH_NAMES)
+    return rng.choice([
+        f"{start} - {end}",
+        f"{start}-Present",
+        f"{month} {start} - {end_month} {end}",
+        f"{month} {start} – Present",
+        f"{rng.randint(1, 12):02d}/{start} - {rng.randint(1, 12):02d}/{end}",
+        f"{rng.randint(1, 11)} months",
+        f"{rng.choice(['1', '1.5', '2', '3'])} years",
+    ])
+
+
+def make_experience(rng: random.Random) -> List[Dict[str, Any]]:
+    return [
+        {"Company": f"Company {i}", "Role": rng.choice(["Intern", "Engineer", "Senior Developer"]), "Years": make_years(rng)}
+        for i in range(rng.randint(0, 5))
+    ]
+
+
+def _time(fn, items, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            fn(item)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    corpus = [make_experience(rng) for _ in range(args.candidates)]
+
+    start = time.perf_counter()
+    stored = [normalize_experience(experiences) for experiences in corpus]
+    ingest = time.perf_counter() - start
+
+    changed = sum(
+        1 for experiences, record in zip(corpus, stored)
+        if legacy_calculate_total_experience(experiences)["total_months"] != record["total_months"]
+    )
+    overlapping = sum(1 for record in stored if record["overlap_months"])
+    print(f"🧮 {len(corpus)} candidates, {sum(len(e) for e in corpus) / len(corpus):.1f} roles each; "
+          f"{overlapping} with overlapping roles, {changed} totals differ from the legacy total")
+
+    legacy = _time(legacy_calculate_total_experience, corpus, args.repeat)
+    current = _time(experience_totals, stored, args.repeat)
+    print(f"ingest (once)      : {ingest * 1000:8.1f} ms  ({ingest / len(corpus) * 1e6:7.1f} µs/candidate)")
+    print(f"legacy (per query) : {legacy * 1000:8.1f} ms  ({legacy / len(corpus) * 1e6:7.1f} µs/candidate)")
+    print(f"stored (per query) : {current * 1000:8.1f} ms  ({current / len(corpus) * 1e6:7.1f} µs/candidate)")
+    print(f"speedup            : {legacy / current:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,528 @@
+"""
+Intent-parity check and latency benchmark: compiled extract_query_intent
+(services/intent_engine.py) vs the original keyword-by-keyword version.
+
+Runs a golden set of recruiter queries plus a generated corpus (skills and
+synonyms, roles, cities, companies, experience/age/salary ranges, notice
+periods, graduation years, education levels, conversational phrasing),
+checks both implementations return the same intent and print the same
+diagnostics for every query, then times them.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_intent_extraction [--queries 2000] [--repeat 5]
+"""
+import argparse
+import contextlib
+import io
+import random
+import re
+import time
+from typing import Any, Dict
+
+from services.intent_engine import extract_query_intent
+from services.location_utils import CITY_STATE_MAPPING, extract_location_info
+from services.skill_vocabulary import SKILL_DATABASE, ROLE_SKILL_MAPPING
+
+
+def legacy_extract_query_intent(query: str) -> Dict[str, Any]:
+    """
+    Original keyword-by-keyword implementation, kept verbatim for comparison
+    """
+    query_lower = query.lower()
+    intent = {
+        'skills': [],
+        'min_experience': None,
+        'max_experience': None,
+        'companies': [],
+        'education_level': None,
+        'top_n': None,
+        
+        # Personal Information Filters
+        'gender': None,
+        'age_min': None,
+        'age_max': None,
+        'location': None,
+        'locations': [],
+        'nationality': None,
+        'marital_status': None,
+        
+        # Work-related Filters
+        'notice_period': None,
+        'willing_to_relocate': None,
+        'work_authorization': None,
+        'salary_min': None,
+        'salary_max': None,
+        
+        # University-specific Filters
+        'graduation_year': None,
+        'current_students_only': False,
+        'placement_preference': None,  # internship/full-time/both
+        'has_internship_experience': None,
+        
+        'query_type': 'general',
+        'company_filter': False,
+        'requires_calculation': False,
+        'is_compound': False,
+        'search_terms': [],
+        'is_conversational': False,
+        'needs_listing': False,
+        'needs_comparison': False,
+        'needs_summary': False
+    }
+
+    # Detect conversational/casual queries
+    conversational_patterns = [
+        r'^(hi|hello|hey|greetings)',
+        r'(how are you|what\'s up|wassup)',
+        r'(thanks|thank you|appreciate)',
+        r'^(help|assist|support)',
+        r'(can you|could you|would you)',
+        r'(tell me about|explain|what is|what are)'
+    ]
+    
+    for pattern in conversational_patterns:
+        if re.search(pattern, query_lower):
+            intent['is_conversational'] = True
+            break
+
+    # Detect query intent types
+    if any(word in query_lower for word in ['list', 'show', 'display', 'give me all']):
+        intent['needs_listing'] = True
+    
+    if any(word in query_lower for word in ['compare', 'difference', 'versus', 'vs', 'between']):
+        intent['needs_comparison'] = True
+    
+    if any(word in query_lower for word in ['summary', 'overview', 'breakdown', 'statistics', 'stats']):
+        intent['needs_summary'] = True
+
+    # Detect compound questions
+    compound_indicators = [' and ', ' with ', ' who ', ' that have ', ' having ', ' as well as ']
+    if any(indicator in query_lower for indicator in compound_indicators):
+        intent['is_compound'] = True
+
+    # ==================== PERSONAL INFORMATION EXTRACTION ====================
+    
+    # FIX: Improved GENDER extraction
+    # Check for female first (more specific to avoid matching 'male' in 'female')
+    if re.search(r'\b(female|women|woman|girl|girls|lady|ladies)\b', query_lower):
+        intent['gender'] = 'female'
+        intent['query_type'] = 'ranking'
+        print("✓ Gender detected: female")
+    # Then check for male
+    elif re.search(r'\b(male|men|man|boy|boys)\b', query_lower):
+        # Double-check that 'female' wasn't in the query
+        if 'female' not in query_lower:
+            intent['gender'] = 'male'
+            intent['query_type'] = 'ranking'
+            print("✓ Gender detected: male")
+    
+    # Extract AGE
+    age_patterns = [
+        r'age\s+(\d+)\s*[-to]+\s*(\d+)',  # age 22-25
+        r'between\s+(\d+)\s+and\s+(\d+)\s+years?\s+old',  # between 22 and 25 years old
+        r'(\d+)\s*[-to]+\s*(\d+)\s+years?\s+old',  # 22-25 years old
+        r'under\s+(\d+)\s+years?\s+old',  # under 25 years old (max)
+        r'above\s+(\d+)\s+years?\s+old',  # above 22 years old (min)
+        r'over\s+(\d+)\s+years?\s+old',  # over 22 years old (min)
+    ]
+    
+    for pattern in age_patterns:
+        match = re.search(pattern, query_lower)
+        if match:
+            if 'under' in pattern or 'below' in pattern:
+                intent['age_max'] = int(match.group(1))
+            elif 'above' in pattern or 'over' in pattern:
+                intent['age_min'] = int(match.group(1))
+            else:
+                intent['age_min'] = int(match.group(1))
+                if match.lastindex >= 2:
+                    intent['age_max'] = int(match.group(2))
+            intent['query_type'] = 'ranking'
+            break
+    
+    # ==================== LOCATION EXTRACTION (INTEGRATED WITH location_utils) ====================
+    
+    # Extract LOCATION using comprehensive city database
+    location_patterns = [
+        r'(?:based in|located in|living in|from|in)\s+([A-Z][a-zA-Z\s]+?)(?:\s+and|\s+with|\s+who|,|$)',
+        r'(?:city|location|place):\s*([A-Z][a-zA-Z\s]+?)(?:\s+and|\s+with|,|$)',
+    ]
+    
+    # First, check against comprehensive city database from location_utils
+    # This handles all Indian cities with proper state mapping
+    for city_name in CITY_STATE_MAPPING.keys():
+        if city_name in query_lower:
+            location_info = extract_location_info(city_name.title())
+            intent['location'] = location_info['city']
+            intent['locations'].append(location_info['city'])
+            if location_info['state']:
+                # Also add state to search both city and state
+                intent['locations'].append(location_info['state'])
+            intent['query_type'] = 'ranking'
+            print(f"✓ Location detected: {location_info['city']}, {location_info['state']}")
+            break
+    
+    # If no direct city match, try pattern matching and lookup
+    if not intent['location']:
+        for pattern in location_patterns:
+            match = re.search(pattern, query_lower, re.IGNORECASE)
+            if match:
+                location = match.group(1).strip()
+                if len(location) > 2:  # Avoid single letters
+                    location_info = extract_location_info(location)
+                    intent['location'] = location_info['city'] or location
+                    intent['locations'].append(location_info['city'] or location)
+                    if location_info['state']:
+                        intent['locations'].append(location_info['state'])
+                    intent['query_type'] = 'ranking'
+                    print(f"✓ Location detected from pattern: {location_info}")
+                    break
+    
+    # Extract NATIONALITY
+    if 'indian' in query_lower or 'india' in query_lower:
+        intent['nationality'] = 'Indian'
+    elif 'american' in query_lower or 'usa' in query_lower or 'us citizen' in query_lower:
+        intent['nationality'] = 'American'
+    
+    # Extract MARITAL STATUS
+    if any(word in query_lower for word in ['single', 'unmarried', 'bachelor']):
+        intent['marital_status'] = 'single'
+    elif 'married' in query_lower:
+        intent['marital_status'] = 'married'
+    
+    # Extract NOTICE PERIOD
+    notice_patterns = [
+        (r'immediate\s+joiner', 'immediate'),
+        (r'join\s+immediately', 'immediate'),
+        (r'available\s+immediately', 'immediate'),
+        (r'(\d+)\s+days?\s+notice', None),  # "30 days notice"
+        (r'notice\s+period\s+of\s+(\d+)', None),  # "notice period of 30"
+    ]
+    
+    for pattern, value in notice_patterns:
+        match = re.search(pattern, query_lower)
+        if match:
+            if value:
+                intent['notice_period'] = value
+            else:
+                intent['notice_period'] = f"{match.group(1)} days"
+            intent['query_type'] = 'ranking'
+            break
+    
+    # Extract RELOCATION WILLINGNESS
+    if any(phrase in query_lower for phrase in ['willing to relocate', 'open to relocation', 'can relocate']):
+        intent['willing_to_relocate'] = True
+    
+    # Extract WORK AUTHORIZATION
+    work_auth_keywords = {
+        'citizen': 'citizen',
+        'h1b': 'H1B',
+        'work permit': 'work permit',
+        'student visa': 'student visa',
+        'work visa': 'work visa',
+    }
+    for keyword, value in work_auth_keywords.items():
+        if keyword in query_lower:
+            intent['work_authorization'] = value
+            break
+    
+    # Extract SALARY EXPECTATIONS
+    salary_patterns = [
+        r'(\d+)\s*[-to]+\s*(\d+)\s*(?:lpa|lakhs?|lacs?|k)',  # 5-10 LPA
+        r'above\s+(\d+)\s*(?:lpa|lakhs?|lacs?|k)',  # above 5 LPA
+        r'under\s+(\d+)\s*(?:lpa|lakhs?|lacs?|k)',  # under 10 LPA
+        r'salary\s+(\d+)',  # salary 500000
+    ]
+    
+    for pattern in salary_patterns:
+        match = re.search(pattern, query_lower)
+        if match:
+            if 'under' in pattern:
+                intent['salary_max'] = int(match.group(1))
+            elif 'above' in pattern:
+                intent['salary_min'] = int(match.group(1))
+            else:
+                intent['salary_min'] = int(match.group(1))
+                if match.lastindex >= 2:
+                    intent['salary_max'] = int(match.group(2))
+            intent['query_type'] = 'ranking'
+            break
+    
+    # ==================== UNIVERSITY-SPECIFIC EXTRACTION ====================
+    
+    # Extract GRADUATION YEAR
+    grad_patterns = [
+        r'(?:graduating|graduated|grad|batch\s+of|class\s+of)\s+(?:in\s+)?(\d{4})',
+        r'(\d{4})\s+(?:graduate|grad|batch|passout)',
+        r'(?:year|yr)\s+(\d{4})',
+    ]
+    
+    for pattern in grad_patterns:
+        match = re.search(pattern, query_lower)
+        if match:
+            intent['graduation_year'] = match.group(1)
+            intent['query_type'] = 'ranking'
+            break
+    
+    # Detect CURRENT STUDENTS
+    if any(phrase in query_lower for phrase in ['current student', 'currently studying', 
+                                                  'final year', '4th year', 'third year']):
+        intent['current_students_only'] = True
+        intent['query_type'] = 'ranking'
+    
+    # Extract PLACEMENT PREFERENCE
+    if 'internship' in query_lower and 'full' not in query_lower:
+        intent['placement_preference'] = 'internship'
+    elif 'full-time' in query_lower or 'full time' in query_lower or 'fte' in query_lower:
+        intent['placement_preference'] = 'full-time'
+    
+    # Detect INTERNSHIP EXPERIENCE
+    if any(phrase in query_lower for phrase in ['with internship', 'has internship', 
+                                                  'internship experience', 'done internship']):
+        intent['has_internship_experience'] = True
+        intent['query_type'] = 'ranking'
+
+    # ==================== REST OF EXISTING EXTRACTION ====================
+    
+    # Extract "top N" requests - ENHANCED to catch more patterns
+    top_n_patterns = [
+        r'top\s+(\d+)',
+        r'best\s+(\d+)',
+        r'(\d+)\s+best',
+        r'(\d+)\s+top',
+        r'give\s+me\s+(\d+)',
+        r'show\s+me\s+(\d+)',
+        r'find\s+(\d+)',
+        r'(\d+)\s+candidates?',
+        r'(\d+)\s+people',
+        r'(\d+)\s+developers?',
+        r'(\d+)\s+engineers?',
+        r'list\s+(\d+)',
+        r'display\s+(\d+)',
+        r'return\s+(\d+)'
+    ]
+    
+    for pattern in top_n_patterns:
+        match = re.search(pattern, query_lower)
+        if match:
+            intent['top_n'] = int(match.group(1))
+            intent['query_type'] = 'ranking'
+            print(f"✓ Number detected: {intent['top_n']} candidates requested")
+            break
+    
+    # If no specific number requested but it's a ranking query, default to 5
+    if not intent['top_n'] and any(word in query_lower for word in ['best', 'top', 'strongest', 'most qualified']):
+        intent['top_n'] = 5
+        intent['query_type'] = 'ranking'
+        print(f"✓ Using default of 5 candidates for ranking query")
+
+    # SKILLS extraction (existing code)
+    # Match skills with fuzzy matching
+    for main_skill, variations in SKILL_DATABASE.items():
+        for variation in variations:
+            if variation in query_lower:
+                if main_skill not in intent['skills']:
+                    intent['skills'].append(main_skill)
+                break
+
+    # Enhanced role-based skill mapping
+    for role, skills in ROLE_SKILL_MAPPING.items():
+        if role in query_lower:
+            for skill in skills:
+                if skill not in intent['skills']:
+                    intent['skills'].append(skill)
+            if intent['query_type'] == 'general':
+                intent['query_type'] = 'ranking'
+            break
+
+    # Extract general search terms (words that aren't stop words)
+    stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
+                  'of', 'with', 'by', 'from', 'as', 'is', 'was', 'are', 'were', 'been',
+                  'be', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would',
+                  'could', 'should', 'may', 'might', 'must', 'can', 'who', 'what',
+                  'where', 'when', 'why', 'how', 'which', 'this', 'that', 'these',
+                  'those', 'i', 'you', 'he', 'she', 'it', 'we', 'they', 'me', 'him',
+                  'her', 'us', 'them', 'my', 'your', 'his', 'its', 'our', 'their',
+                  'find', 'show', 'give', 'tell', 'list', 'get'}
+    
+    words = re.findall(r'\b\w+\b', query_lower)
+    intent['search_terms'] = [word for word in words if word not in stop_words and len(word) > 2]
+
+    # Enhanced experience extraction with better patterns
+    exp_patterns = [
+        (r'(\d+)\s*[-to]+\s*(\d+)\s*years?', 'range'),
+        (r'(\d+)\+?\s*years?', 'minimum'),
+        (r'at least\s+(\d+)\s*years?', 'minimum'),
+        (r'more than\s+(\d+)\s*years?', 'minimum'),
+        (r'over\s+(\d+)\s*years?', 'minimum'),
+        (r'(less than|under|below)\s+(\d+)\s*years?', 'maximum'),
+        (r'(\d+)\s*to\s*(\d+)\s*yrs?', 'range'),
+        (r'between\s+(\d+)\s*and\s*(\d+)\s*years?', 'range')
+    ]
+    
+    for pattern, exp_type in exp_patterns:
+        match = re.search(pattern, query_lower)
+        if match:
+            if exp_type == 'range':
+                intent['min_experience'] = int(match.group(1))
+                intent['max_experience'] = int(match.group(2))
+            elif exp_type == 'minimum':
+                intent['min_experience'] = int(match.group(1))
+            elif exp_type == 'maximum':
+                intent['max_experience'] = int(match.group(2))
+            intent['requires_calculation'] = True
+            break
+
+    # Detect company filter queries
+    company_keywords = ['company', 'companies', 'intern', 'internship', 'full-time', 'full time',
+                       'position', 'worked at', 'experience at', 'employed', 'employer']
+    if any(keyword in query_lower for keyword in company_keywords):
+        intent['company_filter'] = True
+        intent['query_type'] = 'ranking'
+        if not intent['top_n']:
+            intent['top_n'] = 10
+
+    # Expanded company list
+    companies = ['google', 'microsoft', 'amazon', 'facebook', 'meta', 'apple',
+                 'netflix', 'uber', 'airbnb', 'linkedin', 'twitter', 'x corp', 'tesla',
+                 'ibm', 'oracle', 'salesforce', 'adobe', 'intel', 'nvidia', 'amd',
+                 'samsung', 'dell', 'cisco', 'vmware', 'sap', 'accenture',
+                 'deloitte', 'wipro', 'tcs', 'infosys', 'cognizant', 'hcl', 'capgemini',
+                 'goldman sachs', 'morgan stanley', 'jp morgan', 'jpmorgan', 'mckinsey',
+                 'bain', 'bcg', 'stripe', 'spotify', 'slack', 'atlassian', 'zoom',
+                 'shopify', 'square', 'paypal', 'ebay', 'booking', 'expedia']
+    
+    for company in companies:
+        if company in query_lower:
+            intent['companies'].append(company)
+
+    # Extract education level
+    education_keywords = {
+        'phd': ['phd', 'ph.d', 'doctorate', 'doctoral'],
+        'masters': ['masters', 'master', 'msc', 'm.sc', 'mtech', 'm.tech', 'mba', 'm.b.a'],
+        'bachelors': ['bachelor', 'bachelors', 'btech', 'b.tech', 'be', 'b.e', 'bsc', 'b.sc']
+    }
+    
+    for level, keywords in education_keywords.items():
+        if any(keyword in query_lower for keyword in keywords):
+            intent['education_level'] = level
+            break
+
+    return intent
+
+
+GOLDEN_QUERIES = [
+    "hi",
+    "Hello, can you help me?",
+    "thanks a lot",
+    "Top 5 Python developers in Bangalore",
+    "top 5 python developers in bangalore?",
+    "Find me 3 female React devs from Pune with 2-4 years experience",
+    "Show male candidates aged 22-25 based in Hyderabad",
+    "list all candidates between 22 and 25 years old",
+    "candidates under 30 years old who know SQL",
+    "best data scientist with a masters degree",
+    "compare the top 2 java engineers",
+    "give me a summary of candidates who worked at Google or Microsoft",
+    "immediate joiner with 5+ years in AWS and Kubernetes",
+    "30 days notice period, salary 5-10 LPA, willing to relocate",
+    "notice period of 60 days and above 12 lpa",
+    "H1B work visa holders with at least 3 years of Go",
+    "batch of 2024 btech graduates with internship experience",
+    "2025 passout final year students for internship",
+    "full-time backend developer from Chennai, unmarried, Indian",
+    "married us citizen with PhD in machine learning",
+    "strongest frontend developer with typescript and next.js",
+    "candidates with experience at Infosys, TCS or Wipro",
+    "who has the most qualified devops profile",
+    "less than 2 years experience in flutter",
+    "between 3 and 6 years of experience in node.js",
+    "located in: Kolkata and with docker",
+    "city: Noida",
+    "display 10 people with b.e and c++",
+    "return 4 engineers from Mumbai who have done internship",
+    "graduating in 2026 from Bhubaneswar",
+    "Best candidates in New Delhi with statistics background",
+    "people living in Jaipur with work permit",
+    "overview of mobile developer applicants",
+    "",
+]
+
+PHRASES = [
+    "top {n}", "best {n}", "show me {n}", "find {n}", "give me {n}", "list {n}", "{n} candidates", "",
+    "best", "strongest", "most qualified",
+]
+FILTERS = [
+    "with {a}-{b} years experience", "with {a}+ years", "at least {a} years", "more than {a} years",
+    "under {a} years", "between {a} and {b} years", "aged {a}-{b}", "under {b} years old",
+    "above {a} years old", "salary {a}-{b} lpa", "under {b} lpa", "above {a} lpa",
+    "{a} days notice", "immediate joiner", "batch of 20{b}", "class of 20{b}", "20{b} passout",
+    "willing to relocate", "h1b", "work permit", "student visa", "final year", "with internship",
+    "full time", "internship", "indian", "american", "single", "married", "female", "women", "male",
+    "men", "masters", "phd", "btech", "mba", "who worked at {company}", "experience at {company}",
+    "vs {company}", "compare", "summary", "based in {city}", "from {city}", "in {city}",
+]
+
+
+def make_query(rng: random.Random) -> str:
+    skills = [rng.choice(variations) for variations in rng.sample(list(SKILL_DATABASE.values()), rng.randint(0, 3))]
+    roles = rng.sample(list(ROLE_SKILL_MAPPING.keys()), rng.randint(0, 1))
+    parts = [rng.choice(PHRASES)] + skills + roles + ["developers" if rng.random() < 0.5 else "engineers"]
+    for _ in range(rng.randint(0, 4)):
+        parts.append(rng.choice(FILTERS))
+    values = {
+        "n": rng.randint(1, 20),
+        "a": rng.randint(1, 9),
+        "b": rng.randint(10, 30),
+        "company": rng.choice(["google", "Amazon", "TCS", "goldman sachs", "Acme Corp", "jp morgan"]),
+        "city": rng.choice(list(CITY_STATE_MAPPING.keys()) + ["Springfield", "Atlantis"]).title(),
+    }
+    query = " ".join(part.format(**values) for part in parts if part)
+    return query.upper() if rng.random() < 0.1 else query
+
+
+def _run(fn, query):
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        result = fn(query)
+    return result, out.getvalue()
+
+
+def _time(fn, queries, repeat):
+    best = float("inf")
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for query in queries:
+                fn(query)
+            best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    corpus = GOLDEN_QUERIES + [make_query(rng) for _ in range(args.queries)]
+
+    mismatches = [query for query in corpus
+                  if _run(extract_query_intent, query) != _run(legacy_extract_query_intent, query)]
+    if mismatches:
+        for query in mismatches[:5]:
+            print(f"   ✗ {query!r}")
+        raise SystemExit(f"❌ {len(mismatches)} queries produced a different intent")
+    print(f"✅ Identical intent on {len(corpus)} queries ({len(GOLDEN_QUERIES)} golden)")
+
+    legacy = _time(legacy_extract_query_intent, corpus, args.repeat)
+    compiled = _time(extract_query_intent, corpus, args.repeat)
+    print(f"legacy   : {legacy * 1000:8.1f} ms  ({legacy / len(corpus) * 1e6:7.1f} µs/query)")
+    print(f"compiled : {compiled * 1000:8.1f} ms  ({compiled / len(corpus) * 1e6:7.1f} µs/query)")
+    print(f"speedup  : {legacy / compiled:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
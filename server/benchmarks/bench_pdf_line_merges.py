@@ -0,0 +1,138 @@
+"""
+Benchmark: PDF line-merge fix over long multi-page resumes.
+
+Compares the previous _fix_pdf_line_merges (split + token-pair probes into a
+hand-kept city set) with the gazetteer-trie version, on synthetic PDF text of
+growing page counts, and times _clean_location against the old sliding
+window lookup. Time per page should stay flat as documents grow.
+
+Usage (from the server directory, with the app's .env available):
+    python -m benchmarks.bench_pdf_line_merges [--pages 1 10 50 200] [--repeat 5]
+"""
+import argparse
+import random
+import re
+import time
+
+from services.location_utils import CITY_STATE_MAPPING
+from services.resume_parser import _clean_location, _fix_pdf_line_merges
+
+_KNOWN_CITIES = set(CITY_STATE_MAPPING)
+
+def legacy_fix_pdf_line_merges(text: str) -> str:
+    """Previous implementation (token-pair probes into a set), kept for comparison"""
+    # Work token by token; preserve existing newlines as sentinel tokens
+    tokens = re.split(r'(\n)', text)           # keep '\n' as its own element
+    out = []
+    i = 0
+    while i < len(tokens):
+        tok = tokens[i]
+
+        # Try two-word city first (current + next non-newline token)
+        two_word = None
+        if i + 1 < len(tokens):
+            next_tok = tokens[i + 1]
+            if next_tok != '\n':
+                two_word = f"{tok} {next_tok}".lower().strip()
+
+        if two_word and two_word in _KNOWN_CITIES:
+            # Check that the token immediately before is a proper-noun word
+            prev = out[-1] if out else ''
+            if prev and prev != '\n' and prev[0].isupper() and prev.isalpha():
+                out.append('\n')
+            out.append(tok)
+            out.append(' ')
+            out.append(tokens[i + 1])
+            i += 2
+            continue
+
+        single = tok.lower().strip()
+        if single in _KNOWN_CITIES:
+            prev = out[-1] if out else ''
+            if prev and prev != '\n' and prev[0].isupper() and prev.isalpha():
+                out.append('\n')
+
+        out.append(tok)
+        i += 1
+
+    return ''.join(out)
+
+
+def legacy_clean_location(location: str) -> str:
+    """Previous _clean_location (windows of up to 3 tokens), kept for comparison"""
+    comma_idx = location.find(',')
+    if comma_idx != -1:
+        city_part, state_part = location[:comma_idx].strip(), location[comma_idx:]
+    else:
+        city_part, state_part = location.strip(), ""
+    tokens = city_part.split()
+    for length in range(min(len(tokens), 3), 0, -1):
+        for start in range(len(tokens) - length + 1):
+            candidate = ' '.join(tokens[start:start + length])
+            if candidate.lower() in _KNOWN_CITIES:
+                return candidate.title() + state_part
+    return location
+
+
+NAMES = ["Bismay Sarangi", "Priya Das", "Rohan Iyer", "Kavya Reddy", "Arjun Nair"]
+CITIES = ["Bhubaneswar, Odisha", "Navi Mumbai, Maharashtra", "Vasco da Gama, Goa", "Pune 411001", "Cuttack, Odisha"]
+WORDS = ("designed built deployed optimized services pipelines dashboards using Python React "
+         "MongoDB Docker AWS for clients across regions with latency reduced").split()
+
+
+def make_page(rng: random.Random, first: bool) -> str:
+    lines = []
+    if first:
+        # Name and address merged onto one line, as pdfplumber emits them
+        lines.append(f"{rng.choice(NAMES)} {rng.choice(CITIES)}")
+    for _ in range(50):
+        line = " ".join(rng.choice(WORDS).capitalize() if rng.random() < 0.2 else rng.choice(WORDS)
+                        for _ in range(rng.randint(6, 14)))
+        if rng.random() < 0.1:
+            line += f" at Infosys {rng.choice(CITIES)}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def make_document(rng: random.Random, pages: int) -> str:
+    return "\n".join(make_page(rng, page == 0) for page in range(pages))
+
+
+def _best(fn, arg, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 10, 50, 200])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=9)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    print(f"{'pages':>6} {'KB':>8} {'legacy ms':>10} {'trie ms':>10} {'trie µs/page':>13}")
+    for pages in args.pages:
+        text = make_document(rng, pages)
+        legacy = _best(legacy_fix_pdf_line_merges, text, args.repeat)
+        trie = _best(_fix_pdf_line_merges, text, args.repeat)
+        print(f"{pages:>6} {len(text) / 1024:>8.0f} {legacy * 1000:>10.2f} {trie * 1000:>10.2f} "
+              f"{trie / pages * 1e6:>13.1f}")
+
+    sample = _fix_pdf_line_merges(make_document(rng, 1)).split("\n")[:2]
+    print(f"\nmerged header split as: {sample}")
+
+    locations = [f"{rng.choice(['Sarangi', 'Das', 'Near'])} {rng.choice(CITIES)}" for _ in range(5000)]
+    mismatches = sum(legacy_clean_location(loc) != _clean_location(loc) for loc in locations)
+    legacy = _best(lambda locs: [legacy_clean_location(loc) for loc in locs], locations, args.repeat)
+    trie = _best(lambda locs: [_clean_location(loc) for loc in locs], locations, args.repeat)
+    print(f"_clean_location x{len(locations)}: legacy {legacy * 1000:.1f} ms, trie {trie * 1000:.1f} ms, "
+          f"{mismatches} different results")
+
+
+if __name__ == "__main__":
+    main()
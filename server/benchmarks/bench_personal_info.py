@@ -0,0 +1,255 @@
+"""
+Micro-benchmark: precompiled personal-info extraction vs the original
+pattern-by-pattern re.search implementation.
+
+Generates a corpus of synthetic resumes (labelled and unlabelled personal
+sections, different label spellings, missing fields, long experience
+sections), checks both implementations return identical output for every
+resume, then times them.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_personal_info [--resumes 500] [--repeat 5]
+"""
+import argparse
+import random
+import re
+import time
+from datetime import datetime
+
+from services.personal_info_extractor import extract_personal_info
+
+
+def legacy_extract_personal_info(text):
+    """
+    Original pattern-by-pattern implementation, kept verbatim for comparison
+    """
+    info = {}
+
+    # ============ GENDER ============
+    gender_patterns = [
+        r"Gender\s*[:\-]?\s*([MF])\b",
+        r"Gender\s*[:\-]?\s*(Male|Female|MALE|FEMALE|M|F)\b",
+        r"Sex\s*[:\-]?\s*(Male|Female|MALE|FEMALE|M|F)\b",
+        r"\b(Male|Female)\b(?=\s*\n|\s*[,;]|\s*Marital)",
+    ]
+    for pattern in gender_patterns:
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            val = match.group(1).strip().upper()
+            if val in ['M', 'MALE']:
+                info['gender'] = 'Male'
+            elif val in ['F', 'FEMALE']:
+                info['gender'] = 'Female'
+            else:
+                info['gender'] = val.capitalize()
+            break
+
+    # ============ DATE OF BIRTH ============
+    dob_patterns = [
+        r"(?:Date of Birth|DOB|D\.O\.B\.?|Birth Date)\s*[:\-]?\s*(\d{1,2}[\/\-\.]\d{1,2}[\/\-\.]\d{2,4})",
+        r"(?:Date of Birth|DOB|D\.O\.B\.?)\s*[:\-]?\s*(\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{4})",
+        r"\b(\d{1,2}[\/\-\.]\d{1,2}[\/\-\.]\d{4})\b(?=.*(?:Birth|DOB))",
+    ]
+    for pattern in dob_patterns:
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            dob_str = match.group(1).strip().replace('-', '/').replace('.', '/')
+            info['date_of_birth'] = dob_str
+            try:
+                parts = dob_str.split('/')
+                if len(parts) == 3:
+                    day, month, year = int(parts[0]), int(parts[1]), int(parts[2])
+                    if year < 100:
+                        year += 1900 if year > 50 else 2000
+                    info['age'] = datetime.now().year - year
+            except Exception:
+                pass
+            break
+
+    # ============ NATIONALITY ============
+    nationality_patterns = [
+        r"Nationality\s*[:\-]?\s*([A-Za-z]+)",
+        r"Citizen(?:ship)?\s*[:\-]?\s*([A-Za-z]+)",
+        r"\b(Indian|American|British|Canadian|Australian|Chinese|Japanese)\b(?=\s*\n|\s*[,;]|\s*Marital)",
+    ]
+    for pattern in nationality_patterns:
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            val = match.group(1).strip()
+            if val.upper() == 'INDIAN':
+                info['nationality'] = 'Indian'
+            elif val.upper() in ['USA', 'US', 'AMERICAN']:
+                info['nationality'] = 'American'
+            else:
+                info['nationality'] = val.capitalize()
+            break
+
+    # ============ MARITAL STATUS ============
+    marital_patterns = [
+        r"Marital Status\s*[:\-]?\s*(Single|Married|Divorced|Widowed|SINGLE|MARRIED|DIVORCED|WIDOWED)",
+        r"\b(Single|Married|Divorced|Widowed)\b(?=\s*\n|\s*[,;]|\s*Nationality)",
+    ]
+    for pattern in marital_patterns:
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            info['marital_status'] = match.group(1).strip().capitalize()
+            break
+
+    # ============ CURRENT LOCATION ============
+    # Patterns ordered from most-specific (labelled) to least-specific (bare city).
+    # The bare-city pattern only captures the known city word(s), nothing before it,
+    # thanks to the negative lookbehind + word-boundary anchors.
+    location_patterns = [
+        # Explicit label + city + pincode
+        r"(?:Address|Location|City)\s*[:\-]?\s*([A-Za-z\s]+?)\s*[-,]?\s*(\d{6})\b",
+        # City + known Indian state
+        r"\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)\s*,\s*(Karnataka|Tamil Nadu|Maharashtra|Delhi|"
+        r"Telangana|West Bengal|Gujarat|Rajasthan|Punjab|Haryana|Uttar Pradesh|Madhya Pradesh|"
+        r"Kerala|Andhra Pradesh|Odisha|Chhattisgarh)\b",
+        # Explicit city/location label
+        r"(?:City|Location|Based in|Residing in)\s*[:\-]?\s*([A-Za-z][A-Za-z\s]{2,20}?)(?:\s*[\n,;]|$)",
+        # Bare known city — negative lookbehind prevents grabbing a preceding word
+        r"(?<![A-Za-z])(Bangalore|Bengaluru|Chennai|Mumbai|Delhi|Hyderabad|Kolkata|Pune|"
+        r"Ahmedabad|Jaipur|Lucknow|Kanpur|Nagpur|Visakhapatnam|Bhopal|Patna|Ludhiana|Agra|"
+        r"Nashik|Vadodara|Coimbatore|Madurai|Mysore|Bhubaneswar)(?![A-Za-z])",
+    ]
+    for pattern in location_patterns:
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            if len(match.groups()) >= 2:
+                city = match.group(1).strip()
+                state_or_pin = match.group(2).strip()
+                info['current_location'] = f"{city}, {state_or_pin}"
+            else:
+                info['current_location'] = match.group(1).strip().title()
+            break
+
+    # ============ PHONE NUMBER ============
+    phone_patterns = [
+        r"(?:Phone|Mobile|Contact|Cell)\s*[:\-]?\s*(\+?\d{1,3}[-.\s]?\d{10})",
+        r"(?:Phone|Mobile|Contact|Cell)\s*[:\-]?\s*(\d{10})",
+        r"\b(\+?\d{1,3}[-.\s]?\d{10})\b",
+        r"\b(\d{10})\b",
+    ]
+    for pattern in phone_patterns:
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            phone = match.group(1).strip()
+            digits_only = re.sub(r'\D', '', phone)
+            if len(digits_only) >= 10:
+                info['phone'] = phone
+                break
+
+    # ============ EMAIL ============
+    email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
+    match = re.search(email_pattern, text)
+    if match:
+        info['email'] = match.group(0).strip()
+
+    return info
+
+
+FIRST_NAMES = ["Aarav", "Priya", "Rohan", "Sneha", "Vikram", "Ananya", "Bismay", "Kavya", "Arjun", "Meera"]
+LAST_NAMES = ["Sharma", "Sarangi", "Iyer", "Reddy", "Patel", "Das", "Nair", "Gupta", "Mishra", "Khan"]
+CITIES = [
+    ("Bhubaneswar", "Odisha"), ("Bangalore", "Karnataka"), ("Chennai", "Tamil Nadu"),
+    ("Pune", "Maharashtra"), ("Hyderabad", "Telangana"), ("Kolkata", "West Bengal"),
+    ("Cuttack", "Odisha"), ("Jaipur", "Rajasthan"),
+]
+SKILLS = ["Python", "React", "Node.js", "MongoDB", "Docker", "AWS", "Java", "SQL", "FastAPI", "Kubernetes"]
+
+
+def _personal_block(rng: random.Random) -> list:
+    lines = []
+    city, state = rng.choice(CITIES)
+    if rng.random() < 0.7:
+        lines.append(f"{rng.choice(['Gender', 'Sex', 'GENDER'])}{rng.choice([': ', ' - ', ' '])}"
+                     f"{rng.choice(['Male', 'Female', 'M', 'F', 'MALE'])}")
+    if rng.random() < 0.7:
+        label = rng.choice(["Date of Birth", "DOB", "D.O.B.", "Birth Date"])
+        if rng.random() < 0.5:
+            value = f"{rng.randint(1, 28):02d}{rng.choice('/-.')}{rng.randint(1, 12):02d}{rng.choice('/-.')}{rng.randint(1985, 2004)}"
+        else:
+            value = f"{rng.randint(1, 28)} {rng.choice(['Jan', 'March', 'Aug', 'December'])} {rng.randint(1985, 2004)}"
+        lines.append(f"{label}: {value}")
+    if rng.random() < 0.6:
+        lines.append(f"{rng.choice(['Nationality', 'Citizenship'])}: {rng.choice(['Indian', 'INDIAN', 'American'])}")
+    if rng.random() < 0.6:
+        lines.append(f"Marital Status: {rng.choice(['Single', 'Married', 'SINGLE'])}")
+    roll = rng.random()
+    if roll < 0.3:
+        lines.append(f"Address: {city} {rng.randint(100000, 999999)}")
+    elif roll < 0.6:
+        lines.append(f"{city}, {state}")
+    elif roll < 0.8:
+        lines.append(f"Location: {city}")
+    if rng.random() < 0.8:
+        lines.append(f"{rng.choice(['Phone', 'Mobile', 'Contact', 'Cell'])}: "
+                     f"{rng.choice(['+91 ', '+91-', ''])}{rng.randint(6000000000, 9999999999)}")
+    return lines
+
+
+def make_resume(rng: random.Random) -> str:
+    """One synthetic resume of roughly 1-6 KB"""
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    lines = [name, f"{name.split()[0].lower()}.{rng.randint(1, 99)}@example.com"]
+    personal = _personal_block(rng)
+
+    body = ["SUMMARY", "Software engineer focused on backend services and data pipelines.", "EXPERIENCE"]
+    for _ in range(rng.randint(1, 6)):
+        body.append(f"{rng.choice(['Software Engineer', 'Intern', 'Senior Developer'])} at "
+                    f"{rng.choice(['Infosys', 'TCS', 'Google', 'Startup Labs'])} ({rng.randint(2015, 2024)} - Present)")
+        for _ in range(rng.randint(2, 8)):
+            body.append(f"- Built {rng.choice(SKILLS)} services handling {rng.randint(1, 900)}k requests per day "
+                        f"and reduced latency by {rng.randint(5, 60)}%")
+    body.append("PROJECTS")
+    for _ in range(rng.randint(1, 4)):
+        body.append(f"{rng.choice(SKILLS)} dashboard - used {', '.join(rng.sample(SKILLS, 3))}")
+    body.append("SKILLS")
+    body.append(", ".join(rng.sample(SKILLS, 6)))
+    body.append("EDUCATION")
+    body.append(f"B.Tech in Computer Science, {rng.choice(CITIES)[0]} Institute of Technology, {rng.randint(2012, 2024)}")
+
+    # Personal details sit either at the top or in a trailing section
+    if rng.random() < 0.5:
+        lines += personal + body
+    else:
+        lines += body + ["PERSONAL DETAILS"] + personal
+    return "\n".join(lines)
+
+
+def _time(fn, corpus, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in corpus:
+            fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resumes", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    corpus = [make_resume(rng) for _ in range(args.resumes)]
+
+    mismatches = [text for text in corpus if extract_personal_info(text) != legacy_extract_personal_info(text)]
+    if mismatches:
+        raise SystemExit(f"❌ {len(mismatches)} resumes produced different output")
+    print(f"✅ Identical output on {len(corpus)} resumes "
+          f"({sum(len(text) for text in corpus) / len(corpus) / 1024:.1f} KB average)")
+
+    legacy = _time(legacy_extract_personal_info, corpus, args.repeat)
+    compiled = _time(extract_personal_info, corpus, args.repeat)
+    print(f"legacy   : {legacy * 1000:8.1f} ms  ({legacy / len(corpus) * 1e6:7.1f} µs/resume)")
+    print(f"compiled : {compiled * 1000:8.1f} ms  ({compiled / len(corpus) * 1e6:7.1f} µs/resume)")
+    print(f"speedup  : {legacy / compiled:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Token benchmark: full-prompt parsing vs the regex-first tiered parser.
+
+Generates a corpus of synthetic resumes (student and experienced profiles,
+different header spellings, optional sections, some without recognisable
+headers) together with the parse each one should produce, runs tier 1 of
+services/tiered_parser.py on each and estimates the tokens each mode would
+spend per resume:
+
+    full     create_resume_parse_prompt + the completion: every schema field,
+             filled from the expected parse
+    tiered   the focused prompt + a completion holding only the requested
+             fields, or 0 when nothing is left to ask; resumes with untrusted
+             segmentation use the full cost
+    regex    always 0 (no LLM call)
+
+Completions are charged at the size of the expected JSON, not the max_tokens
+budget, which the model rarely fills. Tokens are estimated at 4 characters per
+token, which is close enough for comparing modes. No API calls are made.
+
+Usage (from the server directory, with the app's .env available):
+    python -m benchmarks.bench_tiered_parser [--resumes 500] [--seed 7]
+"""
+import argparse
+import json
+import random
+import time
+from collections import Counter
+from typing import Any, Dict, Tuple
+
+from services.personal_info_extractor import extract_personal_info
+from services.resume_parser import create_resume_parse_prompt
+from services.tiered_parser import (
+    FIELD_SCHEMA,
+    build_draft,
+    create_focused_parse_prompt,
+    fields_for_llm,
+    segmentation_trusted,
+)
+
+CHARS_PER_TOKEN = 4
+
+FIRST_NAMES = ["Aarav", "Priya", "Rohan", "Ananya", "Vikram", "Sneha", "Arjun", "Kavya"]
+LAST_NAMES = ["Sharma", "Patel", "Iyer", "Das", "Reddy", "Nair", "Mehta", "Sarangi"]
+CITIES = ["Bhubaneswar, Odisha", "Pune, Maharashtra", "Bangalore, Karnataka", "Chennai, Tamil Nadu"]
+SKILLS = ["Python", "Java", "React", "SQL", "Docker", "AWS", "FastAPI", "MongoDB", "Kubernetes", "Go", "Pandas"]
+HEADERS = {
+    "summary": ["SUMMARY", "Professional Summary", "Profile"],
+    "education": ["EDUCATION", "Academic Qualifications", "Education:"],
+    "experience": ["EXPERIENCE", "Work Experience", "Professional Experience"],
+    "projects": ["PROJECTS", "Academic Projects", "Projects:"],
+    "skills": ["SKILLS", "Technical Skills", "Key Skills"],
+    "certifications": ["CERTIFICATIONS", "Certifications"],
+    "languages": ["LANGUAGES", "Languages Known"],
+}
+
+
+def _header(rng: random.Random, key: str, plain: bool) -> str:
+    # Resumes without recognisable headers fold everything into prose lines
+    return "" if plain else rng.choice(HEADERS[key])
+
+
+def make_resume(rng: random.Random) -> Tuple[str, Dict[str, Any]]:
+    """Resume text and the parse a correct extraction of it returns"""
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    student = rng.random() < 0.6
+    plain = rng.random() < 0.1
+    email = f"{first.lower()}.{last.lower()}@example.com"
+    phone = f"+91 {rng.randint(70000, 99999)} {rng.randint(10000, 99999)}"
+    parsed: Dict[str, Any] = {"name": f"{first} {last}", "email": email, "phone": phone,
+                              "current_location": rng.choice(CITIES)}
+    lines = [parsed["name"], f"{email} | {phone}", parsed["current_location"]]
+    if rng.random() < 0.5:
+        lines.append(f"linkedin.com/in/{first.lower()}{last.lower()}")
+        parsed["linkedin_url"] = f"https://{lines[-1]}"
+
+    if rng.random() < 0.7:
+        parsed["summary"] = f"{'Final year student' if student else 'Engineer'} interested in backend systems."
+        lines += [_header(rng, "summary", plain), parsed["summary"]]
+
+    lines.append(_header(rng, "education", plain))
+    grad = rng.randint(2018, 2026)
+    grade = str(rng.randint(70, 95) / 10)
+    university = rng.choice(['KIIT University', 'NIT Rourkela', 'Pune Institute of Technology'])
+    lines += [f"B.Tech in Computer Science, CGPA: {grade}", f"{university}, {grad - 4} - {grad}"]
+    parsed["education"] = [{"Degree": "B.Tech in Computer Science", "University": university,
+                            "Grade": grade, "Years": f"{grad - 4}-{grad}"}]
+    parsed["graduation_year"] = str(grad)
+    if student:
+        parsed["twelfth_marks"], parsed["tenth_marks"] = f"{rng.randint(70, 98)}%", f"{rng.randint(70, 98)}%"
+        lines += [f"12th (CBSE) - {parsed['twelfth_marks']}", f"10th (CBSE) - {parsed['tenth_marks']}"]
+
+    used = set()
+    if not student or rng.random() < 0.3:
+        lines.append(_header(rng, "experience", plain))
+        parsed["experience"] = []
+        for _ in range(rng.randint(1, 4)):
+            start = rng.randint(2015, 2023)
+            role, company = rng.choice(['Software Engineer', 'Intern', 'Data Analyst']), rng.choice(['Infosys', 'TCS', 'Startup Labs'])
+            years = f"{start} - {rng.choice([start + 1, 'Present'])}"
+            lines.append(f"{role} at {company} ({years})")
+            bullets = []
+            for _ in range(rng.randint(1, 4)):
+                skill = rng.choice(SKILLS)
+                used.add(skill)
+                bullets.append(f"Built {skill} services handling {rng.randint(1, 900)}k requests per day")
+                lines.append(f"- {bullets[-1]}")
+            parsed["experience"].append({"Company": company, "Role": role, "Years": years, "Description": "; ".join(bullets)})
+
+    if rng.random() < 0.8:
+        lines.append(_header(rng, "projects", plain))
+        parsed["projects"] = []
+        for _ in range(rng.randint(1, 3)):
+            title, stack = f"{rng.choice(SKILLS)} dashboard", rng.sample(SKILLS, 3)
+            used.update(stack)
+            lines.append(f"{title} - used {', '.join(stack)}")
+            parsed["projects"].append({"Title": title, "Description": None, "Technologies": ", ".join(stack), "Duration": None})
+
+    parsed["skills"] = rng.sample(SKILLS, rng.randint(2, 8))
+    parsed["derived_skills"] = sorted(used - set(parsed["skills"]))
+    lines += [_header(rng, "skills", plain), ", ".join(parsed["skills"])]
+
+    if rng.random() < 0.3:
+        year = str(rng.randint(2019, 2024))
+        lines += [_header(rng, "certifications", plain), f"AWS Certified Cloud Practitioner ({year})"]
+        parsed["certifications"] = [{"Name": "AWS Certified Cloud Practitioner", "Issuer": "AWS", "Date": year, "Expiry": None}]
+    if rng.random() < 0.4:
+        lines += [_header(rng, "languages", plain), "English, Hindi, Odia"]
+        parsed["languages"] = [{"Language": language, "Proficiency": None} for language in ("English", "Hindi", "Odia")]
+    return "\n".join(line for line in lines if line), parsed
+
+
+def completion_tokens(parsed: Dict[str, Any], fields) -> int:
+    """Tokens of the JSON the model returns for `fields`: [] for an empty list field, null otherwise"""
+    response = {
+        field: parsed.get(field, [] if isinstance(FIELD_SCHEMA.get(field), list) else None)
+        for field in fields
+    }
+    return _tokens(len(json.dumps(response, indent=2, ensure_ascii=False)))
+
+
+def _tokens(chars: int) -> int:
+    return chars // CHARS_PER_TOKEN
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resumes", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    corpus = [make_resume(rng) for _ in range(args.resumes)]
+    full_completion = completion_tokens({}, FIELD_SCHEMA)
+
+    full_total = tiered_total = 0
+    outcomes = Counter()
+    asked = Counter()
+    draft_seconds = 0.0
+    completion_total = 0
+    for text, parsed in corpus:
+        regex_data = extract_personal_info(text)
+        completion = completion_tokens(parsed, FIELD_SCHEMA)
+        completion_total += completion
+        full = _tokens(len(create_resume_parse_prompt(text, regex_data))) + completion
+        full_total += full
+
+        start = time.perf_counter()
+        draft = build_draft(text, regex_data)
+        fields = fields_for_llm(draft)
+        draft_seconds += time.perf_counter() - start
+
+        if not segmentation_trusted(draft):
+            outcomes["full prompt (untrusted segmentation)"] += 1
+            tiered_total += full
+        elif not fields:
+            outcomes["no LLM call"] += 1
+        else:
+            outcomes["focused call"] += 1
+            asked.update(fields)
+            prompt = create_focused_parse_prompt(text, draft, fields)
+            tiered_total += _tokens(len(prompt)) + completion_tokens(parsed, fields)
+
+    n = len(corpus)
+    print(f"📄 {n} synthetic resumes ({sum(len(text) for text, _ in corpus) / n / 1024:.1f} KB average), "
+          f"tier 1 draft {draft_seconds / n * 1e6:.0f} µs/resume")
+    for outcome, count in outcomes.most_common():
+        print(f"   tiered → {outcome:<38} {count:5d}  ({count / n:.0%})")
+    print(f"   fields most often asked: {', '.join(f'{field} ({count})' for field, count in asked.most_common(6))}")
+    print()
+    print(f"full   : {full_total / n:8.0f} tokens/resume (prompt + completion; {completion_total / n:.0f} "
+          f"completion tokens on average, {full_completion} for an empty parse)")
+    print(f"tiered : {tiered_total / n:8.0f} tokens/resume  → {(full_total - tiered_total) / n:.0f} saved "
+          f"({1 - tiered_total / full_total:.0%})")
+    print(f"regex  : {0:8d} tokens/resume  → {full_total / n:.0f} saved (100%)")
+
+
+if __name__ == "__main__":
+    main()
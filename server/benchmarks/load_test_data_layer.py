@@ -0,0 +1,112 @@
+"""
+Load test: concurrent request throughput, blocking pymongo vs async repositories.
+
+Mounts two copies of the recruiter candidate listing (user lookup as done by
+get_current_user, then the recruiter's resumes newest first) on an in-process
+FastAPI app: one calls the blocking collections from core.database inside
+`async def` (how every handler used to work), the other awaits the
+repositories. Each is hammered with the same number of concurrent requests;
+the blocking variant serializes on the event loop, the async one overlaps its
+round-trips up to MONGO_MAX_POOL_SIZE.
+
+With --url it instead loads a running server (run it once on the old commit
+and once on this one to compare end to end).
+
+Usage (from the server directory, with the app's .env available):
+    python -m benchmarks.load_test_data_layer --recruiter someone@company.com [--requests 200] [--concurrency 50]
+    python -m benchmarks.load_test_data_layer --url http://localhost:8000 --token <JWT> [--path /api/recruiter/candidates]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from core.database import async_client, db, users_collection
+from repositories import resume_history_repository, users_repository
+
+
+def build_app(recruiter_email: str) -> FastAPI:
+    app = FastAPI()
+    resume_history_collection = db["resume_history"]
+
+    @app.get("/blocking")
+    async def blocking_candidates():
+        users_collection.find_one({"email": recruiter_email})
+        candidates = list(resume_history_collection.find({"recruiter_email": recruiter_email}).sort("parsed_at", -1))
+        return {"count": len(candidates)}
+
+    @app.get("/async")
+    async def async_candidates():
+        await users_repository.find_by_email(recruiter_email)
+        candidates = await resume_history_repository.list_for_recruiter(recruiter_email)
+        return {"count": len(candidates)}
+
+    return app
+
+
+async def run_load(client: httpx.AsyncClient, path: str, total: int, concurrency: int, headers=None):
+    latencies = []
+    errors = 0
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one():
+        nonlocal errors
+        async with slots:
+            start = time.perf_counter()
+            response = await client.get(path, headers=headers)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "rps": total / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "errors": errors,
+    }
+
+
+def _report(label: str, result: dict):
+    print(f"{label:>10} {result['rps']:>9.1f} {result['p50_ms']:>9.1f} {result['p95_ms']:>9.1f} {result['errors']:>7}")
+
+
+async def main_async(args):
+    print(f"{'variant':>10} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'errors':>7}")
+
+    if args.url:
+        headers = {"Authorization": f"Bearer {args.token}"} if args.token else None
+        async with httpx.AsyncClient(base_url=args.url, timeout=60) as client:
+            await client.get(args.path, headers=headers)  # warm up
+            _report("server", await run_load(client, args.path, args.requests, args.concurrency, headers))
+        return
+
+    app = build_app(args.recruiter)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        for path in ("/blocking", "/async"):
+            await client.get(path)  # open pool connections before timing
+            _report(path.strip("/"), await run_load(client, path, args.requests, args.concurrency))
+    await async_client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recruiter", default="loadtest@example.com", help="recruiter_email whose candidates are listed")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--url", help="load a running server instead of the in-process comparison")
+    parser.add_argument("--token", help="bearer token for --url")
+    parser.add_argument("--path", default="/api/recruiter/candidates")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
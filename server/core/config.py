@@ -9,6 +9,13 @@ MONGO_USER = os.getenv("MONGO_USER")
 MONGO_PASS = os.getenv("MONGO_PASS")
 MONGO_CLUSTER = os.getenv("MONGO_CLUSTER")
 MONGO_URI = f"mongodb+srv://{quote_plus(MONGO_USER)}:{quote_plus(MONGO_PASS)}@{MONGO_CLUSTER}/resume_parser?retryWrites=true&w=majority"
+# Connection pools: the async client serves request handlers, the blocking one
+# serves background jobs and worker threads
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", 50))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", 5))
+MONGO_WORKER_MAX_POOL_SIZE = int(os.getenv("MONGO_WORKER_MAX_POOL_SIZE", 20))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", 5 * 60 * 1000))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", 10000))
 
 # JWT Configuration
 SECRET_KEY = os.getenv("SECRET_KEY") or "defaultsecret"
@@ -24,5 +31,79 @@ GROQ_PARSING_MODEL = os.getenv("GROQ_PARSING_MODEL", "gpt-oss-20b")
 GROQ_INSIGHTS_MODEL = os.getenv("GROQ_INSIGHTS_MODEL", "qwen-3.6-27b")
 GROQ_CHATBOT_MODEL = os.getenv("GROQ_CHATBOT_MODEL", "mixtral-8x7b-32768")
 
+# Groq rate limiting (shared token bucket for resume parsing)
+GROQ_MAX_REQUESTS_PER_MINUTE = int(os.getenv("GROQ_MAX_REQUESTS_PER_MINUTE", 8))
+
+# Shared Groq HTTP client (connection pool reused by every LLM call)
+GROQ_HTTP2 = os.getenv("GROQ_HTTP2", "true").lower() == "true"
+GROQ_MAX_CONNECTIONS = int(os.getenv("GROQ_MAX_CONNECTIONS", 20))
+GROQ_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("GROQ_MAX_KEEPALIVE_CONNECTIONS", 10))
+GROQ_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("GROQ_KEEPALIVE_EXPIRY_SECONDS", 60))
+GROQ_CONNECT_TIMEOUT_SECONDS = float(os.getenv("GROQ_CONNECT_TIMEOUT_SECONDS", 10))
+GROQ_MAX_RETRIES = int(os.getenv("GROQ_MAX_RETRIES", 3))
+GROQ_MAX_BACKOFF_SECONDS = float(os.getenv("GROQ_MAX_BACKOFF_SECONDS", 30))
+
+# Document text extraction (process pool shared by every upload path)
+EXTRACTION_MAX_WORKERS = int(os.getenv("EXTRACTION_MAX_WORKERS", min(4, os.cpu_count() or 1)))
+EXTRACTION_TIMEOUT_SECONDS = float(os.getenv("EXTRACTION_TIMEOUT_SECONDS", 30))
+EXTRACTION_MEMORY_LIMIT_MB = int(os.getenv("EXTRACTION_MEMORY_LIMIT_MB", 1024))
+EXTRACTION_RECYCLE_AFTER_FILES = int(os.getenv("EXTRACTION_RECYCLE_AFTER_FILES", 200))
+EXTRACTION_PAGES_PER_TASK = int(os.getenv("EXTRACTION_PAGES_PER_TASK", 4))
+# Stop extracting PDF pages past this many characters (the parse prompt keeps 15000); 0 = no limit
+EXTRACTION_CHAR_BUDGET = int(os.getenv("EXTRACTION_CHAR_BUDGET", 20000))
+
+# Resume parse mode (services/tiered_parser.py):
+#   full   - one LLM call with the complete schema (default)
+#   tiered - regex/section draft first, LLM only for missing or low-confidence fields
+#   regex  - draft only, no LLM call (very high-volume ingestion)
+PARSE_MODES = ("full", "tiered", "regex")
+PARSE_MODE = os.getenv("PARSE_MODE", "full").lower()
+if PARSE_MODE not in PARSE_MODES:
+    raise ValueError(f"PARSE_MODE must be one of {PARSE_MODES}")
+# Mode for bulk and ZIP ingestion
+BULK_PARSE_MODE = os.getenv("BULK_PARSE_MODE", PARSE_MODE).lower()
+if BULK_PARSE_MODE not in PARSE_MODES:
+    raise ValueError(f"BULK_PARSE_MODE must be one of {PARSE_MODES}")
+
+# Batched parsing: short resumes waiting for the parse token bucket are packed
+# into one Groq request (the schema is sent once). BATCH_PARSE_MAX_RESUMES=1 disables it.
+BATCH_PARSE_MAX_RESUMES = int(os.getenv("BATCH_PARSE_MAX_RESUMES", 4))
+BATCH_PARSE_MAX_RESUME_CHARS = int(os.getenv("BATCH_PARSE_MAX_RESUME_CHARS", 6000))
+BATCH_PARSE_MAX_PROMPT_CHARS = int(os.getenv("BATCH_PARSE_MAX_PROMPT_CHARS", 30000))
+BATCH_PARSE_MAX_OUTPUT_TOKENS = int(os.getenv("BATCH_PARSE_MAX_OUTPUT_TOKENS", 8000))
+BATCH_PARSE_WINDOW_SECONDS = float(os.getenv("BATCH_PARSE_WINDOW_SECONDS", 0.5))
+
+# Batched inserts for bulk / ZIP ingestion (flush at this many documents or after this delay)
+BULK_WRITE_BATCH_SIZE = int(os.getenv("BULK_WRITE_BATCH_SIZE", 100))
+BULK_WRITE_MAX_DELAY_SECONDS = float(os.getenv("BULK_WRITE_MAX_DELAY_SECONDS", 2))
+
+# Identity claims of a resume that is still being parsed (services/dedup_index.py):
+# other copies wait for it, and after this long without being stored the claim
+# is treated as left behind by a crashed worker and taken over
+IDENTITY_CLAIM_TTL_SECONDS = int(os.getenv("IDENTITY_CLAIM_TTL_SECONDS", 10 * 60))
+IDENTITY_CLAIM_POLL_SECONDS = float(os.getenv("IDENTITY_CLAIM_POLL_SECONDS", 2))
+
+# Pre-parse duplicate detection on extracted text: estimated Jaccard similarity
+# of word shingles at or above this links a resume to the earlier copy
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", 0.85))
+
+# Recruiter chatbot prompt size in tokens (services/prompt_budget.py); candidate
+# data is packed into whatever the instructions and history leave of it
+CHATBOT_PROMPT_TOKEN_BUDGET = int(os.getenv("CHATBOT_PROMPT_TOKEN_BUDGET", 6000))
+# Chatbot query cache (services/query_cache.py), per worker process
+CHATBOT_CACHE_ENABLED = os.getenv("CHATBOT_CACHE_ENABLED", "true").lower() == "true"
+CHATBOT_CACHE_MAX_ENTRIES = int(os.getenv("CHATBOT_CACHE_MAX_ENTRIES", 500))
+CHATBOT_CACHE_TTL_SECONDS = int(os.getenv("CHATBOT_CACHE_TTL_SECONDS", 15 * 60))
+# Serve the previous LLM answer for a repeated question (otherwise only the ranking is reused)
+CHATBOT_CACHE_REUSE_ANSWER = os.getenv("CHATBOT_CACHE_REUSE_ANSWER", "true").lower() == "true"
+
+# Accounts allowed to use the /api/admin endpoints (comma-separated emails)
+ADMIN_EMAILS = {email.strip().lower() for email in os.getenv("ADMIN_EMAILS", "").split(",") if email.strip()}
+
 # CORS Configuration
-CORS_ORIGINS = os.getenv("CORS_ORIGINS", "https://resume-parser-and-manager.vercel.app").split(",")
\ No newline at end of file
+CORS_ORIGINS = os.getenv("CORS_ORIGINS", "https://resume-parser-and-manager.vercel.app").split(",")
+
+# Parse Cache Configuration
+PARSE_CACHE_ENABLED = os.getenv("PARSE_CACHE_ENABLED", "true").lower() == "true"
+PARSE_CACHE_TTL_SECONDS = int(os.getenv("PARSE_CACHE_TTL_SECONDS", 60 * 60 * 24 * 30))  # 30 days
+PARSE_CACHE_MAX_ENTRIES = int(os.getenv("PARSE_CACHE_MAX_ENTRIES", 5000))
@@ -1,8 +1,31 @@
-from pymongo import MongoClient
-from .config import MONGO_URI
+from pymongo import AsyncMongoClient, MongoClient
+from .config import (
+    MONGO_URI,
+    MONGO_MAX_POOL_SIZE,
+    MONGO_MIN_POOL_SIZE,
+    MONGO_WORKER_MAX_POOL_SIZE,
+    MONGO_MAX_IDLE_TIME_MS,
+    MONGO_SERVER_SELECTION_TIMEOUT_MS,
+)
 
-client = MongoClient(MONGO_URI)
+# Blocking client for background jobs, worker threads and batch writes
+client = MongoClient(
+    MONGO_URI,
+    maxPoolSize=MONGO_WORKER_MAX_POOL_SIZE,
+    maxIdleTimeMS=MONGO_MAX_IDLE_TIME_MS,
+    serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+)
 db = client["resume_parser"]
 users_collection = db["users"]
 
-print("MongoDB connected successfully")
\ No newline at end of file
+# Event-loop client for request handlers (used through repositories/)
+async_client = AsyncMongoClient(
+    MONGO_URI,
+    maxPoolSize=MONGO_MAX_POOL_SIZE,
+    minPoolSize=MONGO_MIN_POOL_SIZE,
+    maxIdleTimeMS=MONGO_MAX_IDLE_TIME_MS,
+    serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+)
+async_db = async_client["resume_parser"]
+
+print("MongoDB connected successfully")
@@ -0,0 +1,158 @@
+"""
+Declared MongoDB indexes for the hot request paths, ensured at startup, plus
+explain() of the queries they serve.
+
+INDEX_SPECS is the single list of indexes the app relies on. ensure_indexes()
+creates any that are missing (create_index is a no-op when an identical index
+exists) and records per-index status instead of failing startup, e.g. when
+existing duplicates block a unique index. explain_hot_queries() runs the main
+queries with explain() and flags collection scans and in-memory sorts.
+"""
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from pymongo import ASCENDING, DESCENDING
+
+from core.database import async_db
+
+
+class IndexSpec(NamedTuple):
+    collection: str
+    keys: List[tuple]
+    name: str
+    options: Dict[str, Any] = {}
+
+
+INDEX_SPECS: List[IndexSpec] = [
+    # Recruiter candidate list (keyset pages on parsed_at, _id) / chatbot reconcile
+    IndexSpec(
+        "resume_history",
+        [("recruiter_email", ASCENDING), ("parsed_at", DESCENDING), ("_id", DESCENDING)],
+        "recruiter_parsed_at_id",
+    ),
+    # Candidate's own parse history
+    IndexSpec("resume_history", [("user_email", ASCENDING), ("parsed_at", DESCENDING)], "candidate_parsed_at"),
+    # Resumes still waiting for the dedup backfill (dedup_status missing), checked on every load
+    IndexSpec("resume_history", [("recruiter_email", ASCENDING), ("dedup_status", ASCENDING)], "recruiter_dedup_status"),
+    # Resumes whose experience_normalized is missing or from an older normalizer, checked on every load
+    IndexSpec(
+        "resume_history",
+        [("recruiter_email", ASCENDING), ("experience_normalized.version", ASCENDING)],
+        "recruiter_experience_version",
+    ),
+    # Persistent dedup index: one claim per identity key and recruiter (services/dedup_index.py)
+    IndexSpec(
+        "candidate_identities",
+        [("recruiter_email", ASCENDING), ("kind", ASCENDING), ("value", ASCENDING)],
+        "recruiter_identity_unique",
+        {"unique": True},
+    ),
+    IndexSpec("candidate_identities", [("resume_id", ASCENDING)], "resume_id"),
+    # Pre-parse text dedup (services/near_duplicates.py): exact hash and LSH band lookups
+    IndexSpec(
+        "resume_fingerprints",
+        [("owner_email", ASCENDING), ("target", ASCENDING), ("content_hash", ASCENDING)],
+        "owner_content_hash",
+    ),
+    IndexSpec(
+        "resume_fingerprints",
+        [("owner_email", ASCENDING), ("target", ASCENDING), ("lsh_bands", ASCENDING)],
+        "owner_lsh_bands",
+    ),
+    IndexSpec("resume_fingerprints", [("resume_id", ASCENDING)], "resume_id"),
+    IndexSpec("users", [("email", ASCENDING)], "email_unique", {"unique": True}),
+    IndexSpec("users", [("username", ASCENDING)], "username"),
+    IndexSpec("resumes", [("uploader_email", ASCENDING), ("raw_stored_at", DESCENDING)], "uploader_stored_at"),
+]
+
+_index_status: Dict[str, Dict[str, Any]] = {}
+
+
+async def ensure_indexes() -> Dict[str, Dict[str, Any]]:
+    """Create every declared index that does not exist yet; never raises"""
+    for spec in INDEX_SPECS:
+        key = f"{spec.collection}.{spec.name}"
+        try:
+            await async_db[spec.collection].create_index(spec.keys, name=spec.name, **spec.options)
+            _index_status[key] = {"ok": True, "checked_at": datetime.utcnow()}
+        except Exception as e:
+            # e.g. duplicates blocking a unique index, or the same keys under another name
+            _index_status[key] = {"ok": False, "error": str(e)[:300], "checked_at": datetime.utcnow()}
+            print(f"⚠️  Index {key} not ensured: {str(e)[:150]}")
+
+    ready = sum(status["ok"] for status in _index_status.values())
+    print(f"🗂️  MongoDB indexes ensured: {ready}/{len(INDEX_SPECS)}")
+    return _index_status
+
+
+async def describe_indexes() -> Dict[str, Any]:
+    """Declared indexes with their last ensure status, plus what each collection actually has"""
+    declared = [
+        {
+            "collection": spec.collection,
+            "name": spec.name,
+            "keys": [list(key) for key in spec.keys],
+            "options": spec.options,
+            **_index_status.get(f"{spec.collection}.{spec.name}", {"ok": None}),
+        }
+        for spec in INDEX_SPECS
+    ]
+    existing = {}
+    for collection in sorted({spec.collection for spec in INDEX_SPECS}):
+        info = await async_db[collection].index_information()
+        existing[collection] = {name: [list(key) for key in index["key"]] for name, index in info.items()}
+    return {"declared": declared, "existing": existing}
+
+
+def _plan_stages(plan: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Flatten a (classic or SBE) winning plan into its stages, root first"""
+    plan = plan.get("queryPlan", plan)
+    stages = [{"stage": plan.get("stage"), "index": plan.get("indexName")}]
+    children = plan.get("inputStages") or ([plan["inputStage"]] if "inputStage" in plan else [])
+    for child in children:
+        stages.extend(_plan_stages(child))
+    return stages
+
+
+def summarize_explain(explain: Dict[str, Any]) -> Dict[str, Any]:
+    stages = _plan_stages(explain.get("queryPlanner", {}).get("winningPlan", {}))
+    stats = explain.get("executionStats", {})
+    names = [stage["stage"] for stage in stages]
+    return {
+        "stages": names,
+        "indexes_used": sorted({stage["index"] for stage in stages if stage["index"]}),
+        "collscan": "COLLSCAN" in names,
+        "in_memory_sort": "SORT" in names,
+        "docs_examined": stats.get("totalDocsExamined"),
+        "keys_examined": stats.get("totalKeysExamined"),
+        "returned": stats.get("nReturned"),
+        "millis": stats.get("executionTimeMillis"),
+    }
+
+
+async def explain_hot_queries(recruiter_email: str, user_email: Optional[str] = None) -> List[Dict[str, Any]]:
+    """explain() the queries the request handlers run most, for the given accounts"""
+    user_email = user_email or recruiter_email
+
+    queries = [
+        ("recruiter_candidates", "resume_history", {"recruiter_email": recruiter_email},
+         [("parsed_at", DESCENDING), ("_id", DESCENDING)]),
+        ("candidate_history", "resume_history", {"user_email": user_email}, [("parsed_at", DESCENDING)]),
+        ("user_by_email", "users", {"email": user_email}, None),
+        ("user_by_username", "users", {"username": user_email.split("@")[0]}, None),
+        ("candidate_features", "candidate_features", {"recruiter_email": recruiter_email}, [("parsed_at", DESCENDING)]),
+    ]
+
+    report = []
+    for name, collection, query, sort in queries:
+        cursor = async_db[collection].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        try:
+            summary = summarize_explain(await cursor.explain())
+        except Exception as e:
+            summary = {"error": str(e)[:300]}
+        if summary.get("collscan"):
+            print(f"⚠️  {name}: collection scan on {collection}")
+        report.append({"query": name, "collection": collection, "filter": query, "sort": sort, **summary})
+    return report
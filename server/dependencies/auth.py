@@ -2,14 +2,14 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from core.config import SECRET_KEY, ALGORITHM  
-from core.database import users_collection
+from repositories import users_repository
 from models.user import UserInDB, UserRole
 from schemas.token import TokenData  
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
-def get_user_by_email(email: str):
-    user_data = users_collection.find_one({"email": email})
+async def get_user_by_email(email: str):
+    user_data = await users_repository.find_by_email(email)
     if user_data:
         return UserInDB(**user_data)
     return None
@@ -30,7 +30,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
     except JWTError:
         raise credentials_exception
 
-    user = get_user_by_email(token_data.username)
+    user = await get_user_by_email(token_data.username)
     if user is None:
         raise credentials_exception
     return user
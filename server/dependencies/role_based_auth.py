@@ -1,5 +1,6 @@
 from fastapi import Depends, HTTPException, status
 from models.user import UserRole
+from core.config import ADMIN_EMAILS
 from .auth import get_current_active_user
 
 async def require_role(*allowed_roles: UserRole):
@@ -30,4 +31,12 @@ async def require_recruiter(current_user = Depends(get_current_active_user)):
             status_code=status.HTTP_403_FORBIDDEN,
             detail="This resource is only for recruiters"
         )
-    return current_user
\ No newline at end of file
+    return current_user
+
+async def require_admin(current_user = Depends(get_current_active_user)):
+    if current_user.email.lower() not in ADMIN_EMAILS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="This resource is only for administrators"
+        )
+    return current_user
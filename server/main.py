@@ -1,10 +1,32 @@
+from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 from routes.recruiter import chatbot
 from core.config import CORS_ORIGINS
+from services.bulk_jobs import bulk_job_runner
+from services.groq_client import groq_client
+from services.document_extraction import document_extractor
+from core.database import async_client
+from core.indexes import ensure_indexes
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Hot-path indexes first; a failure is logged, not fatal
+    await ensure_indexes()
+    # Warm extraction workers before the first upload arrives
+    await document_extractor.start()
+    # Picks up queued jobs, including ones abandoned by a previous worker
+    await bulk_job_runner.start()
+    yield
+    await bulk_job_runner.stop()
+    await groq_client.aclose()
+    await document_extractor.stop()
+    await async_client.close()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -44,6 +66,9 @@ app.include_router(bulk_upload.router, prefix="/api/recruiter", tags=["recruiter
 
 app.include_router(chatbot.router, prefix="/api/recruiter", tags=["recruiter-chatbot"])
 
+from routes import admin
+app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
+
 @app.middleware("http")
 async def limit_upload_size(request: Request, call_next):
     if request.method == "POST":
@@ -84,6 +84,10 @@ class ResumeData(BaseModel):
     preferred_industry: Optional[str] = None
     career_objective: Optional[str] = None
 
+    # Parse provenance (services/tiered_parser.py)
+    field_confidence: Dict[str, str] = {}  # high/medium/low/llm/absent per field
+    parse_mode: Optional[str] = None  # full/tiered/regex
+
 class ResumeHistory(BaseModel):
     user_email: str
     filename: str
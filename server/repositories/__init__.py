@@ -0,0 +1,20 @@
+"""
+Async data access for request handlers.
+
+Each repository wraps one collection of the event-loop MongoDB client
+(core.database.async_db), so handlers await their queries instead of blocking
+the worker on pymongo I/O. Background jobs and worker threads keep using the
+blocking client in core.database.
+"""
+from repositories.users import UserRepository, users_repository
+from repositories.resume_history import ResumeHistoryRepository, resume_history_repository
+from repositories.resumes import ResumeRepository, resumes_repository
+
+__all__ = [
+    "UserRepository",
+    "users_repository",
+    "ResumeHistoryRepository",
+    "resume_history_repository",
+    "ResumeRepository",
+    "resumes_repository",
+]
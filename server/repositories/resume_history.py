@@ -0,0 +1,148 @@
+import base64
+import json
+import re
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import DESCENDING
+
+from core.database import async_db
+from services.dedup_index import NOT_DUPLICATE
+
+# Skills shown on a list-view card; the full arrays are only counted
+LIST_VIEW_TOP_SKILLS = 5
+
+
+def _array(field: str) -> Dict[str, Any]:
+    return {"$cond": [{"$isArray": field}, field, []]}
+
+
+# Candidate list cards: identity, location, top skills and counts, computed in MongoDB
+LIST_VIEW_PROJECTION = {
+    "_id": 1,
+    "filename": 1,
+    "parsed_at": 1,
+    "parsed_data": {
+        "name": "$parsed_data.name",
+        "email": "$parsed_data.email",
+        "phone": "$parsed_data.phone",
+        "current_location": "$parsed_data.current_location",
+        "skills": {"$slice": [_array("$parsed_data.skills"), LIST_VIEW_TOP_SKILLS]},
+        "derived_skills": {"$slice": [_array("$parsed_data.derived_skills"), LIST_VIEW_TOP_SKILLS]},
+    },
+    "counts": {
+        "skills": {"$size": _array("$parsed_data.skills")},
+        "derived_skills": {"$size": _array("$parsed_data.derived_skills")},
+        "experience": {"$size": _array("$parsed_data.experience")},
+        "education": {"$size": _array("$parsed_data.education")},
+    },
+}
+
+# Fields matched by the list search box
+SEARCH_FIELDS = ["parsed_data.name", "parsed_data.email", "parsed_data.skills", "parsed_data.derived_skills"]
+
+
+def encode_page_cursor(doc: Dict[str, Any]) -> str:
+    """Opaque keyset cursor pointing just after `doc` in (parsed_at, _id) descending order"""
+    payload = json.dumps([doc["parsed_at"].isoformat(), str(doc["_id"])])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_page_cursor(token: str) -> Tuple[datetime, ObjectId]:
+    """Inverse of encode_page_cursor; raises ValueError for anything malformed"""
+    try:
+        parsed_at, last_id = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        return datetime.fromisoformat(parsed_at), ObjectId(last_id)
+    except Exception as e:
+        raise ValueError(f"Invalid page cursor: {token[:40]}") from e
+
+
+class ResumeHistoryRepository:
+    """
+    Parsed resumes (`resume_history` collection): candidate uploads carry
+    `user_email`, recruiter uploads carry `recruiter_email`.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def list_for_candidate(self, user_email: str) -> List[Dict[str, Any]]:
+        cursor = self.collection.find({"user_email": user_email}).sort("parsed_at", DESCENDING)
+        return await cursor.to_list()
+
+    async def list_for_recruiter(self, recruiter_email: str) -> List[Dict[str, Any]]:
+        cursor = self.collection.find({"recruiter_email": recruiter_email}).sort("parsed_at", DESCENDING)
+        return await cursor.to_list()
+
+    async def count_for_recruiter(self, recruiter_email: str) -> int:
+        return await self.collection.count_documents({"recruiter_email": recruiter_email})
+
+    async def iter_recruiter_page(
+        self,
+        recruiter_email: str,
+        limit: int,
+        after: Optional[Tuple[datetime, ObjectId]] = None,
+        view: str = "list",
+        search: Optional[str] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Up to `limit` of the recruiter's resumes, newest first, strictly after
+        the `after` keyset position. Served by the (recruiter_email, parsed_at,
+        _id) index, so deep pages cost the same as the first one. view="list"
+        projects LIST_VIEW_PROJECTION; "full" returns whole documents.
+        Resumes the dedup index marked as duplicates are skipped.
+        """
+        conditions: List[Dict[str, Any]] = [{"recruiter_email": recruiter_email, **NOT_DUPLICATE}]
+        if after is not None:
+            parsed_at, last_id = after
+            conditions.append({"$or": [
+                {"parsed_at": {"$lt": parsed_at}},
+                {"parsed_at": parsed_at, "_id": {"$lt": last_id}},
+            ]})
+        if search:
+            pattern = {"$regex": re.escape(search), "$options": "i"}
+            conditions.append({"$or": [{field: pattern} for field in SEARCH_FIELDS]})
+
+        pipeline: List[Dict[str, Any]] = [
+            {"$match": conditions[0] if len(conditions) == 1 else {"$and": conditions}},
+            {"$sort": {"parsed_at": DESCENDING, "_id": DESCENDING}},
+            {"$limit": limit},
+        ]
+        if view == "list":
+            pipeline.append({"$project": LIST_VIEW_PROJECTION})
+
+        async with await self.collection.aggregate(pipeline) as cursor:
+            async for doc in cursor:
+                yield doc
+
+    async def get(self, resume_id) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"_id": ObjectId(resume_id)})
+
+    async def get_for_recruiter(self, resume_id, recruiter_email: str) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"_id": ObjectId(resume_id), "recruiter_email": recruiter_email})
+
+    async def find_by_ids(self, resume_ids: Iterable) -> List[Dict[str, Any]]:
+        ids = [ObjectId(resume_id) for resume_id in resume_ids]
+        if not ids:
+            return []
+        return await self.collection.find({"_id": {"$in": ids}}).to_list()
+
+    async def insert(self, entry: Dict[str, Any]):
+        result = await self.collection.insert_one(entry)
+        return result.inserted_id
+
+    async def update(self, resume_id, fields: Dict[str, Any]) -> int:
+        result = await self.collection.update_one({"_id": ObjectId(resume_id)}, {"$set": fields})
+        return result.modified_count
+
+    async def delete_for_candidate(self, resume_id, user_email: str) -> int:
+        result = await self.collection.delete_one({"_id": ObjectId(resume_id), "user_email": user_email})
+        return result.deleted_count
+
+    async def delete_for_recruiter(self, resume_id, recruiter_email: str) -> int:
+        result = await self.collection.delete_one({"_id": ObjectId(resume_id), "recruiter_email": recruiter_email})
+        return result.deleted_count
+
+
+resume_history_repository = ResumeHistoryRepository(async_db["resume_history"])
@@ -0,0 +1,23 @@
+from typing import Any, Dict, List
+
+from pymongo import DESCENDING
+
+from core.database import async_db
+
+
+class ResumeRepository:
+    """Resumes imported from ZIP archives (`resumes` collection)"""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def list_for_uploader(self, uploader_email: str) -> List[Dict[str, Any]]:
+        cursor = self.collection.find({"uploader_email": uploader_email}).sort("raw_stored_at", DESCENDING)
+        return await cursor.to_list()
+
+    async def insert(self, doc: Dict[str, Any]):
+        result = await self.collection.insert_one(doc)
+        return result.inserted_id
+
+
+resumes_repository = ResumeRepository(async_db["resumes"])
@@ -0,0 +1,31 @@
+from typing import Any, Dict, Optional
+
+from core.database import async_db
+
+
+class UserRepository:
+    """Accounts (`users` collection)"""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def find_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"email": email})
+
+    async def find_by_username(self, username: str) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"username": username})
+
+    async def email_exists(self, email: str) -> bool:
+        return await self.collection.find_one({"email": email}, {"_id": 1}) is not None
+
+    async def create(self, user: Dict[str, Any]):
+        result = await self.collection.insert_one(user)
+        return result.inserted_id
+
+    async def update_by_username(self, username: str, fields: Dict[str, Any]) -> int:
+        """Set `fields` on the user; returns the number of modified documents"""
+        result = await self.collection.update_one({"username": username}, {"$set": fields})
+        return result.modified_count
+
+
+users_repository = UserRepository(async_db["users"])
@@ -0,0 +1,63 @@
+import asyncio
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException
+from dependencies.auth import get_current_active_user
+from dependencies.role_based_auth import require_admin
+from core.indexes import describe_indexes, ensure_indexes, explain_hot_queries
+from services.candidate_index import backfill_experience
+
+router = APIRouter()
+
+
+@router.get("/indexes", dependencies=[Depends(require_admin)])
+async def get_indexes():
+    """
+    Declared indexes, their ensure status and the indexes each collection has (ADMIN ONLY)
+    """
+    try:
+        return await describe_indexes()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to read indexes: {str(e)}")
+
+
+@router.post("/indexes/ensure", dependencies=[Depends(require_admin)])
+async def rebuild_missing_indexes():
+    """
+    Create any declared index that is missing, e.g. after cleaning up duplicates (ADMIN ONLY)
+    """
+    return await ensure_indexes()
+
+
+@router.get("/query-plans", dependencies=[Depends(require_admin)])
+async def get_query_plans(
+    recruiter_email: Optional[str] = None,
+    user_email: Optional[str] = None,
+    current_user: dict = Depends(get_current_active_user)
+):
+    """
+    explain() the hot queries and flag collection scans / in-memory sorts (ADMIN ONLY).
+    Defaults to the admin's own account as the sample recruiter / user.
+    """
+    try:
+        plans = await explain_hot_queries(recruiter_email or current_user.email, user_email)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to explain queries: {str(e)}")
+
+    return {
+        "queries": plans,
+        "collscans": [plan["query"] for plan in plans if plan.get("collscan")],
+        "in_memory_sorts": [plan["query"] for plan in plans if plan.get("in_memory_sort")],
+    }
+
+
+@router.post("/experience/backfill", dependencies=[Depends(require_admin)])
+async def backfill_normalized_experience(recruiter_email: Optional[str] = None):
+    """
+    Store normalized experience on resumes that predate it or were normalized
+    by an older version, for one recruiter or all of them (ADMIN ONLY)
+    """
+    try:
+        updated = await asyncio.to_thread(backfill_experience, recruiter_email)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Experience backfill failed: {str(e)}")
+    return {"updated": updated, "recruiter_email": recruiter_email}
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordRequestForm
 from datetime import timedelta, datetime
-from core.database import users_collection
+from repositories import users_repository
 from core.security import verify_password, get_password_hash, create_access_token
 from core.config import ACCESS_TOKEN_EXPIRE_MINUTES
 from models.user import UserCreate, UserInDB, UserOut, UserRole
@@ -20,13 +20,13 @@ class SignupRequest(BaseModel):
     role: UserRole = UserRole.CANDIDATE
     company_name: Optional[str] = None
 
-def authenticate_user(email: str, password: str):
-    user = get_user_by_email(email)
+async def authenticate_user(email: str, password: str):
+    user = await get_user_by_email(email)
     if not user or not verify_password(password, user.hashed_password):
         return False
     return user
 
-def create_user(user: SignupRequest):
+async def create_user(user: SignupRequest):
     hashed_password = get_password_hash(user.password)
     user_dict = {
         "username": user.username,
@@ -38,12 +38,12 @@ def create_user(user: SignupRequest):
         "company_name": user.company_name if user.role == UserRole.RECRUITER else None,
         "created_at": datetime.utcnow().isoformat()
     }
-    users_collection.insert_one(user_dict)
+    await users_repository.create(user_dict)
     return UserInDB(**user_dict)
 
 @router.post("/signup", response_model=UserOut)
 async def signup(user: SignupRequest):
-    existing_user = get_user_by_email(user.email)
+    existing_user = await get_user_by_email(user.email)
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
@@ -51,7 +51,7 @@ async def signup(user: SignupRequest):
     if user.role == UserRole.RECRUITER and not user.company_name:
         raise HTTPException(status_code=400, detail="Company name is required for recruiters")
     
-    new_user = create_user(user)
+    new_user = await create_user(user)
     print(f"New {user.role.value} created: {new_user.email}")
     
     return UserOut(
@@ -65,7 +65,7 @@ async def signup(user: SignupRequest):
 
 @router.post("/login", response_model=Token)
 async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
-    user = authenticate_user(form_data.username, form_data.password)
+    user = await authenticate_user(form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
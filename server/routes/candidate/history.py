@@ -1,24 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException
 from typing import List
-from bson import ObjectId
 from models.resume import ResumeHistory
 from dependencies.auth import get_current_active_user
 from dependencies.role_based_auth import require_candidate
-from core.database import db
+from repositories import resume_history_repository
 
 router = APIRouter()
 
-resume_history_collection = db["resume_history"]
-
 @router.get("/resume-history", response_model=List[ResumeHistory], dependencies=[Depends(require_candidate)])
 async def get_resume_history(current_user: dict = Depends(get_current_active_user)):
     """
     Get resume parsing history (CANDIDATE ONLY)
     """
     try:
-        history = list(resume_history_collection.find(
-            {"user_email": current_user.email}
-        ).sort("parsed_at", -1))
+        history = await resume_history_repository.list_for_candidate(current_user.email)
         
         for item in history:
             item["_id"] = str(item["_id"])
@@ -33,12 +28,9 @@ async def delete_resume_history(resume_id: str, current_user: dict = Depends(get
     Delete a resume (CANDIDATE ONLY)
     """
     try:
-        result = resume_history_collection.delete_one({
-            "_id": ObjectId(resume_id),
-            "user_email": current_user.email
-        })
+        deleted = await resume_history_repository.delete_for_candidate(resume_id, current_user.email)
         
-        if result.deleted_count == 0:
+        if deleted == 0:
             raise HTTPException(status_code=404, detail="Resume not found")
             
         return {"message": "Resume deleted successfully"}
@@ -3,15 +3,14 @@ from pydantic import BaseModel
 from dependencies.auth import get_current_active_user
 from dependencies.role_based_auth import require_candidate
 from services.resume_parser import parse_resume
+from services.experience_normalizer import normalize_experience
 from models.resume import ResumeHistory, ResumeData
-from core.database import db
+from repositories import resume_history_repository
 from datetime import datetime
 import traceback
 
 router = APIRouter()
 
-resume_history_collection = db["resume_history"]
-
 # Request model for AI insights
 class AIInsightsRequest(BaseModel):
     resume_data: dict
@@ -112,7 +111,11 @@ async def parse_resume_endpoint(
             # University-specific fields
             placement_preferences=parsed_data.get("placement_preferences"),
             preferred_job_role=parsed_data.get("preferred_job_role"),
-            preferred_industry=parsed_data.get("preferred_industry")
+            preferred_industry=parsed_data.get("preferred_industry"),
+            
+            # Parse provenance
+            field_confidence=parsed_data.get("field_confidence", {}),
+            parse_mode=parsed_data.get("parse_mode")
         )
         
         # Save to history
@@ -120,10 +123,11 @@ async def parse_resume_endpoint(
             "user_email": current_user.email,
             "filename": parsed_data.get("filename"),
             "parsed_data": resume_data.dict(),
+            "experience_normalized": normalize_experience(resume_data.experience),
             "parsed_at": datetime.utcnow()
         }
         
-        resume_history_collection.insert_one(history_entry)
+        await resume_history_repository.insert(history_entry)
         
         return {
             "message": "Resume parsed successfully",
@@ -1,32 +1,80 @@
-from fastapi import APIRouter, Depends, HTTPException
-from bson import ObjectId
+import asyncio
+import json
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from dependencies.auth import get_current_active_user
 from dependencies.role_based_auth import require_recruiter
-from core.database import db
+from repositories import resume_history_repository
+from repositories.resume_history import decode_page_cursor, encode_page_cursor
+from services.candidate_index import remove_from_index
+from services.dedup_index import release_identity
+from services.near_duplicates import forget_document
 from datetime import datetime
 
 router = APIRouter()
 
-resume_history_collection = db["resume_history"]
-recruiter_databases = db["recruiter_databases"]
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def _json_default(value):
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+
+async def _stream_page(first, rows, limit: int):
+    """
+    Write {"items": [...], "count": n, "next_cursor": ...} one document at a
+    time. `rows` yields up to limit + 1 documents; the extra one only tells
+    us there is a next page.
+    """
+    yield '{"items":['
+    count, last = 0, None
+    doc = first
+    while doc is not None and count < limit:
+        last = doc
+        item = {**doc, "_id": str(doc["_id"])}
+        yield ("," if count else "") + json.dumps(item, default=_json_default)
+        count += 1
+        doc = await anext(rows, None)
+
+    next_cursor = encode_page_cursor(last) if doc is not None else None
+    await rows.aclose()
+    yield f'],"count":{count},"next_cursor":{json.dumps(next_cursor)}}}'
+
 
 @router.get("/candidates", dependencies=[Depends(require_recruiter)])
-async def get_all_candidates(current_user: dict = Depends(get_current_active_user)):
+async def get_all_candidates(
+    view: Literal["list", "full"] = "list",
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    q: Optional[str] = Query(None, max_length=100),
+    current_user: dict = Depends(get_current_active_user)
+):
     """
-    Get all resumes saved by this recruiter (RECRUITER ONLY)
+    One page of this recruiter's resumes, newest first (RECRUITER ONLY).
+
+    view=list returns card fields only (name, email, phone, location, top
+    skills, counts, parsed_at); view=full returns whole documents. Pass the
+    returned next_cursor to get the following page, and q to filter by name,
+    email or skill. Full details of one resume: GET /candidates/{resume_id}.
     """
     try:
-        candidates = list(resume_history_collection.find(
-            {"recruiter_email": current_user.email}
-        ).sort("parsed_at", -1))
-        
-        for item in candidates:
-            item["_id"] = str(item["_id"])
-            
-        return candidates
+        after = decode_page_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    rows = resume_history_repository.iter_recruiter_page(
+        current_user.email, limit + 1, after=after, view=view, search=(q or "").strip() or None
+    )
+    try:
+        # Fetch the first row up front so database errors still get a proper status code
+        first = await anext(rows, None)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch candidates: {str(e)}")
 
+    return StreamingResponse(_stream_page(first, rows, limit), media_type="application/json")
+
 @router.post("/candidates/{resume_id}/save", dependencies=[Depends(require_recruiter)])
 async def save_candidate(
     resume_id: str, 
@@ -36,18 +84,15 @@ async def save_candidate(
     Save a candidate resume to recruiter's database (RECRUITER ONLY)
     """
     try:
-        resume = resume_history_collection.find_one({"_id": ObjectId(resume_id)})
+        resume = await resume_history_repository.get(resume_id)
         if not resume:
             raise HTTPException(status_code=404, detail="Resume not found")
         
         # Add recruiter reference
-        resume_history_collection.update_one(
-            {"_id": ObjectId(resume_id)},
-            {"$set": {
-                "saved_by_recruiters": resume.get("saved_by_recruiters", []) + [current_user.email],
-                "saved_at": datetime.utcnow()
-            }}
-        )
+        await resume_history_repository.update(resume_id, {
+            "saved_by_recruiters": resume.get("saved_by_recruiters", []) + [current_user.email],
+            "saved_at": datetime.utcnow()
+        })
         
         return {"message": "Candidate saved successfully"}
     except Exception as e:
@@ -62,7 +107,7 @@ async def get_candidate_details(
     Get detailed view of a candidate (RECRUITER ONLY)
     """
     try:
-        resume = resume_history_collection.find_one({"_id": ObjectId(resume_id)})
+        resume = await resume_history_repository.get(resume_id)
         if not resume:
             raise HTTPException(status_code=404, detail="Resume not found")
         
@@ -81,10 +126,7 @@ async def delete_candidate(
     """
     try:
         # Verify the resume exists and belongs to this recruiter
-        resume = resume_history_collection.find_one({
-            "_id": ObjectId(resume_id),
-            "recruiter_email": current_user.email
-        })
+        resume = await resume_history_repository.get_for_recruiter(resume_id, current_user.email)
         
         if not resume:
             raise HTTPException(
@@ -93,14 +135,15 @@ async def delete_candidate(
             )
         
         # Delete the resume
-        result = resume_history_collection.delete_one({
-            "_id": ObjectId(resume_id),
-            "recruiter_email": current_user.email
-        })
+        deleted = await resume_history_repository.delete_for_recruiter(resume_id, current_user.email)
         
-        if result.deleted_count == 0:
+        if deleted == 0:
             raise HTTPException(status_code=404, detail="Failed to delete resume")
         
+        await asyncio.to_thread(remove_from_index, resume_id, current_user.email)
+        await asyncio.to_thread(release_identity, resume_id)
+        await asyncio.to_thread(forget_document, resume_id)
+        
         return {
             "message": "Resume deleted successfully",
             "deleted_id": resume_id
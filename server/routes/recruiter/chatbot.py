@@ -1,27 +1,38 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
-import httpx
+import asyncio
 import json
 import re
 import traceback
 from datetime import datetime
+from bson import ObjectId
 from dependencies.auth import get_current_active_user
 from services.email_service import prepare_email_for_candidate  # Added for email functionality
 from dependencies.role_based_auth import require_recruiter
-from core.database import db
-from core.config import GROQ_API_KEY, GROQ_URL, GROQ_PARSING_MODEL
+from repositories import resume_history_repository
+from core.config import GROQ_PARSING_MODEL, CHATBOT_CACHE_REUSE_ANSWER
+from services.groq_client import groq_client
 from services.location_utils import (
-    get_state_from_city,
-    extract_location_info,
-    location_matches,
     normalize_location_for_search,
-    CITY_STATE_MAPPING
+    variations_match,
 )
+from services.intent_engine import extract_query_intent
+from services.ranking_engine import CandidateMatrix, select_weights, top_k_indices
+from services.candidate_index import (
+    get_candidate_features,
+    skill_occurrences,
+    DEGREE_HIERARCHY,
+    load_candidate_features,
+    as_ranking_candidate,
+    candidate_set_version,
+)
+from services.prompt_budget import candidate_budget, count_tokens, pack_candidates, recent_history
+from services.query_cache import chat_query_cache
 
 
 router = APIRouter()
-resume_history_collection = db["resume_history"]
 
 
 class ChatMessage(BaseModel):
@@ -32,6 +43,8 @@ class ChatMessage(BaseModel):
 class ChatRequest(BaseModel):
     query: str
     conversation_history: List[ChatMessage] = []
+    # Return a cached answer to the same question (None = CHATBOT_CACHE_REUSE_ANSWER)
+    reuse_answer: Optional[bool] = None
 
 
 # Added email request/response models
@@ -56,684 +69,6 @@ class CandidateScore:
         self.score_breakdown = score_breakdown
 
 
-def deduplicate_candidates(candidates: List[Dict]) -> List[Dict]:
-    """Deduplicate candidates using the same logic as candidates page"""
-    unique_candidates = []
-    seen_emails = set()
-    seen_phones = set()
-    seen_names = set()
-    seen_ids = set()
-
-    for candidate in candidates:
-        parsed = candidate.get("parsed_data", {})
-        candidate_id = candidate.get("_id")
-
-        email = parsed.get("email")
-        if email:
-            email = str(email).strip().lower()
-            if email == "no email" or email == "none" or email == "":
-                email = None
-        else:
-            email = None
-
-        phone = parsed.get("phone")
-        if phone:
-            phone = str(phone).replace(" ", "").replace("-", "").replace("(", "").replace(")", "")
-            phone = re.sub(r'\D', '', phone)
-            if len(phone) < 6:
-                phone = None
-        else:
-            phone = None
-
-        name = parsed.get("name")
-        if name:
-            name = str(name).strip().lower()
-            if name == "unknown candidate" or name == "none" or name == "":
-                name = None
-        else:
-            name = None
-
-        is_duplicate = False
-
-        if candidate_id in seen_ids:
-            is_duplicate = True
-
-        if not is_duplicate and email:
-            if email in seen_emails:
-                is_duplicate = True
-            else:
-                seen_emails.add(email)
-
-        if not is_duplicate and phone:
-            if phone in seen_phones:
-                is_duplicate = True
-            else:
-                seen_phones.add(phone)
-
-        if not is_duplicate and name:
-            if name in seen_names:
-                is_duplicate = True
-            else:
-                seen_names.add(name)
-
-        if not is_duplicate:
-            seen_ids.add(candidate_id)
-            unique_candidates.append(candidate)
-
-    return unique_candidates
-
-
-def calculate_total_experience(experiences: List[Dict]) -> Dict[str, Any]:
-    """Enhanced experience calculation with better date parsing and validation - FIXED VERSION"""
-    if not experiences:
-        return {
-            'total_years': 0.0,
-            'total_months': 0,
-            'total_years_display': 'No experience',
-            'calculation_method': 'no_data',
-            'details': []
-        }
-    
-    total_months = 0
-    calculation_details = []
-    current_year = datetime.now().year
-    
-    for exp in experiences:
-        years_str = exp.get("Years", "")
-        company = exp.get("Company", "Unknown")
-        role = exp.get("Role", "Unknown")
-        
-        if not years_str:
-            continue
-        
-        years_str = str(years_str).strip()
-        months_for_this_role = 0
-        method = "unknown"
-        
-        # Method 1: Explicit year ranges (e.g., "2020 - 2023" or "2020-2023")
-        date_range_match = re.search(r'(\d{4})\s*[-–to]\s*(\d{4}|present|current)', years_str, re.IGNORECASE)
-        if date_range_match:
-            start_year = int(date_range_match.group(1))
-            end_str = date_range_match.group(2).lower()
-            
-            if end_str in ['present', 'current']:
-                end_year = current_year
-            else:
-                end_year = int(end_str)
-            
-            if 1970 <= start_year <= current_year and start_year <= end_year <= current_year + 1:
-                years_diff = end_year - start_year
-                months_for_this_role = years_diff * 12
-                method = f"date_range ({start_year}-{end_year})"
-        
-        # Method 2: Explicit months
-        if months_for_this_role == 0:
-            months_match = re.search(r'(\d+)\s*month', years_str, re.IGNORECASE)
-            if months_match:
-                months_for_this_role = int(months_match.group(1))
-                method = "explicit_months"
-        
-        # Method 3: Explicit years
-        if months_for_this_role == 0:
-            years_match = re.search(r'(\d+\.?\d*)\s*year', years_str, re.IGNORECASE)
-            if years_match:
-                years_val = float(years_match.group(1))
-                months_for_this_role = int(years_val * 12)
-                method = "explicit_years"
-        
-        # Method 4: Month ranges
-        if months_for_this_role == 0:
-            month_names = r'(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*'
-            month_range_match = re.search(
-                rf'{month_names}\s*(\d{{4}})\s*[-–to]\s*{month_names}\s*(\d{{4}}|present)',
-                years_str,
-                re.IGNORECASE
-            )
-            if month_range_match:
-                start_year = int(month_range_match.group(2))
-                end_str = month_range_match.group(4)
-                
-                if end_str.lower() in ['present', 'current']:
-                    end_year = current_year
-                else:
-                    end_year = int(end_str)
-                
-                if 1970 <= start_year <= current_year and start_year <= end_year <= current_year + 1:
-                    years_diff = end_year - start_year
-                    months_for_this_role = max(1, years_diff * 12)
-                    method = f"month_range ({start_year}-{end_year})"
-        
-        # FIX: Method 5 - Improved fallback that doesn't confuse years with duration
-        if months_for_this_role == 0:
-            numbers = re.findall(r'(\d+\.?\d*)', years_str)
-            if numbers:
-                valid_duration_found = False
-                for num_str in numbers:
-                    num = float(num_str)
-                    # Skip if it looks like a year (1970-2030)
-                    if 1970 <= num <= 2030:
-                        continue
-                    # Only accept reasonable duration values (0.5 to 40 years)
-                    if 0.5 <= num <= 40:
-                        months_for_this_role = int(num * 12)
-                        method = "fallback_duration"
-                        valid_duration_found = True
-                        break
-                
-                # If no valid duration found, try to infer from year pairs
-                if not valid_duration_found and len(numbers) >= 2:
-                    year_nums = [float(n) for n in numbers if 1970 <= float(n) <= 2030]
-                    if len(year_nums) == 2:
-                        start_year = int(min(year_nums))
-                        end_year = int(max(year_nums))
-                        if start_year < end_year:
-                            years_diff = end_year - start_year
-                            months_for_this_role = years_diff * 12
-                            method = f"inferred_range ({start_year}-{end_year})"
-        
-        # Cap at 15 years (180 months) for any single role
-        months_for_this_role = min(months_for_this_role, 180)
-        
-        if months_for_this_role > 0:
-            total_months += months_for_this_role
-            calculation_details.append({
-                'company': company,
-                'role': role,
-                'raw_duration': years_str,
-                'calculated_months': months_for_this_role,
-                'method': method
-            })
-    
-    total_years = total_months / 12.0
-    
-    if total_months == 0:
-        display = "New Graduate / Intern"
-    elif total_months < 12:
-        display = f"{total_months} months"
-    elif total_months < 24:
-        years_part = total_months // 12
-        months_part = total_months % 12
-        if months_part > 0:
-            display = f"{years_part} year {months_part} months"
-        else:
-            display = f"{years_part} year"
-    else:
-        years_part = total_months // 12
-        months_part = total_months % 12
-        if months_part >= 6:
-            display = f"{years_part}.{months_part // 6 * 5} years"
-        else:
-            display = f"{years_part} years"
-    
-    return {
-        'total_years': total_years,
-        'total_months': total_months,
-        'total_years_display': display,
-        'calculation_method': 'multi_method',
-        'details': calculation_details
-    }
-
-
-def extract_query_intent(query: str) -> Dict[str, Any]:
-    """
-    ENHANCED: Extract structured intent including personal information filters
-    """
-    query_lower = query.lower()
-    intent = {
-        'skills': [],
-        'min_experience': None,
-        'max_experience': None,
-        'companies': [],
-        'education_level': None,
-        'top_n': None,
-        
-        # Personal Information Filters
-        'gender': None,
-        'age_min': None,
-        'age_max': None,
-        'location': None,
-        'locations': [],
-        'nationality': None,
-        'marital_status': None,
-        
-        # Work-related Filters
-        'notice_period': None,
-        'willing_to_relocate': None,
-        'work_authorization': None,
-        'salary_min': None,
-        'salary_max': None,
-        
-        # University-specific Filters
-        'graduation_year': None,
-        'current_students_only': False,
-        'placement_preference': None,  # internship/full-time/both
-        'has_internship_experience': None,
-        
-        'query_type': 'general',
-        'company_filter': False,
-        'requires_calculation': False,
-        'is_compound': False,
-        'search_terms': [],
-        'is_conversational': False,
-        'needs_listing': False,
-        'needs_comparison': False,
-        'needs_summary': False
-    }
-
-    # Detect conversational/casual queries
-    conversational_patterns = [
-        r'^(hi|hello|hey|greetings)',
-        r'(how are you|what\'s up|wassup)',
-        r'(thanks|thank you|appreciate)',
-        r'^(help|assist|support)',
-        r'(can you|could you|would you)',
-        r'(tell me about|explain|what is|what are)'
-    ]
-    
-    for pattern in conversational_patterns:
-        if re.search(pattern, query_lower):
-            intent['is_conversational'] = True
-            break
-
-    # Detect query intent types
-    if any(word in query_lower for word in ['list', 'show', 'display', 'give me all']):
-        intent['needs_listing'] = True
-    
-    if any(word in query_lower for word in ['compare', 'difference', 'versus', 'vs', 'between']):
-        intent['needs_comparison'] = True
-    
-    if any(word in query_lower for word in ['summary', 'overview', 'breakdown', 'statistics', 'stats']):
-        intent['needs_summary'] = True
-
-    # Detect compound questions
-    compound_indicators = [' and ', ' with ', ' who ', ' that have ', ' having ', ' as well as ']
-    if any(indicator in query_lower for indicator in compound_indicators):
-        intent['is_compound'] = True
-
-    # ==================== PERSONAL INFORMATION EXTRACTION ====================
-    
-    # FIX: Improved GENDER extraction
-    # Check for female first (more specific to avoid matching 'male' in 'female')
-    if re.search(r'\b(female|women|woman|girl|girls|lady|ladies)\b', query_lower):
-        intent['gender'] = 'female'
-        intent['query_type'] = 'ranking'
-        print("✓ Gender detected: female")
-    # Then check for male
-    elif re.search(r'\b(male|men|man|boy|boys)\b', query_lower):
-        # Double-check that 'female' wasn't in the query
-        if 'female' not in query_lower:
-            intent['gender'] = 'male'
-            intent['query_type'] = 'ranking'
-            print("✓ Gender detected: male")
-    
-    # Extract AGE
-    age_patterns = [
-        r'age\s+(\d+)\s*[-to]+\s*(\d+)',  # age 22-25
-        r'between\s+(\d+)\s+and\s+(\d+)\s+years?\s+old',  # between 22 and 25 years old
-        r'(\d+)\s*[-to]+\s*(\d+)\s+years?\s+old',  # 22-25 years old
-        r'under\s+(\d+)\s+years?\s+old',  # under 25 years old (max)
-        r'above\s+(\d+)\s+years?\s+old',  # above 22 years old (min)
-        r'over\s+(\d+)\s+years?\s+old',  # over 22 years old (min)
-    ]
-    
-    for pattern in age_patterns:
-        match = re.search(pattern, query_lower)
-        if match:
-            if 'under' in pattern or 'below' in pattern:
-                intent['age_max'] = int(match.group(1))
-            elif 'above' in pattern or 'over' in pattern:
-                intent['age_min'] = int(match.group(1))
-            else:
-                intent['age_min'] = int(match.group(1))
-                if match.lastindex >= 2:
-                    intent['age_max'] = int(match.group(2))
-            intent['query_type'] = 'ranking'
-            break
-    
-    # ==================== LOCATION EXTRACTION (INTEGRATED WITH location_utils) ====================
-    
-    # Extract LOCATION using comprehensive city database
-    location_patterns = [
-        r'(?:based in|located in|living in|from|in)\s+([A-Z][a-zA-Z\s]+?)(?:\s+and|\s+with|\s+who|,|$)',
-        r'(?:city|location|place):\s*([A-Z][a-zA-Z\s]+?)(?:\s+and|\s+with|,|$)',
-    ]
-    
-    # First, check against comprehensive city database from location_utils
-    # This handles all Indian cities with proper state mapping
-    for city_name in CITY_STATE_MAPPING.keys():
-        if city_name in query_lower:
-            location_info = extract_location_info(city_name.title())
-            intent['location'] = location_info['city']
-            intent['locations'].append(location_info['city'])
-            if location_info['state']:
-                # Also add state to search both city and state
-                intent['locations'].append(location_info['state'])
-            intent['query_type'] = 'ranking'
-            print(f"✓ Location detected: {location_info['city']}, {location_info['state']}")
-            break
-    
-    # If no direct city match, try pattern matching and lookup
-    if not intent['location']:
-        for pattern in location_patterns:
-            match = re.search(pattern, query_lower, re.IGNORECASE)
-            if match:
-                location = match.group(1).strip()
-                if len(location) > 2:  # Avoid single letters
-                    location_info = extract_location_info(location)
-                    intent['location'] = location_info['city'] or location
-                    intent['locations'].append(location_info['city'] or location)
-                    if location_info['state']:
-                        intent['locations'].append(location_info['state'])
-                    intent['query_type'] = 'ranking'
-                    print(f"✓ Location detected from pattern: {location_info}")
-                    break
-    
-    # Extract NATIONALITY
-    if 'indian' in query_lower or 'india' in query_lower:
-        intent['nationality'] = 'Indian'
-    elif 'american' in query_lower or 'usa' in query_lower or 'us citizen' in query_lower:
-        intent['nationality'] = 'American'
-    
-    # Extract MARITAL STATUS
-    if any(word in query_lower for word in ['single', 'unmarried', 'bachelor']):
-        intent['marital_status'] = 'single'
-    elif 'married' in query_lower:
-        intent['marital_status'] = 'married'
-    
-    # Extract NOTICE PERIOD
-    notice_patterns = [
-        (r'immediate\s+joiner', 'immediate'),
-        (r'join\s+immediately', 'immediate'),
-        (r'available\s+immediately', 'immediate'),
-        (r'(\d+)\s+days?\s+notice', None),  # "30 days notice"
-        (r'notice\s+period\s+of\s+(\d+)', None),  # "notice period of 30"
-    ]
-    
-    for pattern, value in notice_patterns:
-        match = re.search(pattern, query_lower)
-        if match:
-            if value:
-                intent['notice_period'] = value
-            else:
-                intent['notice_period'] = f"{match.group(1)} days"
-            intent['query_type'] = 'ranking'
-            break
-    
-    # Extract RELOCATION WILLINGNESS
-    if any(phrase in query_lower for phrase in ['willing to relocate', 'open to relocation', 'can relocate']):
-        intent['willing_to_relocate'] = True
-    
-    # Extract WORK AUTHORIZATION
-    work_auth_keywords = {
-        'citizen': 'citizen',
-        'h1b': 'H1B',
-        'work permit': 'work permit',
-        'student visa': 'student visa',
-        'work visa': 'work visa',
-    }
-    for keyword, value in work_auth_keywords.items():
-        if keyword in query_lower:
-            intent['work_authorization'] = value
-            break
-    
-    # Extract SALARY EXPECTATIONS
-    salary_patterns = [
-        r'(\d+)\s*[-to]+\s*(\d+)\s*(?:lpa|lakhs?|lacs?|k)',  # 5-10 LPA
-        r'above\s+(\d+)\s*(?:lpa|lakhs?|lacs?|k)',  # above 5 LPA
-        r'under\s+(\d+)\s*(?:lpa|lakhs?|lacs?|k)',  # under 10 LPA
-        r'salary\s+(\d+)',  # salary 500000
-    ]
-    
-    for pattern in salary_patterns:
-        match = re.search(pattern, query_lower)
-        if match:
-            if 'under' in pattern:
-                intent['salary_max'] = int(match.group(1))
-            elif 'above' in pattern:
-                intent['salary_min'] = int(match.group(1))
-            else:
-                intent['salary_min'] = int(match.group(1))
-                if match.lastindex >= 2:
-                    intent['salary_max'] = int(match.group(2))
-            intent['query_type'] = 'ranking'
-            break
-    
-    # ==================== UNIVERSITY-SPECIFIC EXTRACTION ====================
-    
-    # Extract GRADUATION YEAR
-    grad_patterns = [
-        r'(?:graduating|graduated|grad|batch\s+of|class\s+of)\s+(?:in\s+)?(\d{4})',
-        r'(\d{4})\s+(?:graduate|grad|batch|passout)',
-        r'(?:year|yr)\s+(\d{4})',
-    ]
-    
-    for pattern in grad_patterns:
-        match = re.search(pattern, query_lower)
-        if match:
-            intent['graduation_year'] = match.group(1)
-            intent['query_type'] = 'ranking'
-            break
-    
-    # Detect CURRENT STUDENTS
-    if any(phrase in query_lower for phrase in ['current student', 'currently studying', 
-                                                  'final year', '4th year', 'third year']):
-        intent['current_students_only'] = True
-        intent['query_type'] = 'ranking'
-    
-    # Extract PLACEMENT PREFERENCE
-    if 'internship' in query_lower and 'full' not in query_lower:
-        intent['placement_preference'] = 'internship'
-    elif 'full-time' in query_lower or 'full time' in query_lower or 'fte' in query_lower:
-        intent['placement_preference'] = 'full-time'
-    
-    # Detect INTERNSHIP EXPERIENCE
-    if any(phrase in query_lower for phrase in ['with internship', 'has internship', 
-                                                  'internship experience', 'done internship']):
-        intent['has_internship_experience'] = True
-        intent['query_type'] = 'ranking'
-
-    # ==================== REST OF EXISTING EXTRACTION ====================
-    
-    # Extract "top N" requests - ENHANCED to catch more patterns
-    top_n_patterns = [
-        r'top\s+(\d+)',
-        r'best\s+(\d+)',
-        r'(\d+)\s+best',
-        r'(\d+)\s+top',
-        r'give\s+me\s+(\d+)',
-        r'show\s+me\s+(\d+)',
-        r'find\s+(\d+)',
-        r'(\d+)\s+candidates?',
-        r'(\d+)\s+people',
-        r'(\d+)\s+developers?',
-        r'(\d+)\s+engineers?',
-        r'list\s+(\d+)',
-        r'display\s+(\d+)',
-        r'return\s+(\d+)'
-    ]
-    
-    for pattern in top_n_patterns:
-        match = re.search(pattern, query_lower)
-        if match:
-            intent['top_n'] = int(match.group(1))
-            intent['query_type'] = 'ranking'
-            print(f"✓ Number detected: {intent['top_n']} candidates requested")
-            break
-    
-    # If no specific number requested but it's a ranking query, default to 5
-    if not intent['top_n'] and any(word in query_lower for word in ['best', 'top', 'strongest', 'most qualified']):
-        intent['top_n'] = 5
-        intent['query_type'] = 'ranking'
-        print(f"✓ Using default of 5 candidates for ranking query")
-
-    # SKILLS extraction (existing code)
-    skill_database = {
-        'python': ['python', 'py', 'django', 'flask', 'fastapi', 'pandas', 'numpy'],
-        'javascript': ['javascript', 'js', 'ecmascript', 'es6', 'es2015'],
-        'typescript': ['typescript', 'ts'],
-        'java': ['java', 'jvm', 'spring boot', 'spring'],
-        'react': ['react', 'reactjs', 'react.js', 'react native'],
-        'angular': ['angular', 'angularjs', 'angular.js'],
-        'vue': ['vue', 'vuejs', 'vue.js', 'nuxt'],
-        'node': ['node', 'nodejs', 'node.js', 'express', 'expressjs'],
-        'dotnet': ['dotnet', '.net', 'c#', 'csharp', 'asp.net'],
-        'c++': ['c++', 'cpp', 'cplusplus'],
-        'ruby': ['ruby', 'rails', 'ruby on rails'],
-        'php': ['php', 'laravel', 'symfony', 'wordpress'],
-        'go': ['go', 'golang'],
-        'rust': ['rust'],
-        'swift': ['swift', 'ios'],
-        'kotlin': ['kotlin', 'android'],
-        'aws': ['aws', 'amazon web services', 'ec2', 's3', 'lambda', 'cloudformation'],
-        'azure': ['azure', 'microsoft azure'],
-        'gcp': ['gcp', 'google cloud', 'google cloud platform'],
-        'docker': ['docker', 'containerization', 'containers'],
-        'kubernetes': ['kubernetes', 'k8s', 'container orchestration'],
-        'sql': ['sql', 'database', 'rdbms'],
-        'postgresql': ['postgresql', 'postgres'],
-        'mysql': ['mysql'],
-        'mongodb': ['mongodb', 'mongo', 'nosql'],
-        'redis': ['redis', 'cache', 'caching'],
-        'machine learning': ['machine learning', 'ml', 'deep learning', 'neural network'],
-        'ai': ['ai', 'artificial intelligence', 'nlp', 'computer vision'],
-        'data science': ['data science', 'data analysis', 'analytics'],
-        'tensorflow': ['tensorflow', 'tf'],
-        'pytorch': ['pytorch', 'torch'],
-        'flutter': ['flutter', 'dart'],
-        'html': ['html', 'html5'],
-        'css': ['css', 'css3', 'sass', 'scss', 'tailwind'],
-        'graphql': ['graphql', 'gql'],
-        'rest': ['rest', 'restful', 'rest api'],
-        'api': ['api', 'apis'],
-        'git': ['git', 'github', 'gitlab', 'version control'],
-        'jenkins': ['jenkins', 'ci/cd', 'continuous integration'],
-        'linux': ['linux', 'unix', 'ubuntu', 'centos'],
-        'devops': ['devops', 'sre', 'site reliability'],
-        'testing': ['testing', 'test', 'unit test', 'integration test', 'qa', 'quality assurance'],
-        'agile': ['agile', 'scrum', 'kanban', 'sprint'],
-        'ui/ux': ['ui', 'ux', 'user interface', 'user experience', 'design'],
-        'frontend': ['frontend', 'front-end', 'front end'],
-        'backend': ['backend', 'back-end', 'back end'],
-        'fullstack': ['fullstack', 'full-stack', 'full stack'],
-        'microservices': ['microservices', 'microservice architecture'],
-        'blockchain': ['blockchain', 'crypto', 'web3', 'ethereum', 'solidity']
-    }
-    
-     # Match skills with fuzzy matching
-    for main_skill, variations in skill_database.items():
-        for variation in variations:
-            if variation in query_lower:
-                if main_skill not in intent['skills']:
-                    intent['skills'].append(main_skill)
-                break
-
-    # Enhanced role-based skill mapping
-    role_skill_mapping = {
-        'web developer': ['javascript', 'html', 'css', 'react', 'node'],
-        'web development': ['javascript', 'html', 'css', 'react', 'node'],
-        'full stack': ['javascript', 'react', 'node', 'python', 'sql'],
-        'fullstack': ['javascript', 'react', 'node', 'python', 'sql'],
-        'frontend developer': ['javascript', 'react', 'html', 'css', 'typescript'],
-        'front end': ['javascript', 'react', 'html', 'css', 'typescript'],
-        'backend developer': ['python', 'java', 'node', 'sql', 'api'],
-        'back end': ['python', 'java', 'node', 'sql', 'api'],
-        'mobile developer': ['react', 'flutter', 'swift', 'kotlin'],
-        'ios developer': ['swift', 'ios'],
-        'android developer': ['kotlin', 'java', 'android'],
-        'data scientist': ['python', 'machine learning', 'tensorflow', 'sql'],
-        'data engineer': ['python', 'sql', 'spark', 'data science'],
-        'devops engineer': ['docker', 'kubernetes', 'aws', 'jenkins', 'linux'],
-        'ml engineer': ['python', 'machine learning', 'tensorflow', 'pytorch'],
-        'ai engineer': ['python', 'ai', 'machine learning', 'tensorflow'],
-        'software engineer': ['python', 'java', 'javascript'],
-        'qa engineer': ['testing', 'automation', 'selenium'],
-        'ui/ux designer': ['ui/ux', 'design', 'figma']
-    }
-    
-    for role, skills in role_skill_mapping.items():
-        if role in query_lower:
-            for skill in skills:
-                if skill not in intent['skills']:
-                    intent['skills'].append(skill)
-            if intent['query_type'] == 'general':
-                intent['query_type'] = 'ranking'
-            break
-
-    # Extract general search terms (words that aren't stop words)
-    stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
-                  'of', 'with', 'by', 'from', 'as', 'is', 'was', 'are', 'were', 'been',
-                  'be', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would',
-                  'could', 'should', 'may', 'might', 'must', 'can', 'who', 'what',
-                  'where', 'when', 'why', 'how', 'which', 'this', 'that', 'these',
-                  'those', 'i', 'you', 'he', 'she', 'it', 'we', 'they', 'me', 'him',
-                  'her', 'us', 'them', 'my', 'your', 'his', 'its', 'our', 'their',
-                  'find', 'show', 'give', 'tell', 'list', 'get'}
-    
-    words = re.findall(r'\b\w+\b', query_lower)
-    intent['search_terms'] = [word for word in words if word not in stop_words and len(word) > 2]
-
-    # Enhanced experience extraction with better patterns
-    exp_patterns = [
-        (r'(\d+)\s*[-to]+\s*(\d+)\s*years?', 'range'),
-        (r'(\d+)\+?\s*years?', 'minimum'),
-        (r'at least\s+(\d+)\s*years?', 'minimum'),
-        (r'more than\s+(\d+)\s*years?', 'minimum'),
-        (r'over\s+(\d+)\s*years?', 'minimum'),
-        (r'(less than|under|below)\s+(\d+)\s*years?', 'maximum'),
-        (r'(\d+)\s*to\s*(\d+)\s*yrs?', 'range'),
-        (r'between\s+(\d+)\s*and\s*(\d+)\s*years?', 'range')
-    ]
-    
-    for pattern, exp_type in exp_patterns:
-        match = re.search(pattern, query_lower)
-        if match:
-            if exp_type == 'range':
-                intent['min_experience'] = int(match.group(1))
-                intent['max_experience'] = int(match.group(2))
-            elif exp_type == 'minimum':
-                intent['min_experience'] = int(match.group(1))
-            elif exp_type == 'maximum':
-                intent['max_experience'] = int(match.group(2))
-            intent['requires_calculation'] = True
-            break
-
-    # Detect company filter queries
-    company_keywords = ['company', 'companies', 'intern', 'internship', 'full-time', 'full time',
-                       'position', 'worked at', 'experience at', 'employed', 'employer']
-    if any(keyword in query_lower for keyword in company_keywords):
-        intent['company_filter'] = True
-        intent['query_type'] = 'ranking'
-        if not intent['top_n']:
-            intent['top_n'] = 10
-
-    # Expanded company list
-    companies = ['google', 'microsoft', 'amazon', 'facebook', 'meta', 'apple',
-                 'netflix', 'uber', 'airbnb', 'linkedin', 'twitter', 'x corp', 'tesla',
-                 'ibm', 'oracle', 'salesforce', 'adobe', 'intel', 'nvidia', 'amd',
-                 'samsung', 'dell', 'cisco', 'vmware', 'sap', 'accenture',
-                 'deloitte', 'wipro', 'tcs', 'infosys', 'cognizant', 'hcl', 'capgemini',
-                 'goldman sachs', 'morgan stanley', 'jp morgan', 'jpmorgan', 'mckinsey',
-                 'bain', 'bcg', 'stripe', 'spotify', 'slack', 'atlassian', 'zoom',
-                 'shopify', 'square', 'paypal', 'ebay', 'booking', 'expedia']
-    
-    for company in companies:
-        if company in query_lower:
-            intent['companies'].append(company)
-
-    # Extract education level
-    education_keywords = {
-        'phd': ['phd', 'ph.d', 'doctorate', 'doctoral'],
-        'masters': ['masters', 'master', 'msc', 'm.sc', 'mtech', 'm.tech', 'mba', 'm.b.a'],
-        'bachelors': ['bachelor', 'bachelors', 'btech', 'b.tech', 'be', 'b.e', 'bsc', 'b.sc']
-    }
-    
-    for level, keywords in education_keywords.items():
-        if any(keyword in query_lower for keyword in keywords):
-            intent['education_level'] = level
-            break
-
-    return intent
-
 def filter_candidates_by_personal_info(candidates: List[Dict], intent: Dict[str, Any]) -> List[Dict]:
     """
     Filter candidates based on personal information criteria from intent
@@ -826,23 +161,28 @@ def filter_candidates_by_personal_info(candidates: List[Dict], intent: Dict[str,
             
             location_match = False
             
-            # Use location_matches function from location_utils for smart matching
+            # Resume-side location variations are precomputed in the candidate index
+            features = get_candidate_features(candidate)
+            resume_locations = features["locations"]
+            
             for search_loc in search_locations:
+                search_variations = normalize_location_for_search(search_loc)
+                
                 # Check current location
-                if location_matches(candidate_location, search_loc):
+                if variations_match(resume_locations["current"], search_variations):
                     location_match = True
                     print(f"✓ Location match: {candidate_location} matches {search_loc}")
                     break
                 
                 # Check hometown
-                if location_matches(hometown, search_loc):
+                if variations_match(resume_locations["hometown"], search_variations):
                     location_match = True
                     print(f"✓ Hometown match: {hometown} matches {search_loc}")
                     break
                 
                 # Check preferred locations
-                for pref_loc in pref_locations:
-                    if location_matches(str(pref_loc).lower() if pref_loc else '', search_loc):
+                for pref_loc, pref_variations in zip([p for p in pref_locations if p], resume_locations["preferred"]):
+                    if variations_match(pref_variations, search_variations):
                         location_match = True
                         print(f"✓ Preferred location match: {pref_loc} matches {search_loc}")
                         break
@@ -1013,93 +353,9 @@ def filter_candidates_by_personal_info(candidates: List[Dict], intent: Dict[str,
     
     return filtered
 
-def rank_candidates_with_personal_info(candidates: List[Dict], intent: Dict[str, Any]) -> List[CandidateScore]:
-    """
-    Enhanced ranking that considers personal information in scoring
-    """
-    # First, filter candidates based on hard requirements
-    filtered_candidates = filter_candidates_by_personal_info(candidates, intent)
-    
-    if not filtered_candidates:
-        # If no candidates pass filters, return empty or show closest matches
-        print(f"⚠️ No candidates match all personal information filters")
-        return []
-    
-    print(f"✓ {len(filtered_candidates)} candidates match personal info filters (from {len(candidates)} total)")
-    
-    # Now rank the filtered candidates using existing scoring logic
-    scored_candidates = []
-    
-    for candidate in filtered_candidates:
-        try:
-            # Use existing scoring functions
-            skill_analysis = calculate_skill_proficiency_score(candidate, intent.get('skills', []))
-            experience_analysis = calculate_experience_score(candidate, intent)
-            education_analysis = calculate_education_score(candidate, intent.get('education_level'))
-            project_analysis = calculate_project_quality_score(candidate, intent.get('skills', []))
-            company_analysis = calculate_company_score(candidate, intent)
-            
-            # Adjust weights based on query type
-            if intent.get('company_filter'):
-                weights = {
-                    'company': 0.50, 'experience': 0.25, 'skills': 0.15,
-                    'projects': 0.05, 'education': 0.05
-                }
-            elif intent.get('query_type') == 'ranking' and intent.get('skills'):
-                weights = {
-                    'skills': 0.45, 'projects': 0.30, 'experience': 0.15,
-                    'education': 0.05, 'company': 0.05
-                }
-            else:
-                weights = {
-                    'skills': 0.30, 'experience': 0.25, 'projects': 0.20,
-                    'company': 0.15, 'education': 0.10
-                }
-            
-            total_score = (
-                skill_analysis['total_score'] * weights['skills'] +
-                experience_analysis['score'] * weights['experience'] +
-                education_analysis['score'] * weights['education'] +
-                project_analysis['score'] * weights['projects'] +
-                company_analysis['score'] * weights.get('company', 0)
-            )
-            
-            score_breakdown = {
-                'skill_score': round(skill_analysis['total_score'], 1),
-                'skill_details': skill_analysis,
-                'experience_score': round(experience_analysis['score'], 1),
-                'experience_details': experience_analysis,
-                'education_score': round(education_analysis['score'], 1),
-                'project_score': round(project_analysis['score'], 1),
-                'company_score': round(company_analysis['score'], 1),
-                'company_details': company_analysis,
-                'weights_used': weights
-            }
-            
-            scored_candidates.append(CandidateScore(candidate, total_score, score_breakdown))
-        except Exception as e:
-            print(f"Error scoring candidate: {e}")
-            continue
-    
-    scored_candidates.sort(key=lambda x: x.score, reverse=True)
-    return scored_candidates
-
 def calculate_skill_proficiency_score(candidate: Dict, required_skills: List[str]) -> Dict[str, Any]:
     """Calculate skill proficiency based on evidence and usage"""
-    parsed = candidate.get("parsed_data", {})
-    if not parsed:
-        return {
-            'total_score': 0,
-            'skill_breakdown': {},
-            'skills_matched': 0,
-            'total_skills_required': len(required_skills)
-        }
-    
-    all_skills = []
-    if parsed.get("skills"):
-        all_skills.extend([s.lower() for s in parsed.get("skills", [])])
-    if parsed.get("derived_skills"):
-        all_skills.extend([s.lower() for s in parsed.get("derived_skills", [])])
+    features = get_candidate_features(candidate)
     
     skill_scores = {}
     total_score = 0
@@ -1108,35 +364,26 @@ def calculate_skill_proficiency_score(candidate: Dict, required_skills: List[str
     for req_skill in required_skills:
         skill_score = 0
         evidence = []
+        listed, project_indexes, experience_indexes = skill_occurrences(features, req_skill)
         
         # Check explicit listing
-        if any(req_skill in skill for skill in all_skills):
+        if listed:
             skill_score += 30
             evidence.append("listed_in_skills")
         
         # Check project usage
-        projects = parsed.get("projects", [])
-        project_matches = 0
-        for project in projects:
-            proj_text = json.dumps(project).lower()
-            if req_skill in proj_text:
-                project_matches += 1
-                evidence.append(f"used_in_project: {project.get('Name', 'unnamed')[:30]}")
+        for idx in project_indexes:
+            evidence.append(f"used_in_project: {features['projects'][idx]['name'][:30]}")
         
-        if project_matches > 0:
-            skill_score += min(40, project_matches * 10)
+        if project_indexes:
+            skill_score += min(40, len(project_indexes) * 10)
         
         # Check experience usage
-        experiences = parsed.get("experience", [])
-        exp_matches = 0
-        for exp in experiences:
-            exp_text = json.dumps(exp).lower()
-            if req_skill in exp_text:
-                exp_matches += 1
-                evidence.append(f"used_at: {exp.get('Company', 'company')[:20]}")
+        for idx in experience_indexes:
+            evidence.append(f"used_at: {features['experience_blobs'][idx]['company'][:20]}")
         
-        if exp_matches > 0:
-            skill_score += min(30, exp_matches * 10)
+        if experience_indexes:
+            skill_score += min(30, len(experience_indexes) * 10)
         
         skill_scores[req_skill] = {
             'score': skill_score,
@@ -1162,10 +409,9 @@ def calculate_skill_proficiency_score(candidate: Dict, required_skills: List[str
 
 def calculate_experience_score(candidate: Dict, intent: Dict) -> Dict[str, Any]:
     """Enhanced experience scoring with accurate calculation"""
-    parsed = candidate.get("parsed_data", {})
-    experiences = parsed.get("experience", []) if parsed else []
+    exp_features = get_candidate_features(candidate)["experience"]
     
-    if not experiences:
+    if not exp_features['company_count']:
         return {
             'score': 0,
             'total_years': 0.0,
@@ -1179,21 +425,9 @@ def calculate_experience_score(candidate: Dict, intent: Dict) -> Dict[str, Any]:
             'calculation_details': []
         }
     
-    exp_calc = calculate_total_experience(experiences)
-    total_years = exp_calc['total_years']
-    total_months = exp_calc['total_months']
-    
-    company_count = len(experiences)
-    senior_roles = 0
-    
-    senior_keywords = ['senior', 'lead', 'principal', 'architect', 'manager', 'director', 'head', 'chief']
-    
-    for exp in experiences:
-        role = exp.get("Role", "")
-        if role:
-            role_lower = role.lower()
-            if any(keyword in role_lower for keyword in senior_keywords):
-                senior_roles += 1
+    total_years = exp_features['total_years']
+    company_count = exp_features['company_count']
+    senior_roles = exp_features['senior_roles']
     
     score = 0
     
@@ -1233,91 +467,73 @@ def calculate_experience_score(candidate: Dict, intent: Dict) -> Dict[str, Any]:
     return {
         'score': final_score,
         'total_years': total_years,
-        'total_months': total_months,
-        'total_years_display': exp_calc['total_years_display'],
+        'total_months': exp_features['total_months'],
+        'total_years_display': exp_features['total_years_display'],
         'company_count': company_count,
         'senior_roles': senior_roles,
         'meets_min_requirement': meets_min_requirement,
         'meets_max_requirement': meets_max_requirement,
-        'calculation_details': exp_calc['details']
+        'calculation_details': exp_features['details']
     }
 
 
 def calculate_education_score(candidate: Dict, required_level: Optional[str] = None) -> Dict[str, Any]:
     """Calculate education score"""
-    parsed = candidate.get("parsed_data", {})
-    education = parsed.get("education", []) if parsed else []
+    edu_features = get_candidate_features(candidate)["education"]
     
-    if not education:
+    if not edu_features['count']:
         return {
             'score': 0,
             'highest_degree': None,
             'meets_requirement': True if required_level is None else False
         }
     
-    degree_hierarchy = {
-        'phd': 100, 'doctorate': 100, 'doctoral': 100,
-        'masters': 70, 'msc': 70, 'm.sc': 70, 'mtech': 75, 'm.tech': 75, 'mba': 75,
-        'bachelor': 50, 'btech': 70, 'b.tech': 70, 'be': 50, 'b.e': 50, 'bsc': 50,
-        'diploma': 25
-    }
-    
-    highest_score = 0
-    highest_degree = None
-    
-    for edu in education:
-        degree = edu.get("Degree", "")
-        if degree:
-            degree_lower = degree.lower()
-            for key, value in degree_hierarchy.items():
-                if key in degree_lower:
-                    if value > highest_score:
-                        highest_score = value
-                        highest_degree = key
-                    break
+    highest_score = edu_features['highest_score']
     
     meets_requirement = True
     if required_level is not None:
-        required_score = degree_hierarchy.get(required_level, 0)
+        required_score = DEGREE_HIERARCHY.get(required_level, 0)
         if highest_score < required_score:
             meets_requirement = False
             highest_score *= 0.7
     
     return {
         'score': highest_score,
-        'highest_degree': highest_degree,
+        'highest_degree': edu_features['highest_degree'],
         'meets_requirement': meets_requirement
     }
 
 
 def calculate_project_quality_score(candidate: Dict, required_skills: List[str]) -> Dict[str, Any]:
     """Calculate project quality"""
-    parsed = candidate.get("parsed_data", {})
-    projects = parsed.get("projects", []) if parsed else []
+    features = get_candidate_features(candidate)
+    projects = features["projects"]
     
     if not projects:
         return {'score': 0, 'project_count': 0, 'relevant_projects': 0}
     
+    # How many of the required skills each project mentions
+    skills_per_project = [0] * len(projects)
+    for skill in required_skills:
+        for idx in skill_occurrences(features, skill)[1]:
+            skills_per_project[idx] += 1
+    
     relevant_projects = 0
     total_score = 0
     
-    for project in projects:
-        project_text = json.dumps(project).lower()
+    for project, skills_used in zip(projects, skills_per_project):
         project_score = 0
         
-        skills_used = 0
-        if required_skills:
-            skills_used = sum(1 for skill in required_skills if skill in project_text)
         if skills_used > 0:
             relevant_projects += 1
             project_score = min(80, skills_used * 20)
         
-        description = project.get("Description", "")
-        if len(description) > 200:
+        description_length = project["description_length"]
+        if description_length > 200:
             project_score += 15
-        elif len(description) > 100:
+        elif description_length > 100:
             project_score += 10
-        elif len(description) > 50:
+        elif description_length > 50:
             project_score += 5
         
         total_score += project_score
@@ -1333,427 +549,331 @@ def calculate_project_quality_score(candidate: Dict, required_skills: List[str])
 
 def calculate_company_score(candidate: Dict, intent: Dict[str, Any]) -> Dict[str, Any]:
     """Calculate company quality score"""
-    parsed = candidate.get("parsed_data", {})
-    experiences = parsed.get("experience", []) if parsed else []
+    company = get_candidate_features(candidate)["company"]
     
-    if not experiences:
+    if not company['has_experience']:
         return {
             'score': 0, 'top_companies': [], 'has_fulltime': False,
             'has_internship': False, 'company_count': 0
         }
     
-    top_companies = [
-        'google', 'microsoft', 'amazon', 'facebook', 'meta', 'apple',
-        'netflix', 'uber', 'airbnb', 'linkedin', 'twitter', 'tesla',
-        'ibm', 'oracle', 'salesforce', 'adobe', 'intel', 'nvidia',
-        'samsung', 'dell', 'cisco', 'vmware', 'sap', 'accenture',
-        'deloitte', 'wipro', 'tcs', 'infosys', 'cognizant', 'hcl',
-        'goldman sachs', 'morgan stanley', 'jp morgan', 'mckinsey',
-        'bain', 'bcg', 'stripe', 'spotify', 'slack', 'atlassian'
-    ]
-    
-    found_top_companies = []
-    has_fulltime = False
-    has_internship = False
-    score = 0
-    
-    for exp in experiences:
-        company = exp.get("Company", "")
-        role = exp.get("Role", "")
-        
-        if company:
-            company_lower = company.lower()
-            for top_co in top_companies:
-                if top_co in company_lower:
-                    found_top_companies.append(company)
-                    score += 25
-                    break
-        
-        if role:
-            role_lower = role.lower()
-            if any(term in role_lower for term in ['full-time', 'full time', 'engineer',
-                                                     'developer', 'manager', 'lead',
-                                                     'senior', 'architect']):
-                has_fulltime = True
-            
-            if 'intern' in role_lower:
-                has_internship = True
-    
-    if has_fulltime and has_internship:
-        score += 20
-    elif has_fulltime:
-        score += 15
-    elif has_internship:
-        score += 10
-    
-    score = min(100, score)
+    return {
+        'score': company['score'],
+        'top_companies': company['top_companies'],
+        'has_fulltime': company['has_fulltime'],
+        'has_internship': company['has_internship'],
+        'company_count': company['company_count']
+    }
+
+
+def build_score_breakdown(candidate: Dict, intent: Dict[str, Any]) -> Dict[str, Any]:
+    """Detailed per-component breakdown (only built for candidates that are returned)"""
+    skill_analysis = calculate_skill_proficiency_score(candidate, intent.get('skills', []))
+    experience_analysis = calculate_experience_score(candidate, intent)
+    education_analysis = calculate_education_score(candidate, intent.get('education_level'))
+    project_analysis = calculate_project_quality_score(candidate, intent.get('skills', []))
+    company_analysis = calculate_company_score(candidate, intent)
     
     return {
-        'score': score,
-        'top_companies': found_top_companies,
-        'has_fulltime': has_fulltime,
-        'has_internship': has_internship,
-        'company_count': len(found_top_companies)
+        'skill_score': round(skill_analysis['total_score'], 1),
+        'skill_details': skill_analysis,
+        'experience_score': round(experience_analysis['score'], 1),
+        'experience_details': experience_analysis,
+        'education_score': round(education_analysis['score'], 1),
+        'project_score': round(project_analysis['score'], 1),
+        'company_score': round(company_analysis['score'], 1),
+        'company_details': company_analysis,
+        'weights_used': select_weights(intent)
     }
 
 
-def rank_candidates(candidates: List[Dict], intent: Dict[str, Any]) -> List[CandidateScore]:
-    """Rank candidates based on query intent"""
-    scored_candidates = []
+def rank_candidates(candidates: List[Dict], intent: Dict[str, Any], top_n: Optional[int] = None, min_score: Optional[float] = None, apply_penalties: bool = True) -> List[CandidateScore]:
+    """
+    Rank candidates based on query intent.
     
-    for candidate in candidates:
-        try:
-            skill_analysis = calculate_skill_proficiency_score(candidate, intent.get('skills', []))
-            experience_analysis = calculate_experience_score(candidate, intent)
-            education_analysis = calculate_education_score(candidate, intent.get('education_level'))
-            project_analysis = calculate_project_quality_score(candidate, intent.get('skills', []))
-            company_analysis = calculate_company_score(candidate, intent)
-            
-            if intent.get('company_filter'):
-                weights = {
-                    'company': 0.50, 'experience': 0.25, 'skills': 0.15,
-                    'projects': 0.05, 'education': 0.05
-                }
-            elif intent.get('query_type') == 'ranking' and intent.get('skills'):
-                weights = {
-                    'skills': 0.45, 'projects': 0.30, 'experience': 0.15,
-                    'education': 0.05, 'company': 0.05
-                }
-            else:
-                weights = {
-                    'skills': 0.30, 'experience': 0.25, 'projects': 0.20,
-                    'company': 0.15, 'education': 0.10
-                }
-            
-            total_score = (
-                skill_analysis['total_score'] * weights['skills'] +
-                experience_analysis['score'] * weights['experience'] +
-                education_analysis['score'] * weights['education'] +
-                project_analysis['score'] * weights['projects'] +
-                company_analysis['score'] * weights.get('company', 0)
-            )
-            
-            if not experience_analysis['meets_min_requirement']:
-                total_score *= 0.5
-            
-            if not experience_analysis['meets_max_requirement']:
-                total_score *= 0.7
-            
-            if intent.get('education_level') is not None and not education_analysis['meets_requirement']:
-                total_score *= 0.8
-            
-            if intent.get('company_filter') and company_analysis['company_count'] == 0:
-                total_score *= 0.3
-            
-            score_breakdown = {
-                'skill_score': round(skill_analysis['total_score'], 1),
-                'skill_details': skill_analysis,
-                'experience_score': round(experience_analysis['score'], 1),
-                'experience_details': experience_analysis,
-                'education_score': round(education_analysis['score'], 1),
-                'project_score': round(project_analysis['score'], 1),
-                'company_score': round(company_analysis['score'], 1),
-                'company_details': company_analysis,
-                'weights_used': weights
-            }
-            
-            scored_candidates.append(CandidateScore(candidate, total_score, score_breakdown))
-        except Exception as e:
-            print(f"Error scoring candidate: {e}")
-            scored_candidates.append(CandidateScore(candidate, 0, {
-                'skill_score': 0, 'skill_details': {'total_score': 0},
-                'experience_score': 0, 'experience_details': {'score': 0},
-                'education_score': 0, 'project_score': 0,
-                'company_score': 0, 'company_details': {'score': 0},
-                'weights_used': {}
-            }))
+    All candidates are scored at once by the vectorized engine; only the
+    `top_n` best (above `min_score`, if given) get a detailed breakdown.
+    """
+    if not candidates:
+        return []
+    
+    scores = CandidateMatrix(candidates).score(intent, apply_penalties=apply_penalties)
+    top_indices = top_k_indices(scores, top_n, min_score)
     
-    scored_candidates.sort(key=lambda x: x.score, reverse=True)
-    return scored_candidates
+    return [
+        CandidateScore(candidates[i], float(scores[i]), build_score_breakdown(candidates[i], intent))
+        for i in top_indices
+    ]
 
 
-def format_ranked_candidates(ranked_candidates: List[CandidateScore], top_n: Optional[int] = None) -> str:
-    """Format candidates for LLM without exposing scores"""
-    if top_n:
-        ranked_candidates = ranked_candidates[:top_n]
+def candidate_prompt_block(idx: int, scored_candidate: CandidateScore) -> Dict[str, Any]:
+    """Detailed prompt block for one ranked candidate, without scores"""
+    candidate = scored_candidate.candidate
+    parsed = candidate.get("parsed_data", {})
     
-    formatted = []
+    candidate_info = {
+        "rank": idx,
+        "name": parsed.get("name", "Unknown") if parsed else "Unknown",
+        "email": parsed.get("email", "N/A") if parsed else "N/A",
+        "email_available": parsed.get("email") is not None and "@" in parsed.get("email", ""),
+        "phone": parsed.get("phone", "N/A") if parsed else "N/A",
+        "skills": (parsed.get("skills", []) + parsed.get("derived_skills", []))[:10] if parsed else [],
+    }
     
-    for idx, scored_candidate in enumerate(ranked_candidates, 1):
-        candidate = scored_candidate.candidate
-        parsed = candidate.get("parsed_data", {})
-        
-        candidate_info = {
-            "rank": idx,
-            "name": parsed.get("name", "Unknown") if parsed else "Unknown",
-            "email": parsed.get("email", "N/A") if parsed else "N/A",
-            "email_available": parsed.get("email") is not None and "@" in parsed.get("email", ""),
-            "phone": parsed.get("phone", "N/A") if parsed else "N/A",
-            "skills": (parsed.get("skills", []) + parsed.get("derived_skills", []))[:10] if parsed else [],
-        }
-        
-        experiences = parsed.get("experience", []) if parsed else []
-        if experiences:
-            exp_details = scored_candidate.score_breakdown.get('experience_details', {})
-            company_details = scored_candidate.score_breakdown.get('company_details', {})
-            
-            total_years_display = exp_details.get('total_years_display', '0 years')
-            candidate_info["experience"] = {
-                "total_years": total_years_display,
-                "roles": [
-                    {
-                        "role": exp.get("Role", "N/A"),
-                        "company": exp.get("Company", "N/A"),
-                        "duration": exp.get("Years", "N/A")
-                    }
-                    for exp in experiences[:3]
-                ],
-                "notable_companies": company_details.get('top_companies', []),
-                "has_fulltime": company_details.get('has_fulltime', False),
-                "has_internship": company_details.get('has_internship', False)
-            }
-        
-        education = parsed.get("education", []) if parsed else []
-        if education:
-            candidate_info["education"] = [
+    experiences = parsed.get("experience", []) if parsed else []
+    if experiences:
+        exp_details = scored_candidate.score_breakdown.get('experience_details', {})
+        company_details = scored_candidate.score_breakdown.get('company_details', {})
+        
+        total_years_display = exp_details.get('total_years_display', '0 years')
+        candidate_info["experience"] = {
+            "total_years": total_years_display,
+            "roles": [
                 {
-                    "degree": edu.get("Degree", "N/A"),
-                    "institution": edu.get("Institution", "N/A"),
-                    "year": edu.get("Year", "N/A")
+                    "role": exp.get("Role", "N/A"),
+                    "company": exp.get("Company", "N/A"),
+                    "duration": exp.get("Years", "N/A")
                 }
-                for edu in education[:2]
-            ]
-        
-        projects = parsed.get("projects", []) if parsed else []
-        if projects:
-            candidate_info["projects"] = [
+                for exp in experiences[:3]
+            ],
+            "notable_companies": company_details.get('top_companies', []),
+            "has_fulltime": company_details.get('has_fulltime', False),
+            "has_internship": company_details.get('has_internship', False)
+        }
+    
+    education = parsed.get("education", []) if parsed else []
+    if education:
+        candidate_info["education"] = [
+            {
+                "degree": edu.get("Degree", "N/A"),
+                "institution": edu.get("Institution", "N/A"),
+                "year": edu.get("Year", "N/A")
+            }
+            for edu in education[:2]
+        ]
+    
+    projects = parsed.get("projects", []) if parsed else []
+    if projects:
+        candidate_info["projects"] = [
+            {
+                "name": proj.get("Name", "Unnamed Project"),
+                "description": proj.get("Description", "")[:150] + "..." if len(proj.get("Description", "")) > 150 else proj.get("Description", "")
+            }
+            for proj in projects[:3]
+        ]
+    
+    skill_details = scored_candidate.score_breakdown.get('skill_details', {})
+    if skill_details.get('skill_breakdown'):
+        demonstrated_skills = []
+        for skill, details in skill_details['skill_breakdown'].items():
+            if details.get('score', 0) > 0:
+                evidence = details.get('evidence', [])
+                if evidence:
+                    demonstrated_skills.append({
+                        "skill": skill,
+                        "evidence": evidence[:2]
+                    })
+        if demonstrated_skills:
+            candidate_info["skill_evidence"] = demonstrated_skills
+    
+    return candidate_info
+
+
+def candidate_prompt_block_with_personal_info(idx: int, scored_candidate: CandidateScore) -> Dict[str, Any]:
+    """Detailed prompt block for one ranked candidate including personal information"""
+    candidate = scored_candidate.candidate
+    parsed = candidate.get("parsed_data", {})
+    
+    candidate_info = {
+        "rank": idx,
+        "name": parsed.get("name", "Unknown") if parsed else "Unknown",
+        "email": parsed.get("email", "N/A") if parsed else "N/A",
+        "email_available": parsed.get("email") is not None and "@" in parsed.get("email", ""),
+        "phone": parsed.get("phone", "N/A") if parsed else "N/A",
+    }
+    
+    # ==================== PERSONAL INFORMATION ====================
+    personal_info = {}
+    
+    if parsed.get("gender"):
+        personal_info["gender"] = parsed["gender"]
+    
+    if parsed.get("age"):
+        personal_info["age"] = parsed["age"]
+    elif parsed.get("date_of_birth"):
+        personal_info["date_of_birth"] = parsed["date_of_birth"]
+    
+    if parsed.get("current_location"):
+        personal_info["current_location"] = parsed["current_location"]
+    
+    if parsed.get("hometown"):
+        personal_info["hometown"] = parsed["hometown"]
+    
+    if parsed.get("nationality"):
+        personal_info["nationality"] = parsed["nationality"]
+    
+    if parsed.get("marital_status"):
+        personal_info["marital_status"] = parsed["marital_status"]
+    
+    if personal_info:
+        candidate_info["personal_information"] = personal_info
+    
+    # ==================== WORK-RELATED INFORMATION ====================
+    work_info = {}
+    
+    if parsed.get("notice_period"):
+        work_info["notice_period"] = parsed["notice_period"]
+    
+    if parsed.get("availability_date"):
+        work_info["availability_date"] = parsed["availability_date"]
+    
+    if parsed.get("willing_to_relocate") is not None:
+        work_info["willing_to_relocate"] = parsed["willing_to_relocate"]
+    
+    if parsed.get("preferred_locations"):
+        work_info["preferred_locations"] = parsed["preferred_locations"]
+    
+    if parsed.get("work_authorization"):
+        work_info["work_authorization"] = parsed["work_authorization"]
+    
+    if parsed.get("visa_status"):
+        work_info["visa_status"] = parsed["visa_status"]
+    
+    if parsed.get("expected_ctc"):
+        work_info["expected_ctc"] = parsed["expected_ctc"]
+    elif parsed.get("expected_salary"):
+        work_info["expected_salary"] = parsed["expected_salary"]
+    
+    if work_info:
+        candidate_info["work_information"] = work_info
+    
+    # ==================== PROFESSIONAL INFORMATION ====================
+    candidate_info["skills"] = (parsed.get("skills", []) + parsed.get("derived_skills", []))[:5] if parsed else []
+    
+    experiences = parsed.get("experience", []) if parsed else []
+    if experiences:
+        exp_details = scored_candidate.score_breakdown.get('experience_details', {})
+        company_details = scored_candidate.score_breakdown.get('company_details', {})
+        
+        total_years_display = exp_details.get('total_years_display', '0 years')
+        candidate_info["experience"] = {
+            "total_years": total_years_display,
+            "roles": [
                 {
-                    "name": proj.get("Name", "Unnamed Project"),
-                    "description": proj.get("Description", "")[:150] + "..." if len(proj.get("Description", "")) > 150 else proj.get("Description", "")
+                    "role": exp.get("Role", "N/A"),
+                    "company": exp.get("Company", "N/A"),
+                    "duration": exp.get("Years", "N/A")
                 }
-                for proj in projects[:3]
-            ]
-        
-        skill_details = scored_candidate.score_breakdown.get('skill_details', {})
-        if skill_details.get('skill_breakdown'):
-            demonstrated_skills = []
-            for skill, details in skill_details['skill_breakdown'].items():
-                if details.get('score', 0) > 0:
-                    evidence = details.get('evidence', [])
-                    if evidence:
-                        demonstrated_skills.append({
-                            "skill": skill,
-                            "evidence": evidence[:2]
-                        })
-            if demonstrated_skills:
-                candidate_info["skill_evidence"] = demonstrated_skills
-        
-        formatted.append(candidate_info)
+                for exp in experiences[:2]
+            ],
+            "notable_companies": company_details.get('top_companies', []),
+            "has_fulltime": company_details.get('has_fulltime', False),
+            "has_internship": company_details.get('has_internship', False)
+        }
     
-    return json.dumps(formatted, indent=2)
-
-def format_ranked_candidates_with_personal_info(ranked_candidates: List[CandidateScore], top_n: Optional[int] = None) -> str:
-    """Format candidates for LLM including personal information"""
-    if top_n:
-        ranked_candidates = ranked_candidates[:top_n]
+    # ==================== INTERNSHIPS ====================
+    internships = parsed.get("internships", []) if parsed else []
+    if internships:
+        candidate_info["internships"] = [
+            {
+                "company": intern.get("Company", "N/A"),
+                "role": intern.get("Role", "N/A"),
+                "duration": intern.get("Duration", "N/A")
+            }
+            for intern in internships[:3]
+        ]
     
-    formatted = []
+    # ==================== EDUCATION ====================
+    education = parsed.get("education", []) if parsed else []
+    if education:
+        edu_list = []
+        for edu in education[:1]:
+            edu_item = {
+                "degree": edu.get("Degree", "N/A"),
+                "institution": edu.get("Institution", "N/A"),
+                "year": edu.get("Year", "N/A")
+            }
+            if edu.get("Grade"):
+                edu_item["grade"] = edu["Grade"]
+            edu_list.append(edu_item)
+        
+        candidate_info["education"] = edu_list
+        
+        # Add academic marks if available
+        if parsed.get("tenth_marks"):
+            candidate_info["tenth_marks"] = parsed["tenth_marks"]
+        if parsed.get("twelfth_marks"):
+            candidate_info["twelfth_marks"] = parsed["twelfth_marks"]
+    
+    # ==================== GRADUATION INFO ====================
+    academic_info = {}
+    if parsed.get("graduation_year"):
+        academic_info["graduation_year"] = parsed["graduation_year"]
+    if parsed.get("current_year_of_study"):
+        academic_info["current_year_of_study"] = parsed["current_year_of_study"]
+    if parsed.get("university_roll_number"):
+        academic_info["university_roll_number"] = parsed["university_roll_number"]
+    
+    if academic_info:
+        candidate_info["academic_info"] = academic_info
+    
+    # ==================== PROJECTS ====================
+    projects = parsed.get("projects", []) if parsed else []
+    if projects:
+        candidate_info["projects"] = [
+            {
+                "name": proj.get("Name", "Unnamed Project"),
+                "description": proj.get("Description", "")[:150] + "..." if len(proj.get("Description", "")) > 150 else proj.get("Description", "")
+            }
+            for proj in projects[:2]
+        ]
     
-    for idx, scored_candidate in enumerate(ranked_candidates, 1):
-        candidate = scored_candidate.candidate
-        parsed = candidate.get("parsed_data", {})
-        
-        candidate_info = {
-            "rank": idx,
-            "name": parsed.get("name", "Unknown") if parsed else "Unknown",
-            "email": parsed.get("email", "N/A") if parsed else "N/A",
-            "email_available": parsed.get("email") is not None and "@" in parsed.get("email", ""),
-            "phone": parsed.get("phone", "N/A") if parsed else "N/A",
-        }
-        
-        # ==================== PERSONAL INFORMATION ====================
-        personal_info = {}
-        
-        if parsed.get("gender"):
-            personal_info["gender"] = parsed["gender"]
-        
-        if parsed.get("age"):
-            personal_info["age"] = parsed["age"]
-        elif parsed.get("date_of_birth"):
-            personal_info["date_of_birth"] = parsed["date_of_birth"]
-        
-        if parsed.get("current_location"):
-            personal_info["current_location"] = parsed["current_location"]
-        
-        if parsed.get("hometown"):
-            personal_info["hometown"] = parsed["hometown"]
-        
-        if parsed.get("nationality"):
-            personal_info["nationality"] = parsed["nationality"]
-        
-        if parsed.get("marital_status"):
-            personal_info["marital_status"] = parsed["marital_status"]
-        
-        if personal_info:
-            candidate_info["personal_information"] = personal_info
-        
-        # ==================== WORK-RELATED INFORMATION ====================
-        work_info = {}
-        
-        if parsed.get("notice_period"):
-            work_info["notice_period"] = parsed["notice_period"]
-        
-        if parsed.get("availability_date"):
-            work_info["availability_date"] = parsed["availability_date"]
-        
-        if parsed.get("willing_to_relocate") is not None:
-            work_info["willing_to_relocate"] = parsed["willing_to_relocate"]
-        
-        if parsed.get("preferred_locations"):
-            work_info["preferred_locations"] = parsed["preferred_locations"]
-        
-        if parsed.get("work_authorization"):
-            work_info["work_authorization"] = parsed["work_authorization"]
-        
-        if parsed.get("visa_status"):
-            work_info["visa_status"] = parsed["visa_status"]
-        
-        if parsed.get("expected_ctc"):
-            work_info["expected_ctc"] = parsed["expected_ctc"]
-        elif parsed.get("expected_salary"):
-            work_info["expected_salary"] = parsed["expected_salary"]
-        
-        if work_info:
-            candidate_info["work_information"] = work_info
-        
-        # ==================== PROFESSIONAL INFORMATION ====================
-        candidate_info["skills"] = (parsed.get("skills", []) + parsed.get("derived_skills", []))[:5] if parsed else []
-        
-        experiences = parsed.get("experience", []) if parsed else []
-        if experiences:
-            exp_details = scored_candidate.score_breakdown.get('experience_details', {})
-            company_details = scored_candidate.score_breakdown.get('company_details', {})
-            
-            total_years_display = exp_details.get('total_years_display', '0 years')
-            candidate_info["experience"] = {
-                "total_years": total_years_display,
-                "roles": [
-                    {
-                        "role": exp.get("Role", "N/A"),
-                        "company": exp.get("Company", "N/A"),
-                        "duration": exp.get("Years", "N/A")
-                    }
-                    for exp in experiences[:2]
-                ],
-                "notable_companies": company_details.get('top_companies', []),
-                "has_fulltime": company_details.get('has_fulltime', False),
-                "has_internship": company_details.get('has_internship', False)
+    # ==================== ADDITIONAL SECTIONS ====================
+    if parsed.get("certifications"):
+        candidate_info["certifications"] = [cert.get("Name", "N/A") for cert in parsed["certifications"][:3]]
+    
+    if parsed.get("achievements"):
+        candidate_info["achievements"] = [ach.get("Title", "N/A") for ach in parsed["achievements"][:3]]
+    
+    if parsed.get("extracurricular_activities"):
+        candidate_info["extracurricular"] = [
+            {
+                "activity": act.get("Activity", "N/A"),
+                "role": act.get("Role", "")
             }
-        
-        # ==================== INTERNSHIPS ====================
-        internships = parsed.get("internships", []) if parsed else []
-        if internships:
-            candidate_info["internships"] = [
-                {
-                    "company": intern.get("Company", "N/A"),
-                    "role": intern.get("Role", "N/A"),
-                    "duration": intern.get("Duration", "N/A")
-                }
-                for intern in internships[:3]
-            ]
-        
-        # ==================== EDUCATION ====================
-        education = parsed.get("education", []) if parsed else []
-        if education:
-            edu_list = []
-            for edu in education[:1]:
-                edu_item = {
-                    "degree": edu.get("Degree", "N/A"),
-                    "institution": edu.get("Institution", "N/A"),
-                    "year": edu.get("Year", "N/A")
-                }
-                if edu.get("Grade"):
-                    edu_item["grade"] = edu["Grade"]
-                edu_list.append(edu_item)
-            
-            candidate_info["education"] = edu_list
-            
-            # Add academic marks if available
-            if parsed.get("tenth_marks"):
-                candidate_info["tenth_marks"] = parsed["tenth_marks"]
-            if parsed.get("twelfth_marks"):
-                candidate_info["twelfth_marks"] = parsed["twelfth_marks"]
-        
-        # ==================== GRADUATION INFO ====================
-        academic_info = {}
-        if parsed.get("graduation_year"):
-            academic_info["graduation_year"] = parsed["graduation_year"]
-        if parsed.get("current_year_of_study"):
-            academic_info["current_year_of_study"] = parsed["current_year_of_study"]
-        if parsed.get("university_roll_number"):
-            academic_info["university_roll_number"] = parsed["university_roll_number"]
-        
-        if academic_info:
-            candidate_info["academic_info"] = academic_info
-        
-        # ==================== PROJECTS ====================
-        projects = parsed.get("projects", []) if parsed else []
-        if projects:
-            candidate_info["projects"] = [
-                {
-                    "name": proj.get("Name", "Unnamed Project"),
-                    "description": proj.get("Description", "")[:150] + "..." if len(proj.get("Description", "")) > 150 else proj.get("Description", "")
-                }
-                for proj in projects[:2]
-            ]
-        
-        # ==================== ADDITIONAL SECTIONS ====================
-        if parsed.get("certifications"):
-            candidate_info["certifications"] = [cert.get("Name", "N/A") for cert in parsed["certifications"][:3]]
-        
-        if parsed.get("achievements"):
-            candidate_info["achievements"] = [ach.get("Title", "N/A") for ach in parsed["achievements"][:3]]
-        
-        if parsed.get("extracurricular_activities"):
-            candidate_info["extracurricular"] = [
-                {
-                    "activity": act.get("Activity", "N/A"),
-                    "role": act.get("Role", "")
-                }
-                for act in parsed["extracurricular_activities"][:3]
-            ]
-        
-        if parsed.get("languages"):
-            candidate_info["languages"] = [
-                f"{lang.get('Language', 'N/A')} ({lang.get('Proficiency', 'N/A')})"
-                for lang in parsed["languages"][:5]
-            ]
-        
-        # ==================== SOCIAL LINKS ====================
-        social_links = {}
-        if parsed.get("linkedin_url"):
-            social_links["linkedin"] = parsed["linkedin_url"]
-        if parsed.get("github_url"):
-            social_links["github"] = parsed["github_url"]
-        if parsed.get("portfolio_url"):
-            social_links["portfolio"] = parsed["portfolio_url"]
-        
-        if social_links:
-            candidate_info["social_links"] = social_links
-        
-        # ==================== UNIVERSITY RECRUITMENT SPECIFIC ====================
-        if parsed.get("placement_preferences"):
-            candidate_info["placement_preferences"] = parsed["placement_preferences"]
-        
-        if parsed.get("preferred_job_role"):
-            candidate_info["preferred_job_role"] = parsed["preferred_job_role"]
-        
-        if parsed.get("preferred_industry"):
-            candidate_info["preferred_industry"] = parsed["preferred_industry"]
-        
-        formatted.append(candidate_info)
+            for act in parsed["extracurricular_activities"][:3]
+        ]
+    
+    if parsed.get("languages"):
+        candidate_info["languages"] = [
+            f"{lang.get('Language', 'N/A')} ({lang.get('Proficiency', 'N/A')})"
+            for lang in parsed["languages"][:5]
+        ]
+    
+    # ==================== SOCIAL LINKS ====================
+    social_links = {}
+    if parsed.get("linkedin_url"):
+        social_links["linkedin"] = parsed["linkedin_url"]
+    if parsed.get("github_url"):
+        social_links["github"] = parsed["github_url"]
+    if parsed.get("portfolio_url"):
+        social_links["portfolio"] = parsed["portfolio_url"]
+    
+    if social_links:
+        candidate_info["social_links"] = social_links
+    
+    # ==================== UNIVERSITY RECRUITMENT SPECIFIC ====================
+    if parsed.get("placement_preferences"):
+        candidate_info["placement_preferences"] = parsed["placement_preferences"]
+    
+    if parsed.get("preferred_job_role"):
+        candidate_info["preferred_job_role"] = parsed["preferred_job_role"]
     
-    return json.dumps(formatted, indent=2)
+    if parsed.get("preferred_industry"):
+        candidate_info["preferred_industry"] = parsed["preferred_industry"]
+    
+    return candidate_info
+
 
 def create_enhanced_prompt_with_personal_info(query: str, ranked_data: str, intent: Dict, total_shown: int, total_unique: int, total_after_filter: int, conversation_history: List[ChatMessage] = []) -> str:
     """
@@ -1805,9 +925,8 @@ These candidates are ranked based on overall fit, considering:
     # Build conversation context
     conversation_context = ""
     if conversation_history:
-        recent_history = conversation_history[-4:]
         conversation_context = "\n\nCONVERSATION HISTORY:\n"
-        for msg in recent_history:
+        for msg in recent_history(conversation_history):
             conversation_context += f"{msg.role.upper()}: {msg.content}\n"
         conversation_context += "\nUse this context to provide more relevant and personalized responses.\n"
     
@@ -1888,9 +1007,8 @@ These candidates are ranked based on overall fit, considering:
     # Build conversation context
     conversation_context = ""
     if conversation_history:
-        recent_history = conversation_history[-4:]  # Last 4 messages
         conversation_context = "\n\nCONVERSATION HISTORY:\n"
-        for msg in recent_history:
+        for msg in recent_history(conversation_history):  # Last 4 messages that fit the budget
             conversation_context += f"{msg.role.upper()}: {msg.content}\n"
         conversation_context += "\nUse this context to provide more relevant and personalized responses.\n"
     
@@ -1934,7 +1052,7 @@ LIST REQUESTED:
 {ranking_context}
 
 CANDIDATE DATA:
-{ranked_data[:12000]}
+{ranked_data}
 {conversation_context}
 
 USER QUERY: "{query}"
@@ -1985,221 +1103,316 @@ Now respond to: "{query}"
     return prompt
 
 
-@router.post("/chatbot", dependencies=[Depends(require_recruiter)])
-async def chatbot_query(
-    request: ChatRequest,
-    current_user: dict = Depends(get_current_active_user)
-):
+async def hydrate_ranked_candidates(ranked_candidates: List[CandidateScore]):
+    """Swap the lightweight ranking candidates for full resume documents"""
+    docs = await resume_history_repository.find_by_ids(scored.candidate["_id"] for scored in ranked_candidates)
+    full_docs = {str(doc["_id"]): doc for doc in docs}
+    for scored in ranked_candidates:
+        doc = full_docs.get(scored.candidate["_id"])
+        if doc is not None:
+            doc["_id"] = str(doc["_id"])
+            # Keep the feature document: it carries the cached compact prompt summary
+            doc["features"] = scored.candidate.get("features")
+            scored.candidate = doc
+
+
+async def shortlist_candidates(recruiter_email: str, intent: Dict[str, Any], top_n: int, has_personal_filters: bool):
     """
-    ENHANCED: Chatbot with better query understanding and conversational ability
-    WITH INTEGRATED LOCATION MATCHING AND EMAIL SUPPORT
-    FIX: Now respects exact number requested (4, 10, etc.) or defaults to 5
+    Fetch, filter, rank and hydrate the recruiter's candidates for an intent.
+    Returns (candidates analyzed, candidates left after filters, ranked shortlist).
     """
-    try:
-        print(f"Received query: {request.query}")
+    # Fetch precomputed candidate features (full resumes are loaded only for the shortlist).
+    # Duplicates are rejected at insert by the dedup index, so these are already distinct.
+    unique_candidates = [
+        as_ranking_candidate(doc) for doc in await asyncio.to_thread(load_candidate_features, recruiter_email)
+    ]
+    
+    if not unique_candidates:
+        return 0, 0, []
+    
+    print(f"Unique candidates: {len(unique_candidates)}")
+    
+    # Personal filters are hard requirements; the standard path penalizes misses instead
+    if has_personal_filters:
+        print("🔍 Using personal info filtering with location_utils")
+        ranking_pool = filter_candidates_by_personal_info(unique_candidates, intent)
+    else:
+        print("🔍 Using standard ranking")
+        ranking_pool = unique_candidates
+    
+    total_after_filter = len(ranking_pool)
+    
+    # Filter out very low scores (below 10) but only if we have enough candidates
+    # This prevents showing candidates with extremely low relevance
+    min_score = None
+    if total_after_filter > top_n * 2:  # Only filter if we have excess
+        min_score = 10
+        print(f"📊 Dropping candidates scoring 10 or less")
+    
+    # Score everyone in one vectorized pass, keep only the top N
+    ranked_candidates = rank_candidates(
+        ranking_pool,
+        intent,
+        top_n=top_n,
+        min_score=min_score,
+        apply_penalties=not has_personal_filters
+    )
+    
+    actual_count = len(ranked_candidates)
+    total_after_filter = actual_count if actual_count < total_after_filter else total_after_filter
+    print(f"📊 Returning {actual_count} candidates (requested: {top_n}, matched filters: {total_after_filter})")
+    
+    if ranked_candidates:
+        await hydrate_ranked_candidates(ranked_candidates)
+    return len(unique_candidates), total_after_filter, ranked_candidates
+
+
+def frontend_candidate_list(ranked_candidates: List[CandidateScore]) -> List[Dict[str, Any]]:
+    """Format candidates for frontend display (with email info)"""
+    frontend_candidates = []
+    for scored_candidate in ranked_candidates:
+        candidate = scored_candidate.candidate
+        parsed = candidate.get("parsed_data", {})
         
-        # Handle empty queries
-        if not request.query or not request.query.strip():
-            return {
-                "response": "I didn't receive a question. How can I help you find candidates?",
-                "candidates": [],
-                "candidates_analyzed": 0,
-                "candidates_shown": 0
-            }
+        # Get top skills
+        skills = parsed.get("skills", [])
+        if not skills:
+            skills = parsed.get("derived_skills", [])
+        top_skills = skills[:5] if skills else []
+        
+        # Get experience summary
+        experience = parsed.get("experience", [])
+        experience_summary = ""
+        if experience:
+            latest_exp = experience[0]
+            exp_title = latest_exp.get("Role", latest_exp.get("title", "Role"))
+            exp_company = latest_exp.get("Company", latest_exp.get("company", "Company"))
+            experience_summary = f"{exp_title} at {exp_company}"
+        
+        # Get education summary
+        education = parsed.get("education", [])
+        education_summary = ""
+        if education:
+            edu = education[0]
+            edu_degree = edu.get("Degree", "Degree")
+            edu_field = edu.get("Field", edu.get("discipline", ""))
+            edu_institution = edu.get("Institution", edu.get("university", "University"))
+            education_summary = f"{edu_degree} in {edu_field} from {edu_institution}"
         
-        # Fetch candidates
-        all_candidates = list(resume_history_collection.find(
-            {"recruiter_email": current_user.email}
-        ).sort("parsed_at", -1))
+        # CRITICAL: Get email
+        email = parsed.get("email")
         
-        if not all_candidates:
+        frontend_candidates.append({
+            "id": candidate["_id"],
+            "name": parsed.get("name", "Unknown"),
+            "email": email,
+            "email_available": email is not None and "@" in str(email),
+            "phone": parsed.get("phone"),
+            "current_location": parsed.get("current_location"),
+            "experience_summary": experience_summary,
+            "education_summary": education_summary,
+            "skills": top_skills,
+            "experience_years": len(experience),
+            "current_ctc": parsed.get("current_ctc"),
+            "expected_ctc": parsed.get("expected_ctc"),
+            "notice_period": parsed.get("notice_period"),
+            "relevance_score": round(scored_candidate.score, 1) if hasattr(scored_candidate, 'score') else None,
+            "linkedin_url": parsed.get("linkedin_url"),
+            "github_url": parsed.get("github_url")
+        })
+    
+    return frontend_candidates
+
+
+async def plan_chat_response(request: ChatRequest, recruiter_email: str) -> Dict[str, Any]:
+    """
+    Everything before the LLM call, shared by /chatbot and /chatbot/stream.
+
+    Returns either a finished response (it has a "response" key: empty query,
+    no candidates, cached answer) or a plan with the prompt, the candidates
+    for the frontend and what is needed to cache the answer.
+    """
+    print(f"Received query: {request.query}")
+    
+    # Handle empty queries
+    if not request.query or not request.query.strip():
+        return {
+            "response": "I didn't receive a question. How can I help you find candidates?",
+            "candidates": [],
+            "candidates_analyzed": 0,
+            "candidates_shown": 0
+        }
+    
+    # Extract intent (now with integrated location_utils)
+    intent = extract_query_intent(request.query)
+    print(f"Query intent: {intent}")
+    
+    # Check if personal information filters are present
+    has_personal_filters = any([
+        intent.get('gender'),
+        intent.get('age_min'),
+        intent.get('age_max'),
+        intent.get('location'),
+        intent.get('locations'),
+        intent.get('nationality'),
+        intent.get('marital_status'),
+        intent.get('notice_period'),
+        intent.get('willing_to_relocate'),
+        intent.get('salary_min'),
+        intent.get('salary_max'),
+        intent.get('graduation_year'),
+        intent.get('current_students_only')
+    ])
+    
+    # ================ FIXED: Determine how many candidates to show ================
+    # Get requested number from intent (if any)
+    requested_count = intent.get('top_n')
+    
+    if requested_count:
+        # User specifically asked for a number (e.g., "10 candidates", "top 4")
+        top_n = requested_count
+        print(f"📊 User explicitly requested {top_n} candidates")
+    else:
+        # No specific number requested, default to 5
+        top_n = 5
+        print(f"📊 No number specified, defaulting to {top_n} candidates")
+    
+    # Repeated questions: same intent and an unchanged candidate set reuse the
+    # ranked shortlist (and, without conversation history, the answer)
+    version = await asyncio.to_thread(candidate_set_version, recruiter_email)
+    cache_key = chat_query_cache.make_key(recruiter_email, version, {**intent, "top_n": top_n})
+    cached = chat_query_cache.get(cache_key)
+    reuse_answer = CHATBOT_CACHE_REUSE_ANSWER if request.reuse_answer is None else request.reuse_answer
+    shareable_answer = not request.conversation_history
+    
+    if cached is not None and cached.get("response") and reuse_answer and shareable_answer:
+        chat_query_cache.count_answer_hit()
+        print("⚡ Query cache hit: reusing the previous answer")
+        return {**cached["response"], "cached": True}
+    
+    if cached is not None:
+        print(f"⚡ Query cache hit: reusing {len(cached['ranked'])} ranked candidates")
+        candidates_analyzed = cached["candidates_analyzed"]
+        total_after_filter = cached["total_after_filter"]
+        ranked_candidates = cached["ranked"]
+    else:
+        candidates_analyzed, total_after_filter, ranked_candidates = await shortlist_candidates(
+            recruiter_email, intent, top_n, has_personal_filters
+        )
+        if ranked_candidates:
+            chat_query_cache.put(cache_key, {
+                "candidates_analyzed": candidates_analyzed,
+                "total_after_filter": total_after_filter,
+                "ranked": ranked_candidates,
+            })
+    
+    if candidates_analyzed == 0:
+        return {
+            "response": "You don't have any candidates in your database yet. Please upload some resumes first to get started.",
+            "candidates": [],
+            "candidates_analyzed": 0,
+            "candidates_shown": 0
+        }
+    
+    actual_count = len(ranked_candidates)
+    
+    if not ranked_candidates:
+        if has_personal_filters:
             return {
-                "response": "You don't have any candidates in your database yet. Please upload some resumes first to get started.",
+                "response": f"I analyzed {candidates_analyzed} candidates, but none matched your specific criteria for '{request.query}'. Try broadening your search criteria or remove some filters.",
                 "candidates": [],
-                "candidates_analyzed": 0,
+                "candidates_analyzed": candidates_analyzed,
                 "candidates_shown": 0
             }
-        
-        # Convert and deduplicate
-        for candidate in all_candidates:
-            candidate["_id"] = str(candidate["_id"])
-        
-        unique_candidates = deduplicate_candidates(all_candidates)
-        
-        if not unique_candidates:
+        else:
             return {
-                "response": "No distinct candidates found in your database.",
+                "response": f"I analyzed {candidates_analyzed} candidates, but none closely matched your criteria for '{request.query}'. Try broadening your search or rephrase your question.",
                 "candidates": [],
-                "candidates_analyzed": 0,
+                "candidates_analyzed": candidates_analyzed,
                 "candidates_shown": 0
             }
-        
-        print(f"Total: {len(all_candidates)}, Unique: {len(unique_candidates)}")
-        
-        # Extract intent (now with integrated location_utils)
-        intent = extract_query_intent(request.query)
-        print(f"Query intent: {intent}")
-        
-        # Check if personal information filters are present
-        has_personal_filters = any([
-            intent.get('gender'),
-            intent.get('age_min'),
-            intent.get('age_max'),
-            intent.get('location'),
-            intent.get('locations'),
-            intent.get('nationality'),
-            intent.get('marital_status'),
-            intent.get('notice_period'),
-            intent.get('willing_to_relocate'),
-            intent.get('salary_min'),
-            intent.get('salary_max'),
-            intent.get('graduation_year'),
-            intent.get('current_students_only')
-        ])
-        
-        # Use appropriate ranking function based on whether personal filters exist
-        if has_personal_filters:
-            print("🔍 Using personal info filtering with location_utils")
-            ranked_candidates = rank_candidates_with_personal_info(unique_candidates, intent)
-        else:
-            print("🔍 Using standard ranking")
-            ranked_candidates = rank_candidates(unique_candidates, intent)
+    
+    # Format for LLM - use actual_count instead of top_n
+    if has_personal_filters:
+        build_block = candidate_prompt_block_with_personal_info
 
-        total_after_filter = len(ranked_candidates)
-        
-        # ================ FIXED: Determine how many candidates to show ================
-        # Get requested number from intent (if any)
-        requested_count = intent.get('top_n')
-        
-        if requested_count:
-            # User specifically asked for a number (e.g., "10 candidates", "top 4")
-            top_n = requested_count
-            print(f"📊 User explicitly requested {top_n} candidates")
-        else:
-            # No specific number requested, default to 5
-            top_n = 5
-            print(f"📊 No number specified, defaulting to {top_n} candidates")
-        
-        # Filter out very low scores (below 10) but only if we have enough candidates
-        # This prevents showing candidates with extremely low relevance
-        if len(ranked_candidates) > top_n * 2:  # Only filter if we have excess
-            ranked_candidates = [c for c in ranked_candidates if c.score > 10]
-            print(f"📊 Filtered out low-scoring candidates, remaining: {len(ranked_candidates)}")
-        
-        # Take the top N based on what was requested
-        ranked_candidates = ranked_candidates[:min(top_n, len(ranked_candidates))]
-        
-        actual_count = len(ranked_candidates)
-        total_after_filter = actual_count if actual_count < total_after_filter else total_after_filter
-        print(f"📊 Returning {actual_count} candidates (requested: {top_n}, matched filters: {total_after_filter})")
-        # ==============================================================================
-        
-        if not ranked_candidates:
-            if has_personal_filters:
-                return {
-                    "response": f"I analyzed {len(unique_candidates)} candidates, but none matched your specific criteria for '{request.query}'. Try broadening your search criteria or remove some filters.",
-                    "candidates": [],
-                    "candidates_analyzed": len(unique_candidates),
-                    "candidates_shown": 0
-                }
-            else:
-                return {
-                    "response": f"I analyzed {len(unique_candidates)} candidates, but none closely matched your criteria for '{request.query}'. Try broadening your search or rephrase your question.",
-                    "candidates": [],
-                    "candidates_analyzed": len(unique_candidates),
-                    "candidates_shown": 0
-                }
-        
-        # Format for LLM - use actual_count instead of top_n
-        if has_personal_filters:
-            ranked_data = format_ranked_candidates_with_personal_info(ranked_candidates, actual_count)
-            prompt = create_enhanced_prompt_with_personal_info(
+        def build_prompt(ranked_data: str) -> str:
+            return create_enhanced_prompt_with_personal_info(
                 request.query,
                 ranked_data,
                 intent,
                 actual_count,  # Pass actual number shown
-                len(unique_candidates),
+                candidates_analyzed,
                 total_after_filter,
                 request.conversation_history
             )
-        else:
-            ranked_data = format_ranked_candidates(ranked_candidates, actual_count)
-            prompt = create_enhanced_prompt(
+    else:
+        build_block = candidate_prompt_block
+
+        def build_prompt(ranked_data: str) -> str:
+            return create_enhanced_prompt(
                 request.query,
                 ranked_data,
                 intent,
                 actual_count,  # Pass actual number shown
-                len(unique_candidates),
+                candidates_analyzed,
                 request.conversation_history
             )
-        
-        print(f"Sending {actual_count} candidates to LLM")
+    
+    # Pack whole candidates into the token budget: detailed blocks for the best
+    # ranked, cached compact summaries for the rest, never a half candidate
+    packed = pack_candidates(
+        [build_block(idx, scored) for idx, scored in enumerate(ranked_candidates, 1)],
+        [
+            {"rank": idx, **get_candidate_features(scored.candidate)["prompt_summary"]}
+            for idx, scored in enumerate(ranked_candidates, 1)
+        ],
+        candidate_budget(build_prompt("")),
+    )
+    prompt = build_prompt(packed.text)
+    
+    print(f"Sending {actual_count} candidates to LLM: {packed.detailed} detailed, {packed.compact} compact, "
+          f"{packed.omitted} omitted ({count_tokens(prompt)} prompt tokens)")
+    
+    return {
+        "prompt": prompt,
+        "candidates": frontend_candidate_list(ranked_candidates),
+        "candidates_analyzed": candidates_analyzed,
+        "cache_key": cache_key,
+        "shareable_answer": shareable_answer,
+    }
+
+
+@router.post("/chatbot", dependencies=[Depends(require_recruiter)])
+async def chatbot_query(
+    request: ChatRequest,
+    current_user: dict = Depends(get_current_active_user)
+):
+    """
+    ENHANCED: Chatbot with better query understanding and conversational ability
+    WITH INTEGRATED LOCATION MATCHING AND EMAIL SUPPORT
+    FIX: Now respects exact number requested (4, 10, etc.) or defaults to 5
+    """
+    try:
+        plan = await plan_chat_response(request, current_user.email)
+        if "prompt" not in plan:
+            return plan
         
         # Call Groq with higher temperature for natural responses
-        response = await call_groq_api(prompt, temperature=0.8)
+        response = await call_groq_api(plan["prompt"], temperature=0.8)
         
         if "choices" in response and len(response["choices"]) > 0:
             ai_response = response["choices"][0]["message"]["content"]
             
-            # Format candidates for frontend display (with email info)
-            frontend_candidates = []
-            for scored_candidate in ranked_candidates:
-                candidate = scored_candidate.candidate
-                parsed = candidate.get("parsed_data", {})
-                
-                # Get top skills
-                skills = parsed.get("skills", [])
-                if not skills:
-                    skills = parsed.get("derived_skills", [])
-                top_skills = skills[:5] if skills else []
-                
-                # Get experience summary
-                experience = parsed.get("experience", [])
-                experience_summary = ""
-                if experience:
-                    latest_exp = experience[0]
-                    exp_title = latest_exp.get("Role", latest_exp.get("title", "Role"))
-                    exp_company = latest_exp.get("Company", latest_exp.get("company", "Company"))
-                    experience_summary = f"{exp_title} at {exp_company}"
-                
-                # Get education summary
-                education = parsed.get("education", [])
-                education_summary = ""
-                if education:
-                    edu = education[0]
-                    edu_degree = edu.get("Degree", "Degree")
-                    edu_field = edu.get("Field", edu.get("discipline", ""))
-                    edu_institution = edu.get("Institution", edu.get("university", "University"))
-                    education_summary = f"{edu_degree} in {edu_field} from {edu_institution}"
-                
-                # CRITICAL: Get email
-                email = parsed.get("email")
-                
-                frontend_candidates.append({
-                    "id": candidate["_id"],
-                    "name": parsed.get("name", "Unknown"),
-                    "email": email,
-                    "email_available": email is not None and "@" in str(email),
-                    "phone": parsed.get("phone"),
-                    "current_location": parsed.get("current_location"),
-                    "experience_summary": experience_summary,
-                    "education_summary": education_summary,
-                    "skills": top_skills,
-                    "experience_years": len(experience),
-                    "current_ctc": parsed.get("current_ctc"),
-                    "expected_ctc": parsed.get("expected_ctc"),
-                    "notice_period": parsed.get("notice_period"),
-                    "relevance_score": round(scored_candidate.score, 1) if hasattr(scored_candidate, 'score') else None,
-                    "linkedin_url": parsed.get("linkedin_url"),
-                    "github_url": parsed.get("github_url")
-                })
-            
-            return {
+            result = {
                 "response": ai_response,
-                "candidates": frontend_candidates,  # This is what the frontend needs for emails
-                "candidates_analyzed": len(unique_candidates),
-                "candidates_shown": len(frontend_candidates)
+                "candidates": plan["candidates"],  # This is what the frontend needs for emails
+                "candidates_analyzed": plan["candidates_analyzed"],
+                "candidates_shown": len(plan["candidates"])
             }
+            if plan["shareable_answer"]:
+                chat_query_cache.record_answer(plan["cache_key"], result)
+            return {**result, "cached": False}
         else:
             raise Exception("Invalid API response")
             
@@ -2215,6 +1428,75 @@ async def chatbot_query(
         }
 
 
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@router.post("/chatbot/stream", dependencies=[Depends(require_recruiter)])
+async def chatbot_query_stream(
+    request: ChatRequest,
+    current_user: dict = Depends(get_current_active_user)
+):
+    """
+    Streaming variant of /chatbot (server-sent events). The ranked candidates
+    are sent as soon as ranking is done, then the answer as Groq generates it:
+
+        event: candidates   {candidates, candidates_analyzed, candidates_shown, cached}
+        event: token        {text}        (repeated)
+        event: done         {response}    (the full answer)
+        event: error        {message}     (instead of done)
+    """
+    recruiter_email = current_user.email
+
+    async def events():
+        try:
+            plan = await plan_chat_response(request, recruiter_email)
+            candidates = plan["candidates"]
+            yield _sse("candidates", {
+                "candidates": candidates,
+                "candidates_analyzed": plan["candidates_analyzed"],
+                "candidates_shown": len(candidates),
+                "cached": plan.get("cached", False),
+            })
+
+            # Finished without the LLM (empty query, no matches, cached answer)
+            if "prompt" not in plan:
+                yield _sse("token", {"text": plan["response"]})
+                yield _sse("done", {"response": plan["response"]})
+                return
+
+            parts = []
+            async for text in stream_groq_api(plan["prompt"], temperature=0.8):
+                parts.append(text)
+                yield _sse("token", {"text": text})
+
+            ai_response = "".join(parts)
+            if not ai_response:
+                raise Exception("Empty API response")
+            if plan["shareable_answer"]:
+                chat_query_cache.record_answer(plan["cache_key"], {
+                    "response": ai_response,
+                    "candidates": candidates,
+                    "candidates_analyzed": plan["candidates_analyzed"],
+                    "candidates_shown": len(candidates)
+                })
+            yield _sse("done", {"response": ai_response})
+
+        except Exception as e:
+            print(f"Error in chatbot stream: {str(e)}")
+            print(traceback.format_exc())
+            yield _sse("error", {
+                "message": "I apologize, but I encountered an error while processing your query. Please try rephrasing your question or check if you have candidates in your database."
+            })
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Keep proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post("/chatbot/generate-email", response_model=EmailResponse, dependencies=[Depends(require_recruiter)])
 async def generate_candidate_email(
     request: EmailRequest,
@@ -2262,7 +1544,7 @@ async def generate_candidate_email(
         
         # Fetch candidate from database
         try:
-            candidate = resume_history_collection.find_one({"_id": ObjectId(candidate_id_str)})
+            candidate = await resume_history_repository.get(candidate_id_str)
         except Exception as db_error:
             print(f"❌ DATABASE ERROR: {str(db_error)}")
             raise HTTPException(
@@ -2349,53 +1631,48 @@ async def generate_candidate_email(
         )
 
 async def call_groq_api(prompt: str, temperature: float = 0.7):
-    """Call Groq API"""
-    headers = {
-        "Authorization": f"Bearer {GROQ_API_KEY}",
-        "Content-Type": "application/json",
-    }
-
-    if len(prompt) > 20000:
-        prompt = prompt[:20000] + "\n\n[Data truncated to fit context limit]"
-    
-    payload = {
-        "model": GROQ_PARSING_MODEL,
-        "messages": [{"role": "user", "content": prompt}],
-        "temperature": temperature,
-        "max_tokens": 1500
-    }
-
-    async with httpx.AsyncClient(timeout=60) as client:
-        response = await client.post(GROQ_URL, headers=headers, json=payload)
-        response.raise_for_status()
-        return response.json()
+    """Call Groq API (prompts are sized by services/prompt_budget.py, never truncated here)"""
+    response = await groq_client.chat_completion(
+        prompt,
+        model=GROQ_PARSING_MODEL,
+        temperature=temperature,
+        max_tokens=1500,
+        timeout=60,
+        purpose="chatbot",
+    )
+    return response.json()
+
+
+def stream_groq_api(prompt: str, temperature: float = 0.7):
+    """Stream the Groq completion as content deltas"""
+    return groq_client.chat_completion_stream(
+        prompt,
+        model=GROQ_PARSING_MODEL,
+        temperature=temperature,
+        max_tokens=1500,
+        timeout=60,
+        purpose="chatbot",
+    )
 
 
 @router.get("/chatbot/stats", dependencies=[Depends(require_recruiter)])
 async def get_chatbot_stats(current_user: dict = Depends(get_current_active_user)):
     """Get chatbot statistics"""
     try:
-        all_candidates = list(resume_history_collection.find(
-            {"recruiter_email": current_user.email}
-        ))
-        
-        for candidate in all_candidates:
-            candidate["_id"] = str(candidate["_id"])
-        
-        unique_candidates = deduplicate_candidates(all_candidates)
+        unique_candidates = [
+            as_ranking_candidate(doc) for doc in await asyncio.to_thread(load_candidate_features, current_user.email)
+        ]
         
         all_skills = set()
         for candidate in unique_candidates:
-            parsed = candidate.get("parsed_data", {})
-            if parsed:
-                skills = parsed.get("skills", []) + parsed.get("derived_skills", [])
-                all_skills.update([s.lower() for s in skills if s])
+            all_skills.update(candidate["features"]["skills"])
         
         return {
             "total_candidates": len(unique_candidates),
             "unique_skills": len(all_skills),
             "top_skills": list(all_skills)[:20] if all_skills else [],
-            "total_in_database": len(all_candidates)
+            "total_in_database": await resume_history_repository.count_for_recruiter(current_user.email),
+            "query_cache": chat_query_cache.stats()
         }
         
     except Exception as e:
@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel
 from models.user import UserOut, UserInDB, UserRole
 from dependencies.auth import get_current_active_user
-from core.database import users_collection
+from repositories import users_repository
 from core.security import get_password_hash, create_access_token
 from core.config import ACCESS_TOKEN_EXPIRE_MINUTES
 from datetime import timedelta
@@ -53,8 +53,7 @@ async def update_profile(
     
     if update_data.email and update_data.email != current_user.email:
         # Check if new email already exists
-        existing_user = users_collection.find_one({"email": update_data.email})
-        if existing_user:
+        if await users_repository.email_exists(update_data.email):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already registered by another user."
@@ -72,18 +71,15 @@ async def update_profile(
         )
 
     # Update user in database
-    result = users_collection.update_one(
-        {"username": current_user.username},
-        {"$set": update_fields}
-    )
+    modified = await users_repository.update_by_username(current_user.username, update_fields)
 
-    if result.modified_count == 0:
+    if modified == 0:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found or no changes made."
         )
 
-    updated_user = users_collection.find_one({"username": current_user.username})
+    updated_user = await users_repository.find_by_username(current_user.username)
 
     response_data = {
         "user": UserOut(
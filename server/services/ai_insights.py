@@ -1,8 +1,8 @@
 import json
 import httpx
-import asyncio
 import re
-from core.config import GROQ_API_KEY, GROQ_URL, GROQ_INSIGHTS_MODEL
+from core.config import GROQ_INSIGHTS_MODEL
+from services.groq_client import groq_client
 
 
 def create_insights_prompt(resume_data):
@@ -42,64 +42,23 @@ async def call_groq_for_insights(prompt, temperature=0.7, max_retries=3):
     """
     Call Groq API specifically for insights generation with retry logic
     """
-    headers = {
-        "Authorization": f"Bearer {GROQ_API_KEY}",
-        "Content-Type": "application/json",
-    }
-
-    payload = {
-        "model": GROQ_INSIGHTS_MODEL,
-        "messages": [{"role": "user", "content": prompt}],
-        "temperature": temperature,
-        "max_tokens": 2000
-    }
-
-    last_error = None
-    
-    for attempt in range(max_retries):
-        try:
-            async with httpx.AsyncClient(timeout=90) as client:
-                response = await client.post(GROQ_URL, headers=headers, json=payload)
-                
-                # Check for rate limiting
-                if response.status_code == 429:
-                    wait_time = min((2 ** attempt) * 2, 30)  # Exponential backoff
-                    print(f"Rate limited. Waiting {wait_time}s before retry {attempt + 1}/{max_retries}")
-                    await asyncio.sleep(wait_time)
-                    continue
-                
-                # Raise for other HTTP errors
-                response.raise_for_status()
-                return response
-                
-        except httpx.TimeoutException as e:
-            last_error = f"Request timeout (attempt {attempt + 1}/{max_retries})"
-            print(last_error)
-            if attempt < max_retries - 1:
-                await asyncio.sleep(2 ** attempt)
-                continue
-                
-        except httpx.HTTPStatusError as e:
-            last_error = f"HTTP {e.response.status_code}: {e.response.text}"
-            print(f"API error (attempt {attempt + 1}/{max_retries}): {last_error}")
-            
-            # Don't retry on client errors (4xx except 429)
-            if 400 <= e.response.status_code < 500 and e.response.status_code != 429:
-                raise
-                
-            if attempt < max_retries - 1:
-                await asyncio.sleep(2 ** attempt)
-                continue
-                
-        except Exception as e:
-            last_error = str(e)
-            print(f"Unexpected error (attempt {attempt + 1}/{max_retries}): {last_error}")
-            if attempt < max_retries - 1:
-                await asyncio.sleep(2 ** attempt)
-                continue
-    
-    # All retries exhausted
-    raise Exception(f"Failed after {max_retries} attempts. Last error: {last_error}")
+    try:
+        return await groq_client.chat_completion(
+            prompt,
+            model=GROQ_INSIGHTS_MODEL,
+            temperature=temperature,
+            max_tokens=2000,
+            timeout=90,
+            max_retries=max_retries,
+            purpose="insights",
+        )
+    except httpx.HTTPStatusError as e:
+        # Client errors (4xx other than 429) are surfaced as-is
+        if 400 <= e.response.status_code < 500 and e.response.status_code != 429:
+            raise
+        raise Exception(f"Failed after {max_retries} attempts. Last error: {str(e)}")
+    except Exception as e:
+        raise Exception(f"Failed after {max_retries} attempts. Last error: {str(e)}")
 
 
 def parse_insights_response(response_text):
@@ -0,0 +1,170 @@
+"""
+Batched multi-resume parsing.
+
+The single-resume prompt carries the full JSON schema (~5k characters), so
+every Groq call pays for it again. ResumeBatchParser sits in front of
+parse_prepared_resume: short resumes handed to parse() wait for the next
+dispatch, which happens once the parsing token bucket has a token. Whatever
+queued up by then (up to BATCH_PARSE_MAX_RESUMES and within
+BATCH_PARSE_MAX_PROMPT_CHARS) goes out as one request. So batches fill
+exactly when the requests-per-minute limit is what holds the upload back,
+and a lone resume still gets the regular single prompt.
+
+The model answers with an array that is split and validated per resume;
+any resume whose element is missing, belongs to another resume or fails
+post-processing falls back to its own single call, as does the whole batch
+when the request or the array fails.
+"""
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.config import (
+    BATCH_PARSE_MAX_RESUMES,
+    BATCH_PARSE_MAX_RESUME_CHARS,
+    BATCH_PARSE_MAX_PROMPT_CHARS,
+    BATCH_PARSE_WINDOW_SECONDS,
+)
+from services.rate_limiter import groq_parse_limiter
+from services.resume_parser import create_batch_parse_prompt, parse_prepared_batch, parse_prepared_resume
+
+# Instructions + schema, sent once per batch
+BATCH_PROMPT_BASE_CHARS = len(create_batch_parse_prompt([]))
+# Delimiters and regex hints added per resume
+BATCH_PROMPT_OVERHEAD_CHARS = 400
+
+
+class ResumeBatchParser:
+    """Coalesces concurrent parse_prepared_resume calls into batched requests"""
+
+    def __init__(
+        self,
+        limiter=groq_parse_limiter,
+        max_resumes: int = BATCH_PARSE_MAX_RESUMES,
+        max_resume_chars: int = BATCH_PARSE_MAX_RESUME_CHARS,
+        max_prompt_chars: int = BATCH_PARSE_MAX_PROMPT_CHARS,
+        window_seconds: float = BATCH_PARSE_WINDOW_SECONDS,
+    ):
+        self.limiter = limiter
+        self.max_resumes = max_resumes
+        self.max_resume_chars = max_resume_chars
+        self.max_prompt_chars = max_prompt_chars
+        self.window_seconds = window_seconds
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._sending: set = set()
+        self.batch_requests = 0
+        self.batched_resumes = 0
+        self.single_requests = 0
+        self.fallbacks = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_resumes > 1
+
+    def batchable(self, prepared: Dict[str, Any]) -> bool:
+        # Tiered and regex-only parses build their own (smaller or no) prompt
+        text = prepared.get("text")
+        return (
+            self.enabled
+            and prepared.get("parse_mode", "full") == "full"
+            and prepared.get("cached") is None
+            and bool(text)
+            and len(text) <= self.max_resume_chars
+        )
+
+    async def parse(self, prepared: Dict[str, Any]) -> Dict[str, Any]:
+        """Drop-in for parse_prepared_resume"""
+        if not self.batchable(prepared):
+            if prepared.get("cached") is None:
+                self.single_requests += 1
+            return await parse_prepared_resume(prepared)
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((prepared, future))
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        return await future
+
+    async def _dispatch(self):
+        try:
+            while self._pending:
+                # Let concurrent callers join, then hold the batch open until a token is free
+                await asyncio.sleep(self.window_seconds)
+                wait = self.limiter.time_until_available()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                batch = self._take_batch()
+                if not batch:
+                    continue
+                task = asyncio.create_task(self._send(batch))
+                self._sending.add(task)
+                task.add_done_callback(self._sending.discard)
+        except BaseException as e:
+            for _, future in self._pending:
+                if not future.done():
+                    future.set_exception(e if isinstance(e, Exception) else RuntimeError("Batch parser stopped"))
+            self._pending.clear()
+            raise
+
+    def _take_batch(self) -> List[Tuple[Dict[str, Any], asyncio.Future]]:
+        # Callers that went away (cancelled) no longer need a parse
+        self._pending = [(prepared, future) for prepared, future in self._pending if not future.done()]
+        batch = []
+        chars = BATCH_PROMPT_BASE_CHARS
+        while self._pending and len(batch) < self.max_resumes:
+            size = len(self._pending[0][0]["text"]) + BATCH_PROMPT_OVERHEAD_CHARS
+            if batch and chars + size > self.max_prompt_chars:
+                break
+            batch.append(self._pending.pop(0))
+            chars += size
+        return batch
+
+    async def _send(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]):
+        if len(batch) == 1:
+            results = [None]
+        else:
+            self.batch_requests += 1
+            try:
+                results = await parse_prepared_batch([prepared for prepared, _ in batch])
+            except Exception as e:
+                print(f"⚠️  Batch parse of {len(batch)} resumes failed, falling back to single calls: {str(e)[:150]}")
+                results = [None] * len(batch)
+
+        fallbacks = []
+        for (prepared, future), result in zip(batch, results):
+            if result is not None:
+                self.batched_resumes += 1
+                if not future.done():
+                    future.set_result(result)
+            else:
+                if len(batch) > 1:
+                    self.fallbacks += 1
+                fallbacks.append(self._parse_single(prepared, future))
+        if fallbacks:
+            await asyncio.gather(*fallbacks)
+
+    async def _parse_single(self, prepared: Dict[str, Any], future: asyncio.Future):
+        self.single_requests += 1
+        try:
+            result = await parse_prepared_resume(prepared)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+        if not future.done():
+            future.set_result(result)
+
+    async def aclose(self):
+        """Wait for batches still in flight"""
+        if self._dispatcher is not None:
+            await asyncio.gather(self._dispatcher, return_exceptions=True)
+        if self._sending:
+            await asyncio.gather(*list(self._sending), return_exceptions=True)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "batch_requests": self.batch_requests,
+            "batched_resumes": self.batched_resumes,
+            "single_requests": self.single_requests,
+            "fallbacks": self.fallbacks,
+        }
@@ -0,0 +1,155 @@
+"""
+Batched MongoDB inserts for bulk and ZIP ingestion.
+
+Instead of one insert_one round-trip per parsed resume, documents are
+buffered and written with insert_many(ordered=False) once
+BULK_WRITE_BATCH_SIZE documents are waiting or the oldest one has waited
+BULK_WRITE_MAX_DELAY_SECONDS. The blocking pymongo call runs in a thread so
+the event loop keeps serving requests. Every insert gets its own future,
+resolved with the document's _id or with the error for that document only
+(e.g. a duplicate key), so callers still see per-document outcomes.
+"""
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from pymongo.errors import BulkWriteError
+
+from core.config import BULK_WRITE_BATCH_SIZE, BULK_WRITE_MAX_DELAY_SECONDS
+
+DUPLICATE_KEY_ERROR = 11000
+
+
+class BatchInsertError(Exception):
+    """One document of a batch was rejected"""
+
+    def __init__(self, message: str, code: Optional[int] = None):
+        super().__init__(message)
+        self.code = code
+
+    @property
+    def is_duplicate(self) -> bool:
+        return self.code == DUPLICATE_KEY_ERROR
+
+
+class BatchWriter:
+    """Buffers inserts into one collection and flushes them in batches"""
+
+    def __init__(
+        self,
+        collection,
+        max_batch_size: int = BULK_WRITE_BATCH_SIZE,
+        max_delay: float = BULK_WRITE_MAX_DELAY_SECONDS,
+        after_flush: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+    ):
+        self.collection = collection
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_delay = max_delay
+        # Called (in the writer thread) with the documents that were stored
+        self.after_flush = after_flush
+        self._buffer: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushes: set = set()
+        self._closed = False
+        self._counters = {"round_trips": 0, "inserted": 0, "failed": 0, "write_seconds": 0.0}
+
+    def insert(self, document: Dict[str, Any]) -> "asyncio.Future":
+        """
+        Queue one document. The returned future resolves to its _id once the
+        batch containing it is written, or raises BatchInsertError.
+        """
+        if self._closed:
+            raise RuntimeError("BatchWriter is closed")
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._buffer.append((document, future))
+
+        if len(self._buffer) >= self.max_batch_size:
+            self._start_flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._start_flush)
+        return future
+
+    def _start_flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._buffer:
+            return
+        batch, self._buffer = self._buffer, []
+        task = asyncio.get_running_loop().create_task(self._write(batch))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _write(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]):
+        documents = [document for document, _ in batch]
+        started = time.perf_counter()
+        errors: Dict[int, BatchInsertError] = {}
+        try:
+            await asyncio.to_thread(self._insert_many, documents, errors)
+        except Exception as e:
+            # Nothing is known to be stored (network error, auth, ...)
+            for document, future in batch:
+                if not future.done():
+                    future.set_exception(BatchInsertError(f"Database write failed: {str(e)[:200]}"))
+            self._counters["failed"] += len(batch)
+            print(f"❌ Batch insert of {len(batch)} document(s) failed: {str(e)[:150]}")
+            return
+        finally:
+            self._counters["round_trips"] += 1
+            self._counters["write_seconds"] += time.perf_counter() - started
+
+        for position, (document, future) in enumerate(batch):
+            if future.done():
+                continue
+            if position in errors:
+                future.set_exception(errors[position])
+            else:
+                future.set_result(document["_id"])
+        self._counters["failed"] += len(errors)
+        self._counters["inserted"] += len(batch) - len(errors)
+        print(f"💾 Stored {len(batch) - len(errors)}/{len(batch)} document(s) in one write")
+
+    def _insert_many(self, documents: List[Dict[str, Any]], errors: Dict[int, BatchInsertError]):
+        try:
+            self.collection.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            for write_error in e.details.get("writeErrors", []):
+                errors[write_error["index"]] = BatchInsertError(
+                    write_error.get("errmsg", "Write failed"), write_error.get("code")
+                )
+            # Anything else (e.g. write concern) means the outcome is unknown
+            if not errors:
+                raise
+
+        if self.after_flush is not None:
+            stored = [document for position, document in enumerate(documents) if position not in errors]
+            if stored:
+                try:
+                    self.after_flush(stored)
+                except Exception as e:
+                    print(f"⚠️  Post-write hook failed: {str(e)[:150]}")
+
+    async def flush(self):
+        """Write whatever is buffered and wait for every pending write"""
+        self._start_flush()
+        while self._flushes:
+            await asyncio.gather(*list(self._flushes), return_exceptions=True)
+
+    async def aclose(self):
+        await self.flush()
+        self._closed = True
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "round_trips": self._counters["round_trips"],
+            "inserted": self._counters["inserted"],
+            "failed": self._counters["failed"],
+            "write_seconds": round(self._counters["write_seconds"], 3),
+        }
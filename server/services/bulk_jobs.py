@@ -0,0 +1,427 @@
+"""
+Persistent job queue for bulk resume uploads.
+
+Uploads are stored in MongoDB (`bulk_jobs` for job state, the
+`bulk_job_files` GridFS bucket for the raw bytes, so a file is not bound by
+the 16MB document limit) and a background runner in each API process claims jobs
+with a renewable lease. Every finished file is recorded immediately, so if a
+worker dies the lease expires and the next runner resumes with the files that
+are still pending.
+"""
+import asyncio
+import json
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import gridfs
+from bson import ObjectId
+from pymongo import ASCENDING, ReturnDocument
+
+from core.database import db
+from services.bulk_pipeline import run_bulk_parse_pipeline
+from services.rate_limiter import groq_parse_limiter
+from services.uploads import InMemoryUpload
+
+bulk_jobs_collection = db["bulk_jobs"]
+bulk_job_files = gridfs.GridFS(db, collection="bulk_job_files")
+bulk_job_files_collection = db["bulk_job_files.files"]
+resume_history_collection = db["resume_history"]
+
+JOB_LEASE_SECONDS = 60
+IDLE_POLL_SECONDS = 10
+SSE_POLL_SECONDS = 1.0
+SSE_KEEPALIVE_SECONDS = 15
+
+TERMINAL_STATUSES = {"completed", "failed"}
+
+# Per-file states and the summary counter each one feeds
+FILE_STATE_COUNTERS = {
+    "successful": "successful",
+    "failed": "failed",
+    "duplicate": "duplicates",
+}
+
+
+def create_bulk_job(recruiter_email: str, uploads: List[Tuple[str, bytes]]) -> str:
+    """Persist the uploaded files as a queued job and wake the runner"""
+    now = datetime.utcnow()
+    job = {
+        "recruiter_email": recruiter_email,
+        "status": "queued",
+        "total": len(uploads),
+        "counts": {"successful": 0, "failed": 0, "duplicates": 0},
+        "files": [
+            {
+                "index": idx,
+                "filename": filename,
+                "state": "pending",
+                "error": None,
+                "resume_id": None,
+                "resume_hash": None,
+                "duplicate_of": None,
+            }
+            for idx, (filename, _) in enumerate(uploads)
+        ],
+        "created_at": now,
+        "updated_at": now,
+        "started_at": None,
+        "finished_at": None,
+        "worker_id": None,
+        "lease_expires_at": None,
+        "attempts": 0,
+        "processing_seconds": 0.0,
+        "api_calls": 0,
+        "llm_calls_saved": 0,
+        "version": 0,
+        "error": None,
+    }
+    job_id = bulk_jobs_collection.insert_one(job).inserted_id
+
+    for idx, (filename, content) in enumerate(uploads):
+        bulk_job_files.put(content, job_id=job_id, index=idx, filename=filename)
+
+    print(f"📥 Bulk job {job_id} queued with {len(uploads)} files for {recruiter_email}")
+    bulk_job_runner.wake()
+    return str(job_id)
+
+
+def _delete_job_files(job_id: ObjectId, query: Optional[Dict[str, Any]] = None):
+    query = {"job_id": job_id, **(query or {})}
+    for doc in bulk_job_files_collection.find(query, {"_id": 1}):
+        bulk_job_files.delete(doc["_id"])
+
+
+def _load_job_files(job_id: ObjectId, indexes: List[int]) -> Dict[int, bytes]:
+    return {
+        grid_out.index: grid_out.read()
+        for grid_out in bulk_job_files.find({"job_id": job_id, "index": {"$in": indexes}})
+    }
+
+
+def _find_job(job_id: str, recruiter_email: str) -> Optional[Dict[str, Any]]:
+    if not ObjectId.is_valid(job_id):
+        return None
+    return bulk_jobs_collection.find_one({"_id": ObjectId(job_id), "recruiter_email": recruiter_email})
+
+
+def get_job_progress(job_id: str, recruiter_email: str, include_data: bool = True) -> Optional[Dict[str, Any]]:
+    """
+    Job status in the same shape as the synchronous bulk upload response
+    (successful / failed / duplicates / summary) plus the files still pending.
+    """
+    job = _find_job(job_id, recruiter_email)
+    if job is None:
+        return None
+
+    parsed_by_id = {}
+    if include_data:
+        resume_ids = [ObjectId(f["resume_id"]) for f in job["files"] if f["state"] == "successful" and f.get("resume_id")]
+        if resume_ids:
+            for doc in resume_history_collection.find({"_id": {"$in": resume_ids}}, {"parsed_data": 1}):
+                parsed_by_id[str(doc["_id"])] = doc.get("parsed_data")
+
+    successful, failed, duplicates, pending = [], [], [], []
+    for f in job["files"]:
+        if f["state"] == "successful":
+            entry = {"filename": f["filename"], "resume_id": f.get("resume_id")}
+            if include_data:
+                entry["data"] = parsed_by_id.get(f.get("resume_id"))
+            successful.append(entry)
+        elif f["state"] == "duplicate":
+            duplicates.append({"filename": f["filename"], "reason": f.get("error"), "duplicate_of": f.get("duplicate_of")})
+        elif f["state"] == "failed":
+            failed.append({"filename": f["filename"], "error": f.get("error")})
+        else:
+            pending.append(f["filename"])
+
+    total = job["total"]
+    processed = total - len(pending)
+    elapsed = job.get("processing_seconds") or 0.0
+
+    return {
+        "job_id": str(job["_id"]),
+        "status": job["status"],
+        "error": job.get("error"),
+        "created_at": job["created_at"],
+        "started_at": job.get("started_at"),
+        "finished_at": job.get("finished_at"),
+        "version": job.get("version", 0),
+        "successful": successful,
+        "failed": failed,
+        "duplicates": duplicates,
+        "pending": pending,
+        "summary": {
+            "total": total,
+            "processed": processed,
+            "pending": len(pending),
+            "progress_percent": round(processed / total * 100, 1) if total else 100.0,
+            "successful": len(successful),
+            "failed": len(failed),
+            "duplicates": len(duplicates),
+            "elapsed_time_seconds": round(elapsed, 2),
+            "average_time_per_resume": round(elapsed / processed, 2) if processed else 0,
+            "api_calls": job.get("api_calls", 0),
+            "llm_calls_saved": job.get("llm_calls_saved", 0),
+            "next_upload_available_in_seconds": int(groq_parse_limiter.time_until_available()),
+        },
+    }
+
+
+async def wait_for_job(job_id: str, recruiter_email: str, poll_interval: float = SSE_POLL_SECONDS) -> Optional[Dict[str, Any]]:
+    """Block until the job reaches a terminal status and return its progress"""
+    while True:
+        job = await asyncio.to_thread(_find_job, job_id, recruiter_email)
+        if job is None:
+            return None
+        if job["status"] in TERMINAL_STATUSES:
+            return await asyncio.to_thread(get_job_progress, job_id, recruiter_email)
+        await asyncio.sleep(poll_interval)
+
+
+async def stream_job_events(job_id: str, recruiter_email: str):
+    """Server-Sent Events: a `progress` event on every change, then `complete`"""
+    last_version = None
+    last_sent = time.monotonic()
+
+    while True:
+        progress = await asyncio.to_thread(get_job_progress, job_id, recruiter_email, include_data=False)
+        if progress is None:
+            yield _sse("error", {"detail": "Job not found"})
+            return
+
+        if progress["status"] in TERMINAL_STATUSES:
+            yield _sse("complete", progress)
+            return
+
+        if progress["version"] != last_version:
+            last_version = progress["version"]
+            last_sent = time.monotonic()
+            yield _sse("progress", progress)
+        elif time.monotonic() - last_sent >= SSE_KEEPALIVE_SECONDS:
+            last_sent = time.monotonic()
+            yield ": keep-alive\n\n"
+
+        await asyncio.sleep(SSE_POLL_SECONDS)
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+class BulkJobRunner:
+    """Background task that claims queued (or abandoned) jobs and runs them one at a time"""
+
+    def __init__(self):
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._task: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def start(self):
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            await asyncio.to_thread(bulk_job_files_collection.create_index, [("job_id", ASCENDING), ("index", ASCENDING)])
+            await asyncio.to_thread(bulk_jobs_collection.create_index, [("status", ASCENDING), ("created_at", ASCENDING)])
+            self._task = asyncio.create_task(self._run())
+            print(f"🧵 Bulk job runner started ({self.worker_id})")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def wake(self):
+        """Safe from any thread: create_bulk_job runs in a worker thread"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def _run(self):
+        while True:
+            try:
+                job = await asyncio.to_thread(self._claim_next_job)
+            except Exception as e:
+                print(f"⚠️  Bulk job claim failed: {str(e)[:150]}")
+                job = None
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), IDLE_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+                continue
+
+            try:
+                await self._process(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Bulk job {job['_id']} crashed: {str(e)}")
+                try:
+                    await asyncio.to_thread(self._fail, job["_id"], str(e))
+                except Exception as fail_error:
+                    print(f"⚠️  Bulk job {job['_id']} could not be marked failed: {str(fail_error)[:150]}")
+
+    def _fail(self, job_id: ObjectId, error: str):
+        now = datetime.utcnow()
+        failed = bulk_jobs_collection.update_one(
+            {"_id": job_id, "worker_id": self.worker_id},
+            {
+                "$set": {
+                    "status": "failed",
+                    "error": error[:500],
+                    "finished_at": now,
+                    "updated_at": now,
+                    "lease_expires_at": None,
+                },
+                "$inc": {"version": 1},
+            },
+        )
+        # A failed job is never resumed, so its pending uploads would otherwise stay forever
+        if failed.matched_count:
+            _delete_job_files(job_id)
+
+    def _claim_next_job(self) -> Optional[Dict[str, Any]]:
+        """Atomically take the oldest queued job, or a running job whose lease has expired"""
+        now = datetime.utcnow()
+        return bulk_jobs_collection.find_one_and_update(
+            {
+                "status": {"$in": ["queued", "running"]},
+                "$or": [{"lease_expires_at": None}, {"lease_expires_at": {"$lt": now}}],
+            },
+            {
+                "$set": {
+                    "status": "running",
+                    "worker_id": self.worker_id,
+                    "lease_expires_at": now + timedelta(seconds=JOB_LEASE_SECONDS),
+                    "updated_at": now,
+                },
+                "$inc": {"attempts": 1, "version": 1},
+            },
+            sort=[("created_at", ASCENDING)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def _heartbeat(self, job_id: ObjectId):
+        while True:
+            await asyncio.sleep(JOB_LEASE_SECONDS / 3)
+            try:
+                await asyncio.to_thread(
+                    bulk_jobs_collection.update_one,
+                    {"_id": job_id, "worker_id": self.worker_id},
+                    {"$set": {"lease_expires_at": datetime.utcnow() + timedelta(seconds=JOB_LEASE_SECONDS)}},
+                )
+            except Exception as e:
+                # Keep beating: the lease outlives a few missed renewals
+                print(f"⚠️  Bulk job {job_id} lease renewal failed: {str(e)[:150]}")
+
+    def _record_result(self, job_id: ObjectId, index: int, result: Dict[str, Any]):
+        if result["success"]:
+            state = "successful"
+            fields = {
+                f"files.{index}.resume_id": result["data"]["resume_id"],
+                f"files.{index}.resume_hash": result["data"].get("resume_hash"),
+            }
+        else:
+            state = "duplicate" if result.get("is_duplicate") else "failed"
+            fields = {f"files.{index}.error": result.get("error")}
+            if result.get("duplicate_of"):
+                fields[f"files.{index}.duplicate_of"] = result["duplicate_of"]
+
+        counters = {f"counts.{FILE_STATE_COUNTERS[state]}": 1, "version": 1}
+        if result.get("llm_call_saved"):
+            counters["llm_calls_saved"] = 1
+
+        # Only while this worker holds the job: after a lost lease the new holder reprocesses the file
+        recorded = bulk_jobs_collection.update_one(
+            {"_id": job_id, "worker_id": self.worker_id, f"files.{index}.state": "pending"},
+            {
+                "$set": {f"files.{index}.state": state, "updated_at": datetime.utcnow(), **fields},
+                "$inc": counters,
+            },
+        )
+        if not recorded.matched_count:
+            print(f"⚠️  Bulk job {job_id} file #{index + 1}: already recorded, or the job is held by another worker")
+            return
+        # The bytes are no longer needed once the outcome is recorded
+        _delete_job_files(job_id, {"index": index})
+
+        icon = {"successful": "✅", "duplicate": "⚠️ ", "failed": "❌"}[state]
+        print(f"{icon} Bulk job {job_id} file #{index + 1}: {state.upper()}"
+              + (f" - {str(result.get('error'))[:150]}" if state == "failed" else ""))
+
+    def _complete(self, job_id: ObjectId) -> bool:
+        now = datetime.utcnow()
+        completed = bulk_jobs_collection.update_one(
+            {"_id": job_id, "worker_id": self.worker_id},
+            {
+                "$set": {"status": "completed", "finished_at": now, "updated_at": now, "lease_expires_at": None},
+                "$inc": {"version": 1},
+            },
+        )
+        if not completed.matched_count:
+            return False
+        _delete_job_files(job_id)
+        return True
+
+    async def _process(self, job: Dict[str, Any]):
+        job_id = job["_id"]
+        pending = [f for f in job["files"] if f["state"] == "pending"]
+
+        if job.get("started_at") is None:
+            await asyncio.to_thread(bulk_jobs_collection.update_one, {"_id": job_id}, {"$set": {"started_at": datetime.utcnow()}})
+            print(f"🚀 Bulk job {job_id}: processing {len(pending)} files")
+        else:
+            print(f"♻️  Bulk job {job_id}: resuming with {len(pending)}/{job['total']} files pending")
+
+        blobs = await asyncio.to_thread(_load_job_files, job_id, [f["index"] for f in pending])
+
+        uploads, indexes = [], []
+        for f in pending:
+            blob = blobs.get(f["index"])
+            if blob is None:
+                await asyncio.to_thread(self._record_result, job_id, f["index"], {
+                    "success": False,
+                    "is_duplicate": False,
+                    "error": "Uploaded file data is no longer available",
+                })
+                continue
+            uploads.append(InMemoryUpload(f["filename"], blob))
+            indexes.append(f["index"])
+
+        async def record(position, result):
+            await asyncio.to_thread(self._record_result, job_id, indexes[position], result)
+
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        start_time = time.time()
+        try:
+            # Only this job's requests: other jobs and uploads draw from the same bucket
+            with groq_parse_limiter.count_acquired() as api_calls:
+                if uploads:
+                    await run_bulk_parse_pipeline(uploads, job["recruiter_email"], on_result=record)
+        finally:
+            heartbeat.cancel()
+            await asyncio.to_thread(
+                bulk_jobs_collection.update_one,
+                {"_id": job_id},
+                {"$inc": {
+                    "processing_seconds": time.time() - start_time,
+                    "api_calls": api_calls.total,
+                }},
+            )
+
+        if await asyncio.to_thread(self._complete, job_id):
+            print(f"🏁 Bulk job {job_id} completed")
+        else:
+            print(f"⚠️  Bulk job {job_id}: lease lost, leaving it to the worker that holds it")
+
+
+bulk_job_runner = BulkJobRunner()
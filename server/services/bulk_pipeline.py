@@ -0,0 +1,363 @@
+"""
+Bulk resume parsing pipeline shared by the bulk upload endpoint and the
+background bulk job runner.
+"""
+import asyncio
+import hashlib
+from datetime import datetime
+from typing import List, Optional
+
+from bson import ObjectId
+
+from core.config import BULK_PARSE_MODE, IDENTITY_CLAIM_POLL_SECONDS
+from core.database import db
+from models.resume import ResumeData
+from services.resume_parser import prepare_resume, parse_prepared_resume
+from services.rate_limiter import groq_parse_limiter
+from services.candidate_index import index_resume, index_resumes
+from services.experience_normalizer import normalize_experience
+from services.batch_writer import BatchWriter, BatchInsertError
+from services.dedup_index import (
+    DEDUP_STATUS_UNIQUE,
+    claim_identity,
+    ensure_backfilled,
+    identity_keys,
+    release_identity,
+)
+from services.near_duplicates import DuplicateTextSession, describe_match
+from services.batch_parser import ResumeBatchParser
+
+resume_history_collection = db["resume_history"]
+
+MAX_PARSE_ATTEMPTS = 5
+
+# How many extracted resumes may wait for an LLM worker at once
+EXTRACTION_READ_AHEAD = 2
+
+RATE_LIMIT_ERROR_TERMS = ['rate limit', '429', 'too many requests', 'tokens per minute']
+PARSE_ERROR_TERMS = ["'choices'", "choices", "Failed to parse", "validation error"]
+
+def generate_resume_hash(parsed_data: dict) -> str:
+    """Generate hash for duplicate detection"""
+    unique_string = f"{parsed_data.get('email', '')}|{parsed_data.get('name', '')}|{parsed_data.get('phone', '')}"
+    return hashlib.md5(unique_string.lower().encode()).hexdigest()
+
+def _duplicate_result(holder: dict, stage: str) -> dict:
+    return {
+        "success": False,
+        "is_duplicate": True,
+        "error": f"Duplicate resume detected (same {holder.get('kind')} as an existing candidate, {stage})",
+        "duplicate_of": str(holder["resume_id"]) if holder.get("resume_id") else None,
+        "llm_call_saved": stage == "before parsing",
+    }
+
+async def claim_identity_when_settled(recruiter_email: str, resume_id: ObjectId, keys: dict):
+    """
+    claim_identity, waiting while the conflicting resume is still being
+    parsed: it either gets stored (a duplicate) or its claim is released or
+    goes stale (taken over). Returns None once the keys are claimed.
+    """
+    while True:
+        holder = await asyncio.to_thread(claim_identity, recruiter_email, resume_id, keys)
+        if holder is None or holder.get("state") != "pending":
+            return holder
+        await asyncio.sleep(IDENTITY_CLAIM_POLL_SECONDS)
+
+def _text_duplicate_result(match: dict) -> dict:
+    return {
+        "success": False,
+        "is_duplicate": True,
+        "error": f"Duplicate resume detected ({describe_match(match)})",
+        "duplicate_of": str(match["resume_id"]),
+        "llm_call_saved": True,
+    }
+
+async def parse_history_entry(prepared: dict, recruiter_email: str, max_retries=MAX_PARSE_ATTEMPTS, batcher: Optional[ResumeBatchParser] = None):
+    """
+    Run the LLM stage for one extracted resume and build its resume_history
+    document (not stored yet).
+
+    Duplicates are caught by the persistent dedup index: the email the regex
+    stage found (or the cached parse's keys; the phone key also needs the
+    name, which the regex stage doesn't extract) is claimed before the LLM
+    call, so a resume already stored for this recruiter, in this upload or an
+    earlier one, costs no tokens. The full keys are claimed once the LLM has
+    returned. Claims are released again if the resume is not stored; a copy
+    that is still being parsed elsewhere is waited for, and claims abandoned
+    by a crashed worker are taken over once they go stale.
+
+    With a batcher the first attempt may share its request with other short
+    resumes; retries always use a single-resume call.
+
+    Pacing comes from the shared token bucket (call_groq_api acquires a token
+    per request and a 429 drains the bucket), so retries never sleep here.
+    """
+    resume_id = ObjectId()
+    early_keys = identity_keys(prepared["cached"] or prepared.get("personal_info") or {})
+    holder = await claim_identity_when_settled(recruiter_email, resume_id, early_keys)
+    if holder is not None:
+        print(f"⏭️  {prepared['filename']}: duplicate {holder.get('kind')}, skipping LLM call")
+        return _duplicate_result(holder, "before parsing")
+
+    outcome = None
+    try:
+        outcome = await _parse_history_entry(prepared, recruiter_email, resume_id, max_retries, batcher)
+        return outcome
+    finally:
+        if outcome is None or (not outcome["success"] and not outcome.get("is_duplicate")):
+            await asyncio.to_thread(release_identity, resume_id)
+
+async def _parse_history_entry(prepared: dict, recruiter_email: str, resume_id: ObjectId, max_retries: int, batcher: Optional[ResumeBatchParser]):
+    filename = prepared["filename"]
+    last_error = None
+    
+    for attempt in range(max_retries):
+        try:
+            if attempt > 0:
+                print(f"🔄 Retry attempt {attempt + 1}/{max_retries} for {filename}")
+            
+            if attempt == 0 and batcher is not None:
+                parsed_data = await batcher.parse(prepared)
+            else:
+                parsed_data = await parse_prepared_resume(prepared)
+            
+            if not isinstance(parsed_data, dict):
+                raise ValueError("Parser returned invalid data format")
+            
+            resume_hash = generate_resume_hash(parsed_data)
+            
+            holder = await claim_identity_when_settled(recruiter_email, resume_id, identity_keys(parsed_data))
+            if holder is not None:
+                return _duplicate_result(holder, "after parsing")
+            
+            resume_data = ResumeData(
+                name=parsed_data.get("name"),
+                email=parsed_data.get("email"),
+                phone=parsed_data.get("phone"),
+                gender=parsed_data.get("gender"),
+                date_of_birth=parsed_data.get("date_of_birth"),
+                age=parsed_data.get("age"),
+                nationality=parsed_data.get("nationality"),
+                marital_status=parsed_data.get("marital_status"),
+                current_location=parsed_data.get("current_location"),
+                permanent_address=parsed_data.get("permanent_address"),
+                hometown=parsed_data.get("hometown"),
+                preferred_locations=parsed_data.get("preferred_locations", []),
+                willing_to_relocate=parsed_data.get("willing_to_relocate"),
+                work_authorization=parsed_data.get("work_authorization"),
+                visa_status=parsed_data.get("visa_status"),
+                notice_period=parsed_data.get("notice_period"),
+                availability_date=parsed_data.get("availability_date"),
+                current_ctc=parsed_data.get("current_ctc"),
+                expected_ctc=parsed_data.get("expected_ctc"),
+                current_salary=parsed_data.get("current_salary"),
+                expected_salary=parsed_data.get("expected_salary"),
+                summary=parsed_data.get("summary"),
+                objective=parsed_data.get("objective"),
+                career_objective=parsed_data.get("career_objective"),
+                education=parsed_data.get("education", []),
+                tenth_marks=parsed_data.get("tenth_marks"),
+                twelfth_marks=parsed_data.get("twelfth_marks"),
+                graduation_year=parsed_data.get("graduation_year"),
+                current_year_of_study=parsed_data.get("current_year_of_study"),
+                university_roll_number=parsed_data.get("university_roll_number"),
+                student_id=parsed_data.get("student_id"),
+                skills=parsed_data.get("skills", []),
+                derived_skills=parsed_data.get("derived_skills", []),
+                experience=parsed_data.get("experience", []),
+                projects=parsed_data.get("projects", []),
+                internships=parsed_data.get("internships", []),
+                achievements=parsed_data.get("achievements", []),
+                publications=parsed_data.get("publications", []),
+                research=parsed_data.get("research", []),
+                certifications=parsed_data.get("certifications", []),
+                awards=parsed_data.get("awards", []),
+                volunteer_work=parsed_data.get("volunteer_work", []),
+                extracurricular_activities=parsed_data.get("extracurricular_activities", []),
+                languages=parsed_data.get("languages", []),
+                interests=parsed_data.get("interests", []),
+                hobbies=parsed_data.get("hobbies", []),
+                references=parsed_data.get("references", []),
+                linkedin_url=parsed_data.get("linkedin_url"),
+                github_url=parsed_data.get("github_url"),
+                portfolio_url=parsed_data.get("portfolio_url"),
+                personal_website=parsed_data.get("personal_website"),
+                placement_preferences=parsed_data.get("placement_preferences"),
+                preferred_job_role=parsed_data.get("preferred_job_role"),
+                preferred_industry=parsed_data.get("preferred_industry"),
+                extra_sections=parsed_data.get("extra_sections", {}),
+                field_confidence=parsed_data.get("field_confidence", {}),
+                parse_mode=parsed_data.get("parse_mode")
+            )
+
+            history_entry = {
+                "_id": resume_id,
+                "recruiter_email": recruiter_email,
+                "filename": parsed_data.get("filename"),
+                "parsed_data": resume_data.dict(),
+                "experience_normalized": normalize_experience(resume_data.experience),
+                "parsed_at": datetime.utcnow(),
+                "upload_type": "bulk",
+                "candidate_email": parsed_data.get("email"),
+                "resume_hash": resume_hash,
+                "dedup_status": DEDUP_STATUS_UNIQUE
+            }
+
+            return {
+                "success": True,
+                "is_duplicate": False,
+                "history_entry": history_entry,
+                "data": {
+                    "filename": filename,
+                    "resume_hash": resume_hash,
+                    "data": resume_data.dict()
+                }
+            }
+            
+        except Exception as e:
+            error_msg = str(e)
+            last_error = error_msg
+            
+            if any(term in error_msg.lower() for term in RATE_LIMIT_ERROR_TERMS):
+                print(f"⚠️  Rate limit hit for {filename} - waiting on shared token bucket")
+            elif any(term in error_msg for term in PARSE_ERROR_TERMS):
+                print(f"🔄 Parse error for {filename}")
+                print(f"   └─ Error: {error_msg[:150]}")
+            else:
+                print(f"⚠️  Unexpected error for {filename}: {error_msg[:100]}")
+            
+            if attempt >= max_retries - 1:
+                print(f"❌ Max retries reached for {filename}")
+    
+    return {
+        "success": False,
+        "is_duplicate": False,
+        "error": last_error
+    }
+
+async def store_history_entry(parsed: dict, writer: Optional[BatchWriter] = None) -> dict:
+    """
+    Store a parsed resume and index its features. With a writer the insert
+    joins the next batched insert_many; otherwise it is written on its own.
+    """
+    history_entry = parsed["history_entry"]
+    try:
+        if writer is not None:
+            inserted_id = await writer.insert(history_entry)
+        else:
+            inserted_id = (await asyncio.to_thread(resume_history_collection.insert_one, history_entry)).inserted_id
+            await asyncio.to_thread(index_resume, history_entry)
+    except Exception as e:
+        # Not stored, so its identity keys must not block a later upload
+        await asyncio.to_thread(release_identity, history_entry["_id"])
+        if isinstance(e, BatchInsertError):
+            if e.is_duplicate:
+                return {"success": False, "is_duplicate": True, "error": "Duplicate resume detected"}
+            return {"success": False, "is_duplicate": False, "error": str(e)}
+        return {"success": False, "is_duplicate": False, "error": f"Database write failed: {str(e)[:200]}"}
+
+    return {
+        "success": True,
+        "is_duplicate": False,
+        "data": {**parsed["data"], "resume_id": str(inserted_id)}
+    }
+
+async def run_bulk_parse_pipeline(files: list, recruiter_email: str, on_result=None) -> List[dict]:
+    """
+    Two-stage pipeline: text extraction runs ahead while a pool of LLM workers
+    drains the extracted queue. The pool is sized to the token bucket's burst
+    capacity times the batch size, so it saturates the configured
+    requests-per-minute and short resumes waiting on the bucket share a
+    request (services/batch_parser.py). Parsed
+    resumes go to a BatchWriter, so workers never wait on the database and
+    inserts (plus feature indexing) happen a batch per round-trip.
+
+    `files` only need a .filename and an async read(). Returns one result per
+    file (in input order); `on_result(idx, result)` is awaited as each file
+    finishes. Duplicates (within the upload or against anything stored
+    before) are caught before the LLM call where possible: by extracted text
+    (services/near_duplicates.py), then by the persistent identity index;
+    those results carry llm_call_saved=True.
+    """
+    batcher = ResumeBatchParser()
+    # With batching on, enough workers wait on the bucket to fill a batch per token
+    worker_count = max(1, min(len(files), groq_parse_limiter.capacity * max(1, batcher.max_resumes)))
+    queue: asyncio.Queue = asyncio.Queue(maxsize=worker_count + EXTRACTION_READ_AHEAD)
+    results: List[dict] = [None] * len(files)
+    # Claim keys of resumes stored before the dedup index existed
+    await asyncio.to_thread(ensure_backfilled, recruiter_email)
+    writer = BatchWriter(resume_history_collection, after_flush=index_resumes)
+    text_dedup = DuplicateTextSession(recruiter_email, "resume_history")
+    storing: set = set()
+
+    async def finish(idx, result):
+        results[idx] = result
+        if on_result is not None:
+            await on_result(idx, result)
+
+    async def extractor():
+        for idx, file in enumerate(files):
+            try:
+                prepared = await prepare_resume(file, mode=BULK_PARSE_MODE)
+                await queue.put((idx, prepared, None))
+            except Exception as e:
+                await queue.put((idx, None, f"Failed to parse resume: {str(e)}"))
+        for _ in range(worker_count):
+            await queue.put(None)
+
+    async def llm_worker():
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            idx, prepared, error = item
+            if error is not None:
+                await finish(idx, {"success": False, "is_duplicate": False, "error": error})
+                continue
+            match = await text_dedup.check(idx, prepared["filename"], prepared.get("text"))
+            if match is not None:
+                await finish(idx, _text_duplicate_result(match))
+                continue
+            try:
+                parsed = await parse_history_entry(prepared, recruiter_email, batcher=batcher)
+            except BaseException:
+                text_dedup.resolve(idx, None)
+                raise
+            if not parsed["success"]:
+                text_dedup.resolve(idx, None)
+                await finish(idx, parsed)
+                continue
+            task = asyncio.create_task(store_and_finish(idx, parsed))
+            storing.add(task)
+
+    async def store_and_finish(idx, parsed):
+        result = None
+        try:
+            result = await store_history_entry(parsed, writer)
+        finally:
+            # Later copies of this text in the upload wait on the outcome
+            text_dedup.resolve(idx, result["data"]["resume_id"] if result and result["success"] else None)
+        await finish(idx, result)
+
+    print(f"⚙️  Pipeline: 1 extractor → {worker_count} LLM workers")
+    try:
+        await asyncio.gather(extractor(), *(llm_worker() for _ in range(worker_count)))
+    finally:
+        await batcher.aclose()
+        await writer.aclose()
+    try:
+        if storing:
+            await asyncio.gather(*storing)
+    finally:
+        text_dedup.abort()
+    await text_dedup.save()
+
+    stats = writer.stats()
+    if stats["round_trips"]:
+        print(f"💾 Stored {stats['inserted']} resume(s) in {stats['round_trips']} write(s)")
+    batch_stats = batcher.stats()
+    if batch_stats["batch_requests"]:
+        print(f"📦 Batched parsing: {batch_stats['batched_resumes']} resume(s) in {batch_stats['batch_requests']} request(s), "
+              f"{batch_stats['single_requests']} single request(s), {batch_stats['fallbacks']} fallback(s)")
+    return results
+
@@ -0,0 +1,536 @@
+"""
+Per-recruiter candidate feature index for the recruiter chatbot.
+
+Everything the ranking needs that can be derived from a resume alone
+(normalized skills, experience totals, education level, location variations,
+lowercased project/experience text blobs, dedup keys and the small set of
+profile fields used by the personal-info filters) is computed once when the
+resume is stored and kept in `candidate_features`. The chatbot reads these
+documents instead of re-deriving them from raw `parsed_data` on every query.
+
+Documents are written on insert, removed on delete, and lazily rebuilt when
+FEATURE_VERSION changes or a resume was stored by a path that did not index it.
+Experience totals come from the `experience_normalized` record stored on the
+resume (services/experience_normalizer.py); resumes stored before it existed
+are backfilled per recruiter on first load. Every such change bumps the recruiter's counter in `candidate_set_versions`,
+which keys the chatbot's query cache (services/query_cache.py).
+"""
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, ReplaceOne, UpdateOne
+
+from core.database import db
+from services.dedup_index import NOT_DUPLICATE, dedup_keys, ensure_backfilled
+from services.experience_normalizer import (
+    EXPERIENCE_NORMALIZER_VERSION,
+    current_month,
+    experience_totals,
+    is_current,
+    month_label,
+    normalize_experience,
+)
+from services.location_utils import normalize_location_for_search
+from services.skill_vocabulary import QUERY_SKILLS, query_skill_automaton
+
+candidate_features_collection = db["candidate_features"]
+candidate_set_versions_collection = db["candidate_set_versions"]
+resume_history_collection = db["resume_history"]
+
+# Bump whenever build_candidate_features changes so stale documents get rebuilt
+FEATURE_VERSION = 4
+
+QUERY_SKILL_SET = frozenset(QUERY_SKILLS)
+
+# parsed_data fields the personal-info filters and prompt header read
+PROFILE_FIELDS = [
+    "name", "email", "phone", "gender", "age", "date_of_birth",
+    "current_location", "hometown", "preferred_locations", "nationality",
+    "marital_status", "notice_period", "willing_to_relocate", "summary",
+    "objective", "work_authorization", "visa_status", "expected_ctc",
+    "expected_salary", "graduation_year", "current_year_of_study",
+    "placement_preferences",
+]
+
+SENIOR_KEYWORDS = ['senior', 'lead', 'principal', 'architect', 'manager', 'director', 'head', 'chief']
+
+DEGREE_HIERARCHY = {
+    'phd': 100, 'doctorate': 100, 'doctoral': 100,
+    'masters': 70, 'msc': 70, 'm.sc': 70, 'mtech': 75, 'm.tech': 75, 'mba': 75,
+    'bachelor': 50, 'btech': 70, 'b.tech': 70, 'be': 50, 'b.e': 50, 'bsc': 50,
+    'diploma': 25
+}
+
+TOP_COMPANIES = [
+    'google', 'microsoft', 'amazon', 'facebook', 'meta', 'apple',
+    'netflix', 'uber', 'airbnb', 'linkedin', 'twitter', 'tesla',
+    'ibm', 'oracle', 'salesforce', 'adobe', 'intel', 'nvidia',
+    'samsung', 'dell', 'cisco', 'vmware', 'sap', 'accenture',
+    'deloitte', 'wipro', 'tcs', 'infosys', 'cognizant', 'hcl',
+    'goldman sachs', 'morgan stanley', 'jp morgan', 'mckinsey',
+    'bain', 'bcg', 'stripe', 'spotify', 'slack', 'atlassian'
+]
+
+FULLTIME_ROLE_TERMS = ['full-time', 'full time', 'engineer', 'developer', 'manager', 'lead', 'senior', 'architect']
+
+_indexes_ready = False
+
+
+def calculate_total_experience(experiences: List[Dict], normalized: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Overlap-merged experience total, read from the resume's stored
+    `experience_normalized` record when it is current and normalized here otherwise
+    """
+    if not is_current(normalized):
+        normalized = normalize_experience(experiences)
+    totals = experience_totals(normalized)
+    if not normalized["entries"]:
+        totals["total_years_display"] = 'No experience'
+
+    details = [
+        {
+            'company': entry['company'],
+            'role': entry['role'],
+            'raw_duration': entry['raw'],
+            'calculated_months': entry['months'],
+            'start': entry['start'],
+            'end': entry['end'],
+            'ongoing': entry['ongoing'],
+            'method': entry['method'],
+        }
+        for entry in normalized["entries"]
+        if entry['months'] > 0
+    ]
+    return {
+        **totals,
+        'calculation_method': 'normalized' if normalized["entries"] else 'no_data',
+        'details': details,
+    }
+
+
+def _experience_features(experiences: List[Dict], normalized: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    exp_calc = calculate_total_experience(experiences, normalized)
+    senior_roles = 0
+    for exp in experiences:
+        role = exp.get("Role", "")
+        if role and any(keyword in role.lower() for keyword in SENIOR_KEYWORDS):
+            senior_roles += 1
+
+    return {
+        'total_years': exp_calc['total_years'],
+        'total_months': exp_calc['total_months'],
+        'total_years_display': exp_calc['total_years_display'],
+        'normalizer_version': EXPERIENCE_NORMALIZER_VERSION,
+        'overlap_months': exp_calc['overlap_months'],
+        'ongoing': exp_calc['ongoing'],
+        'as_of': exp_calc['as_of'],
+        'details': exp_calc['details'],
+        'company_count': len(experiences),
+        'senior_roles': senior_roles,
+    }
+
+
+def _education_features(education: List[Dict]) -> Dict[str, Any]:
+    highest_score = 0
+    highest_degree = None
+    for edu in education:
+        degree = edu.get("Degree", "")
+        if degree:
+            degree_lower = degree.lower()
+            for key, value in DEGREE_HIERARCHY.items():
+                if key in degree_lower:
+                    if value > highest_score:
+                        highest_score = value
+                        highest_degree = key
+                    break
+
+    return {'count': len(education), 'highest_score': highest_score, 'highest_degree': highest_degree}
+
+
+def _company_features(experiences: List[Dict]) -> Dict[str, Any]:
+    found_top_companies = []
+    has_fulltime = False
+    has_internship = False
+    score = 0
+
+    for exp in experiences:
+        company = exp.get("Company", "")
+        role = exp.get("Role", "")
+
+        if company:
+            company_lower = company.lower()
+            for top_co in TOP_COMPANIES:
+                if top_co in company_lower:
+                    found_top_companies.append(company)
+                    score += 25
+                    break
+
+        if role:
+            role_lower = role.lower()
+            if any(term in role_lower for term in FULLTIME_ROLE_TERMS):
+                has_fulltime = True
+            if 'intern' in role_lower:
+                has_internship = True
+
+    if has_fulltime and has_internship:
+        score += 20
+    elif has_fulltime:
+        score += 15
+    elif has_internship:
+        score += 10
+
+    return {
+        'score': min(100, score),
+        'top_companies': found_top_companies,
+        'has_fulltime': has_fulltime,
+        'has_internship': has_internship,
+        'company_count': len(found_top_companies),
+        'has_experience': bool(experiences),
+    }
+
+
+def _skill_hits(skills: List[str], project_texts: List[str], experience_texts: List[str]) -> List[Dict[str, Any]]:
+    """
+    For every query skill that occurs anywhere in the resume: whether it is a
+    substring of a listed skill, and which projects / experience entries mention it.
+    """
+    hits: Dict[str, Dict[str, Any]] = {}
+
+    def entry(term):
+        return hits.setdefault(term, {"skill": term, "listed": False, "projects": [], "experience": []})
+
+    for skill in skills:
+        for term in query_skill_automaton.find(skill):
+            entry(term)["listed"] = True
+    for idx, text in enumerate(project_texts):
+        for term in query_skill_automaton.find(text):
+            entry(term)["projects"].append(idx)
+    for idx, text in enumerate(experience_texts):
+        for term in query_skill_automaton.find(text):
+            entry(term)["experience"].append(idx)
+
+    # Stored as a list: skill names are not safe as MongoDB field names
+    return sorted(hits.values(), key=lambda hit: hit["skill"])
+
+
+def skill_occurrences(features: Dict[str, Any], skill: str):
+    """
+    (listed, project indexes, experience indexes) for one required skill,
+    read from the precomputed hits for vocabulary skills and scanned otherwise
+    """
+    if skill in QUERY_SKILL_SET:
+        hit_map = features.get("_skill_hit_map")
+        if hit_map is None:
+            hit_map = features["_skill_hit_map"] = {hit["skill"]: hit for hit in features["skill_hits"]}
+        hit = hit_map.get(skill)
+        if hit is None:
+            return False, [], []
+        return hit["listed"], hit["projects"], hit["experience"]
+
+    listed = any(skill in s for s in features["skills"])
+    projects = [idx for idx, project in enumerate(features["projects"]) if skill in project["text"]]
+    experience = [idx for idx, exp in enumerate(features["experience_blobs"]) if skill in exp["text"]]
+    return listed, projects, experience
+
+
+# Optional fields appended to the compact chatbot summary when present
+SUMMARY_EXTRA_FIELDS = ["gender", "age", "notice_period", "graduation_year", "expected_ctc"]
+SUMMARY_SKILLS = 8
+
+
+def build_prompt_summary(parsed: Dict[str, Any], experience: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compact fixed-field summary the chatbot prompt falls back to when the
+    detailed candidate block doesn't fit its token budget.
+    """
+    email = parsed.get("email")
+    summary = {
+        "name": parsed.get("name") or "Unknown",
+        "email": email or "N/A",
+        "email_available": bool(email) and "@" in str(email),
+        "phone": parsed.get("phone") or "N/A",
+        "location": parsed.get("current_location"),
+        "experience": experience["total_years_display"],
+        "skills": ((parsed.get("skills") or []) + (parsed.get("derived_skills") or []))[:SUMMARY_SKILLS],
+    }
+    experiences = [exp for exp in (parsed.get("experience") or []) if isinstance(exp, dict)]
+    if experiences:
+        latest = experiences[0]
+        summary["latest_role"] = f"{latest.get('Role') or 'Role'} at {latest.get('Company') or 'N/A'}"
+    education = [edu for edu in (parsed.get("education") or []) if isinstance(edu, dict)]
+    if education:
+        edu = education[0]
+        institution = edu.get("University") or edu.get("Institution")
+        summary["education"] = f"{edu.get('Degree') or 'Degree'}{f', {institution}' if institution else ''}"
+    for field in SUMMARY_EXTRA_FIELDS:
+        if parsed.get(field) not in (None, "", []):
+            summary[field] = parsed[field]
+    return {key: value for key, value in summary.items() if value not in (None, "", [])}
+
+
+def build_candidate_features(parsed: Dict[str, Any], experience_normalized: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Derive every query-independent ranking input from a resume's parsed_data
+    and its stored experience_normalized record
+    """
+    parsed = parsed or {}
+    experiences = parsed.get("experience") or []
+    education = parsed.get("education") or []
+    projects = parsed.get("projects") or []
+
+    skills = [s.lower() for s in (parsed.get("skills") or []) if s]
+    skills += [s.lower() for s in (parsed.get("derived_skills") or []) if s]
+
+    preferred = parsed.get("preferred_locations") or []
+
+    # Small profile for the personal-info filters; lists are trimmed to the keys they read
+    profile = {field: parsed.get(field) for field in PROFILE_FIELDS}
+    profile["preferred_locations"] = preferred
+    profile["education"] = [{"Year": edu.get("Year")} for edu in education]
+    profile["experience"] = [{"Role": exp.get("Role")} for exp in experiences]
+    profile["internships"] = [{"Company": i.get("Company")} for i in (parsed.get("internships") or []) if isinstance(i, dict)]
+
+    project_features = [
+        {
+            "name": project.get("Name") or "unnamed",
+            "text": json.dumps(project).lower(),
+            "description_length": len(project.get("Description", "") or ""),
+        }
+        for project in projects
+    ]
+    experience_blobs = [
+        {"company": exp.get("Company") or "company", "text": json.dumps(exp).lower()}
+        for exp in experiences
+    ]
+
+    experience = _experience_features(experiences, experience_normalized)
+
+    return {
+        "version": FEATURE_VERSION,
+        "dedup_keys": dedup_keys(parsed),
+        "skills": skills,
+        "skill_hits": _skill_hits(
+            skills,
+            [project["text"] for project in project_features],
+            [exp["text"] for exp in experience_blobs],
+        ),
+        "projects": project_features,
+        "experience_blobs": experience_blobs,
+        "experience": experience,
+        "education": _education_features(education),
+        "company": _company_features(experiences),
+        "locations": {
+            "current": normalize_location_for_search(parsed.get("current_location")) if parsed.get("current_location") else [],
+            "hometown": normalize_location_for_search(parsed.get("hometown")) if parsed.get("hometown") else [],
+            "preferred": [normalize_location_for_search(str(loc)) for loc in preferred if loc],
+        },
+        "profile": profile,
+        "prompt_summary": build_prompt_summary(parsed, experience),
+    }
+
+
+def _is_fresh(features: Optional[Dict[str, Any]]) -> bool:
+    """Current FEATURE_VERSION and normalizer, and any ongoing role's total was computed this month"""
+    if features is None or features.get("version") != FEATURE_VERSION:
+        return False
+    experience = features.get("experience") or {}
+    if experience.get("normalizer_version") != EXPERIENCE_NORMALIZER_VERSION:
+        return False
+    return not experience.get("ongoing") or experience.get("as_of") == month_label(current_month())
+
+
+def get_candidate_features(candidate: Dict[str, Any]) -> Dict[str, Any]:
+    """Precomputed features for a candidate, building them on the fly for raw resume docs"""
+    features = candidate.get("features")
+    if not _is_fresh(features):
+        features = build_candidate_features(candidate.get("parsed_data", {}), candidate.get("experience_normalized"))
+        candidate["features"] = features
+    return features
+
+
+def _ensure_indexes():
+    global _indexes_ready
+    if _indexes_ready:
+        return
+    candidate_features_collection.create_index([("recruiter_email", ASCENDING), ("parsed_at", DESCENDING)])
+    _indexes_ready = True
+
+
+def _feature_document(resume: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "_id": resume["_id"],
+        "recruiter_email": resume["recruiter_email"],
+        "parsed_at": resume.get("parsed_at"),
+        "indexed_at": datetime.utcnow(),
+        **build_candidate_features(resume.get("parsed_data", {}), resume.get("experience_normalized")),
+    }
+
+
+def candidate_set_version(recruiter_email: str) -> int:
+    """Counter that changes whenever the recruiter's candidate set does"""
+    doc = candidate_set_versions_collection.find_one({"_id": recruiter_email}, {"version": 1})
+    return doc["version"] if doc else 0
+
+
+def bump_candidate_set_version(*recruiter_emails: str):
+    for recruiter_email in set(recruiter_emails):
+        try:
+            candidate_set_versions_collection.update_one(
+                {"_id": recruiter_email},
+                {"$inc": {"version": 1}, "$set": {"updated_at": datetime.utcnow()}},
+                upsert=True,
+            )
+        except Exception as e:
+            print(f"⚠️  Candidate set version bump failed for {recruiter_email}: {str(e)[:150]}")
+
+
+def index_resume(resume: Dict[str, Any]):
+    """Upsert the feature document for one stored resume (recruiter uploads only)"""
+    if not resume.get("recruiter_email"):
+        return
+    try:
+        _ensure_indexes()
+        candidate_features_collection.replace_one({"_id": resume["_id"]}, _feature_document(resume), upsert=True)
+        bump_candidate_set_version(resume["recruiter_email"])
+    except Exception as e:
+        # The chatbot rebuilds missing entries lazily, so never fail the upload
+        print(f"⚠️  Candidate index update failed for {resume.get('_id')}: {str(e)[:150]}")
+
+
+def index_resumes(resumes: List[Dict[str, Any]]):
+    """Upsert feature documents for many stored resumes in one bulk write"""
+    operations = [
+        ReplaceOne({"_id": resume["_id"]}, _feature_document(resume), upsert=True)
+        for resume in resumes
+        if resume.get("recruiter_email")
+    ]
+    if not operations:
+        return
+    try:
+        _ensure_indexes()
+        candidate_features_collection.bulk_write(operations, ordered=False)
+        bump_candidate_set_version(*(resume["recruiter_email"] for resume in resumes if resume.get("recruiter_email")))
+    except Exception as e:
+        print(f"⚠️  Candidate index update failed for {len(operations)} resume(s): {str(e)[:150]}")
+
+
+def remove_from_index(resume_id, recruiter_email: Optional[str] = None):
+    try:
+        candidate_features_collection.delete_one({"_id": ObjectId(resume_id)})
+        if recruiter_email:
+            bump_candidate_set_version(recruiter_email)
+    except Exception as e:
+        print(f"⚠️  Candidate index delete failed for {resume_id}: {str(e)[:150]}")
+
+
+def _stale_experience_query(recruiter_email: Optional[str] = None) -> Dict[str, Any]:
+    # Missing or older only: a process still on an older normalizer leaves newer records alone
+    query = {"experience_normalized.version": {"$not": {"$gte": EXPERIENCE_NORMALIZER_VERSION}}}
+    if recruiter_email:
+        query["recruiter_email"] = recruiter_email
+    return query
+
+
+def backfill_experience(recruiter_email: Optional[str] = None, batch_size: int = 500) -> int:
+    """
+    Store experience_normalized on resumes written before it existed (or by an
+    older normalizer), for one recruiter or the whole collection. Returns how
+    many resumes were updated; their feature documents are rebuilt on the next load.
+    """
+    query = _stale_experience_query(recruiter_email)
+    updated = 0
+    updates = []
+    for resume in resume_history_collection.find(query, {"parsed_data.experience": 1}):
+        experiences = (resume.get("parsed_data") or {}).get("experience") or []
+        updates.append(UpdateOne(
+            {"_id": resume["_id"]},
+            {"$set": {"experience_normalized": normalize_experience(experiences)}},
+        ))
+        if len(updates) >= batch_size:
+            resume_history_collection.bulk_write(updates, ordered=False)
+            updated += len(updates)
+            updates = []
+    if updates:
+        resume_history_collection.bulk_write(updates, ordered=False)
+        updated += len(updates)
+
+    if updated:
+        print(f"🧮 Normalized experience for {updated} resume(s){f' of {recruiter_email}' if recruiter_email else ''}")
+    return updated
+
+
+def ensure_experience_backfilled(recruiter_email: str) -> int:
+    """
+    Backfill when any of the recruiter's resumes lacks a current record. The
+    check is one indexed find_one, so every worker sees the same state and a
+    normalizer version bump is picked up on the next load.
+    """
+    try:
+        if resume_history_collection.find_one(_stale_experience_query(recruiter_email), {"_id": 1}) is None:
+            return 0
+        return backfill_experience(recruiter_email)
+    except Exception as e:
+        # Features fall back to normalizing parsed_data, so ranking still works
+        print(f"⚠️  Experience backfill failed for {recruiter_email}: {str(e)[:150]}")
+        return 0
+
+
+def _reconcile(recruiter_email: str, features: List[Dict[str, Any]]) -> bool:
+    """Index resumes that have no (current) feature document and drop orphans. Returns True if anything changed."""
+    current_ids = {f["_id"] for f in features if _is_fresh(f)}
+    indexed_ids = {f["_id"] for f in features}
+    resume_ids = {
+        doc["_id"]
+        for doc in resume_history_collection.find({"recruiter_email": recruiter_email, **NOT_DUPLICATE}, {"_id": 1})
+    }
+
+    missing = resume_ids - current_ids
+    orphans = indexed_ids - resume_ids
+
+    if missing:
+        index_resumes(list(resume_history_collection.find({"_id": {"$in": list(missing)}})))
+    if orphans:
+        candidate_features_collection.delete_many({"_id": {"$in": list(orphans)}})
+        bump_candidate_set_version(recruiter_email)
+
+    if missing or orphans:
+        print(f"🗂️  Candidate index for {recruiter_email}: built {len(missing)}, removed {len(orphans)}")
+        return True
+    return False
+
+
+def load_candidate_features(recruiter_email: str) -> List[Dict[str, Any]]:
+    """
+    Feature documents for every distinct candidate of a recruiter, newest
+    first. Resumes the dedup index marked as duplicates are left out, so
+    callers need no dedup pass of their own.
+
+    The count check keeps the common path to one indexed query; a full
+    reconcile only runs when the index is out of step with resume_history.
+    """
+    _ensure_indexes()
+    ensure_backfilled(recruiter_email)
+    ensure_experience_backfilled(recruiter_email)
+    query = {"recruiter_email": recruiter_email}
+    features = list(candidate_features_collection.find(query).sort("parsed_at", DESCENDING))
+
+    stale = not all(_is_fresh(f) for f in features)
+    if stale or len(features) != resume_history_collection.count_documents({**query, **NOT_DUPLICATE}):
+        if _reconcile(recruiter_email, features):
+            features = list(candidate_features_collection.find(query).sort("parsed_at", DESCENDING))
+
+    return features
+
+
+def as_ranking_candidate(feature_doc: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Lightweight candidate for filtering and ranking: the trimmed profile stands
+    in for parsed_data and the precomputed features ride along.
+    """
+    return {
+        "_id": str(feature_doc["_id"]),
+        "parsed_data": feature_doc.get("profile", {}),
+        "features": feature_doc,
+    }
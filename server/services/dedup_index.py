@@ -0,0 +1,229 @@
+"""
+Persistent per-recruiter duplicate index.
+
+Every stored recruiter resume claims its identity keys in
+`candidate_identities`: the normalized email, and the phone digits together
+with a name fingerprint (a phone is often shared, by family members or a
+placement office, so it only identifies a candidate along with the name; a
+name on its own never does). The unique index on (recruiter_email, kind,
+value) makes a claim atomic across requests, bulk jobs and workers, so a
+resume whose key is already held by another resume is a duplicate and is
+never stored. The bulk pipeline checks the keys it can build from the regex
+stage (or a cached parse) before spending an LLM call, and claims every key
+right before the insert.
+
+A claim whose resume is not in resume_history yet is pending: the resume is
+still being parsed, and other copies wait for its outcome. Once a pending
+claim is older than IDENTITY_CLAIM_TTL_SECONDS it was left behind by a worker
+that crashed or restarted mid-parse, and the next copy takes it over.
+
+Resumes stored before the index existed are backfilled per recruiter, newest
+first (the order the chatbot used to dedupe in); the ones that lose a key are
+marked dedup_status="duplicate" and left out of listings and ranking. When
+IDENTITY_KEY_VERSION changes, a recruiter's claims are dropped and every
+resume is backfilled again under the new keys.
+"""
+import re
+import unicodedata
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from bson import ObjectId
+from pymongo import DESCENDING, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from core.config import IDENTITY_CLAIM_TTL_SECONDS
+from core.database import db
+
+candidate_identities_collection = db["candidate_identities"]
+resume_history_collection = db["resume_history"]
+
+DEDUP_STATUS_UNIQUE = "unique"
+DEDUP_STATUS_DUPLICATE = "duplicate"
+
+# Query fragment for resumes that hold their own identity (or predate the index)
+NOT_DUPLICATE = {"dedup_status": {"$ne": DEDUP_STATUS_DUPLICATE}}
+
+DUPLICATE_KEY_ERROR = 11000
+
+# Bump whenever identity_keys changes; recorded per recruiter as a marker claim
+IDENTITY_KEY_VERSION = "2"
+KEY_VERSION_KIND = "key_version"
+
+# Attempts to claim keys when each conflict turns out to be a stale claim
+MAX_CLAIM_ATTEMPTS = 3
+
+
+def dedup_keys(parsed: Dict[str, Any]) -> Dict[str, Optional[str]]:
+    """Normalized email / phone / name used to collapse duplicate candidates"""
+    email = parsed.get("email")
+    if email:
+        email = str(email).strip().lower()
+        if email == "no email" or email == "none" or email == "":
+            email = None
+    else:
+        email = None
+
+    phone = parsed.get("phone")
+    if phone:
+        phone = re.sub(r'\D', '', str(phone))
+        if len(phone) < 6:
+            phone = None
+    else:
+        phone = None
+
+    name = parsed.get("name")
+    if name:
+        name = str(name).strip().lower()
+        if name == "unknown candidate" or name == "none" or name == "":
+            name = None
+    else:
+        name = None
+
+    return {"email": email, "phone": phone, "name": name}
+
+
+def name_fingerprint(name: Optional[str]) -> Optional[str]:
+    """Accent-, case-, punctuation- and order-insensitive form of a name"""
+    if not name:
+        return None
+    ascii_name = unicodedata.normalize("NFKD", str(name)).encode("ascii", "ignore").decode().lower()
+    tokens = sorted(re.findall(r"[a-z]+", ascii_name))
+    fingerprint = " ".join(tokens)
+    if not fingerprint or fingerprint in ("unknown candidate", "none"):
+        return None
+    return fingerprint
+
+
+def identity_keys(parsed: Dict[str, Any]) -> Dict[str, str]:
+    """{kind: value} for every identity key the parsed resume has: email, and phone + name fingerprint"""
+    keys = dedup_keys(parsed)
+    fingerprint = name_fingerprint(parsed.get("name"))
+    identity = {}
+    if keys["email"]:
+        identity["email"] = keys["email"]
+    if keys["phone"] and fingerprint:
+        identity["phone"] = f"{keys['phone']}|{fingerprint}"
+    return identity
+
+
+def find_duplicate(recruiter_email: str, keys: Dict[str, str], exclude_resume_id=None) -> Optional[Dict[str, Any]]:
+    """The claim holding any of `keys` for this recruiter (by another resume), if one exists"""
+    if not keys:
+        return None
+    query = {"recruiter_email": recruiter_email, "$or": [{"kind": kind, "value": value} for kind, value in keys.items()]}
+    if exclude_resume_id is not None:
+        query["resume_id"] = {"$ne": exclude_resume_id}
+    return candidate_identities_collection.find_one(query, {"kind": 1, "resume_id": 1, "claimed_at": 1})
+
+
+def holder_state(holder: Dict[str, Any]) -> str:
+    """'stored' (the resume exists), 'pending' (still being parsed) or 'stale' (abandoned mid-parse)"""
+    if resume_history_collection.find_one({"_id": holder["resume_id"]}, {"_id": 1}) is not None:
+        return "stored"
+    claimed_at = holder.get("claimed_at")
+    if claimed_at is not None and claimed_at > datetime.utcnow() - timedelta(seconds=IDENTITY_CLAIM_TTL_SECONDS):
+        return "pending"
+    return "stale"
+
+
+def claim_identity(recruiter_email: str, resume_id: ObjectId, keys: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    """
+    Atomically claim `keys` for resume_id. Returns None on success, or the
+    conflicting claim (nothing stays claimed for resume_id in that case) with
+    its holder_state under "state". Stale claims are taken over.
+    """
+    if not keys:
+        return None
+    for _ in range(MAX_CLAIM_ATTEMPTS):
+        now = datetime.utcnow()
+        try:
+            candidate_identities_collection.insert_many(
+                [
+                    {"recruiter_email": recruiter_email, "kind": kind, "value": value,
+                     "resume_id": resume_id, "claimed_at": now}
+                    for kind, value in keys.items()
+                ],
+                ordered=False,
+            )
+            return None
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            if not errors or any(error.get("code") != DUPLICATE_KEY_ERROR for error in errors):
+                raise
+        holder = find_duplicate(recruiter_email, keys, exclude_resume_id=resume_id)
+        if holder is None:
+            # Every conflict is a key this resume already holds (a retried claim); keep them fresh
+            candidate_identities_collection.update_many({"resume_id": resume_id}, {"$set": {"claimed_at": now}})
+            return None
+        holder["state"] = holder_state(holder)
+        if holder["state"] != "stale":
+            candidate_identities_collection.delete_many({"resume_id": resume_id})
+            return holder
+        # Left behind by a crashed parse; the claimed_at guard keeps a refreshed claim
+        candidate_identities_collection.delete_many({
+            "resume_id": holder["resume_id"],
+            "claimed_at": {"$lte": holder["claimed_at"]} if holder.get("claimed_at") else {"$exists": False},
+        })
+        print(f"🪪 Took over stale {holder.get('kind')} claim of unstored resume {holder['resume_id']}")
+    candidate_identities_collection.delete_many({"resume_id": resume_id})
+    return holder
+
+
+def release_identity(resume_id) -> int:
+    """
+    Drop the claims of a deleted resume. Duplicates that pointed at it go
+    back to the backfill queue, so the newest of them takes over its keys.
+    """
+    resume_id = ObjectId(resume_id)
+    released = candidate_identities_collection.delete_many({"resume_id": resume_id}).deleted_count
+    # Every worker picks them up: ensure_backfilled looks for a missing dedup_status
+    resume_history_collection.update_many(
+        {"duplicate_of": resume_id},
+        {"$unset": {"dedup_status": "", "duplicate_of": ""}},
+    )
+    return released
+
+
+def _ensure_key_version(recruiter_email: str):
+    """Drop claims built by an older identity_keys so the backfill claims every resume again"""
+    marker = {"recruiter_email": recruiter_email, "kind": KEY_VERSION_KIND, "value": IDENTITY_KEY_VERSION}
+    if candidate_identities_collection.find_one(marker, {"_id": 1}) is not None:
+        return
+    dropped = candidate_identities_collection.delete_many({"recruiter_email": recruiter_email}).deleted_count
+    reset = resume_history_collection.update_many(
+        {"recruiter_email": recruiter_email, "dedup_status": {"$exists": True}},
+        {"$unset": {"dedup_status": "", "duplicate_of": ""}},
+    ).modified_count
+    candidate_identities_collection.update_one(marker, {"$set": {"claimed_at": datetime.utcnow()}}, upsert=True)
+    if dropped or reset:
+        print(f"🪪 Dedup index for {recruiter_email}: identity keys v{IDENTITY_KEY_VERSION}, re-checking {reset} resume(s)")
+
+
+def ensure_backfilled(recruiter_email: str) -> int:
+    """Claim keys for this recruiter's resumes stored before the index existed; returns how many were processed"""
+    _ensure_key_version(recruiter_email)
+    pending_query = {"recruiter_email": recruiter_email, "dedup_status": {"$exists": False}}
+    if resume_history_collection.find_one(pending_query, {"_id": 1}) is None:
+        return 0
+
+    pending = list(resume_history_collection.find(
+        pending_query,
+        {"parsed_data.email": 1, "parsed_data.phone": 1, "parsed_data.name": 1, "parsed_at": 1},
+    ).sort("parsed_at", DESCENDING))
+
+    updates = []
+    duplicates = 0
+    for resume in pending:
+        holder = claim_identity(recruiter_email, resume["_id"], identity_keys(resume.get("parsed_data") or {}))
+        if holder is None:
+            fields = {"dedup_status": DEDUP_STATUS_UNIQUE}
+        else:
+            fields = {"dedup_status": DEDUP_STATUS_DUPLICATE, "duplicate_of": holder["resume_id"]}
+            duplicates += 1
+        updates.append(UpdateOne({"_id": resume["_id"]}, {"$set": fields}))
+
+    if updates:
+        resume_history_collection.bulk_write(updates, ordered=False)
+        print(f"🪪 Dedup index for {recruiter_email}: claimed {len(updates) - duplicates}, marked {duplicates} duplicate(s)")
+    return len(updates)
@@ -0,0 +1,431 @@
+"""
+Document text extraction in a pool of worker processes.
+
+pdfplumber and python-docx are CPU-bound and hold the GIL, so running them in
+the request handler (or a thread) stalls every other request on the worker.
+Extraction runs in a bounded ProcessPoolExecutor instead:
+
+- workers are started and warmed (pdfplumber / python-docx imported) at app
+  startup; at most one file per worker is in flight, and the whole pool is
+  replaced with fresh workers every EXTRACTION_RECYCLE_AFTER_FILES tasks so
+  leaked memory doesn't accumulate
+- each worker caps its address space (EXTRACTION_MEMORY_LIMIT_MB) so a
+  pathological PDF fails with MemoryError instead of taking the host down
+- each task gets EXTRACTION_TIMEOUT_SECONDS; the worker interrupts itself, and
+  if it does not come back the pool is torn down and rebuilt. The other files
+  that were on the torn-down (or crashed) pool are retried once, one at a
+  time, on the new one instead of failing with it
+- PDFs are extracted in page ranges spread over the workers and streamed back
+  in order (iter_pdf_pages); extraction stops once EXTRACTION_CHAR_BUDGET
+  characters are in, since the parse prompt truncates the text anyway
+
+`document_extractor.extract_document(filename, content)` is the async entry
+point the candidate, bulk and ZIP upload paths share. It returns the raw text
+with per-page timing; the resume parser applies its own clean-up on top.
+"""
+import asyncio
+import io
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from core.config import (
+    EXTRACTION_MAX_WORKERS,
+    EXTRACTION_TIMEOUT_SECONDS,
+    EXTRACTION_MEMORY_LIMIT_MB,
+    EXTRACTION_RECYCLE_AFTER_FILES,
+    EXTRACTION_PAGES_PER_TASK,
+    EXTRACTION_CHAR_BUDGET,
+)
+
+try:
+    import resource
+except ImportError:  # Windows: no rlimits, the timeout still applies
+    resource = None
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".txt")
+
+# Extra time the parent waits past the worker's own alarm before it gives up
+# on the worker and rebuilds the pool
+HARD_TIMEOUT_GRACE_SECONDS = 5
+
+
+class DocumentExtractionError(ValueError):
+    """A document could not be extracted (timeout, memory cap, crashed worker)"""
+
+
+class _ExtractionTimeout(Exception):
+    pass
+
+
+class PageText(NamedTuple):
+    number: int      # 1-based
+    text: str
+    seconds: float   # time spent extracting this page in the worker
+
+
+@dataclass
+class ExtractedText:
+    text: str
+    pages: List[PageText] = field(default_factory=list)
+    truncated: bool = False      # stopped at the character budget
+    seconds: float = 0.0
+
+    def page_timings(self) -> List[Dict[str, Any]]:
+        return [
+            {"page": page.number, "chars": len(page.text), "seconds": round(page.seconds, 3)}
+            for page in self.pages
+        ]
+
+
+# ---------------------------------------------------------------------------
+# Worker side
+# ---------------------------------------------------------------------------
+
+def _raise_timeout(signum, frame):
+    raise _ExtractionTimeout()
+
+
+def _init_worker(memory_limit_mb: int):
+    """Runs once per worker process: memory cap + warm imports"""
+    if resource is not None and memory_limit_mb > 0:
+        limit = memory_limit_mb * 1024 * 1024
+        try:
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ValueError, OSError) as e:
+            print(f"⚠️  Could not cap extraction worker memory: {e}")
+
+    # Import the heavy parsers now so the first upload doesn't pay for it
+    import pdfplumber  # noqa: F401
+    import docx  # noqa: F401
+
+
+def _warm_up() -> int:
+    return os.getpid()
+
+
+def _extract_text_sync(filename: str, content: bytes) -> str:
+    """Extract raw text from DOCX or TXT bytes (PDFs go page by page)"""
+    if filename.endswith(".docx"):
+        from docx import Document
+        doc = Document(io.BytesIO(content))
+        return "\n".join([p.text for p in doc.paragraphs])
+    if filename.endswith(".txt"):
+        return content.decode("utf-8")
+    raise ValueError("Unsupported file type. Please upload PDF, DOCX, or TXT.")
+
+
+def _extract_pdf_pages_sync(content: bytes, start: int, stop: int) -> Tuple[int, List[Tuple[int, str, float]]]:
+    """
+    Text of pages [start, stop) as (page number, text, seconds), plus the
+    document's page count so the parent can schedule the remaining ranges
+    """
+    import pdfplumber
+    pages = []
+    with pdfplumber.open(io.BytesIO(content)) as pdf:
+        page_count = len(pdf.pages)
+        for number in range(start, min(stop, page_count)):
+            started = time.perf_counter()
+            page = pdf.pages[number]
+            text = page.extract_text() or ""
+            page.close()
+            pages.append((number + 1, text, time.perf_counter() - started))
+    return page_count, pages
+
+
+def _run_with_alarm(timeout: float, fn: Callable, *args):
+    """Pool task: run fn bounded by a SIGALRM timer in the worker itself"""
+    use_alarm = hasattr(signal, "setitimer") and timeout > 0
+    if use_alarm:
+        previous = signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return fn(*args)
+    except _ExtractionTimeout:
+        raise DocumentExtractionError(f"Text extraction timed out after {timeout:.0f}s")
+    except MemoryError:
+        raise DocumentExtractionError("Text extraction exceeded the memory limit")
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+
+
+# ---------------------------------------------------------------------------
+# Parent side
+# ---------------------------------------------------------------------------
+
+def _pool_context():
+    # Forking a process that already runs the event loop, pymongo and httpx
+    # threads is unsafe; forkserver keeps worker start-up cheap on Linux
+    if sys.platform.startswith("linux"):
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+class DocumentExtractor:
+    """Owns the extraction process pool and its counters"""
+
+    def __init__(
+        self,
+        max_workers: int = EXTRACTION_MAX_WORKERS,
+        timeout: float = EXTRACTION_TIMEOUT_SECONDS,
+        memory_limit_mb: int = EXTRACTION_MEMORY_LIMIT_MB,
+        recycle_after_files: int = EXTRACTION_RECYCLE_AFTER_FILES,
+        pages_per_task: int = EXTRACTION_PAGES_PER_TASK,
+        char_budget: int = EXTRACTION_CHAR_BUDGET,
+    ):
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.recycle_after_files = recycle_after_files
+        self.pages_per_task = max(1, pages_per_task)
+        self.char_budget = char_budget
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_files = 0
+        self._warming: Optional[asyncio.Task] = None
+        # One file per worker: queued files wait here, so the timeout only
+        # covers time actually spent extracting
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._retry_lock: Optional[asyncio.Lock] = None
+        self._in_flight = 0
+        self._counters = {
+            "extracted": 0, "failed": 0, "timeouts": 0, "truncated": 0, "pool_restarts": 0,
+            "restart_retries": 0, "pool_recycles": 0, "pages": 0, "total_seconds": 0.0, "page_seconds": 0.0,
+            "slowest_page_seconds": 0.0,
+        }
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+        return self._slots
+
+    def _get_retry_lock(self) -> asyncio.Lock:
+        if self._retry_lock is None:
+            self._retry_lock = asyncio.Lock()
+        return self._retry_lock
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=_pool_context(),
+                initializer=_init_worker,
+                initargs=(self.memory_limit_mb,),
+            )
+            self._pool_files = 0
+        return self._pool
+
+    def _discard_pool(self):
+        """Kill the workers (a stuck one cannot be cancelled) and start over lazily"""
+        pool, self._pool = self._pool, None
+        if pool is None:
+            return
+        self._counters["pool_restarts"] += 1
+        for process in list((getattr(pool, "_processes", None) or {}).values()):
+            try:
+                process.kill()
+            except Exception:
+                pass
+        # Queued tasks are not cancelled: they fail with BrokenProcessPool and are retried
+        pool.shutdown(wait=False)
+
+    def _maybe_recycle(self, pool: ProcessPoolExecutor):
+        """Swap in fresh workers once this pool has handled enough tasks"""
+        if pool is not self._pool or not self.recycle_after_files:
+            return
+        self._pool_files += 1
+        if self._pool_files < self.recycle_after_files:
+            return
+        self._pool = None
+        self._counters["pool_recycles"] += 1
+        # Files still running on the old workers finish before they exit
+        pool.shutdown(wait=False)
+        self._warming = asyncio.get_running_loop().create_task(self._warm(self._get_pool()))
+
+    async def _warm(self, pool: ProcessPoolExecutor) -> int:
+        loop = asyncio.get_running_loop()
+        pids = await asyncio.gather(
+            *(loop.run_in_executor(pool, _warm_up) for _ in range(self.max_workers)),
+            return_exceptions=True,
+        )
+        return len({pid for pid in pids if isinstance(pid, int)})
+
+    async def start(self):
+        """Spawn and warm every worker up front"""
+        started = time.perf_counter()
+        workers = await self._warm(self._get_pool())
+        print(f"🧰 Extraction pool ready: {workers} worker(s) in {time.perf_counter() - started:.1f}s "
+              f"(timeout={self.timeout:.0f}s, memory cap={self.memory_limit_mb}MB)")
+
+    async def stop(self):
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            await asyncio.to_thread(pool.shutdown, wait=True, cancel_futures=True)
+
+    async def _run(self, label: str, fn: Callable, *args):
+        """Run one task in a worker slot, enforcing the timeout and keeping the pool healthy"""
+        async with self._get_slots():
+            try:
+                return await self._attempt(label, fn, *args)
+            except BrokenProcessPool:
+                # Every task on a torn-down pool breaks, not just the file that hung or crashed
+                self._counters["restart_retries"] += 1
+                print(f"🔁 Extraction worker pool broke during {label}, retrying on fresh workers")
+
+            # Retries run one at a time, so a retry that breaks the pool again is the file at fault
+            async with self._get_retry_lock():
+                try:
+                    return await self._attempt(label, fn, *args)
+                except BrokenProcessPool:
+                    print(f"💥 Extraction worker died on {label}, restarting worker pool")
+                    raise DocumentExtractionError("Text extraction worker crashed (file too large or malformed)")
+
+    async def _attempt(self, label: str, fn: Callable, *args):
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool()
+        started = time.perf_counter()
+        self._in_flight += 1
+        try:
+            future = loop.run_in_executor(pool, _run_with_alarm, self.timeout, fn, *args)
+            result = await asyncio.wait_for(future, self.timeout + HARD_TIMEOUT_GRACE_SECONDS)
+        except asyncio.TimeoutError:
+            self._counters["timeouts"] += 1
+            print(f"⏱️  Extraction of {label} hung past {self.timeout:.0f}s, restarting worker pool")
+            if pool is self._pool:
+                self._discard_pool()
+            raise DocumentExtractionError(f"Text extraction timed out after {self.timeout:.0f}s")
+        except BrokenProcessPool:
+            if pool is self._pool:
+                self._discard_pool()
+            raise
+        except DocumentExtractionError as e:
+            if "timed out" in str(e):
+                self._counters["timeouts"] += 1
+            self._maybe_recycle(pool)
+            raise
+        except Exception:
+            self._maybe_recycle(pool)
+            raise
+        finally:
+            self._in_flight -= 1
+            self._counters["total_seconds"] += time.perf_counter() - started
+
+        self._maybe_recycle(pool)
+        return result
+
+    async def iter_pdf_pages(
+        self, content: bytes, char_budget: Optional[int] = None, label: str = "PDF"
+    ) -> AsyncIterator[PageText]:
+        """
+        Yield a PDF's pages in order as they are extracted.
+
+        The first EXTRACTION_PAGES_PER_TASK pages come from one task that also
+        reports the page count; the remaining ranges are spread over the
+        workers. Once `char_budget` characters have been yielded no further
+        pages are extracted.
+        """
+        page_count, first_pages = await self._run(label, _extract_pdf_pages_sync, content, 0, self.pages_per_task)
+        chars = 0
+        for page in first_pages:
+            yield self._record_page(PageText(*page))
+            chars += len(page[1])
+            if char_budget and chars >= char_budget:
+                return
+
+        starts = deque(range(self.pages_per_task, page_count, self.pages_per_task))
+        scheduled: deque = deque()
+
+        def schedule():
+            # Keep every worker busy, but don't run far ahead of the budget
+            while starts and len(scheduled) < self.max_workers:
+                start = starts.popleft()
+                scheduled.append(asyncio.ensure_future(
+                    self._run(label, _extract_pdf_pages_sync, content, start, start + self.pages_per_task)
+                ))
+
+        try:
+            schedule()
+            while scheduled:
+                _, pages = await scheduled.popleft()
+                schedule()
+                for page in pages:
+                    yield self._record_page(PageText(*page))
+                    chars += len(page[1])
+                    if char_budget and chars >= char_budget:
+                        return
+        finally:
+            for task in scheduled:
+                task.cancel()
+
+    def _record_page(self, page: PageText) -> PageText:
+        self._counters["pages"] += 1
+        self._counters["page_seconds"] += page.seconds
+        self._counters["slowest_page_seconds"] = max(self._counters["slowest_page_seconds"], page.seconds)
+        return page
+
+    async def extract_document(
+        self, filename: str, content: bytes, char_budget: Optional[int] = None
+    ) -> ExtractedText:
+        """Raw text of one uploaded document plus per-page timing (PDFs)"""
+        if not filename.endswith(SUPPORTED_EXTENSIONS):
+            raise ValueError("Unsupported file type. Please upload PDF, DOCX, or TXT.")
+        if char_budget is None:
+            char_budget = self.char_budget
+
+        started = time.perf_counter()
+        try:
+            if filename.endswith(".pdf"):
+                parts: List[str] = []
+                pages: List[PageText] = []
+                async for page in self.iter_pdf_pages(content, char_budget, label=filename):
+                    parts.append(page.text)
+                    parts.append("\n")
+                    pages.append(page)
+                truncated = bool(char_budget) and sum(len(page.text) for page in pages) >= char_budget
+                result = ExtractedText("".join(parts), pages, truncated)
+            else:
+                text = await self._run(filename, _extract_text_sync, filename, content)
+                result = ExtractedText(text, [], False)
+        except Exception:
+            self._counters["failed"] += 1
+            raise
+
+        self._counters["extracted"] += 1
+        if result.truncated:
+            self._counters["truncated"] += 1
+        result.seconds = time.perf_counter() - started
+        return result
+
+    async def extract(self, filename: str, content: bytes) -> str:
+        """Raw text of one uploaded document, extracted in worker processes"""
+        return (await self.extract_document(filename, content)).text
+
+    def stats(self) -> Dict[str, Any]:
+        done = self._counters["extracted"] + self._counters["failed"]
+        return {
+            "workers": self.max_workers,
+            "running": self._pool is not None,
+            "in_flight": self._in_flight,
+            "timeout_seconds": self.timeout,
+            "memory_limit_mb": self.memory_limit_mb,
+            "recycle_after_files": self.recycle_after_files,
+            "pages_per_task": self.pages_per_task,
+            "char_budget": self.char_budget,
+            **{k: v for k, v in self._counters.items() if k not in ("total_seconds", "page_seconds")},
+            "slowest_page_seconds": round(self._counters["slowest_page_seconds"], 3),
+            "average_seconds": round(self._counters["total_seconds"] / done, 3) if done else 0.0,
+            "average_page_seconds": (
+                round(self._counters["page_seconds"] / self._counters["pages"], 3) if self._counters["pages"] else 0.0
+            ),
+        }
+
+
+document_extractor = DocumentExtractor()
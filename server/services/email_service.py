@@ -1,8 +1,8 @@
-import httpx
 import json
 import re
 from typing import Dict, Any
-from core.config import GROQ_API_KEY, GROQ_URL, GROQ_CHATBOT_MODEL
+from core.config import GROQ_CHATBOT_MODEL
+from services.groq_client import groq_client
 
 async def generate_email_content(recruiter_name: str, candidate_name: str, job_title: str = None, company: str = None) -> Dict[str, str]:
     """
@@ -26,41 +26,35 @@ async def generate_email_content(recruiter_name: str, candidate_name: str, job_t
     The email should be professional, warm, and engaging. Include placeholders for any missing information.
     """
 
-    headers = {
-        "Authorization": f"Bearer {GROQ_API_KEY}",
-        "Content-Type": "application/json",
-    }
-
-    payload = {
-        "model": GROQ_CHATBOT_MODEL,
-        "messages": [{"role": "user", "content": prompt}],
-        "temperature": 0.7,
-        "max_tokens": 1000
-    }
-
     try:
         print(f"🤖 Generating email with Groq using model: {GROQ_CHATBOT_MODEL}")
-        async with httpx.AsyncClient(timeout=30) as client:
-            response = await client.post(GROQ_URL, headers=headers, json=payload)
-            response.raise_for_status()
-            data = response.json()
-            
-            ai_text = data["choices"][0]["message"]["content"]
-            print(f"✅ Groq response received")
-            
-            # Clean and parse JSON
-            json_match = re.search(r'\{.*\}', ai_text, re.DOTALL)
-            if json_match:
-                cleaned = json_match.group(0)
-                email_data = json.loads(cleaned)
-                return email_data
-            else:
-                print(f"⚠️ Could not parse JSON from response, using fallback")
-                # Fallback email template
-                return {
-                    "subject": f"Exciting Opportunity at {company or 'our company'}",
-                    "body": f"Dear {candidate_name},\n\nI came across your profile and was impressed by your experience. We have an exciting opportunity at {company or 'our company'} that I believe would be a great fit for your skills.\n\nWould you be available for a brief call to discuss this further?\n\nBest regards,\n{recruiter_name}"
-                }
+        response = await groq_client.chat_completion(
+            prompt,
+            model=GROQ_CHATBOT_MODEL,
+            temperature=0.7,
+            max_tokens=1000,
+            timeout=30,
+            max_retries=2,
+            purpose="email",
+        )
+        data = response.json()
+        
+        ai_text = data["choices"][0]["message"]["content"]
+        print(f"✅ Groq response received")
+        
+        # Clean and parse JSON
+        json_match = re.search(r'\{.*\}', ai_text, re.DOTALL)
+        if json_match:
+            cleaned = json_match.group(0)
+            email_data = json.loads(cleaned)
+            return email_data
+        else:
+            print(f"⚠️ Could not parse JSON from response, using fallback")
+            # Fallback email template
+            return {
+                "subject": f"Exciting Opportunity at {company or 'our company'}",
+                "body": f"Dear {candidate_name},\n\nI came across your profile and was impressed by your experience. We have an exciting opportunity at {company or 'our company'} that I believe would be a great fit for your skills.\n\nWould you be available for a brief call to discuss this further?\n\nBest regards,\n{recruiter_name}"
+            }
     except Exception as e:
         print(f"❌ Error generating email: {str(e)}")
         # Return default template on error
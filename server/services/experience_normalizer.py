@@ -0,0 +1,257 @@
+"""
+Structured experience normalization, run once when a resume is stored.
+
+Each experience entry's free-text `Years` ("Jan 2020 - Mar 2022",
+"2019-Present", "06/2021 – 08/2021", "1.5 years", "8 months") becomes a
+start/end month pair and a duration in months. Entries with dates are merged
+as intervals, so overlapping roles (a part-time job during an internship, a
+promotion listed as two rows) are not counted twice; entries that only give
+a duration are added on top.
+
+The result is stored on the resume document as `experience_normalized` and
+the candidate index reads it instead of re-parsing `Years` on every query.
+Ongoing roles are stored with the month they were normalized in (`as_of`);
+experience_totals() extends them to the current month from the stored
+months, without touching the text again.
+"""
+import re
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+# Bump whenever the parsing below changes so stored records get backfilled again
+EXPERIENCE_NORMALIZER_VERSION = 1
+
+# Cap for any single role (15 years), as before normalization existed
+MAX_ROLE_MONTHS = 180
+EARLIEST_YEAR = 1970
+
+MONTHS = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12,
+}
+ONGOING_WORDS = r"present|current|now|till\s+date|to\s+date|ongoing"
+_MONTH_NAME = r"(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?"
+_SEPARATOR = r"\s*(?:-|–|—|to|till|until)\s*"
+
+# "Jan 2020 - Mar 2022", "Jan 2020 - Present", "Jan - Mar 2022"
+_MONTH_RANGE = re.compile(
+    rf"(?:{_MONTH_NAME}\s*,?\s*)?(\d{{4}}){_SEPARATOR}(?:{_MONTH_NAME}\s*,?\s*(\d{{4}})|({ONGOING_WORDS}))",
+    re.IGNORECASE,
+)
+_SHORT_MONTH_RANGE = re.compile(rf"{_MONTH_NAME}{_SEPARATOR}{_MONTH_NAME}\s*,?\s*(\d{{4}})", re.IGNORECASE)
+# "06/2021 - 08/2021", "06/2021 - present"
+_NUMERIC_RANGE = re.compile(
+    rf"\b(\d{{1,2}})[/.-](\d{{4}}){_SEPARATOR}(?:(\d{{1,2}})[/.-](\d{{4}})|({ONGOING_WORDS}))",
+    re.IGNORECASE,
+)
+# "2020 - 2023", "2019-Present"
+_YEAR_RANGE = re.compile(rf"(\d{{4}}){_SEPARATOR}(\d{{4}}|{ONGOING_WORDS})", re.IGNORECASE)
+_YEAR = re.compile(r"\b((?:19|20)\d{2})\b")
+_DURATION_YEARS = re.compile(r"(\d+\.?\d*)\s*(?:years?|yrs?)\b", re.IGNORECASE)
+_DURATION_MONTHS = re.compile(r"(\d+)\s*(?:months?|mos?)\b", re.IGNORECASE)
+_NUMBER = re.compile(r"(\d+\.?\d*)")
+
+
+def month_index(year: int, month: int) -> int:
+    return year * 12 + month - 1
+
+
+def month_label(index: int) -> str:
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def parse_month_label(label: str) -> int:
+    year, month = label.split("-")
+    return month_index(int(year), int(month))
+
+
+def _month(name: Optional[str], default: int) -> int:
+    return MONTHS[name[:3].lower()] if name else default
+
+
+def _interval(start_year: int, start_month: int, end: Optional[Tuple[int, int]], today: int,
+              method: str) -> Optional[Dict[str, Any]]:
+    """
+    Interval from a start and an end (None = ongoing). Month-level ends are
+    inclusive; year-only ranges run from January to January, so "2020 - 2023"
+    stays 36 months.
+    """
+    current_year = today // 12
+    if not EARLIEST_YEAR <= start_year <= current_year:
+        return None
+    start = month_index(start_year, start_month)
+    if end is None:
+        stop = today + 1
+    else:
+        end_year, end_month = end
+        if not start_year <= end_year <= current_year + 1:
+            return None
+        stop = month_index(end_year, end_month) + (0 if method == "year_range" else 1)
+    if stop < start:
+        return None
+    return {"start": start, "stop": stop, "ongoing": end is None, "method": method}
+
+
+def _parse_interval(text: str, today: int) -> Optional[Dict[str, Any]]:
+    match = _NUMERIC_RANGE.search(text)
+    if match and 1 <= int(match.group(1)) <= 12:
+        end = None if match.group(5) else (int(match.group(4)), int(match.group(3)))
+        if end is None or 1 <= end[1] <= 12:
+            return _interval(int(match.group(2)), int(match.group(1)), end, today, "month_range")
+
+    match = _MONTH_RANGE.search(text)
+    if match and (match.group(1) or match.group(3)):
+        end = None if match.group(5) else (int(match.group(4)), _month(match.group(3), 12))
+        return _interval(int(match.group(2)), _month(match.group(1), 1), end, today, "month_range")
+
+    match = _SHORT_MONTH_RANGE.search(text)
+    if match:
+        year = int(match.group(3))
+        return _interval(year, _month(match.group(1), 1), (year, _month(match.group(2), 12)), today, "month_range")
+
+    match = _YEAR_RANGE.search(text)
+    if match:
+        end_text = match.group(2)
+        end = (int(end_text), 1) if end_text.isdigit() else None
+        return _interval(int(match.group(1)), 1, end, today, "year_range")
+
+    # Two loose years ("2019, 2021") read as a year range
+    years = sorted({int(year) for year in _YEAR.findall(text)})
+    if len(years) == 2:
+        return _interval(years[0], 1, (years[1], 1), today, "year_range")
+    return None
+
+
+def _parse_duration(text: str) -> Tuple[int, str]:
+    """Months stated as a duration ("1.5 years", "2 yrs 3 months"), else a bare number of years"""
+    years = _DURATION_YEARS.search(text)
+    months = _DURATION_MONTHS.search(text)
+    if years or months:
+        total = (int(float(years.group(1)) * 12) if years else 0) + (int(months.group(1)) if months else 0)
+        return total, "explicit_duration"
+
+    for number in _NUMBER.findall(text):
+        value = float(number)
+        # Skip anything that looks like a year; accept 0.5 to 40 years
+        if EARLIEST_YEAR <= value <= 2100:
+            continue
+        if 0.5 <= value <= 40:
+            return int(value * 12), "fallback_duration"
+    return 0, "unknown"
+
+
+def normalize_experience_entry(years: Any, today: Optional[int] = None) -> Dict[str, Any]:
+    """Structured form of one `Years` value; months is 0 when nothing usable was found"""
+    today = current_month() if today is None else today
+    text = str(years or "").strip()
+    entry = {"raw": text, "start": None, "end": None, "ongoing": False, "months": 0, "method": "no_data"}
+    if not text:
+        return entry
+
+    interval = _parse_interval(text, today)
+    if interval:
+        start = max(interval["start"], interval["stop"] - MAX_ROLE_MONTHS)
+        entry.update({
+            "start": month_label(start),
+            "end": month_label(interval["stop"] - 1) if interval["stop"] > start else month_label(start),
+            "ongoing": interval["ongoing"],
+            "months": interval["stop"] - start,
+            "method": interval["method"],
+        })
+        return entry
+
+    months, method = _parse_duration(text)
+    entry.update({"months": min(months, MAX_ROLE_MONTHS), "method": method})
+    return entry
+
+
+def current_month(now: Optional[datetime] = None) -> int:
+    now = now or datetime.now()
+    return month_index(now.year, now.month)
+
+
+def experience_display(total_months: int) -> str:
+    if total_months == 0:
+        return "New Graduate / Intern"
+    if total_months < 12:
+        return f"{total_months} months"
+    years_part = total_months // 12
+    months_part = total_months % 12
+    if total_months < 24:
+        return f"{years_part} year {months_part} months" if months_part > 0 else f"{years_part} year"
+    if months_part >= 6:
+        return f"{years_part}.{months_part // 6 * 5} years"
+    return f"{years_part} years"
+
+
+def _merged_months(intervals: List[Tuple[int, int]]) -> int:
+    total = 0
+    span_start = span_stop = None
+    for start, stop in sorted(intervals):
+        if span_stop is None or start > span_stop:
+            if span_stop is not None:
+                total += span_stop - span_start
+            span_start, span_stop = start, stop
+        else:
+            span_stop = max(span_stop, stop)
+    if span_stop is not None:
+        total += span_stop - span_start
+    return total
+
+
+def experience_totals(normalized: Dict[str, Any], today: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Overlap-merged total of a normalized record. Ongoing entries are extended
+    to the current month from their stored start, so the total stays right
+    long after the resume was stored.
+    """
+    today = current_month() if today is None else today
+    intervals = []
+    duration_months = 0
+    summed_months = 0
+    for entry in normalized.get("entries", []):
+        if entry["start"] is None:
+            duration_months += entry["months"]
+            summed_months += entry["months"]
+            continue
+        start = parse_month_label(entry["start"])
+        stop = parse_month_label(entry["end"]) + 1 if entry["months"] else start
+        if entry["ongoing"]:
+            stop = max(stop, today + 1)
+            start = max(start, stop - MAX_ROLE_MONTHS)
+        intervals.append((start, stop))
+        summed_months += stop - start
+
+    total_months = _merged_months(intervals) + duration_months
+    return {
+        "total_months": total_months,
+        "total_years": total_months / 12.0,
+        "total_years_display": experience_display(total_months),
+        "overlap_months": summed_months - total_months,
+        "ongoing": any(entry["ongoing"] for entry in normalized.get("entries", [])),
+        "as_of": month_label(today),
+    }
+
+
+def normalize_experience(experiences: List[Dict[str, Any]], now: Optional[datetime] = None) -> Dict[str, Any]:
+    """The `experience_normalized` record stored on a resume document"""
+    today = current_month(now)
+    entries = []
+    for index, exp in enumerate(experiences or []):
+        if not isinstance(exp, dict):
+            continue
+        entry = normalize_experience_entry(exp.get("Years"), today)
+        entries.append({
+            "index": index,
+            "company": exp.get("Company") or "Unknown",
+            "role": exp.get("Role") or "Unknown",
+            **entry,
+        })
+
+    normalized = {"version": EXPERIENCE_NORMALIZER_VERSION, "entries": entries}
+    normalized.update(experience_totals(normalized, today))
+    return normalized
+
+
+def is_current(normalized: Optional[Dict[str, Any]]) -> bool:
+    return bool(normalized) and normalized.get("version") == EXPERIENCE_NORMALIZER_VERSION
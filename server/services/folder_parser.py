@@ -3,70 +3,46 @@ import os
 import tempfile
 from typing import List, Dict, Any
 from datetime import datetime
-import json
 import asyncio
-from pathlib import Path
 
+from core.config import BULK_PARSE_MODE
 # Use your existing parser module (you provided this earlier)
 from services import resume_parser  # async parse_resume(file)
+from services.uploads import SpooledUpload
+from services.batch_writer import BatchWriter
+from services.near_duplicates import DuplicateTextSession, describe_match
+from services.batch_parser import ResumeBatchParser
 
 ALLOWED_EXT = {".pdf", ".doc", ".docx", ".txt", ".docm"}
 
-# Rate limiting configuration (lighter since model is fixed)
-DELAY_BETWEEN_REQUESTS = 0.5  # 0.5 seconds between each resume parse
-MAX_CONCURRENT_PARSES = 3  # Process max 3 resumes at a time
+# Parsing is paced by the shared Groq token bucket; this only bounds how many
+# archive members are decompressed and in flight at once
+MAX_CONCURRENT_PARSES = 3
+
+# Members up to this size stay in memory; larger ones are spooled to a temp file
+ZIP_SPOOL_THRESHOLD_BYTES = 2 * 1024 * 1024
+# Members whose uncompressed size (from the central directory) exceeds this are skipped
+ZIP_MAX_MEMBER_BYTES = 20 * 1024 * 1024
 
 def _is_valid_resume(filename: str) -> bool:
     _, ext = os.path.splitext(filename.lower())
     return ext in ALLOWED_EXT
 
-class FileLikeAsyncWrapper:
-    """
-    Wrap a filesystem path into an object compatible with your parse_resume(file) function:
-    - .filename attribute
-    - .file attribute (binary file object; pdfplumber and python-docx will use .file)
-    - async read() method returning bytes (for txt reading)
+async def parse_single_resume_with_retry(prepared, relpath, max_retries=2, batcher=None):
     """
-    def __init__(self, path: str, filename: str):
-        self.path = path
-        self.filename = filename
-        # We'll open file lazily as needed
-        self._file_obj = None
-
-    def _open(self):
-        if self._file_obj is None:
-            # open in binary mode
-            self._file_obj = open(self.path, "rb")
-        return self._file_obj
-
-    @property
-    def file(self):
-        # return file-like object for pdfplumber/docx which expect a file or file-like
-        return self._open()
-
-    async def read(self) -> bytes:
-        # run blocking read in executor
-        loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(None, self._open().read)
-
-    def close(self):
-        try:
-            if self._file_obj:
-                self._file_obj.close()
-        except Exception:
-            pass
-
-
-async def parse_single_resume_with_retry(wrapper, relpath, max_retries=2):
-    """
-    Parse a single resume with retry logic and better error handling
+    Parse a single resume (already through resume_parser.prepare_resume) with
+    retry logic and better error handling. With a batcher the first attempt
+    may share its request with other short resumes.
     """
     last_error = None
     
     for attempt in range(max_retries):
         try:
             # Call your async parser
-            parsed = await resume_parser.parse_resume(wrapper)
+            if attempt == 0 and batcher is not None:
+                parsed = await batcher.parse(prepared)
+            else:
+                parsed = await resume_parser.parse_prepared_resume(prepared)
             return {"success": True, "data": parsed}
             
         except Exception as e:
@@ -90,112 +66,154 @@ async def parse_single_resume_with_retry(wrapper, relpath, max_retries=2):
 
 async def process_zip_and_store(zip_path: str, uploader_email: str, db) -> List[Dict[str, Any]]:
     """
-    Async: Extract zip at zip_path, parse each supported file with resume_parser.parse_resume,
-    store parsed results into MongoDB `resumes` collection using provided `db` (core.database.db).
-    Returns list of per-file result dicts: { filename, status, message }
-    
-    NOW WITH RATE LIMITING AND SEQUENTIAL PROCESSING
+    Async: Stream each supported member of the zip at zip_path through
+    resume_parser.parse_resume and store parsed results into MongoDB `resumes`
+    collection using provided `db` (core.database.db).
+    Returns list of per-file result dicts (archive order): { filename, status, message }
+
+    Nothing is extracted to disk up front: members are filtered by extension
+    and size from the central directory, then decompressed one at a time into
+    a memory buffer (spooled to a temp file above ZIP_SPOOL_THRESHOLD_BYTES)
+    right before a parse slot picks them up. Parsed documents are stored
+    through a BatchWriter, so the whole archive takes a few insert_many calls.
+
+    Members whose extracted text matches a resume stored earlier by this
+    uploader (or earlier in the archive) are linked to it as duplicates
+    without an LLM call.
     """
-    results: List[Dict[str, Any]] = []
-    tmpdir = tempfile.mkdtemp(prefix="resumes_unzip_")
-
-    try:
-        # Extract zip into tmpdir (blocking; small cost)
-        with zipfile.ZipFile(zip_path, "r") as zf:
-            zf.extractall(tmpdir)
-
-        resumes_coll = db["resumes"]
-
-        # Collect all valid resume files first
-        resume_files = []
-        for root, dirs, files in os.walk(tmpdir):
-            for fname in files:
-                relpath = os.path.relpath(os.path.join(root, fname), tmpdir)
-                if not _is_valid_resume(fname):
-                    results.append({
-                        "filename": relpath,
-                        "status": "skipped",
-                        "message": "Unsupported file type"
-                    })
-                else:
-                    file_path = os.path.join(root, fname)
-                    resume_files.append((file_path, relpath, fname))
-
-        # Process resumes SEQUENTIALLY with delays (prevents rate limiting)
-        print(f"Processing {len(resume_files)} valid resumes sequentially...")
-        
-        for idx, (file_path, relpath, fname) in enumerate(resume_files):
-            wrapper = FileLikeAsyncWrapper(file_path, fname)
-            
+    resumes_coll = db["resumes"]
+    writer = BatchWriter(resumes_coll)
+    text_dedup = DuplicateTextSession(uploader_email, "resumes")
+    batcher = ResumeBatchParser()
+
+    with zipfile.ZipFile(zip_path, "r") as zf:
+        results: List[Dict[str, Any]] = []
+        resume_members = []
+
+        # Central directory only — no member is decompressed here
+        for info in zf.infolist():
+            if info.is_dir():
+                continue
+            relpath = info.filename
+            fname = os.path.basename(relpath)
+            if not _is_valid_resume(fname) or relpath.startswith("__MACOSX/"):
+                results.append({
+                    "filename": relpath,
+                    "status": "skipped",
+                    "message": "Unsupported file type"
+                })
+            elif info.file_size > ZIP_MAX_MEMBER_BYTES:
+                results.append({
+                    "filename": relpath,
+                    "status": "skipped",
+                    "message": f"File too large ({info.file_size // (1024 * 1024)}MB uncompressed)"
+                })
+            else:
+                results.append(None)
+                resume_members.append((len(results) - 1, info, fname))
+
+        print(f"Processing {len(resume_members)} valid resumes ({MAX_CONCURRENT_PARSES} at a time)...")
+
+        slots = asyncio.Semaphore(MAX_CONCURRENT_PARSES)
+        # ZipFile shares one file handle between members; decompress one at a time
+        archive_lock = asyncio.Lock()
+
+        def spool_member(info):
+            spool = tempfile.SpooledTemporaryFile(max_size=ZIP_SPOOL_THRESHOLD_BYTES, prefix="resume_zip_")
+            written = 0
+            with zf.open(info) as member:
+                while True:
+                    chunk = member.read(1024 * 1024)
+                    if not chunk:
+                        break
+                    written += len(chunk)
+                    # The central directory size can lie (zip bombs)
+                    if written > ZIP_MAX_MEMBER_BYTES:
+                        spool.close()
+                        raise ValueError("File too large once decompressed")
+                    spool.write(chunk)
+            return spool
+
+        async def process_member(position, info, fname):
+            relpath = info.filename
+            stored_id = None
             try:
-                print(f"Parsing resume {idx + 1}/{len(resume_files)}: {relpath}")
-                
-                # Parse with retry logic
-                result = await parse_single_resume_with_retry(wrapper, relpath)
-                
-                if result["success"]:
-                    parsed = result["data"]
-                    
-                    # Create MongoDB document
-                    doc = {
-                        "filename": relpath,
-                        "uploader_email": uploader_email,
-                        "parsed": parsed,
-                        "raw_stored_at": datetime.utcnow(),
-                    }
-
-                    # Insert into MongoDB
-                    insert_result = resumes_coll.insert_one(doc)
-
-                    results.append({
-                        "filename": relpath,
-                        "status": "success",
-                        "message": "Parsed and stored",
-                        "inserted_id": str(insert_result.inserted_id)
-                    })
-                else:
+                async with slots:
+                    upload = None
+                    try:
+                        async with archive_lock:
+                            upload = SpooledUpload(fname, await asyncio.to_thread(spool_member, info))
+
+                        try:
+                            prepared = await resume_parser.prepare_resume(upload, mode=BULK_PARSE_MODE)
+                        except Exception as e:
+                            prepared = None
+                            result = {"success": False, "error": str(e)}
+                    finally:
+                        if upload is not None:
+                            upload.close()
+
+                    if prepared is not None:
+                        match = await text_dedup.check(position, relpath, prepared.get("text"))
+                        if match is not None:
+                            results[position] = {
+                                "filename": relpath,
+                                "status": "duplicate",
+                                "message": describe_match(match),
+                                "duplicate_of": str(match["resume_id"]),
+                            }
+                            return
+
+                        print(f"Parsing resume {position + 1}/{len(results)}: {relpath}")
+
+                        # Parse with retry logic
+                        result = await parse_single_resume_with_retry(prepared, relpath, batcher=batcher)
+
+                if not result["success"]:
                     # Parsing failed after retries
-                    results.append({
+                    results[position] = {
                         "filename": relpath,
                         "status": "error",
                         "message": f"Failed to parse resume: {result['error'][:200]}"
-                    })
-                
+                    }
+                    return
+
+                # Queue the MongoDB document; the slot is already free for the next member
+                doc = {
+                    "filename": relpath,
+                    "uploader_email": uploader_email,
+                    "parsed": result["data"],
+                    "raw_stored_at": datetime.utcnow(),
+                }
+                inserted_id = stored_id = await writer.insert(doc)
+
+                results[position] = {
+                    "filename": relpath,
+                    "status": "success",
+                    "message": "Parsed and stored",
+                    "inserted_id": str(inserted_id)
+                }
+
             except Exception as e:
-                # Unexpected error during processing
-                results.append({
+                # Unexpected error during processing (including corrupt members and failed writes)
+                results[position] = {
                     "filename": relpath,
                     "status": "error",
                     "message": f"Unexpected error: {str(e)[:200]}"
-                })
+                }
             finally:
-                wrapper.close()
-            
-            # Add delay between requests to avoid rate limiting
-            # Skip delay after the last file
-            if idx < len(resume_files) - 1:
-                print(f"Waiting {DELAY_BETWEEN_REQUESTS}s before next resume...")
-                await asyncio.sleep(DELAY_BETWEEN_REQUESTS)
-
-    finally:
-        # Cleanup extracted files and tempdir
-        try:
-            for root, dirs, files in os.walk(tmpdir, topdown=False):
-                for name in files:
-                    try:
-                        os.remove(os.path.join(root, name))
-                    except Exception:
-                        pass
-                for name in dirs:
-                    try:
-                        os.rmdir(os.path.join(root, name))
-                    except Exception:
-                        pass
-            try:
-                os.rmdir(tmpdir)
-            except Exception:
-                pass
-        except Exception:
-            pass
+                # Later copies of this member's text wait on the outcome
+                text_dedup.resolve(position, stored_id)
 
-    return results
\ No newline at end of file
+        try:
+            await asyncio.gather(*(process_member(*member) for member in resume_members))
+        finally:
+            await batcher.aclose()
+            await writer.aclose()
+            text_dedup.abort()
+        await text_dedup.save()
+
+    stats = writer.stats()
+    print(f"Stored {stats['inserted']} resume(s) in {stats['round_trips']} write(s), "
+          f"{text_dedup.llm_calls_saved} duplicate(s) skipped without an LLM call")
+    return results
@@ -0,0 +1,330 @@
+"""
+Application-wide Groq client.
+
+One httpx.AsyncClient (HTTP/2 when `h2` is installed) is kept for the life of
+the app so LLM calls reuse warm connections instead of paying a TCP + TLS
+handshake per request. The client owns timeouts, retries with exponential
+backoff, 429 Retry-After handling and per-call latency / token-usage metrics.
+chat_completion_stream() is the server-sent-events variant for callers that
+forward tokens as they arrive.
+"""
+import asyncio
+import importlib.util
+import json
+import random
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from core.config import (
+    GROQ_API_KEY,
+    GROQ_URL,
+    GROQ_HTTP2,
+    GROQ_MAX_CONNECTIONS,
+    GROQ_MAX_KEEPALIVE_CONNECTIONS,
+    GROQ_KEEPALIVE_EXPIRY_SECONDS,
+    GROQ_CONNECT_TIMEOUT_SECONDS,
+    GROQ_MAX_RETRIES,
+    GROQ_MAX_BACKOFF_SECONDS,
+)
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+RECENT_CALLS_KEPT = 200
+
+_json_decoder = json.JSONDecoder()
+
+
+def _retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    """Seconds from a Retry-After header (delta-seconds form only)"""
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+def _response_usage(response: httpx.Response) -> Dict[str, Any]:
+    """
+    The `usage` object of a completion body, decoded on its own so the caller's
+    response.json() stays the only full parse. Quotes inside string values are
+    escaped, so the last `"usage":` in the body is the top-level key.
+    """
+    body = response.text
+    position = body.rfind('"usage":')
+    if position < 0:
+        return {}
+    start = position + len('"usage":')
+    while start < len(body) and body[start].isspace():
+        start += 1
+    try:
+        usage, _ = _json_decoder.raw_decode(body, start)
+    except ValueError:
+        return {}
+    return usage if isinstance(usage, dict) else {}
+
+
+class GroqClient:
+    """Pooled chat-completions client shared by every Groq call site"""
+
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self.http2 = GROQ_HTTP2 and importlib.util.find_spec("h2") is not None
+        self._recent_calls: deque = deque(maxlen=RECENT_CALLS_KEPT)
+        self._totals: Dict[str, Dict[str, Any]] = {}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=self.http2,
+                limits=httpx.Limits(
+                    max_connections=GROQ_MAX_CONNECTIONS,
+                    max_keepalive_connections=GROQ_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=GROQ_KEEPALIVE_EXPIRY_SECONDS,
+                ),
+                timeout=httpx.Timeout(60, connect=GROQ_CONNECT_TIMEOUT_SECONDS),
+                headers={
+                    "Authorization": f"Bearer {GROQ_API_KEY}",
+                    "Content-Type": "application/json",
+                },
+            )
+            print(f"🔌 Groq client ready (HTTP/{'2' if self.http2 else '1.1'}, pool={GROQ_MAX_CONNECTIONS})")
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+
+    async def chat_completion(
+        self,
+        prompt: str,
+        model: str,
+        temperature: float = 0.7,
+        max_tokens: int = 2000,
+        timeout: float = 60,
+        max_retries: int = GROQ_MAX_RETRIES,
+        limiter=None,
+        purpose: str = "chat",
+    ) -> httpx.Response:
+        """
+        POST a single-message chat completion and return the successful response.
+
+        Retries timeouts, transport errors, 429 and 5xx with exponential backoff
+        (honouring Retry-After on 429). Other 4xx responses raise immediately.
+        `limiter` is an optional TokenBucket acquired before every attempt and
+        penalized on 429 so concurrent callers back off together.
+        """
+        payload = {
+            "model": model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }
+        client = self._get_client()
+        last_error: Optional[Exception] = None
+
+        for attempt in range(max_retries):
+            if limiter is not None:
+                await limiter.acquire()
+
+            start = time.perf_counter()
+            delay = min(GROQ_MAX_BACKOFF_SECONDS, 2 ** attempt + random.uniform(0, 0.5))
+            try:
+                response = await client.post(GROQ_URL, json=payload, timeout=self._timeout(timeout))
+            except (httpx.TimeoutException, httpx.TransportError) as e:
+                last_error = e
+                self._record(purpose, model, time.perf_counter() - start, None, attempt, error=type(e).__name__)
+                print(f"⚠️  Groq {purpose} {type(e).__name__} (attempt {attempt + 1}/{max_retries})")
+                if attempt < max_retries - 1:
+                    await asyncio.sleep(delay)
+                continue
+
+            latency = time.perf_counter() - start
+            self._record(purpose, model, latency, response, attempt,
+                         usage=_response_usage(response) if response.status_code == 200 else {})
+
+            if response.status_code not in RETRYABLE_STATUS_CODES:
+                response.raise_for_status()
+                return response
+
+            last_error = httpx.HTTPStatusError(
+                f"HTTP {response.status_code}: {response.text[:200]}",
+                request=response.request,
+                response=response,
+            )
+
+            if response.status_code == 429:
+                retry_after = _retry_after_seconds(response)
+                if retry_after is not None:
+                    delay = min(GROQ_MAX_BACKOFF_SECONDS, retry_after)
+                else:
+                    delay = min(GROQ_MAX_BACKOFF_SECONDS, 2 ** (attempt + 2))
+                if limiter is not None:
+                    # The bucket does the waiting for every caller sharing it
+                    limiter.penalize(delay)
+                    delay = 0
+                print(f"⏳ Groq {purpose} rate limited (attempt {attempt + 1}/{max_retries}), backing off {delay:.1f}s")
+            else:
+                print(f"⚠️  Groq {purpose} HTTP {response.status_code} (attempt {attempt + 1}/{max_retries})")
+
+            if attempt < max_retries - 1 and delay > 0:
+                await asyncio.sleep(delay)
+
+        raise last_error
+
+    async def chat_completion_stream(
+        self,
+        prompt: str,
+        model: str,
+        temperature: float = 0.7,
+        max_tokens: int = 2000,
+        timeout: float = 60,
+        max_retries: int = GROQ_MAX_RETRIES,
+        purpose: str = "chat",
+    ) -> AsyncIterator[str]:
+        """
+        Streaming chat completion: yields content deltas as Groq sends them.
+
+        Opening the stream is retried like chat_completion (timeouts, transport
+        errors, 429 and 5xx). Once a token has been yielded a failure is raised
+        to the caller, since the partial answer can't be replayed.
+        """
+        payload = {
+            "model": model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": True,
+        }
+        client = self._get_client()
+        last_error: Optional[Exception] = None
+
+        for attempt in range(max_retries):
+            start = time.perf_counter()
+            delay = min(GROQ_MAX_BACKOFF_SECONDS, 2 ** attempt + random.uniform(0, 0.5))
+            first_token: Optional[float] = None
+            try:
+                async with client.stream("POST", GROQ_URL, json=payload, timeout=self._timeout(timeout)) as response:
+                    if response.status_code != 200:
+                        await response.aread()
+                        self._record(purpose, model, time.perf_counter() - start, response, attempt, usage={})
+                        if response.status_code not in RETRYABLE_STATUS_CODES:
+                            response.raise_for_status()
+                        last_error = httpx.HTTPStatusError(
+                            f"HTTP {response.status_code}: {response.text[:200]}",
+                            request=response.request,
+                            response=response,
+                        )
+                        if response.status_code == 429:
+                            retry_after = _retry_after_seconds(response)
+                            delay = min(GROQ_MAX_BACKOFF_SECONDS, retry_after if retry_after is not None else 2 ** (attempt + 2))
+                        print(f"⚠️  Groq {purpose} stream HTTP {response.status_code} (attempt {attempt + 1}/{max_retries})")
+                    else:
+                        usage: Dict[str, Any] = {}
+                        async for line in response.aiter_lines():
+                            if not line.startswith("data:"):
+                                continue
+                            data = line[5:].strip()
+                            if data == "[DONE]":
+                                break
+                            chunk = json.loads(data)
+                            # Groq reports usage on the last chunk (x_groq.usage, or usage when requested)
+                            usage = chunk.get("usage") or (chunk.get("x_groq") or {}).get("usage") or usage
+                            for choice in chunk.get("choices") or []:
+                                content = (choice.get("delta") or {}).get("content")
+                                if content:
+                                    if first_token is None:
+                                        first_token = time.perf_counter() - start
+                                    yield content
+                        self._record(purpose, model, time.perf_counter() - start, response, attempt,
+                                     usage=usage, first_token=first_token)
+                        return
+            except (httpx.TimeoutException, httpx.TransportError) as e:
+                self._record(purpose, model, time.perf_counter() - start, None, attempt, error=type(e).__name__)
+                if first_token is not None:
+                    raise
+                last_error = e
+                print(f"⚠️  Groq {purpose} stream {type(e).__name__} (attempt {attempt + 1}/{max_retries})")
+
+            if attempt < max_retries - 1:
+                await asyncio.sleep(delay)
+
+        raise last_error
+
+    @staticmethod
+    def _timeout(timeout: float) -> httpx.Timeout:
+        # A bare float would replace the client's connect timeout as well
+        return httpx.Timeout(timeout, connect=GROQ_CONNECT_TIMEOUT_SECONDS)
+
+    def _record(self, purpose: str, model: str, latency: float, response: Optional[httpx.Response], attempt: int,
+                error: str = None, usage: Optional[Dict[str, Any]] = None, first_token: Optional[float] = None):
+        usage = usage or {}
+
+        call = {
+            "purpose": purpose,
+            "model": model,
+            "status": response.status_code if response is not None else None,
+            "error": error,
+            "attempt": attempt + 1,
+            "latency_ms": round(latency * 1000, 1),
+            "prompt_tokens": usage.get("prompt_tokens", 0),
+            "completion_tokens": usage.get("completion_tokens", 0),
+            "total_tokens": usage.get("total_tokens", 0),
+            "http_version": response.http_version if response is not None else None,
+        }
+        if first_token is not None:
+            call["first_token_ms"] = round(first_token * 1000, 1)
+        self._recent_calls.append(call)
+
+        totals = self._totals.setdefault(purpose, {
+            "calls": 0,
+            "errors": 0,
+            "rate_limited": 0,
+            "retries": 0,
+            "latency_ms_total": 0.0,
+            "latency_ms_max": 0.0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "total_tokens": 0,
+        })
+        totals["calls"] += 1
+        totals["retries"] += 1 if attempt > 0 else 0
+        totals["errors"] += 1 if call["status"] != 200 else 0
+        totals["rate_limited"] += 1 if call["status"] == 429 else 0
+        totals["latency_ms_total"] += call["latency_ms"]
+        totals["latency_ms_max"] = max(totals["latency_ms_max"], call["latency_ms"])
+        for key in ("prompt_tokens", "completion_tokens", "total_tokens"):
+            totals[key] += call[key]
+
+    def recent_calls(self, limit: int = 20) -> List[Dict[str, Any]]:
+        return list(self._recent_calls)[-limit:]
+
+    def stats(self) -> Dict[str, Any]:
+        """Aggregate latency / token counters per call site plus latency percentiles"""
+        by_purpose = {}
+        for purpose, totals in self._totals.items():
+            latencies = sorted(c["latency_ms"] for c in self._recent_calls if c["purpose"] == purpose)
+            by_purpose[purpose] = {
+                **{k: v for k, v in totals.items() if k != "latency_ms_total"},
+                "latency_ms_avg": round(totals["latency_ms_total"] / totals["calls"], 1) if totals["calls"] else 0.0,
+                "latency_ms_p50": latencies[len(latencies) // 2] if latencies else 0.0,
+                "latency_ms_p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else 0.0,
+            }
+
+        return {
+            "http2": self.http2,
+            "pool": {
+                "max_connections": GROQ_MAX_CONNECTIONS,
+                "max_keepalive_connections": GROQ_MAX_KEEPALIVE_CONNECTIONS,
+                "keepalive_expiry_seconds": GROQ_KEEPALIVE_EXPIRY_SECONDS,
+            },
+            "by_purpose": by_purpose,
+            "recent_calls": self.recent_calls(),
+        }
+
+
+groq_client = GroqClient()
@@ -0,0 +1,416 @@
+"""
+Compiled query-intent extraction for the recruiter chatbot.
+
+Every literal keyword the intent slots look for (skill synonyms, role
+names, cities, companies, education levels and the filter / query-type
+keywords) is compiled at import into one SubstringAutomaton. A query is
+scanned once; each pattern found carries the slot(s) it feeds, and the
+slots are resolved in the same priority order as the original chain of
+`keyword in query` checks. Pattern-shaped slots (age, salary, notice
+period, experience, graduation year, top N) use precompiled regexes, and
+the numeric ones only run when the query contains a digit.
+
+The output is identical to the original extract_query_intent, quirks
+included (substring matching means "devs" contains "vs" and "best"
+contains "be"); benchmarks/bench_intent_extraction.py keeps the original
+implementation and checks parity on a golden query set.
+"""
+import re
+from collections import defaultdict
+from functools import lru_cache
+from typing import Any, Dict
+
+from services.location_utils import CITY_STATE_MAPPING, extract_location_info
+from services.skill_vocabulary import SKILL_DATABASE, ROLE_SKILL_MAPPING
+from services.text_automaton import SubstringAutomaton
+
+CONVERSATIONAL_PATTERN = re.compile(
+    r"^(hi|hello|hey|greetings)"
+    r"|(how are you|what's up|wassup)"
+    r"|(thanks|thank you|appreciate)"
+    r"|^(help|assist|support)"
+    r"|(can you|could you|would you)"
+    r"|(tell me about|explain|what is|what are)"
+)
+FEMALE_PATTERN = re.compile(r"\b(female|women|woman|girl|girls|lady|ladies)\b")
+MALE_PATTERN = re.compile(r"\b(male|men|man|boy|boys)\b")
+
+# (pattern, kind) in priority order; kind says which groups hold the bounds
+AGE_PATTERNS = [
+    (re.compile(r"age\s+(\d+)\s*[-to]+\s*(\d+)"), "range"),  # age 22-25
+    (re.compile(r"between\s+(\d+)\s+and\s+(\d+)\s+years?\s+old"), "range"),  # between 22 and 25 years old
+    (re.compile(r"(\d+)\s*[-to]+\s*(\d+)\s+years?\s+old"), "range"),  # 22-25 years old
+    (re.compile(r"under\s+(\d+)\s+years?\s+old"), "max"),  # under 25 years old
+    (re.compile(r"above\s+(\d+)\s+years?\s+old"), "min"),  # above 22 years old
+    (re.compile(r"over\s+(\d+)\s+years?\s+old"), "min"),  # over 22 years old
+]
+LOCATION_PATTERNS = [
+    re.compile(r"(?:based in|located in|living in|from|in)\s+([A-Z][a-zA-Z\s]+?)(?:\s+and|\s+with|\s+who|,|$)", re.IGNORECASE),
+    re.compile(r"(?:city|location|place):\s*([A-Z][a-zA-Z\s]+?)(?:\s+and|\s+with|,|$)", re.IGNORECASE),
+]
+NOTICE_PATTERNS = [
+    (re.compile(r"immediate\s+joiner"), "immediate"),
+    (re.compile(r"join\s+immediately"), "immediate"),
+    (re.compile(r"available\s+immediately"), "immediate"),
+    (re.compile(r"(\d+)\s+days?\s+notice"), None),  # "30 days notice"
+    (re.compile(r"notice\s+period\s+of\s+(\d+)"), None),  # "notice period of 30"
+]
+SALARY_PATTERNS = [
+    (re.compile(r"(\d+)\s*[-to]+\s*(\d+)\s*(?:lpa|lakhs?|lacs?|k)"), "range"),  # 5-10 LPA
+    (re.compile(r"above\s+(\d+)\s*(?:lpa|lakhs?|lacs?|k)"), "min"),  # above 5 LPA
+    (re.compile(r"under\s+(\d+)\s*(?:lpa|lakhs?|lacs?|k)"), "max"),  # under 10 LPA
+    (re.compile(r"salary\s+(\d+)"), "range"),  # salary 500000
+]
+GRADUATION_PATTERNS = [
+    re.compile(r"(?:graduating|graduated|grad|batch\s+of|class\s+of)\s+(?:in\s+)?(\d{4})"),
+    re.compile(r"(\d{4})\s+(?:graduate|grad|batch|passout)"),
+    re.compile(r"(?:year|yr)\s+(\d{4})"),
+]
+TOP_N_PATTERN_SOURCES = [
+    r"top\s+(\d+)", r"best\s+(\d+)", r"(\d+)\s+best", r"(\d+)\s+top", r"give\s+me\s+(\d+)",
+    r"show\s+me\s+(\d+)", r"find\s+(\d+)", r"(\d+)\s+candidates?", r"(\d+)\s+people",
+    r"(\d+)\s+developers?", r"(\d+)\s+engineers?", r"list\s+(\d+)", r"display\s+(\d+)", r"return\s+(\d+)",
+]
+TOP_N_PATTERNS = [re.compile(source) for source in TOP_N_PATTERN_SOURCES]
+EXPERIENCE_PATTERNS = [
+    (re.compile(r"(\d+)\s*[-to]+\s*(\d+)\s*years?"), "range"),
+    (re.compile(r"(\d+)\+?\s*years?"), "minimum"),
+    (re.compile(r"at least\s+(\d+)\s*years?"), "minimum"),
+    (re.compile(r"more than\s+(\d+)\s*years?"), "minimum"),
+    (re.compile(r"over\s+(\d+)\s*years?"), "minimum"),
+    (re.compile(r"(less than|under|below)\s+(\d+)\s*years?"), "maximum"),
+    (re.compile(r"(\d+)\s*to\s*(\d+)\s*yrs?"), "range"),
+    (re.compile(r"between\s+(\d+)\s*and\s*(\d+)\s*years?"), "range"),
+]
+WORD_PATTERN = re.compile(r"\b\w+\b")
+HAS_DIGIT = re.compile(r"\d")
+
+STOP_WORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
+    'of', 'with', 'by', 'from', 'as', 'is', 'was', 'are', 'were', 'been',
+    'be', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would',
+    'could', 'should', 'may', 'might', 'must', 'can', 'who', 'what',
+    'where', 'when', 'why', 'how', 'which', 'this', 'that', 'these',
+    'those', 'i', 'you', 'he', 'she', 'it', 'we', 'they', 'me', 'him',
+    'her', 'us', 'them', 'my', 'your', 'his', 'its', 'our', 'their',
+    'find', 'show', 'give', 'tell', 'list', 'get',
+})
+
+WORK_AUTHORIZATION_KEYWORDS = {
+    'citizen': 'citizen',
+    'h1b': 'H1B',
+    'work permit': 'work permit',
+    'student visa': 'student visa',
+    'work visa': 'work visa',
+}
+QUERY_COMPANIES = [
+    'google', 'microsoft', 'amazon', 'facebook', 'meta', 'apple',
+    'netflix', 'uber', 'airbnb', 'linkedin', 'twitter', 'x corp', 'tesla',
+    'ibm', 'oracle', 'salesforce', 'adobe', 'intel', 'nvidia', 'amd',
+    'samsung', 'dell', 'cisco', 'vmware', 'sap', 'accenture',
+    'deloitte', 'wipro', 'tcs', 'infosys', 'cognizant', 'hcl', 'capgemini',
+    'goldman sachs', 'morgan stanley', 'jp morgan', 'jpmorgan', 'mckinsey',
+    'bain', 'bcg', 'stripe', 'spotify', 'slack', 'atlassian', 'zoom',
+    'shopify', 'square', 'paypal', 'ebay', 'booking', 'expedia',
+]
+EDUCATION_KEYWORDS = {
+    'phd': ['phd', 'ph.d', 'doctorate', 'doctoral'],
+    'masters': ['masters', 'master', 'msc', 'm.sc', 'mtech', 'm.tech', 'mba', 'm.b.a'],
+    'bachelors': ['bachelor', 'bachelors', 'btech', 'b.tech', 'be', 'b.e', 'bsc', 'b.sc'],
+}
+
+# Plain keyword slots: slot -> keywords whose presence sets it
+KEYWORD_SLOTS = {
+    'listing': ['list', 'show', 'display', 'give me all'],
+    'comparison': ['compare', 'difference', 'versus', 'vs', 'between'],
+    'summary': ['summary', 'overview', 'breakdown', 'statistics', 'stats'],
+    'compound': [' and ', ' with ', ' who ', ' that have ', ' having ', ' as well as '],
+    'nationality_indian': ['indian', 'india'],
+    'nationality_american': ['american', 'usa', 'us citizen'],
+    'single': ['single', 'unmarried', 'bachelor'],
+    'married': ['married'],
+    'relocate': ['willing to relocate', 'open to relocation', 'can relocate'],
+    'current_student': ['current student', 'currently studying', 'final year', '4th year', 'third year'],
+    'internship': ['internship'],
+    'full': ['full'],
+    'full_time': ['full-time', 'full time', 'fte'],
+    'has_internship': ['with internship', 'has internship', 'internship experience', 'done internship'],
+    'ranking_word': ['best', 'top', 'strongest', 'most qualified'],
+    'company_keyword': ['company', 'companies', 'intern', 'internship', 'full-time', 'full time',
+                        'position', 'worked at', 'experience at', 'employed', 'employer'],
+    'female': ['female'],
+}
+
+# Indexed slots: slot -> ordered keys, each with the keywords that select it.
+# Resolution picks every hit (skills, companies) or the first hit in order.
+_CITIES = list(CITY_STATE_MAPPING.keys())
+_SKILLS = list(SKILL_DATABASE.items())
+_ROLES = list(ROLE_SKILL_MAPPING.items())
+_WORK_AUTH = list(WORK_AUTHORIZATION_KEYWORDS.items())
+_EDUCATION = list(EDUCATION_KEYWORDS.items())
+INDEXED_SLOTS = {
+    'city': [[city] for city in _CITIES],
+    'skill': [variations for _, variations in _SKILLS],
+    'role': [[role] for role, _ in _ROLES],
+    'work_auth': [[keyword] for keyword, _ in _WORK_AUTH],
+    'company': [[company] for company in QUERY_COMPANIES],
+    'education': [keywords for _, keywords in _EDUCATION],
+}
+
+
+def _compile():
+    tags = defaultdict(list)
+    for slot, keywords in KEYWORD_SLOTS.items():
+        for keyword in keywords:
+            tags[keyword].append((slot, 0))
+    for slot, entries in INDEXED_SLOTS.items():
+        for index, keywords in enumerate(entries):
+            for keyword in keywords:
+                tags[keyword].append((slot, index))
+    automaton = SubstringAutomaton(tags)
+    return automaton, [tags[pattern] for pattern in automaton.patterns]
+
+
+INTENT_AUTOMATON, _PATTERN_TAGS = _compile()
+
+
+def _scan(query_lower: str) -> Dict[str, set]:
+    """Slots present in the query, each with the indexes that matched"""
+    hits: Dict[str, set] = defaultdict(set)
+    for pattern_id in INTENT_AUTOMATON.find_ids(query_lower):
+        for slot, index in _PATTERN_TAGS[pattern_id]:
+            hits[slot].add(index)
+    return hits
+
+
+@lru_cache(maxsize=512)
+def _city_location(city_name: str):
+    return extract_location_info(city_name.title())
+
+
+def _empty_intent() -> Dict[str, Any]:
+    return {
+        'skills': [],
+        'min_experience': None,
+        'max_experience': None,
+        'companies': [],
+        'education_level': None,
+        'top_n': None,
+
+        # Personal Information Filters
+        'gender': None,
+        'age_min': None,
+        'age_max': None,
+        'location': None,
+        'locations': [],
+        'nationality': None,
+        'marital_status': None,
+
+        # Work-related Filters
+        'notice_period': None,
+        'willing_to_relocate': None,
+        'work_authorization': None,
+        'salary_min': None,
+        'salary_max': None,
+
+        # University-specific Filters
+        'graduation_year': None,
+        'current_students_only': False,
+        'placement_preference': None,  # internship/full-time/both
+        'has_internship_experience': None,
+
+        'query_type': 'general',
+        'company_filter': False,
+        'requires_calculation': False,
+        'is_compound': False,
+        'search_terms': [],
+        'is_conversational': False,
+        'needs_listing': False,
+        'needs_comparison': False,
+        'needs_summary': False
+    }
+
+
+def extract_query_intent(query: str) -> Dict[str, Any]:
+    """
+    Structured intent of a recruiter query, including personal information filters
+    """
+    query_lower = query.lower()
+    intent = _empty_intent()
+    hits = _scan(query_lower)
+    has_digit = HAS_DIGIT.search(query_lower) is not None
+
+    intent['is_conversational'] = CONVERSATIONAL_PATTERN.search(query_lower) is not None
+    intent['needs_listing'] = 'listing' in hits
+    intent['needs_comparison'] = 'comparison' in hits
+    intent['needs_summary'] = 'summary' in hits
+    intent['is_compound'] = 'compound' in hits
+
+    # ==================== PERSONAL INFORMATION ====================
+
+    # Female first: 'male' is a substring of 'female'
+    if FEMALE_PATTERN.search(query_lower):
+        intent['gender'] = 'female'
+        intent['query_type'] = 'ranking'
+        print("✓ Gender detected: female")
+    elif MALE_PATTERN.search(query_lower) and 'female' not in hits:
+        intent['gender'] = 'male'
+        intent['query_type'] = 'ranking'
+        print("✓ Gender detected: male")
+
+    if has_digit:
+        for pattern, kind in AGE_PATTERNS:
+            match = pattern.search(query_lower)
+            if match:
+                if kind == 'max':
+                    intent['age_max'] = int(match.group(1))
+                else:
+                    intent['age_min'] = int(match.group(1))
+                    if kind == 'range':
+                        intent['age_max'] = int(match.group(2))
+                intent['query_type'] = 'ranking'
+                break
+
+    # Known city (first in CITY_STATE_MAPPING order), else a "based in X" style phrase
+    if 'city' in hits:
+        location_info = _city_location(_CITIES[min(hits['city'])])
+        intent['location'] = location_info['city']
+        intent['locations'].append(location_info['city'])
+        if location_info['state']:
+            intent['locations'].append(location_info['state'])
+        intent['query_type'] = 'ranking'
+        print(f"✓ Location detected: {location_info['city']}, {location_info['state']}")
+
+    if not intent['location']:
+        for pattern in LOCATION_PATTERNS:
+            match = pattern.search(query_lower)
+            if match:
+                location = match.group(1).strip()
+                if len(location) > 2:  # Avoid single letters
+                    location_info = extract_location_info(location)
+                    intent['location'] = location_info['city'] or location
+                    intent['locations'].append(location_info['city'] or location)
+                    if location_info['state']:
+                        intent['locations'].append(location_info['state'])
+                    intent['query_type'] = 'ranking'
+                    print(f"✓ Location detected from pattern: {location_info}")
+                    break
+
+    if 'nationality_indian' in hits:
+        intent['nationality'] = 'Indian'
+    elif 'nationality_american' in hits:
+        intent['nationality'] = 'American'
+
+    if 'single' in hits:
+        intent['marital_status'] = 'single'
+    elif 'married' in hits:
+        intent['marital_status'] = 'married'
+
+    for pattern, value in NOTICE_PATTERNS:
+        if value is None and not has_digit:
+            break
+        match = pattern.search(query_lower)
+        if match:
+            intent['notice_period'] = value if value else f"{match.group(1)} days"
+            intent['query_type'] = 'ranking'
+            break
+
+    if 'relocate' in hits:
+        intent['willing_to_relocate'] = True
+
+    if 'work_auth' in hits:
+        intent['work_authorization'] = _WORK_AUTH[min(hits['work_auth'])][1]
+
+    if has_digit:
+        for pattern, kind in SALARY_PATTERNS:
+            match = pattern.search(query_lower)
+            if match:
+                if kind == 'max':
+                    intent['salary_max'] = int(match.group(1))
+                else:
+                    intent['salary_min'] = int(match.group(1))
+                    if kind == 'range' and match.lastindex >= 2:
+                        intent['salary_max'] = int(match.group(2))
+                intent['query_type'] = 'ranking'
+                break
+
+    # ==================== UNIVERSITY-SPECIFIC ====================
+
+    if has_digit:
+        for pattern in GRADUATION_PATTERNS:
+            match = pattern.search(query_lower)
+            if match:
+                intent['graduation_year'] = match.group(1)
+                intent['query_type'] = 'ranking'
+                break
+
+    if 'current_student' in hits:
+        intent['current_students_only'] = True
+        intent['query_type'] = 'ranking'
+
+    if 'internship' in hits and 'full' not in hits:
+        intent['placement_preference'] = 'internship'
+    elif 'full_time' in hits:
+        intent['placement_preference'] = 'full-time'
+
+    if 'has_internship' in hits:
+        intent['has_internship_experience'] = True
+        intent['query_type'] = 'ranking'
+
+    # ==================== RANKING, SKILLS, EXPERIENCE ====================
+
+    if has_digit:
+        for pattern in TOP_N_PATTERNS:
+            match = pattern.search(query_lower)
+            if match:
+                intent['top_n'] = int(match.group(1))
+                intent['query_type'] = 'ranking'
+                print(f"✓ Number detected: {intent['top_n']} candidates requested")
+                break
+
+    if not intent['top_n'] and 'ranking_word' in hits:
+        intent['top_n'] = 5
+        intent['query_type'] = 'ranking'
+        print(f"✓ Using default of 5 candidates for ranking query")
+
+    if 'skill' in hits:
+        intent['skills'] = [_SKILLS[index][0] for index in sorted(hits['skill'])]
+
+    if 'role' in hits:
+        for skill in _ROLES[min(hits['role'])][1]:
+            if skill not in intent['skills']:
+                intent['skills'].append(skill)
+        if intent['query_type'] == 'general':
+            intent['query_type'] = 'ranking'
+
+    intent['search_terms'] = [
+        word for word in WORD_PATTERN.findall(query_lower) if word not in STOP_WORDS and len(word) > 2
+    ]
+
+    if has_digit:
+        for pattern, kind in EXPERIENCE_PATTERNS:
+            match = pattern.search(query_lower)
+            if match:
+                if kind == 'range':
+                    intent['min_experience'] = int(match.group(1))
+                    intent['max_experience'] = int(match.group(2))
+                elif kind == 'minimum':
+                    intent['min_experience'] = int(match.group(1))
+                else:
+                    intent['max_experience'] = int(match.group(2))
+                intent['requires_calculation'] = True
+                break
+
+    if 'company_keyword' in hits:
+        intent['company_filter'] = True
+        intent['query_type'] = 'ranking'
+        if not intent['top_n']:
+            intent['top_n'] = 10
+
+    if 'company' in hits:
+        intent['companies'] = [QUERY_COMPANIES[index] for index in sorted(hits['company'])]
+
+    if 'education' in hits:
+        intent['education_level'] = _EDUCATION[min(hits['education'])][0]
+
+    return intent
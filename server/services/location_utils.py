@@ -2,6 +2,7 @@
 Indian City to State Mapping
 Comprehensive mapping of cities, towns, and districts to their states
 """
+from services.text_automaton import TokenTrie
 
 # Comprehensive Indian city-to-state mapping
 CITY_STATE_MAPPING = {
@@ -352,6 +353,10 @@ CITY_VARIATIONS = {
     'kochi': 'cochin',
 }
 
+# Shared city gazetteer: every known city name compiled once into a word trie.
+# Used by the resume parser for the PDF line-merge fix and location cleanup.
+CITY_GAZETTEER = TokenTrie(CITY_STATE_MAPPING)
+
 
 def normalize_city_name(city):
     """
@@ -512,7 +517,14 @@ def location_matches(resume_location, search_location):
     resume_variations = normalize_location_for_search(resume_location)
     search_variations = normalize_location_for_search(search_location)
     
-    # Check if any variation matches
+    return variations_match(resume_variations, search_variations)
+
+
+def variations_match(resume_variations, search_variations):
+    """
+    Compare two lists produced by normalize_location_for_search
+    (lets callers precompute the resume side once)
+    """
     for rv in resume_variations:
         for sv in search_variations:
             if rv == sv or rv in sv or sv in rv:
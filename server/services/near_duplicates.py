@@ -0,0 +1,270 @@
+"""
+Pre-parse duplicate detection on extracted resume text.
+
+Runs between text extraction and the LLM call, so a resume that was already
+uploaded costs no API call. Two checks per document:
+
+- exact: SHA-256 of the normalized text (case, punctuation and whitespace
+  folded), which catches the same resume re-exported to another format;
+- near: MinHash over word shingles with LSH banding, which catches minor
+  edits (a changed line, a new phone number, reordered contact details).
+  LSH bands only select candidates; a match needs the estimated Jaccard
+  similarity to reach NEAR_DUPLICATE_THRESHOLD.
+
+Fingerprints of stored resumes are kept in `resume_fingerprints`, scoped to
+the owner (recruiter or ZIP uploader) and the collection the resume went to.
+A DuplicateTextSession covers one upload: it also matches documents earlier
+in the same upload, waiting for such an original to be stored (or to fail)
+before deciding. Resumes stored before this existed have no raw text and so
+no fingerprint; the identity index in services/dedup_index.py covers them.
+"""
+import asyncio
+import hashlib
+import re
+import zlib
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import numpy as np
+from bson import ObjectId
+
+from core.config import NEAR_DUPLICATE_THRESHOLD
+from core.database import db
+
+resume_fingerprints_collection = db["resume_fingerprints"]
+
+SHINGLE_SIZE = 5  # words
+MINHASH_PERMUTATIONS = 128
+LSH_BANDS = 32
+LSH_ROWS = MINHASH_PERMUTATIONS // LSH_BANDS
+
+_MERSENNE_PRIME = (1 << 61) - 1
+# Fixed seed: signatures are persisted, so the permutations must never change
+_rng = np.random.default_rng(20240611)
+# a * crc32 + b stays below 2**64, so uint64 arithmetic cannot overflow
+_PERM_A = _rng.integers(1, 1 << 31, size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+_PERM_B = _rng.integers(0, 1 << 31, size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+
+
+class TextFingerprint(NamedTuple):
+    content_hash: str
+    minhash: List[int]
+    bands: List[str]
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase alphanumeric words separated by single spaces"""
+    return " ".join(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+def fingerprint_text(text: str) -> TextFingerprint:
+    normalized = normalize_text(text)
+    content_hash = hashlib.sha256(normalized.encode()).hexdigest()
+
+    words = normalized.split()
+    if len(words) <= SHINGLE_SIZE:
+        shingles = {normalized}
+    else:
+        shingles = {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+    hashes = np.fromiter((zlib.crc32(s.encode()) for s in shingles), dtype=np.uint64, count=len(shingles))
+    signature = ((np.outer(hashes, _PERM_A) + _PERM_B) % _MERSENNE_PRIME).min(axis=0)
+    minhash = [int(value) for value in signature]
+
+    bands = [
+        f"{band}:{hashlib.blake2b(signature[band * LSH_ROWS:(band + 1) * LSH_ROWS].tobytes(), digest_size=8).hexdigest()}"
+        for band in range(LSH_BANDS)
+    ]
+    return TextFingerprint(content_hash, minhash, bands)
+
+
+def estimate_similarity(a: List[int], b: List[int]) -> float:
+    """Estimated Jaccard similarity of two MinHash signatures"""
+    return sum(x == y for x, y in zip(a, b)) / MINHASH_PERMUTATIONS
+
+
+def _compare(fingerprint: TextFingerprint, content_hash: str, minhash: List[int]) -> Optional[Dict[str, Any]]:
+    if fingerprint.content_hash == content_hash:
+        return {"match": "exact", "similarity": 1.0}
+    similarity = estimate_similarity(fingerprint.minhash, minhash)
+    if similarity >= NEAR_DUPLICATE_THRESHOLD:
+        return {"match": "near", "similarity": round(similarity, 3)}
+    return None
+
+
+def find_stored_duplicate(owner_email: str, target: str, fingerprint: TextFingerprint) -> Optional[Dict[str, Any]]:
+    """Best stored resume of this owner whose text matches, if any"""
+    candidates = resume_fingerprints_collection.find(
+        {
+            "owner_email": owner_email,
+            "target": target,
+            "$or": [{"content_hash": fingerprint.content_hash}, {"lsh_bands": {"$in": fingerprint.bands}}],
+        },
+        {"content_hash": 1, "minhash": 1, "resume_id": 1, "filename": 1},
+    )
+    best = None
+    for candidate in candidates:
+        match = _compare(fingerprint, candidate["content_hash"], candidate["minhash"])
+        if match and (best is None or match["similarity"] > best["similarity"]):
+            best = {**match, "resume_id": candidate["resume_id"], "filename": candidate.get("filename")}
+    return best
+
+
+def forget_document(resume_id) -> int:
+    """Drop the fingerprint of a deleted resume"""
+    return resume_fingerprints_collection.delete_many({"resume_id": ObjectId(resume_id)}).deleted_count
+
+
+class _Entry:
+    def __init__(self, key, filename: str, fingerprint: TextFingerprint):
+        self.key = key
+        self.filename = filename
+        self.fingerprint = fingerprint
+        self.stored: asyncio.Future = asyncio.get_running_loop().create_future()
+        # False when the text matched a resume stored before this upload
+        self.persist = True
+
+
+class DuplicateTextSession:
+    """
+    Pre-parse duplicate checks for one upload.
+
+        session = DuplicateTextSession(recruiter_email, "resume_history")
+        match = await session.check(idx, filename, text)   # None -> parse it
+        ...
+        session.resolve(idx, resume_id)                    # or None if not stored
+        await session.save()                               # persist new fingerprints
+
+    Every key that check() returned None for must be resolved, since later
+    copies in the same upload wait on it.
+    """
+
+    def __init__(self, owner_email: str, target: str):
+        self.owner_email = owner_email
+        self.target = target
+        self._entries: Dict[Any, _Entry] = {}
+        self._by_hash: Dict[str, List[_Entry]] = {}
+        self._by_band: Dict[str, List[_Entry]] = {}
+        self.checked = 0
+        self.exact = 0
+        self.near = 0
+
+    @property
+    def llm_calls_saved(self) -> int:
+        return self.exact + self.near
+
+    def _local_candidates(self, fingerprint: TextFingerprint) -> List[_Entry]:
+        seen, ordered = set(), []
+        for entry in self._by_hash.get(fingerprint.content_hash, []) + [
+            entry for band in fingerprint.bands for entry in self._by_band.get(band, [])
+        ]:
+            if id(entry) not in seen:
+                seen.add(id(entry))
+                ordered.append(entry)
+        return ordered
+
+    async def check(self, key, filename: str, text: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        The earlier resume this text duplicates ({match, similarity,
+        resume_id, filename}), or None when it has to be parsed.
+        """
+        if not text:
+            return None
+        self.checked += 1
+        fingerprint = await asyncio.to_thread(fingerprint_text, text)
+
+        # Wait on earlier copies still in flight, then rescan: a copy checked
+        # meanwhile may have registered. The last scan and the registration
+        # below run without an await, so concurrent copies can't miss each other.
+        while True:
+            pending = None
+            for entry in self._local_candidates(fingerprint):
+                match = _compare(fingerprint, entry.fingerprint.content_hash, entry.fingerprint.minhash)
+                if match is None:
+                    continue
+                if not entry.stored.done():
+                    pending = entry
+                    break
+                if entry.stored.result() is not None:
+                    return self._count({**match, "resume_id": entry.stored.result(), "filename": entry.filename})
+            if pending is None:
+                break
+            await asyncio.wait([pending.stored])
+
+        entry = _Entry(key, filename, fingerprint)
+        self._entries[key] = entry
+        self._by_hash.setdefault(fingerprint.content_hash, []).append(entry)
+        for band in fingerprint.bands:
+            self._by_band.setdefault(band, []).append(entry)
+
+        try:
+            stored = await asyncio.to_thread(find_stored_duplicate, self.owner_email, self.target, fingerprint)
+        except BaseException:
+            # The caller never gets a key to resolve, so don't leave copies waiting
+            entry.stored.set_result(None)
+            raise
+        if stored is not None:
+            # Copies waiting on this one become duplicates of the stored resume
+            entry.persist = False
+            entry.stored.set_result(stored["resume_id"])
+            return self._count(stored)
+        return None
+
+    def _count(self, match: Dict[str, Any]) -> Dict[str, Any]:
+        if match["match"] == "exact":
+            self.exact += 1
+        else:
+            self.near += 1
+        return match
+
+    def resolve(self, key, resume_id) -> None:
+        """Record whether the document checked under `key` was stored"""
+        entry = self._entries.get(key)
+        if entry is None or entry.stored.done():
+            return
+        entry.stored.set_result(ObjectId(resume_id) if resume_id is not None else None)
+
+    def abort(self) -> None:
+        """Release anything still waiting on an unresolved document"""
+        for key in list(self._entries):
+            self.resolve(key, None)
+
+    async def save(self) -> int:
+        """Persist the fingerprints of the documents stored in this upload"""
+        now = datetime.utcnow()
+        docs = [
+            {
+                "owner_email": self.owner_email,
+                "target": self.target,
+                "resume_id": entry.stored.result(),
+                "filename": entry.filename,
+                "content_hash": entry.fingerprint.content_hash,
+                "minhash": entry.fingerprint.minhash,
+                "lsh_bands": entry.fingerprint.bands,
+                "created_at": now,
+            }
+            for entry in self._entries.values()
+            if entry.persist and entry.stored.done() and entry.stored.result() is not None
+        ]
+        if docs:
+            await asyncio.to_thread(resume_fingerprints_collection.insert_many, docs, ordered=False)
+        if self.llm_calls_saved:
+            print(f"🧬 Pre-parse dedup: {self.exact} exact + {self.near} near duplicate(s) of {self.checked} — "
+                  f"{self.llm_calls_saved} LLM call(s) saved")
+        return len(docs)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "checked": self.checked,
+            "exact_duplicates": self.exact,
+            "near_duplicates": self.near,
+            "llm_calls_saved": self.llm_calls_saved,
+        }
+
+
+def describe_match(match: Dict[str, Any]) -> str:
+    """Human readable reason for a per-file result"""
+    original = match.get("filename") or str(match["resume_id"])
+    if match["match"] == "exact":
+        return f"Same text as {original}"
+    return f"Near-duplicate of {original} ({match['similarity']:.0%} similar)"
@@ -0,0 +1,145 @@
+"""
+Content-addressed cache for parsed resumes.
+
+Entries are keyed by a SHA-256 of the raw file bytes plus the parsing model and
+prompt version, so re-uploading the exact same file skips both text extraction
+and the Groq round-trip. Entries expire after PARSE_CACHE_TTL_SECONDS and the
+collection is kept under PARSE_CACHE_MAX_ENTRIES by evicting the least recently
+used entries.
+"""
+import copy
+import hashlib
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from pymongo import ASCENDING
+from core.database import db
+from core.config import (
+    PARSE_CACHE_ENABLED,
+    PARSE_CACHE_TTL_SECONDS,
+    PARSE_CACHE_MAX_ENTRIES,
+)
+
+parse_cache_collection = db["parse_cache"]
+
+# Process-local counters (reset on restart)
+_stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "errors": 0}
+_indexes_ready = False
+
+# Evict a little below the cap so we don't evict on every single insert
+EVICTION_BATCH_RATIO = 0.05
+
+
+def make_cache_key(file_bytes: bytes, model: str, prompt_version: str) -> str:
+    """SHA-256 over the file bytes, namespaced by model and prompt version"""
+    digest = hashlib.sha256()
+    digest.update(file_bytes)
+    digest.update(b"\x00")
+    digest.update(model.encode())
+    digest.update(b"\x00")
+    digest.update(prompt_version.encode())
+    return digest.hexdigest()
+
+
+def _ensure_indexes():
+    global _indexes_ready
+    if _indexes_ready:
+        return
+    # TTL index - MongoDB removes documents once expires_at has passed
+    parse_cache_collection.create_index("expires_at", expireAfterSeconds=0)
+    parse_cache_collection.create_index([("last_accessed_at", ASCENDING)])
+    _indexes_ready = True
+
+
+def get_cached_parse(cache_key: str) -> Optional[Dict[str, Any]]:
+    """Return a copy of the cached parsed data, or None on a miss"""
+    if not PARSE_CACHE_ENABLED:
+        return None
+
+    try:
+        _ensure_indexes()
+        now = datetime.utcnow()
+        entry = parse_cache_collection.find_one_and_update(
+            {"_id": cache_key, "expires_at": {"$gt": now}},
+            {"$set": {"last_accessed_at": now}, "$inc": {"hit_count": 1}},
+            projection={"parsed_data": 1},
+        )
+    except Exception as e:
+        _stats["errors"] += 1
+        print(f"⚠️  Parse cache lookup failed: {str(e)[:150]}")
+        return None
+
+    if entry is None:
+        _stats["misses"] += 1
+        return None
+
+    _stats["hits"] += 1
+    return copy.deepcopy(entry["parsed_data"])
+
+
+def store_parsed(cache_key: str, parsed_data: Dict[str, Any], model: str, prompt_version: str):
+    """Store parsed data for a cache key, evicting old entries if over capacity"""
+    if not PARSE_CACHE_ENABLED:
+        return
+
+    now = datetime.utcnow()
+    cached = {k: v for k, v in parsed_data.items() if k != "filename"}
+
+    try:
+        _ensure_indexes()
+        parse_cache_collection.replace_one(
+            {"_id": cache_key},
+            {
+                "parsed_data": cached,
+                "model": model,
+                "prompt_version": prompt_version,
+                "created_at": now,
+                "last_accessed_at": now,
+                "expires_at": now + timedelta(seconds=PARSE_CACHE_TTL_SECONDS),
+                "hit_count": 0,
+            },
+            upsert=True,
+        )
+        _stats["stores"] += 1
+        _evict_if_needed()
+    except Exception as e:
+        _stats["errors"] += 1
+        print(f"⚠️  Parse cache store failed: {str(e)[:150]}")
+
+
+def _evict_if_needed():
+    """Drop least-recently-used entries once the collection exceeds its cap"""
+    size = parse_cache_collection.estimated_document_count()
+    if size <= PARSE_CACHE_MAX_ENTRIES:
+        return
+
+    overflow = size - PARSE_CACHE_MAX_ENTRIES
+    batch = overflow + max(1, int(PARSE_CACHE_MAX_ENTRIES * EVICTION_BATCH_RATIO))
+    stale_ids = [
+        doc["_id"]
+        for doc in parse_cache_collection.find({}, {"_id": 1})
+        .sort("last_accessed_at", ASCENDING)
+        .limit(batch)
+    ]
+    if stale_ids:
+        result = parse_cache_collection.delete_many({"_id": {"$in": stale_ids}})
+        _stats["evictions"] += result.deleted_count
+        print(f"🧹 Parse cache evicted {result.deleted_count} entries")
+
+
+def get_cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters for this process plus current cache size"""
+    lookups = _stats["hits"] + _stats["misses"]
+    try:
+        entries = parse_cache_collection.estimated_document_count()
+    except Exception:
+        entries = None
+
+    return {
+        "enabled": PARSE_CACHE_ENABLED,
+        **_stats,
+        "hit_rate": round(_stats["hits"] / lookups, 3) if lookups else 0.0,
+        "entries": entries,
+        "max_entries": PARSE_CACHE_MAX_ENTRIES,
+        "ttl_seconds": PARSE_CACHE_TTL_SECONDS,
+    }
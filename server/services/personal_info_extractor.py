@@ -0,0 +1,295 @@
+"""
+Precompiled regex extraction of personal fields (gender, DOB, nationality,
+marital status, location, phone, email) from resume text.
+
+All patterns are compiled once at import. One keyword scanner pass over the
+lowercased text records where every label ("Gender", "DOB", "Phone", ...)
+and every literal value word the fallback patterns look for ("Male",
+"Single", known cities and states) starts. Patterns that begin with one of
+those words are then only tried, anchored, at the recorded positions; a
+pattern can only match where one of its words starts, so trying them left to
+right returns the same match re.search would. Patterns that merely contain
+one (the "City, State" and trailing-DOB fallbacks) are skipped when none of
+their words occur. Output is identical to the original pattern-by-pattern
+re.search implementation.
+"""
+import re
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+_FLAGS = re.IGNORECASE
+
+_GENDER_LABELS = ("gender",)
+_SEX_LABELS = ("sex",)
+_DOB_LABELS = ("date of birth", "dob", "d.o.b", "birth")   # "birth" starts "Birth Date"
+_NATIONALITY_LABELS = ("nationality",)
+_CITIZEN_LABELS = ("citizen",)
+_MARITAL_LABELS = ("marital status",)
+_ADDRESS_LABELS = ("address", "location", "city")
+_CITY_LABELS = ("city", "location", "based in", "residing in")
+_PHONE_LABELS = ("phone", "mobile", "contact", "cell")
+
+_GENDER_VALUES = ("male", "female")
+_NATIONALITY_VALUES = ("indian", "american", "british", "canadian", "australian", "chinese", "japanese")
+_MARITAL_VALUES = ("single", "married", "divorced", "widowed")
+_STATES = (
+    "Karnataka", "Tamil Nadu", "Maharashtra", "Delhi", "Telangana", "West Bengal", "Gujarat",
+    "Rajasthan", "Punjab", "Haryana", "Uttar Pradesh", "Madhya Pradesh", "Kerala",
+    "Andhra Pradesh", "Odisha", "Chhattisgarh",
+)
+_BARE_CITIES = (
+    "Bangalore", "Bengaluru", "Chennai", "Mumbai", "Delhi", "Hyderabad", "Kolkata", "Pune",
+    "Ahmedabad", "Jaipur", "Lucknow", "Kanpur", "Nagpur", "Visakhapatnam", "Bhopal", "Patna",
+    "Ludhiana", "Agra", "Nashik", "Vadodara", "Coimbatore", "Madurai", "Mysore", "Bhubaneswar",
+)
+
+
+def _anchored(pattern: str, *keywords: str):
+    """Pattern that starts with one of `keywords`: tried only where they start"""
+    return re.compile(pattern, _FLAGS), "anchored", tuple(k.lower() for k in keywords)
+
+
+def _gated(pattern: str, *keywords: str):
+    """Pattern that contains one of `keywords`: searched only if one occurs"""
+    return re.compile(pattern, _FLAGS), "gated", tuple(k.lower() for k in keywords)
+
+
+def _search(pattern: str):
+    """Pattern without a literal keyword: always searched"""
+    return re.compile(pattern, _FLAGS), "search", ()
+
+
+_GENDER_PATTERNS = [
+    _anchored(r"Gender\s*[:\-]?\s*([MF])\b", *_GENDER_LABELS),
+    _anchored(r"Gender\s*[:\-]?\s*(Male|Female|MALE|FEMALE|M|F)\b", *_GENDER_LABELS),
+    _anchored(r"Sex\s*[:\-]?\s*(Male|Female|MALE|FEMALE|M|F)\b", *_SEX_LABELS),
+    _anchored(r"\b(Male|Female)\b(?=\s*\n|\s*[,;]|\s*Marital)", *_GENDER_VALUES),
+]
+
+_DOB_PATTERNS = [
+    _anchored(
+        r"(?:Date of Birth|DOB|D\.O\.B\.?|Birth Date)\s*[:\-]?\s*(\d{1,2}[\/\-\.]\d{1,2}[\/\-\.]\d{2,4})",
+        *_DOB_LABELS,
+    ),
+    _anchored(
+        r"(?:Date of Birth|DOB|D\.O\.B\.?)\s*[:\-]?\s*(\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{4})",
+        *_DOB_LABELS,
+    ),
+    _gated(r"\b(\d{1,2}[\/\-\.]\d{1,2}[\/\-\.]\d{4})\b(?=.*(?:Birth|DOB))", "birth", "dob"),
+]
+
+_NATIONALITY_PATTERNS = [
+    _anchored(r"Nationality\s*[:\-]?\s*([A-Za-z]+)", *_NATIONALITY_LABELS),
+    _anchored(r"Citizen(?:ship)?\s*[:\-]?\s*([A-Za-z]+)", *_CITIZEN_LABELS),
+    _anchored(
+        r"\b(Indian|American|British|Canadian|Australian|Chinese|Japanese)\b(?=\s*\n|\s*[,;]|\s*Marital)",
+        *_NATIONALITY_VALUES,
+    ),
+]
+
+_MARITAL_PATTERNS = [
+    _anchored(
+        r"Marital Status\s*[:\-]?\s*(Single|Married|Divorced|Widowed|SINGLE|MARRIED|DIVORCED|WIDOWED)",
+        *_MARITAL_LABELS,
+    ),
+    _anchored(r"\b(Single|Married|Divorced|Widowed)\b(?=\s*\n|\s*[,;]|\s*Nationality)", *_MARITAL_VALUES),
+]
+
+# Ordered from most-specific (labelled) to least-specific (bare city).
+# The bare-city pattern only captures the known city word(s), nothing before it,
+# thanks to the negative lookbehind + word-boundary anchors.
+_LOCATION_PATTERNS = [
+    # Explicit label + city + pincode
+    _anchored(r"(?:Address|Location|City)\s*[:\-]?\s*([A-Za-z\s]+?)\s*[-,]?\s*(\d{6})\b", *_ADDRESS_LABELS),
+    # City + known Indian state
+    _gated(r"\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)\s*,\s*(" + "|".join(_STATES) + r")\b", *_STATES),
+    # Explicit city/location label
+    _anchored(
+        r"(?:City|Location|Based in|Residing in)\s*[:\-]?\s*([A-Za-z][A-Za-z\s]{2,20}?)(?:\s*[\n,;]|$)",
+        *_CITY_LABELS,
+    ),
+    # Bare known city — negative lookbehind prevents grabbing a preceding word
+    _anchored(r"(?<![A-Za-z])(" + "|".join(_BARE_CITIES) + r")(?![A-Za-z])", *_BARE_CITIES),
+]
+
+_PHONE_PATTERNS = [
+    _anchored(r"(?:Phone|Mobile|Contact|Cell)\s*[:\-]?\s*(\+?\d{1,3}[-.\s]?\d{10})", *_PHONE_LABELS),
+    _anchored(r"(?:Phone|Mobile|Contact|Cell)\s*[:\-]?\s*(\d{10})", *_PHONE_LABELS),
+    _search(r"\b(\+?\d{1,3}[-.\s]?\d{10})\b"),
+    _search(r"\b(\d{10})\b"),
+]
+
+_NON_DIGIT = re.compile(r"\D")
+_EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+
+_ALL_PATTERNS = (
+    _GENDER_PATTERNS + _DOB_PATTERNS + _NATIONALITY_PATTERNS
+    + _MARITAL_PATTERNS + _LOCATION_PATTERNS + _PHONE_PATTERNS
+)
+_KEYWORDS = sorted({keyword for _, _, keywords in _ALL_PATTERNS for keyword in keywords})
+
+
+def _trie_regex(words: Iterable[str]) -> str:
+    """Alternation of `words` with shared prefixes factored out, so the regex
+    engine compares each character once instead of once per word"""
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            body = "(?:" + body + ")?"
+        return body
+
+    return build(trie)
+
+
+# Zero-width, so every start position is reported even when one keyword
+# occurs inside another ("birth" in "date of birth", "male" in "female").
+_KEYWORD_SCANNER = re.compile("(?=" + _trie_regex(_KEYWORDS) + ")")
+_KEYWORDS_BY_FIRST_CHAR: Dict[str, List[str]] = {}
+for _keyword in _KEYWORDS:
+    _KEYWORDS_BY_FIRST_CHAR.setdefault(_keyword[0], []).append(_keyword)
+
+# Characters re.IGNORECASE folds onto an ASCII letter but str.lower() does
+# not (or changes the length of). Texts containing them are scanned with the
+# case-insensitive patterns instead of the lowercased fast path.
+_CASEFOLD_SPECIALS = re.compile("[\u0130\u0131\u017f\u212a]")
+_KEYWORD_SCANNER_IGNORECASE = re.compile(_KEYWORD_SCANNER.pattern, _FLAGS)
+_KEYWORD_PATTERNS = {keyword: re.compile(re.escape(keyword), _FLAGS) for keyword in _KEYWORDS}
+
+
+def scan_keywords(text: str) -> Dict[str, List[int]]:
+    """Start offsets of every keyword, from one pass over the text"""
+    positions: Dict[str, List[int]] = {}
+    if _CASEFOLD_SPECIALS.search(text):
+        for match in _KEYWORD_SCANNER_IGNORECASE.finditer(text):
+            pos = match.start()
+            for keyword, pattern in _KEYWORD_PATTERNS.items():
+                if pattern.match(text, pos):
+                    positions.setdefault(keyword, []).append(pos)
+        return positions
+
+    lowered = text.lower()
+    for match in _KEYWORD_SCANNER.finditer(lowered):
+        pos = match.start()
+        for keyword in _KEYWORDS_BY_FIRST_CHAR[lowered[pos]]:
+            if lowered.startswith(keyword, pos):
+                positions.setdefault(keyword, []).append(pos)
+    return positions
+
+
+class _Matcher:
+    """Finds pattern matches in one text using its keyword positions"""
+
+    def __init__(self, text: str, positions: Dict[str, List[int]]):
+        self.text = text
+        self.positions = positions
+
+    def _starts(self, keywords: Iterable[str]) -> List[int]:
+        found = [self.positions[keyword] for keyword in keywords if keyword in self.positions]
+        if len(found) == 1:
+            return found[0]
+        return sorted(pos for positions in found for pos in positions)
+
+    def first(self, pattern, mode: str, keywords) -> Optional[re.Match]:
+        """Leftmost match of one pattern, the same one pattern.search would find"""
+        if mode == "anchored":
+            for pos in self._starts(keywords):
+                match = pattern.match(self.text, pos)
+                if match:
+                    return match
+            return None
+        if mode == "gated" and not any(keyword in self.positions for keyword in keywords):
+            return None
+        return pattern.search(self.text)
+
+    def matches(self, patterns):
+        """First match of each pattern, in order (lazy, so callers can stop early)"""
+        for pattern, mode, keywords in patterns:
+            match = self.first(pattern, mode, keywords)
+            if match:
+                yield match
+
+
+def extract_personal_info(text: str) -> Dict[str, object]:
+    """
+    Extract personal fields with the precompiled patterns.
+    Output is identical to the original pattern-by-pattern re.search version.
+    """
+    info = {}
+    matcher = _Matcher(text, scan_keywords(text))
+
+    # ============ GENDER ============
+    for match in matcher.matches(_GENDER_PATTERNS):
+        val = match.group(1).strip().upper()
+        if val in ['M', 'MALE']:
+            info['gender'] = 'Male'
+        elif val in ['F', 'FEMALE']:
+            info['gender'] = 'Female'
+        else:
+            info['gender'] = val.capitalize()
+        break
+
+    # ============ DATE OF BIRTH ============
+    for match in matcher.matches(_DOB_PATTERNS):
+        dob_str = match.group(1).strip().replace('-', '/').replace('.', '/')
+        info['date_of_birth'] = dob_str
+        try:
+            parts = dob_str.split('/')
+            if len(parts) == 3:
+                day, month, year = int(parts[0]), int(parts[1]), int(parts[2])
+                if year < 100:
+                    year += 1900 if year > 50 else 2000
+                info['age'] = datetime.now().year - year
+        except Exception:
+            pass
+        break
+
+    # ============ NATIONALITY ============
+    for match in matcher.matches(_NATIONALITY_PATTERNS):
+        val = match.group(1).strip()
+        if val.upper() == 'INDIAN':
+            info['nationality'] = 'Indian'
+        elif val.upper() in ['USA', 'US', 'AMERICAN']:
+            info['nationality'] = 'American'
+        else:
+            info['nationality'] = val.capitalize()
+        break
+
+    # ============ MARITAL STATUS ============
+    for match in matcher.matches(_MARITAL_PATTERNS):
+        info['marital_status'] = match.group(1).strip().capitalize()
+        break
+
+    # ============ CURRENT LOCATION ============
+    for match in matcher.matches(_LOCATION_PATTERNS):
+        if len(match.groups()) >= 2:
+            city = match.group(1).strip()
+            state_or_pin = match.group(2).strip()
+            info['current_location'] = f"{city}, {state_or_pin}"
+        else:
+            info['current_location'] = match.group(1).strip().title()
+        break
+
+    # ============ PHONE NUMBER ============
+    for match in matcher.matches(_PHONE_PATTERNS):
+        phone = match.group(1).strip()
+        digits_only = _NON_DIGIT.sub('', phone)
+        if len(digits_only) >= 10:
+            info['phone'] = phone
+            break
+
+    # ============ EMAIL ============
+    match = _EMAIL_PATTERN.search(text)
+    if match:
+        info['email'] = match.group(0).strip()
+
+    return info
@@ -0,0 +1,124 @@
+"""
+Token-budgeted prompt assembly for the recruiter chatbot.
+
+The chatbot prompt is instructions + conversation history + one JSON block
+per ranked candidate. Instead of cutting the finished prompt at a character
+count (which could stop in the middle of a candidate), the candidate section
+is packed to fit what is left of CHATBOT_PROMPT_TOKEN_BUDGET:
+
+1. every shown candidate gets its compact summary (cached in the candidate
+   feature document), in rank order, until the budget runs out;
+2. the remaining budget upgrades candidates to their detailed block, best
+   ranked first.
+
+Candidates that don't fit even as a summary are left out whole and the LLM
+is told how many were omitted.
+
+Tokens are counted with tiktoken when it is installed (cl100k_base is close
+enough to the Groq models' tokenizers for budgeting); otherwise a
+conservative characters-per-token estimate is used.
+"""
+import importlib.util
+import json
+import math
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from core.config import CHATBOT_PROMPT_TOKEN_BUDGET
+
+# Fallback estimate; JSON-heavy text runs at ~3.5 characters per token
+CHARS_PER_TOKEN = 3.5
+TIKTOKEN_ENCODING = "cl100k_base"
+
+_encoding = None
+_tiktoken_checked = False
+
+
+def _get_encoding():
+    global _encoding, _tiktoken_checked
+    if not _tiktoken_checked:
+        _tiktoken_checked = True
+        if importlib.util.find_spec("tiktoken") is not None:
+            try:
+                import tiktoken
+                _encoding = tiktoken.get_encoding(TIKTOKEN_ENCODING)
+            except Exception as e:
+                # The encoding file is downloaded on first use; stay on the estimate if that fails
+                print(f"⚠️  tiktoken unavailable, estimating prompt tokens: {str(e)[:150]}")
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _serialize(block: Dict[str, Any]) -> str:
+    return json.dumps(block, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+class PackedCandidates(NamedTuple):
+    text: str
+    tokens: int
+    detailed: int
+    compact: int
+    omitted: int
+
+
+def pack_candidates(
+    detailed_blocks: List[Dict[str, Any]],
+    compact_blocks: List[Dict[str, Any]],
+    budget_tokens: int,
+) -> PackedCandidates:
+    """
+    Candidate section within `budget_tokens`. Both lists are in rank order
+    and aligned; each candidate appears once, detailed or compact.
+    """
+    detailed_text = [_serialize(block) for block in detailed_blocks]
+    compact_text = [_serialize(block) for block in compact_blocks]
+    detailed_cost = [count_tokens(text) + 1 for text in detailed_text]  # +1 for the newline
+    compact_cost = [count_tokens(text) + 1 for text in compact_text]
+
+    omitted_note = 30  # room for the "N more candidates" line
+    remaining = budget_tokens - 2 - omitted_note  # brackets + note
+    chosen: List[Optional[str]] = []
+    for text, cost in zip(compact_text, compact_cost):
+        if cost > remaining:
+            break
+        chosen.append(text)
+        remaining -= cost
+
+    detailed = 0
+    for index in range(len(chosen)):
+        extra = detailed_cost[index] - compact_cost[index]
+        if extra <= remaining:
+            chosen[index] = detailed_text[index]
+            remaining -= max(extra, 0)
+            detailed += 1
+
+    omitted = len(compact_blocks) - len(chosen)
+    text = "[\n" + ",\n".join(chosen) + "\n]"
+    if omitted:
+        text += f"\n({omitted} more matching candidate(s) omitted to fit the prompt)"
+    return PackedCandidates(text, count_tokens(text), detailed, len(chosen) - detailed, omitted)
+
+
+def recent_history(messages: List[Any], limit: int = 4, budget_tokens: Optional[int] = None) -> List[Any]:
+    """
+    The last `limit` chat messages (objects with .role/.content), dropping
+    the oldest while they exceed `budget_tokens` (a quarter of the prompt
+    budget by default) so long pastes can't crowd out the candidates.
+    """
+    budget_tokens = CHATBOT_PROMPT_TOKEN_BUDGET // 4 if budget_tokens is None else budget_tokens
+    kept = list(messages[-limit:]) if messages else []
+    while kept and sum(count_tokens(f"{m.role}: {m.content}") for m in kept) > budget_tokens:
+        kept.pop(0)
+    return kept
+
+
+def candidate_budget(fixed_prompt: str, budget_tokens: int = CHATBOT_PROMPT_TOKEN_BUDGET) -> int:
+    """Tokens left for candidate data once the rest of the prompt is in"""
+    return max(0, budget_tokens - count_tokens(fixed_prompt))
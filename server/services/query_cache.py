@@ -0,0 +1,114 @@
+"""
+In-process result cache for the recruiter chatbot.
+
+Recruiters repeat near-identical questions ("top 5 python developers in
+Bangalore", "Top 5 Python developers in bangalore?"). Those map to the same
+extract_query_intent output, so the cache key is the normalized intent plus
+the recruiter and their candidate-set version (services/candidate_index.py
+bumps it whenever a resume is indexed or removed). Adding or deleting a
+resume therefore invalidates every cached answer for that recruiter without
+any explicit purge, in every worker process.
+
+Entries hold the ranked shortlist and, once the LLM has answered, the
+response payload. Eviction is LRU over CHATBOT_CACHE_MAX_ENTRIES with a
+CHATBOT_CACHE_TTL_SECONDS expiry.
+"""
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from core.config import CHATBOT_CACHE_ENABLED, CHATBOT_CACHE_MAX_ENTRIES, CHATBOT_CACHE_TTL_SECONDS
+
+# Intent fields that echo the wording but feed neither filtering nor ranking
+IGNORED_INTENT_KEYS = {"search_terms"}
+
+
+def normalize_intent(intent: Dict[str, Any]) -> str:
+    """Canonical form of an intent: unset fields dropped, lists sorted and deduplicated"""
+    normalized = {}
+    for key, value in intent.items():
+        if key in IGNORED_INTENT_KEYS or value in (None, False, "", [], {}):
+            continue
+        if isinstance(value, str):
+            value = value.strip().lower()
+        elif isinstance(value, (list, tuple, set)):
+            value = sorted({str(item).strip().lower() for item in value})
+        normalized[key] = value
+    return json.dumps(normalized, sort_keys=True, default=str)
+
+
+class ChatQueryCache:
+    """LRU + TTL cache of chatbot results keyed by (recruiter, candidate-set version, intent)"""
+
+    def __init__(self, max_entries: int = CHATBOT_CACHE_MAX_ENTRIES, ttl_seconds: float = CHATBOT_CACHE_TTL_SECONDS,
+                 enabled: bool = CHATBOT_CACHE_ENABLED):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled and max_entries > 0
+        self._entries: "OrderedDict[Tuple[str, int, str], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.hits = 0
+        self.answer_hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(recruiter_email: str, version: int, intent: Dict[str, Any]) -> Tuple[str, int, str]:
+        return (recruiter_email, version, normalize_intent(intent))
+
+    def get(self, key) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        item = self._entries.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        stored_at, entry = item
+        if time.monotonic() - stored_at > self.ttl_seconds:
+            del self._entries[key]
+            self.expired += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, entry: Dict[str, Any]) -> None:
+        if not self.enabled:
+            return
+        self._entries[key] = (time.monotonic(), entry)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def record_answer(self, key, response: Dict[str, Any]) -> None:
+        """Attach the LLM response payload to an existing entry"""
+        item = self._entries.get(key)
+        if item is not None:
+            item[1]["response"] = response
+
+    def count_answer_hit(self) -> None:
+        self.answer_hits += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "answer_hits": self.answer_hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+chat_query_cache = ChatQueryCache()
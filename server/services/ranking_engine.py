@@ -0,0 +1,275 @@
+"""
+Columnar candidate scoring for the recruiter chatbot.
+
+CandidateMatrix lays the candidate-index features out as NumPy arrays
+(one row per candidate, plus flat "exploded" arrays for skills, projects and
+experience entries with an owner index) and computes every component score
+and the weighted total with vector operations. Required skills from the query
+vocabulary are resolved through an inverted index built from the precomputed
+per-resume skill hits, so only candidates that mention a skill are touched.
+It mirrors the scalar
+calculate_*_score functions in routes/recruiter/chatbot.py exactly; those are
+still used to build the detailed breakdown for the few candidates returned.
+"""
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from services.candidate_index import DEGREE_HIERARCHY, QUERY_SKILL_SET, get_candidate_features
+
+# Variable-width strings: fixed-width unicode would pad every text to the longest one
+TEXT_DTYPE = np.dtypes.StringDType()
+
+
+def select_weights(intent: Dict[str, Any]) -> Dict[str, float]:
+    """Component weights for the query type (shared by both ranking paths)"""
+    if intent.get('company_filter'):
+        return {
+            'company': 0.50, 'experience': 0.25, 'skills': 0.15,
+            'projects': 0.05, 'education': 0.05
+        }
+    if intent.get('query_type') == 'ranking' and intent.get('skills'):
+        return {
+            'skills': 0.45, 'projects': 0.30, 'experience': 0.15,
+            'education': 0.05, 'company': 0.05
+        }
+    return {
+        'skills': 0.30, 'experience': 0.25, 'projects': 0.20,
+        'company': 0.15, 'education': 0.10
+    }
+
+
+def _contains(texts: np.ndarray, needle: str) -> np.ndarray:
+    """Vectorized `needle in text` over an array of strings"""
+    if texts.size == 0:
+        return np.zeros(0, dtype=bool)
+    return np.strings.find(texts, needle) >= 0
+
+
+class CandidateMatrix:
+    """Feature arrays for a list of ranking candidates"""
+
+    def __init__(self, candidates: List[Dict[str, Any]]):
+        self.size = n = len(candidates)
+
+        self.total_years = np.zeros(n)
+        self.experience_count = np.zeros(n, dtype=np.int64)
+        self.senior_roles = np.zeros(n, dtype=np.int64)
+        self.education_count = np.zeros(n, dtype=np.int64)
+        self.education_score = np.zeros(n)
+        self.company_score = np.zeros(n)
+        self.top_company_count = np.zeros(n, dtype=np.int64)
+        self.has_experience = np.zeros(n, dtype=bool)
+        self.project_count = np.zeros(n, dtype=np.int64)
+
+        skill_owner, skill_text = [], []
+        project_owner, project_text, project_desc_bonus = [], [], []
+        exp_owner, exp_text = [], []
+
+        # Inverted index: query skill -> candidates mentioning it (from the precomputed hits)
+        postings: Dict[str, Dict[str, list]] = {}
+
+        for i, candidate in enumerate(candidates):
+            features = get_candidate_features(candidate)
+            experience = features["experience"]
+            self.total_years[i] = experience["total_years"]
+            self.experience_count[i] = experience["company_count"]
+            self.senior_roles[i] = experience["senior_roles"]
+            self.education_count[i] = features["education"]["count"]
+            self.education_score[i] = features["education"]["highest_score"]
+            self.company_score[i] = features["company"]["score"]
+            self.top_company_count[i] = features["company"]["company_count"]
+            self.has_experience[i] = features["company"]["has_experience"]
+            self.project_count[i] = len(features["projects"])
+
+            project_offset = len(project_owner)
+            for hit in features["skill_hits"]:
+                posting = postings.setdefault(hit["skill"], {
+                    "owners": [], "listed": [], "project_matches": [], "exp_matches": [], "project_ids": []
+                })
+                posting["owners"].append(i)
+                posting["listed"].append(hit["listed"])
+                posting["project_matches"].append(len(hit["projects"]))
+                posting["exp_matches"].append(len(hit["experience"]))
+                posting["project_ids"].extend(project_offset + idx for idx in hit["projects"])
+
+            for skill in features["skills"]:
+                skill_owner.append(i)
+                skill_text.append(skill)
+            for project in features["projects"]:
+                project_owner.append(i)
+                project_text.append(project["text"])
+                length = project["description_length"]
+                project_desc_bonus.append(15 if length > 200 else 10 if length > 100 else 5 if length > 50 else 0)
+            for exp in features["experience_blobs"]:
+                exp_owner.append(i)
+                exp_text.append(exp["text"])
+
+        self._postings = postings
+        self.skill_owner = np.array(skill_owner, dtype=np.int64)
+        self.project_owner = np.array(project_owner, dtype=np.int64)
+        self.project_desc_bonus = np.array(project_desc_bonus, dtype=float)
+        self.exp_owner = np.array(exp_owner, dtype=np.int64)
+
+        # Raw texts are only needed for skills outside the query vocabulary
+        self._raw_texts = (skill_text, project_text, exp_text)
+        self._text_arrays = None
+
+    def _count_per_candidate(self, owner: np.ndarray, hits: np.ndarray) -> np.ndarray:
+        return np.bincount(owner, weights=hits, minlength=self.size)
+
+    def skill_matches(self, skill: str) -> Dict[str, np.ndarray]:
+        """
+        Per-candidate listed flag and project / experience mention counts for
+        one skill, plus a per-project hit mask. Vocabulary skills only touch
+        the candidates in their posting list; anything else falls back to a
+        vectorized substring scan.
+        """
+        if skill in QUERY_SKILL_SET:
+            listed = np.zeros(self.size, dtype=bool)
+            project_matches = np.zeros(self.size)
+            exp_matches = np.zeros(self.size)
+            project_hits = np.zeros(len(self.project_owner), dtype=bool)
+            posting = self._postings.get(skill)
+            if posting:
+                owners = np.array(posting["owners"], dtype=np.int64)
+                listed[owners] = posting["listed"]
+                project_matches[owners] = posting["project_matches"]
+                exp_matches[owners] = posting["exp_matches"]
+                project_hits[np.array(posting["project_ids"], dtype=np.int64)] = True
+            return {
+                "listed": listed,
+                "project_matches": project_matches,
+                "exp_matches": exp_matches,
+                "project_hits": project_hits,
+            }
+
+        if self._text_arrays is None:
+            self._text_arrays = tuple(np.array(texts, dtype=TEXT_DTYPE) for texts in self._raw_texts)
+        skill_text, project_text, exp_text = self._text_arrays
+        project_hits = _contains(project_text, skill)
+        return {
+            "listed": self._count_per_candidate(self.skill_owner, _contains(skill_text, skill)) > 0,
+            "project_matches": self._count_per_candidate(self.project_owner, project_hits),
+            "exp_matches": self._count_per_candidate(self.exp_owner, _contains(exp_text, skill)),
+            "project_hits": project_hits,
+        }
+
+    def score(self, intent: Dict[str, Any], apply_penalties: bool = True) -> np.ndarray:
+        """Weighted relevance score for every candidate"""
+        n = self.size
+        required_skills = intent.get('skills', [])
+
+        # ---- skills + per-project skill usage (one pass over the required skills)
+        skill_total = np.zeros(n)
+        skills_matched = np.zeros(n)
+        project_skills_used = np.zeros(len(self.project_owner))
+        for skill in required_skills:
+            matches = self.skill_matches(skill)
+            project_matches = matches["project_matches"]
+            exp_matches = matches["exp_matches"]
+            project_skills_used += matches["project_hits"]
+
+            skill_score = (
+                np.where(matches["listed"], 30, 0)
+                + np.where(project_matches > 0, np.minimum(40, project_matches * 10), 0)
+                + np.where(exp_matches > 0, np.minimum(30, exp_matches * 10), 0)
+            )
+            skill_total += skill_score
+            skills_matched += skill_score > 0
+
+        max_possible_score = len(required_skills) * 100 if required_skills else 100
+        skill_score = skill_total / max_possible_score * 100
+        if len(required_skills) > 3:
+            match_ratio = skills_matched / len(required_skills)
+            boost = (skills_matched > 0) & (match_ratio >= 0.5)
+            skill_score = np.where(boost, np.maximum(skill_score, 50 * match_ratio), skill_score)
+        skill_score = np.minimum(100, skill_score)
+
+        # ---- experience
+        years = self.total_years
+        count = self.experience_count
+        exp_score = np.where(years >= 1, np.minimum(40, years * 5), np.minimum(5, years * 6))
+        exp_score = exp_score + np.select(
+            [(count >= 4) & (count <= 6), count == 3, count == 2, count == 1],
+            [15, 12, 8, 4],
+            default=5,
+        )
+        exp_score = exp_score + np.minimum(20, self.senior_roles * 8)
+
+        has_exp = count > 0
+        meets_min = np.ones(n, dtype=bool)
+        meets_max = np.ones(n, dtype=bool)
+        if intent.get('min_experience') is not None:
+            meets_min = np.where(has_exp, years >= intent['min_experience'], False)
+            exp_score = np.where(meets_min, exp_score, exp_score * 0.5)
+        if intent.get('max_experience') is not None:
+            meets_max = ~has_exp | (years <= intent['max_experience'])
+            exp_score = np.where(meets_max, exp_score, exp_score * 0.7)
+        exp_score = np.where(has_exp, np.minimum(75, exp_score), 0)
+
+        # ---- education
+        required_level = intent.get('education_level')
+        edu_score = np.where(self.education_count > 0, self.education_score, 0)
+        meets_education = np.ones(n, dtype=bool)
+        if required_level is not None:
+            required_score = DEGREE_HIERARCHY.get(required_level, 0)
+            meets_education = (self.education_count > 0) & (self.education_score >= required_score)
+            edu_score = np.where(
+                (self.education_count > 0) & ~meets_education, edu_score * 0.7, edu_score
+            )
+
+        # ---- projects
+        per_project = (
+            np.where(project_skills_used > 0, np.minimum(80, project_skills_used * 20), 0)
+            + self.project_desc_bonus
+        )
+        project_sum = self._count_per_candidate(self.project_owner, per_project)
+        project_score = np.minimum(
+            100, np.divide(project_sum, self.project_count, out=np.zeros(n), where=self.project_count > 0)
+        )
+
+        # ---- company
+        company_score = np.where(self.has_experience, self.company_score, 0)
+        top_company_count = np.where(self.has_experience, self.top_company_count, 0)
+
+        weights = select_weights(intent)
+        total = (
+            skill_score * weights['skills'] +
+            exp_score * weights['experience'] +
+            edu_score * weights['education'] +
+            project_score * weights['projects'] +
+            company_score * weights.get('company', 0)
+        )
+
+        if apply_penalties:
+            total = np.where(meets_min, total, total * 0.5)
+            total = np.where(meets_max, total, total * 0.7)
+            if required_level is not None:
+                total = np.where(meets_education, total, total * 0.8)
+            if intent.get('company_filter'):
+                total = np.where(top_company_count == 0, total * 0.3, total)
+
+        return total
+
+
+def top_k_indices(scores: np.ndarray, k: Optional[int] = None, min_score: Optional[float] = None) -> np.ndarray:
+    """
+    Indices of the k best scores, highest first. Ties keep input order, the
+    same as a stable descending sort. `min_score` drops scores <= min_score.
+    """
+    candidates = np.arange(len(scores))
+    if min_score is not None:
+        candidates = candidates[scores > min_score]
+    if k is None or k >= len(candidates):
+        chosen = candidates
+    elif k <= 0:
+        return candidates[:0]
+    else:
+        subset = scores[candidates]
+        threshold = subset[np.argpartition(-subset, k - 1)[k - 1]]
+        above = candidates[subset > threshold]
+        ties = candidates[subset == threshold][: k - len(above)]
+        chosen = np.concatenate([above, ties])
+
+    return chosen[np.lexsort((chosen, -scores[chosen]))]
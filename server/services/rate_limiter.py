@@ -0,0 +1,112 @@
+"""
+Token-bucket rate limiting for Groq API calls.
+
+A single shared bucket is refilled continuously at the configured
+requests-per-minute. Callers await acquire() before every request instead of
+sleeping for fixed delays, so concurrent workers saturate the quota without
+exceeding it. A 429 response drains the bucket via penalize() so every waiter
+backs off together. count_acquired() attributes the tokens taken by one
+piece of work (e.g. a bulk job) and every task it spawns.
+"""
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+from core.config import GROQ_MAX_REQUESTS_PER_MINUTE
+
+
+class AcquireCount:
+    def __init__(self):
+        self.total = 0
+
+
+class TokenBucket:
+    """Async token bucket: `rate_per_minute` tokens per minute, bursting up to `capacity`"""
+
+    def __init__(self, rate_per_minute: float, capacity: int | None = None):
+        self.rate_per_minute = rate_per_minute
+        self.capacity = capacity or max(1, int(rate_per_minute))
+        self._fill_rate = rate_per_minute / 60.0  # tokens per second
+        self._tokens = float(self.capacity)
+        self._updated_at = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+        self.total_acquired = 0
+        self.total_wait_seconds = 0.0
+        self.penalties = 0
+        # Tasks copy the context when created, so they add to their creator's counter
+        self._counter: ContextVar[Optional[AcquireCount]] = ContextVar(f"acquired_{id(self)}", default=None)
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated_at
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self._fill_rate)
+            self._updated_at = now
+
+    def time_until_available(self, tokens: int = 1) -> float:
+        """Seconds until `tokens` could be acquired (0 if available now)"""
+        now = time.monotonic()
+        self._refill(now)
+        wait = max(0.0, self._blocked_until - now)
+        deficit = tokens - self._tokens
+        if deficit > 0:
+            wait = max(wait, deficit / self._fill_rate)
+        return wait
+
+    async def acquire(self, tokens: int = 1) -> float:
+        """Wait until `tokens` are available and take them. Returns seconds waited."""
+        start = time.monotonic()
+        # The lock makes waiters queue up FIFO instead of racing for each refill
+        async with self._lock:
+            while True:
+                wait = self.time_until_available(tokens)
+                if wait <= 0:
+                    self._tokens -= tokens
+                    break
+                await asyncio.sleep(wait)
+
+        waited = time.monotonic() - start
+        self.total_acquired += tokens
+        self.total_wait_seconds += waited
+        counter = self._counter.get()
+        if counter is not None:
+            counter.total += tokens
+        return waited
+
+    @contextmanager
+    def count_acquired(self) -> Iterator[AcquireCount]:
+        """Count the tokens acquired inside the block, including by tasks it creates"""
+        counter = AcquireCount()
+        reset_token = self._counter.set(counter)
+        try:
+            yield counter
+        finally:
+            self._counter.reset(reset_token)
+
+    def penalize(self, retry_after: float):
+        """Empty the bucket and block all callers for `retry_after` seconds (used on 429)"""
+        now = time.monotonic()
+        self._refill(now)
+        self._tokens = 0.0
+        self._blocked_until = max(self._blocked_until, now + retry_after)
+        # No refill while blocked - the quota restarts once the block lifts
+        self._updated_at = self._blocked_until
+        self.penalties += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rate_per_minute": self.rate_per_minute,
+            "capacity": self.capacity,
+            "available_tokens": round(max(0.0, self._tokens), 2),
+            "seconds_until_available": round(self.time_until_available(), 2),
+            "total_acquired": self.total_acquired,
+            "total_wait_seconds": round(self.total_wait_seconds, 2),
+            "penalties": self.penalties,
+        }
+
+
+# Shared by every resume-parsing call so bulk, ZIP and single uploads draw from one quota
+groq_parse_limiter = TokenBucket(GROQ_MAX_REQUESTS_PER_MINUTE)
@@ -1,80 +1,98 @@
-import pdfplumber
-from docx import Document
+import asyncio
 import re
 import json
-import httpx
-from core.config import GROQ_API_KEY, GROQ_URL, GROQ_PARSING_MODEL
-import io
-from datetime import datetime
-
-
-# ---------------------------------------------------------------------------
-# Known Indian cities — used for PDF line-merge fix.
-# Keep this in sync with location_utils.CITY_STATE_MAPPING or import from it.
-# ---------------------------------------------------------------------------
-_KNOWN_CITIES = {
-    "bhubaneswar", "cuttack", "rourkela", "berhampur", "sambalpur", "puri",
-    "balasore", "baripada", "bhadrak", "jharsuguda", "jeypore", "kendrapara",
-    "rayagada", "angul", "koraput", "parlakhemundi", "sundargarh",
-    "bangalore", "bengaluru", "mysore", "mysuru", "hubli", "mangalore",
-    "belgaum", "gulbarga", "davanagere", "bellary", "bijapur", "shimoga",
-    "tumkur", "raichur", "bidar", "hospet", "gadag", "udupi", "hassan",
-    "chitradurga", "mandya",
-    "chennai", "madras", "coimbatore", "madurai", "tiruchirappalli", "trichy",
-    "salem", "tirunelveli", "tiruppur", "erode", "vellore", "thoothukudi",
-    "dindigul", "thanjavur", "ranipet", "sivakasi", "karur", "kanchipuram",
-    "kumbakonam", "nagercoil", "cuddalore",
-    "mumbai", "pune", "nagpur", "thane", "nashik", "aurangabad", "solapur",
-    "kolhapur", "amravati", "sangli", "malegaon", "jalgaon", "akola",
-    "latur", "ahmednagar", "chandrapur", "parbhani", "ichalkaranji", "jalna",
-    "delhi", "new delhi",
-    "kolkata", "calcutta", "howrah", "durgapur", "asansol", "siliguri",
-    "bardhaman", "kharagpur", "haldia", "krishnanagar", "raiganj", "medinipur",
-    "jalpaiguri",
-    "ahmedabad", "surat", "vadodara", "rajkot", "bhavnagar", "jamnagar",
-    "junagadh", "gandhinagar", "gandhidham", "anand", "navsari", "morbi",
-    "surendranagar", "bharuch", "vapi",
-    "hyderabad", "warangal", "nizamabad", "karimnagar", "ramagundam",
-    "khammam", "mahbubnagar", "nalgonda", "adilabad", "suryapet",
-    "siddipet", "miryalaguda",
-    "visakhapatnam", "vijayawada", "guntur", "nellore", "kurnool", "tirupati",
-    "kadapa", "kakinada", "rajahmundry", "anantapur", "eluru", "ongole",
-    "vizianagaram", "machilipatnam",
-    "lucknow", "kanpur", "ghaziabad", "agra", "meerut", "varanasi",
-    "prayagraj", "allahabad", "bareilly", "aligarh", "moradabad",
-    "saharanpur", "gorakhpur", "noida", "firozabad", "jhansi",
-    "muzaffarnagar", "mathura", "rampur",
-    "jaipur", "jodhpur", "kota", "bikaner", "udaipur", "ajmer", "bhilwara",
-    "alwar", "bharatpur", "pali", "sikar", "tonk",
-    "indore", "bhopal", "jabalpur", "gwalior", "ujjain", "sagar", "dewas",
-    "satna", "ratlam", "rewa", "katni", "singrauli",
-    "ludhiana", "amritsar", "jalandhar", "patiala", "bathinda", "mohali",
-    "pathankot", "hoshiarpur", "batala", "moga", "abohar", "malerkotla",
-    "khanna",
-    "faridabad", "gurgaon", "gurugram", "panipat", "ambala", "yamunanagar",
-    "rohtak", "hisar", "karnal", "sonipat", "panchkula", "bhiwani", "sirsa",
-    "thiruvananthapuram", "trivandrum", "kochi", "cochin", "kozhikode",
-    "calicut", "kollam", "thrissur", "kannur", "alappuzha", "kottayam",
-    "palakkad", "malappuram",
-    "patna", "gaya", "bhagalpur", "muzaffarpur", "purnia", "darbhanga",
-    "begusarai", "katihar", "munger",
-    "ranchi", "jamshedpur", "dhanbad", "bokaro", "deoghar", "hazaribagh",
-    "giridih",
-    "raipur", "bhilai", "bilaspur", "korba", "durg", "raigarh",
-    "rajnandgaon",
-    "guwahati", "silchar", "dibrugarh", "jorhat", "nagaon", "tinsukia",
-    "tezpur",
-    "dehradun", "haridwar", "roorkee", "haldwani", "rudrapur", "kashipur",
-    "rishikesh",
-    "shimla", "mandi", "solan", "nahan", "palampur", "sundernagar",
-    "srinagar", "jammu", "anantnag", "baramulla", "udhampur",
-    "panaji", "margao", "mapusa", "ponda",
-    "puducherry", "pondicherry", "karaikal",
-    "chandigarh",
-    # two-word cities
-    "navi mumbai", "new delhi", "sri ganganagar", "vasco da gama",
-    "bihar sharif", "english bazar",
-}
+from core.config import GROQ_PARSING_MODEL, BATCH_PARSE_MAX_OUTPUT_TOKENS, PARSE_MODE
+from services.parse_cache import make_cache_key, get_cached_parse, store_parsed
+from services.rate_limiter import groq_parse_limiter
+from services.groq_client import groq_client
+from services.personal_info_extractor import extract_personal_info
+from services.location_utils import CITY_GAZETTEER
+from services.document_extraction import document_extractor
+from services.tiered_parser import (
+    build_draft,
+    create_focused_parse_prompt,
+    fields_for_llm,
+    focused_response_tokens,
+    full_parse_confidence,
+    merge_draft,
+    segmentation_trusted,
+)
+
+
+# Bump whenever the prompt or post-processing changes so cached parses
+# produced by the old pipeline are no longer served.
+PARSER_PROMPT_VERSION = "2025.2"
+
+
+def cache_version(mode):
+    """Parse cache namespace: tiered and regex-only parses are never served to full mode"""
+    return PARSER_PROMPT_VERSION if mode == "full" else f"{PARSER_PROMPT_VERSION}/{mode}"
+
+
+# Non-space runs within one line, for the PDF line-merge fix
+_LINE_WORDS = re.compile(r"\S+")
+_PINCODE = re.compile(r"[0-9]{6}")
+_CITY_KEY_PUNCTUATION = "()[],.;:|"
+# UTF-8 byte map keeping newlines and commas, folding ASCII digits to "0" and
+# everything else to a space: one C-level pass finds the candidate lines
+_ADDRESS_BYTE_MASK = bytes(
+    0x30 if 0x30 <= byte <= 0x39 else byte if byte in (0x0A, 0x2C) else 0x20
+    for byte in range(256)
+)
+
+
+def _split_merged_city(line: str) -> str:
+    """Insert a newline before a known city merged onto the end of another line"""
+    keys = [word.strip(_CITY_KEY_PUNCTUATION) for word in line.lower().split()]
+    starts = CITY_GAZETTEER.phrase_starts(keys)
+    if not starts:
+        return line
+
+    words = line.split()
+    splits = []
+    consumed = 0
+    for i in starts:
+        if i < consumed:
+            continue
+        length = CITY_GAZETTEER.match_at(keys, i)
+        if not length:
+            continue
+        end = consumed = i + length
+        ends_address = words[end - 1].endswith(',') or (
+            end < len(words) and _PINCODE.fullmatch(words[end])
+        )
+        prev = words[i - 1] if i else ''
+        if ends_address and prev and prev[0].isupper() and prev.isalpha():
+            splits.append(i)
+    if not splits:
+        return line
+
+    # Only lines that really split pay for word offsets
+    spans = [match.span() for match in _LINE_WORDS.finditer(line)]
+    parts = []
+    copied_to = 0
+    for i in splits:
+        parts += [line[copied_to:spans[i - 1][1]], '\n']
+        copied_to = spans[i][0]
+    parts.append(line[copied_to:])
+    return ''.join(parts)
+
+
+def _address_line_numbers(text: str) -> list:
+    """Indexes (in text.split('\\n')) of the lines holding a comma or six ASCII digits"""
+    mask = text.encode('utf-8', 'surrogatepass').translate(_ADDRESS_BYTE_MASK)
+    numbers = set()
+    for needle in (b',', b'000000'):
+        line = counted_to = 0
+        pos = mask.find(needle)
+        while pos != -1:
+            line += mask.count(b'\n', counted_to, pos)
+            numbers.add(line)
+            counted_to = mask.find(b'\n', pos)
+            if counted_to == -1:
+                break
+            pos = mask.find(needle, counted_to)
+    return sorted(numbers)
 
 
 def _fix_pdf_line_merges(text: str) -> str:
@@ -87,67 +105,38 @@ def _fix_pdf_line_merges(text: str) -> str:
         → extracted as →
         "Bismay Sarangi Bhubaneswar, Odisha"
 
-    Strategy: scan every token.  When a token (or token-pair) matches a
-    known city name AND the preceding token looks like a proper-noun
-    (starts with an uppercase letter, no digits, not already separated by
-    a newline), insert a newline before the city token so the rest of the
-    pipeline sees the correct structure.
+    Strategy: a translate/find pass over the UTF-8 bytes picks out the lines
+    holding a comma or pincode; only those are split into words, walking the
+    shared city gazetteer (location_utils.CITY_GAZETTEER) to find the longest
+    known city starting at each word, multi-word names included.  When a city
+    is followed by a comma or pincode AND the preceding word on the same line
+    looks like a proper noun (starts uppercase, letters only), the space
+    before the city becomes a newline so the rest of the pipeline sees the
+    correct structure.
     """
-    # Work token by token; preserve existing newlines as sentinel tokens
-    tokens = re.split(r'(\n)', text)           # keep '\n' as its own element
-    out = []
-    i = 0
-    while i < len(tokens):
-        tok = tokens[i]
-
-        # Try two-word city first (current + next non-newline token)
-        two_word = None
-        if i + 1 < len(tokens):
-            next_tok = tokens[i + 1]
-            if next_tok != '\n':
-                two_word = f"{tok} {next_tok}".lower().strip()
-
-        if two_word and two_word in _KNOWN_CITIES:
-            # Check that the token immediately before is a proper-noun word
-            prev = out[-1] if out else ''
-            if prev and prev != '\n' and prev[0].isupper() and prev.isalpha():
-                out.append('\n')
-            out.append(tok)
-            out.append(' ')
-            out.append(tokens[i + 1])
-            i += 2
-            continue
-
-        single = tok.lower().strip()
-        if single in _KNOWN_CITIES:
-            prev = out[-1] if out else ''
-            if prev and prev != '\n' and prev[0].isupper() and prev.isalpha():
-                out.append('\n')
-
-        out.append(tok)
-        i += 1
-
-    return ''.join(out)
+    lines = None
+    for number in _address_line_numbers(text):
+        if lines is None:
+            lines = text.split('\n')
+        lines[number] = _split_merged_city(lines[number])
+    return text if lines is None else '\n'.join(lines)
 
 
 async def extract_text_from_file(file):
     """Extract text from uploaded file (PDF, DOCX, TXT)"""
-    text = ""
     file_content = await file.read()
     await file.seek(0)
+    return await extract_text_from_bytes(file.filename, file_content)
 
-    if file.filename.endswith(".pdf"):
-        with pdfplumber.open(io.BytesIO(file_content)) as pdf:
-            for page in pdf.pages:
-                text += (page.extract_text() or "") + "\n"
-    elif file.filename.endswith(".docx"):
-        doc = Document(io.BytesIO(file_content))
-        text = "\n".join([p.text for p in doc.paragraphs])
-    elif file.filename.endswith(".txt"):
-        text = file_content.decode("utf-8")
-    else:
-        raise ValueError("Unsupported file type. Please upload PDF, DOCX, or TXT.")
 
+async def extract_text_from_bytes(filename, file_content):
+    """Extract text from raw file bytes (PDF, DOCX, TXT) in the extraction worker pool"""
+    extracted = await document_extractor.extract_document(filename, file_content)
+    return clean_extracted_text(extracted.text)
+
+
+def clean_extracted_text(text):
+    """Post-process raw extracted text before regex / LLM parsing"""
     # Fix PDF line-merge artifacts BEFORE any regex or whitespace normalisation.
     # e.g. "Sarangi Bhubaneswar, Odisha" → "Sarangi\nBhubaneswar, Odisha"
     text = _fix_pdf_line_merges(text)
@@ -159,156 +148,20 @@ async def extract_text_from_file(file):
 def extract_personal_info_regex(text):
     """
     ENHANCED REGEX EXTRACTION - Multiple patterns for each field
+    (precompiled, single label scan — see services/personal_info_extractor.py)
     """
-    info = {}
-
-    # ============ GENDER ============
-    gender_patterns = [
-        r"Gender\s*[:\-]?\s*([MF])\b",
-        r"Gender\s*[:\-]?\s*(Male|Female|MALE|FEMALE|M|F)\b",
-        r"Sex\s*[:\-]?\s*(Male|Female|MALE|FEMALE|M|F)\b",
-        r"\b(Male|Female)\b(?=\s*\n|\s*[,;]|\s*Marital)",
-    ]
-    for pattern in gender_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            val = match.group(1).strip().upper()
-            if val in ['M', 'MALE']:
-                info['gender'] = 'Male'
-            elif val in ['F', 'FEMALE']:
-                info['gender'] = 'Female'
-            else:
-                info['gender'] = val.capitalize()
-            break
-
-    # ============ DATE OF BIRTH ============
-    dob_patterns = [
-        r"(?:Date of Birth|DOB|D\.O\.B\.?|Birth Date)\s*[:\-]?\s*(\d{1,2}[\/\-\.]\d{1,2}[\/\-\.]\d{2,4})",
-        r"(?:Date of Birth|DOB|D\.O\.B\.?)\s*[:\-]?\s*(\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{4})",
-        r"\b(\d{1,2}[\/\-\.]\d{1,2}[\/\-\.]\d{4})\b(?=.*(?:Birth|DOB))",
-    ]
-    for pattern in dob_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            dob_str = match.group(1).strip().replace('-', '/').replace('.', '/')
-            info['date_of_birth'] = dob_str
-            try:
-                parts = dob_str.split('/')
-                if len(parts) == 3:
-                    day, month, year = int(parts[0]), int(parts[1]), int(parts[2])
-                    if year < 100:
-                        year += 1900 if year > 50 else 2000
-                    info['age'] = datetime.now().year - year
-            except Exception:
-                pass
-            break
-
-    # ============ NATIONALITY ============
-    nationality_patterns = [
-        r"Nationality\s*[:\-]?\s*([A-Za-z]+)",
-        r"Citizen(?:ship)?\s*[:\-]?\s*([A-Za-z]+)",
-        r"\b(Indian|American|British|Canadian|Australian|Chinese|Japanese)\b(?=\s*\n|\s*[,;]|\s*Marital)",
-    ]
-    for pattern in nationality_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            val = match.group(1).strip()
-            if val.upper() == 'INDIAN':
-                info['nationality'] = 'Indian'
-            elif val.upper() in ['USA', 'US', 'AMERICAN']:
-                info['nationality'] = 'American'
-            else:
-                info['nationality'] = val.capitalize()
-            break
-
-    # ============ MARITAL STATUS ============
-    marital_patterns = [
-        r"Marital Status\s*[:\-]?\s*(Single|Married|Divorced|Widowed|SINGLE|MARRIED|DIVORCED|WIDOWED)",
-        r"\b(Single|Married|Divorced|Widowed)\b(?=\s*\n|\s*[,;]|\s*Nationality)",
-    ]
-    for pattern in marital_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            info['marital_status'] = match.group(1).strip().capitalize()
-            break
-
-    # ============ CURRENT LOCATION ============
-    # Patterns ordered from most-specific (labelled) to least-specific (bare city).
-    # The bare-city pattern only captures the known city word(s), nothing before it,
-    # thanks to the negative lookbehind + word-boundary anchors.
-    location_patterns = [
-        # Explicit label + city + pincode
-        r"(?:Address|Location|City)\s*[:\-]?\s*([A-Za-z\s]+?)\s*[-,]?\s*(\d{6})\b",
-        # City + known Indian state
-        r"\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)\s*,\s*(Karnataka|Tamil Nadu|Maharashtra|Delhi|"
-        r"Telangana|West Bengal|Gujarat|Rajasthan|Punjab|Haryana|Uttar Pradesh|Madhya Pradesh|"
-        r"Kerala|Andhra Pradesh|Odisha|Chhattisgarh)\b",
-        # Explicit city/location label
-        r"(?:City|Location|Based in|Residing in)\s*[:\-]?\s*([A-Za-z][A-Za-z\s]{2,20}?)(?:\s*[\n,;]|$)",
-        # Bare known city — negative lookbehind prevents grabbing a preceding word
-        r"(?<![A-Za-z])(Bangalore|Bengaluru|Chennai|Mumbai|Delhi|Hyderabad|Kolkata|Pune|"
-        r"Ahmedabad|Jaipur|Lucknow|Kanpur|Nagpur|Visakhapatnam|Bhopal|Patna|Ludhiana|Agra|"
-        r"Nashik|Vadodara|Coimbatore|Madurai|Mysore|Bhubaneswar)(?![A-Za-z])",
-    ]
-    for pattern in location_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            if len(match.groups()) >= 2:
-                city = match.group(1).strip()
-                state_or_pin = match.group(2).strip()
-                info['current_location'] = f"{city}, {state_or_pin}"
-            else:
-                info['current_location'] = match.group(1).strip().title()
-            break
-
-    # ============ PHONE NUMBER ============
-    phone_patterns = [
-        r"(?:Phone|Mobile|Contact|Cell)\s*[:\-]?\s*(\+?\d{1,3}[-.\s]?\d{10})",
-        r"(?:Phone|Mobile|Contact|Cell)\s*[:\-]?\s*(\d{10})",
-        r"\b(\+?\d{1,3}[-.\s]?\d{10})\b",
-        r"\b(\d{10})\b",
-    ]
-    for pattern in phone_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            phone = match.group(1).strip()
-            digits_only = re.sub(r'\D', '', phone)
-            if len(digits_only) >= 10:
-                info['phone'] = phone
-                break
+    return extract_personal_info(text)
 
-    # ============ EMAIL ============
-    email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-    match = re.search(email_pattern, text)
-    if match:
-        info['email'] = match.group(0).strip()
 
-    return info
-
-
-def create_resume_parse_prompt(text, regex_info=None):
-    """
-    ENHANCED AI PROMPT with strict format requirements
-    """
-    regex_context = ""
-    if regex_info:
-        regex_context = f"""
-ALREADY EXTRACTED BY REGEX (use as reference):
-{json.dumps(regex_info, indent=2)}
-"""
-
-    prompt = f"""Extract ALL information from this resume into a structured JSON format.
-
-{regex_context}
-
-**CRITICAL FORMAT REQUIREMENTS:**
+# Format rules and JSON schema shared by the single and batched parse prompts
+_RESUME_SCHEMA_INSTRUCTIONS = """**CRITICAL FORMAT REQUIREMENTS:**
 
 For array fields that expect dictionaries, you MUST return arrays of objects, NOT strings:
 
 CORRECT:
-"achievements": [{{"title": "Merit Scholarship", "description": "Received in 2024"}}]
-"awards": [{{"name": "Gold Medal", "issuer": "XIM University", "year": "2024"}}]
-"volunteer_work": [{{"organization": "NGO Name", "role": "Volunteer", "duration": "6 months"}}]
+"achievements": [{"title": "Merit Scholarship", "description": "Received in 2024"}]
+"awards": [{"name": "Gold Medal", "issuer": "XIM University", "year": "2024"}]
+"volunteer_work": [{"organization": "NGO Name", "role": "Volunteer", "duration": "6 months"}]
 
 WRONG (DO NOT DO THIS):
 "achievements": ["Merit Scholarship 2024"]  ❌
@@ -319,7 +172,7 @@ If a field is not mentioned, use an EMPTY ARRAY [], NOT ["Not mentioned"] or ["n
 
 Return ONLY a valid JSON object (no markdown, no explanations):
 
-{{
+{
   "name": "Full Name",
   "email": "email@example.com",
   "phone": "+91XXXXXXXXXX or 10-digit number",
@@ -350,12 +203,12 @@ Return ONLY a valid JSON object (no markdown, no explanations):
   "objective": "string or null",
 
   "education": [
-    {{
+    {
       "Degree": "Ph.D./M.Tech/B.Tech/etc",
       "University": "University Name",
       "Grade": "CGPA or %",
       "Years": "2020-2024 or year"
-    }}
+    }
   ],
 
   "tenth_marks": "string or null",
@@ -369,109 +222,109 @@ Return ONLY a valid JSON object (no markdown, no explanations):
   "derived_skills": [],
 
   "experience": [
-    {{
+    {
       "Company": "Company Name",
       "Role": "Job Title",
       "Years": "2020-2022",
       "Description": "brief description or null"
-    }}
+    }
   ],
 
   "projects": [
-    {{
+    {
       "Title": "Project Name",
       "Description": "what it does",
       "Technologies": "tech stack",
       "Duration": "time period"
-    }}
+    }
   ],
 
   "internships": [
-    {{
+    {
       "Company": "Company Name",
       "Role": "Intern Title",
       "Duration": "3 months",
       "Description": "what you did"
-    }}
+    }
   ],
 
   "achievements": [
-    {{
+    {
       "title": "Achievement name",
       "description": "Brief description",
       "year": "2024 or null"
-    }}
+    }
   ],
 
   "publications": [
-    {{
+    {
       "Title": "Paper Title",
       "Authors": "Author names or null",
       "Journal/Conference": "where published or null",
       "Date": "year or null",
       "DOI/Link": "link or null"
-    }}
+    }
   ],
 
   "research": [
-    {{
+    {
       "Title": "Research Title",
       "Description": "brief description",
       "Duration": "time period or null",
       "Institution": "where conducted or null"
-    }}
+    }
   ],
 
   "certifications": [
-    {{
+    {
       "Name": "Certification Name",
       "Issuer": "who issued",
       "Date": "when obtained or null",
       "Expiry": "if applicable or null"
-    }}
+    }
   ],
 
   "awards": [
-    {{
+    {
       "name": "Award name",
       "issuer": "Organization that gave award",
       "year": "2024 or null"
-    }}
+    }
   ],
 
   "volunteer_work": [
-    {{
+    {
       "organization": "Organization name",
       "role": "Your role",
       "duration": "Time period or null"
-    }}
+    }
   ],
 
   "extracurricular_activities": [
-    {{
+    {
       "activity": "Activity name",
       "role": "Your role or null",
       "duration": "Time period or null"
-    }}
+    }
   ],
 
   "languages": [
-    {{
+    {
       "Language": "English",
       "Proficiency": "Fluent/Native/Intermediate"
-    }}
+    }
   ],
 
   "interests": ["interest1", "interest2"],
   "hobbies": ["hobby1", "hobby2"],
 
   "references": [
-    {{
+    {
       "Name": "Reference Name",
       "Title": "their title",
       "Contact": "email/phone",
       "Relationship": "Manager/Professor"
-    }}
+    }
   ],
 
   "linkedin_url": "url or null",
@@ -484,8 +337,8 @@ Return ONLY a valid JSON object (no markdown, no explanations):
   "preferred_industry": "string or null",
   "career_objective": "string or null",
 
-  "extra_sections": {{}}
-}}
+  "extra_sections": {}
+}
 
 **CRITICAL RULES:**
 1. achievements, awards, volunteer_work, extracurricular_activities MUST be arrays of objects (dictionaries), NOT arrays of strings
@@ -494,7 +347,25 @@ Return ONLY a valid JSON object (no markdown, no explanations):
 4. No markdown backticks
 5. All quotes properly escaped
 6. No trailing commas
-7. current_location must be ONLY "City, State" — never include a person's name or any word preceding the city
+7. current_location must be ONLY "City, State" — never include a person's name or any word preceding the city"""
+
+
+def create_resume_parse_prompt(text, regex_info=None):
+    """
+    ENHANCED AI PROMPT with strict format requirements
+    """
+    regex_context = ""
+    if regex_info:
+        regex_context = f"""
+ALREADY EXTRACTED BY REGEX (use as reference):
+{json.dumps(regex_info, indent=2)}
+"""
+
+    prompt = f"""Extract ALL information from this resume into a structured JSON format.
+
+{regex_context}
+
+{_RESUME_SCHEMA_INSTRUCTIONS}
 
 Resume Text:
 {text[:15000]}
@@ -504,39 +375,56 @@ Return ONLY the JSON object with proper structure.
     return prompt
 
 
-async def call_groq_api(prompt, temperature=0.1, max_retries=3):
-    """Call Groq API with retry logic"""
-    import asyncio
+def create_batch_parse_prompt(prepared_list):
+    """
+    One prompt for several short resumes: the schema is sent once and the
+    model returns a JSON array with one object per resume
+    """
+    count = len(prepared_list)
+    sections = []
+    for position, prepared in enumerate(prepared_list, 1):
+        regex_info = prepared.get("personal_info")
+        regex_line = f"ALREADY EXTRACTED BY REGEX (use as reference): {json.dumps(regex_info)}\n" if regex_info else ""
+        sections.append(
+            f"=== RESUME {position} ===\n{regex_line}Resume Text:\n{prepared['text']}\n=== END OF RESUME {position} ==="
+        )
+    resumes = "\n\n".join(sections)
 
-    headers = {
-        "Authorization": f"Bearer {GROQ_API_KEY}",
-        "Content-Type": "application/json",
-    }
+    return f"""Extract ALL information from each of the {count} resumes below into a structured JSON format.
+
+Parse every resume on its own and never mix details between resumes. Each resume becomes one object that follows the rules and schema below, plus a "resume_index" field (1 to {count}) naming the resume it came from.
+
+{_RESUME_SCHEMA_INSTRUCTIONS}
+
+**BATCH OUTPUT:**
+Return ONLY a JSON array of exactly {count} objects in resume order, e.g. [{{"resume_index": 1, "name": ...}}, {{"resume_index": 2, "name": ...}}].
+Wherever the rules above say "JSON object", they mean one element of this array.
 
-    MAX_PROMPT_CHARS = 15000
-    if len(prompt) > MAX_PROMPT_CHARS:
+{resumes}
+
+Return ONLY the JSON array with proper structure.
+"""
+
+
+async def call_groq_api(prompt, temperature=0.1, max_retries=3, max_tokens=2000, max_prompt_chars=15000):
+    """Call Groq API through the shared client, paced by the parsing token bucket"""
+    if len(prompt) > max_prompt_chars:
         # Keep the instruction part (first 3000 chars) + truncated resume text
-        prompt = prompt[:3000] + "\n\n[Resume text truncated to fit limits]\n\n" + prompt[MAX_PROMPT_CHARS-2000:MAX_PROMPT_CHARS]
-    
-    payload = {
-        "model": GROQ_PARSING_MODEL,
-        "messages": [{"role": "user", "content": prompt}],
-        "temperature": temperature,
-        "max_tokens": 2000  # Reduced from 4000 — response doesn't need more
-    }
+        prompt = prompt[:3000] + "\n\n[Resume text truncated to fit limits]\n\n" + prompt[max_prompt_chars-2000:max_prompt_chars]
 
-    for attempt in range(max_retries):
-        try:
-            async with httpx.AsyncClient(timeout=90) as client:
-                response = await client.post(GROQ_URL, headers=headers, json=payload)
-                response.raise_for_status()
-                return response
-        except Exception as e:
-            if attempt < max_retries - 1:
-                import asyncio as _a
-                await _a.sleep(2 ** attempt)
-                continue
-            raise Exception(f"API failed: {str(e)}")
+    try:
+        return await groq_client.chat_completion(
+            prompt,
+            model=GROQ_PARSING_MODEL,
+            temperature=temperature,
+            max_tokens=max_tokens,  # 2000 per resume — response doesn't need more
+            timeout=90,
+            max_retries=max_retries,
+            limiter=groq_parse_limiter,
+            purpose="resume_parse",
+        )
+    except Exception as e:
+        raise Exception(f"API failed: {str(e)}")
 
 
 def parse_ai_response(response_text):
@@ -563,6 +451,36 @@ def parse_ai_response(response_text):
             raise ValueError(f"Failed to parse AI response as JSON: {e}")
 
 
+def parse_ai_array_response(response_text):
+    """Parse the JSON array returned for a batch prompt"""
+    cleaned = re.sub(r'^```json\s*', '', response_text.strip(), flags=re.IGNORECASE | re.MULTILINE)
+    cleaned = re.sub(r'^```\s*', '', cleaned.strip(), flags=re.MULTILINE)
+    cleaned = re.sub(r'\s*```$', '', cleaned.strip(), flags=re.MULTILINE)
+    cleaned = cleaned.strip()
+
+    # Drop any prose around the outermost array (or object)
+    starts = [i for i in (cleaned.find('['), cleaned.find('{')) if i != -1]
+    if starts:
+        cleaned = cleaned[min(starts):]
+    cleaned = cleaned[:max(cleaned.rfind(']'), cleaned.rfind('}')) + 1] or cleaned
+
+    try:
+        parsed = json.loads(cleaned)
+    except json.JSONDecodeError as e:
+        try:
+            parsed = json.loads(re.sub(r',(\s*[}\]])', r'\1', cleaned))
+        except Exception:
+            raise ValueError(f"Failed to parse AI batch response as JSON: {e}")
+
+    if isinstance(parsed, dict):
+        # {"resumes": [...]} or a lone object
+        lists = [value for value in parsed.values() if isinstance(value, list) and value and isinstance(value[0], dict)]
+        parsed = lists[0] if len(lists) == 1 and "resume_index" in lists[0][0] else [parsed]
+    if not isinstance(parsed, list):
+        raise ValueError("AI batch response is not a JSON array")
+    return parsed
+
+
 def normalize_list_fields(data):
     """
     FIX: Convert string arrays to dict arrays for Pydantic validation
@@ -594,8 +512,8 @@ def _clean_location(location: str) -> str:
     known city name (e.g. "Sarangi Bhubaneswar, Odisha"), strip everything
     up to and including the non-city prefix word(s).
 
-    Works by sliding a window over the tokens and returning the substring
-    starting at the first token that is a known city.
+    Works by looking up the tokens in the shared city gazetteer and returning
+    the substring starting at the longest known city.
     """
     if not location:
         return location
@@ -611,12 +529,11 @@ def _clean_location(location: str) -> str:
 
     tokens = city_part.split()
 
-    # Try longest match first (handles two-word cities like "Navi Mumbai")
-    for length in range(min(len(tokens), 3), 0, -1):
-        for start in range(len(tokens) - length + 1):
-            candidate = ' '.join(tokens[start:start + length])
-            if candidate.lower() in _KNOWN_CITIES:
-                return candidate.title() + state_part
+    # Longest known city wins (handles multi-word cities like "Navi Mumbai")
+    match = CITY_GAZETTEER.longest_match([token.lower() for token in tokens])
+    if match:
+        start, end = match
+        return ' '.join(tokens[start:end]).title() + state_part
 
     # No known city found — return unchanged
     return location
@@ -641,23 +558,86 @@ def merge_regex_and_ai_data(regex_data, ai_data):
     return final_data
 
 
+async def prepare_resume(file, mode=None):
+    """
+    Read the upload, consult the parse cache and extract text.
+
+    This is the CPU/IO stage that runs ahead of the LLM stage. Returns a dict
+    with filename, cache_key, parse_mode (PARSE_MODE unless given) and either
+    the cached parse or the extracted text.
+    """
+    mode = mode or PARSE_MODE
+    file_content = await file.read()
+    cache_key = make_cache_key(file_content, GROQ_PARSING_MODEL, cache_version(mode))
+
+    cached = await asyncio.to_thread(get_cached_parse, cache_key)
+    if cached is not None:
+        cached["filename"] = file.filename
+        return {"filename": file.filename, "cache_key": cache_key, "parse_mode": mode, "cached": cached, "text": None}
+
+    extracted = await document_extractor.extract_document(file.filename, file_content)
+    text = clean_extracted_text(extracted.text)
+    if not text or len(text.strip()) < 50:
+        raise ValueError("Could not extract meaningful text from file")
+
+    if extracted.pages:
+        slowest = max(extracted.pages, key=lambda page: page.seconds)
+        print(f"📄 {file.filename}: {len(extracted.pages)} page(s) in {extracted.seconds:.2f}s "
+              f"(slowest p{slowest.number} {slowest.seconds:.2f}s){' — stopped at char budget' if extracted.truncated else ''}")
+
+    return {
+        "filename": file.filename,
+        "cache_key": cache_key,
+        "parse_mode": mode,
+        "cached": None,
+        "text": text,
+        # Regex personal info, reused by the LLM stage and the pre-LLM duplicate check
+        "personal_info": extract_personal_info_regex(text),
+        "extraction": {
+            "seconds": round(extracted.seconds, 3),
+            "truncated": extracted.truncated,
+            "pages": extracted.page_timings(),
+        },
+    }
+
+
 async def parse_resume(file):
     """
     ENHANCED HYBRID PARSER with format normalization
     """
+    try:
+        prepared = await prepare_resume(file)
+    except Exception as e:
+        print(f"❌ ERROR: {str(e)}")
+        raise ValueError(f"Failed to parse resume: {str(e)}")
+
+    return await parse_prepared_resume(prepared)
+
+
+async def parse_prepared_resume(prepared):
+    """
+    LLM stage: run regex + AI extraction on text produced by prepare_resume
+    """
+    filename = prepared["filename"]
+    cache_key = prepared["cache_key"]
+
     try:
         print(f"\n{'='*70}")
-        print(f"📄 PARSING: {file.filename}")
+        print(f"📄 PARSING: {filename}")
         print('='*70)
 
-        text = await extract_text_from_file(file)
-        if not text or len(text.strip()) < 50:
-            raise ValueError("Could not extract meaningful text from file")
+        if prepared["cached"] is not None:
+            print(f"⚡ CACHE HIT - returning stored parse ({cache_key[:12]}...)")
+            print('='*70 + '\n')
+            return prepared["cached"]
 
+        text = prepared["text"]
         print(f"✓ Extracted {len(text)} characters")
 
         print("\n🔍 REGEX EXTRACTION (High-Confidence Patterns):")
-        regex_data = extract_personal_info_regex(text)
+        regex_data = prepared.get("personal_info")
+        if regex_data is None:
+            regex_data = extract_personal_info_regex(text)
 
         if regex_data:
             for key, value in regex_data.items():
@@ -665,6 +645,11 @@ async def parse_resume(file):
         else:
             print("  ℹ No regex matches found")
 
+        if prepared.get("parse_mode", "full") != "full":
+            final_data = await parse_tiered(prepared, regex_data)
+            if final_data is not None:
+                return final_data
+
         print("\n🤖 AI EXTRACTION:")
         prompt = create_resume_parse_prompt(text, regex_data)
         response = await call_groq_api(prompt, temperature=0.1)
@@ -678,87 +663,200 @@ async def parse_resume(file):
 
         print(f"✓ AI extracted {len([k for k, v in ai_data.items() if v])} non-null fields")
 
-        print("\n🔄 NORMALIZING DATA (Converting strings to dicts):")
-        ai_data = normalize_list_fields(ai_data)
-        print("✓ Normalized list fields for Pydantic validation")
-
-        print("\n🔄 MERGING DATA (Regex priority for personal info):")
-        final_data = merge_regex_and_ai_data(regex_data, ai_data)
-
-        # ------------------------------------------------------------------
-        # POST-PROCESS: strip any surname/locality prefix from current_location
-        # e.g. "Sarangi Bhubaneswar, Odisha" → "Bhubaneswar, Odisha"
-        # ------------------------------------------------------------------
-        if final_data.get('current_location'):
-            original_loc = final_data['current_location']
-            cleaned_loc = _clean_location(original_loc)
-            if cleaned_loc != original_loc:
-                print(f"  ✓ Location cleaned: '{original_loc}' → '{cleaned_loc}'")
-            final_data['current_location'] = cleaned_loc
-
-        schema_defaults = {
-            "gender": None, "date_of_birth": None, "age": None, "nationality": None,
-            "marital_status": None, "current_location": None, "permanent_address": None,
-            "hometown": None, "preferred_locations": [], "willing_to_relocate": None,
-            "work_authorization": None, "visa_status": None, "notice_period": None,
-            "availability_date": None, "current_ctc": None, "expected_ctc": None,
-            "current_salary": None, "expected_salary": None, "summary": None,
-            "objective": None, "career_objective": None, "tenth_marks": None,
-            "twelfth_marks": None, "graduation_year": None, "current_year_of_study": None,
-            "university_roll_number": None, "student_id": None, "derived_skills": [],
-            "internships": [], "achievements": [], "research": [], "awards": [],
-            "volunteer_work": [], "extracurricular_activities": [], "languages": [],
-            "interests": [], "hobbies": [], "references": [], "linkedin_url": None,
-            "github_url": None, "portfolio_url": None, "personal_website": None,
-            "placement_preferences": None, "preferred_job_role": None,
-            "preferred_industry": None, "extra_sections": {}
-        }
-
-        for field, default_value in schema_defaults.items():
-            if field not in final_data:
-                final_data[field] = default_value
-
-        list_fields = [
-            'education', 'skills', 'experience', 'projects', 'internships',
-            'achievements', 'publications', 'research', 'certifications',
-            'awards', 'volunteer_work', 'extracurricular_activities',
-            'languages', 'interests', 'hobbies', 'references',
-            'derived_skills', 'preferred_locations'
-        ]
-        for field in list_fields:
-            if final_data.get(field) is None:
-                final_data[field] = []
-
-        if final_data.get('extra_sections') is None:
-            final_data['extra_sections'] = {}
-
-        final_data["filename"] = file.filename
-
-        print(f"\n{'='*70}")
-        print("✅ PARSING COMPLETE - FINAL RESULT:")
-        print(f"   Name: {final_data.get('name', 'N/A')}")
-        print(f"   Email: {final_data.get('email', 'N/A')}")
-        print(f"   Phone: {final_data.get('phone', 'N/A')}")
-        print(f"   Gender: {final_data.get('gender', 'Not Found')}")
-        print(f"   DOB: {final_data.get('date_of_birth', 'Not Found')}")
-        print(f"   Age: {final_data.get('age', 'Not Found')}")
-        print(f"   Nationality: {final_data.get('nationality', 'Not Found')}")
-        print(f"   Marital Status: {final_data.get('marital_status', 'Not Found')}")
-        print(f"   Location: {final_data.get('current_location', 'Not Found')}")
-
-        education = final_data.get('education', []) or []
-        experience = final_data.get('experience', []) or []
-        skills = final_data.get('skills', []) or []
-        achievements = final_data.get('achievements', []) or []
-
-        print(f"   Education Entries: {len(education)}")
-        print(f"   Experience Entries: {len(experience)}")
-        print(f"   Skills: {len(skills)}")
-        print(f"   Achievements: {len(achievements)}")
-        print('='*70 + '\n')
-
-        return final_data
+        return await finalize_parsed_resume(prepared, regex_data, ai_data)
 
     except Exception as e:
         print(f"❌ ERROR: {str(e)}")
-        raise ValueError(f"Failed to parse resume: {str(e)}")
\ No newline at end of file
+        raise ValueError(f"Failed to parse resume: {str(e)}")
+
+
+def _belongs_to(ai_data, prepared, regex_data):
+    """Cheap check that a batch element describes this resume and not a neighbour"""
+    if not any(ai_data.get(field) for field in ("name", "email", "skills", "education", "experience")):
+        return False
+
+    regex_email = (regex_data or {}).get("email")
+    ai_email = ai_data.get("email")
+    if regex_email and isinstance(ai_email, str) and "@" in ai_email and ai_email.strip().lower() != regex_email.strip().lower():
+        return False
+
+    name_tokens = re.findall(r"[a-z]{3,}", str(ai_data.get("name") or "").lower())
+    if name_tokens and not any(token in prepared["text"].lower() for token in name_tokens):
+        return False
+    return True
+
+
+async def parse_prepared_batch(prepared_list):
+    """
+    LLM stage for several short resumes in one request (see
+    services/batch_parser.py). Returns one entry per resume: the final parse,
+    or None when the model's element for it is missing or fails validation,
+    in which case the caller falls back to parse_prepared_resume.
+    """
+    regex_list = []
+    for prepared in prepared_list:
+        regex_data = prepared.get("personal_info")
+        regex_list.append(regex_data if regex_data is not None else extract_personal_info_regex(prepared["text"]))
+        prepared["personal_info"] = regex_list[-1]
+
+    names = ", ".join(prepared["filename"] for prepared in prepared_list)
+    print(f"\n📦 BATCH PARSING {len(prepared_list)} resumes in one request: {names}")
+
+    prompt = create_batch_parse_prompt(prepared_list)
+    response = await call_groq_api(
+        prompt,
+        temperature=0.1,
+        max_tokens=min(BATCH_PARSE_MAX_OUTPUT_TOKENS, 2000 * len(prepared_list)),
+        max_prompt_chars=len(prompt),
+    )
+
+    data = response.json()
+    if "choices" not in data or not data["choices"]:
+        raise ValueError("Invalid API response - no choices returned")
+    items = parse_ai_array_response(data["choices"][0]["message"]["content"])
+
+    by_index = {}
+    for item in items:
+        if isinstance(item, dict) and isinstance(item.get("resume_index"), int):
+            by_index.setdefault(item.pop("resume_index"), item)
+
+    results = []
+    for position, (prepared, regex_data) in enumerate(zip(prepared_list, regex_list), 1):
+        ai_data = by_index.get(position)
+        if ai_data is None or not _belongs_to(ai_data, prepared, regex_data):
+            print(f"  ⚠️  {prepared['filename']}: no valid element in the batch response")
+            results.append(None)
+            continue
+        try:
+            results.append(await finalize_parsed_resume(prepared, regex_data, ai_data))
+        except Exception as e:
+            print(f"  ⚠️  {prepared['filename']}: batch element rejected ({str(e)[:100]})")
+            results.append(None)
+    return results
+
+
+async def parse_tiered(prepared, regex_data):
+    """
+    Regex-first parse (services/tiered_parser.py): the LLM is asked only for
+    missing or low-confidence fields, or not at all in regex mode. Returns
+    None when the section headers can't be trusted, so the caller falls back
+    to the full prompt.
+    """
+    mode = prepared["parse_mode"]
+    text = prepared["text"]
+    draft = build_draft(text, regex_data)
+    fields = fields_for_llm(draft)
+    print(f"\n🧩 DRAFT: {len(draft['data'])} fields, sections: {', '.join(draft['sections']) or 'none'}")
+
+    if mode == "tiered" and not segmentation_trusted(draft):
+        print("  ℹ Too few section headers recognised - using the full prompt")
+        return None
+
+    llm_data = None
+    if mode == "regex" or not fields:
+        print("⚡ No LLM call needed" if mode == "tiered" else "⚡ REGEX-ONLY MODE - no LLM call")
+    else:
+        print(f"\n🤖 FOCUSED AI EXTRACTION ({len(fields)} fields): {', '.join(fields)}")
+        prompt = create_focused_parse_prompt(text, draft, fields)
+        response = await call_groq_api(prompt, temperature=0.1, max_tokens=focused_response_tokens(fields))
+
+        data = response.json()
+        if "choices" not in data or not data["choices"]:
+            raise ValueError("Invalid API response - no choices returned")
+        llm_data = parse_ai_response(data["choices"][0]["message"]["content"])
+        print(f"✓ AI extracted {len([k for k, v in llm_data.items() if v])} non-null fields")
+
+    return await finalize_parsed_resume(prepared, regex_data, merge_draft(draft, llm_data, fields))
+
+
+async def finalize_parsed_resume(prepared, regex_data, ai_data):
+    """
+    Post-process the LLM output for one resume: normalize list fields, merge
+    regex results, fill schema defaults and store it in the parse cache
+    """
+    print("\n🔄 NORMALIZING DATA (Converting strings to dicts):")
+    ai_data = normalize_list_fields(ai_data)
+    print("✓ Normalized list fields for Pydantic validation")
+
+    print("\n🔄 MERGING DATA (Regex priority for personal info):")
+    final_data = merge_regex_and_ai_data(regex_data, ai_data)
+
+    # ------------------------------------------------------------------
+    # POST-PROCESS: strip any surname/locality prefix from current_location
+    # e.g. "Sarangi Bhubaneswar, Odisha" → "Bhubaneswar, Odisha"
+    # ------------------------------------------------------------------
+    if final_data.get('current_location'):
+        original_loc = final_data['current_location']
+        cleaned_loc = _clean_location(original_loc)
+        if cleaned_loc != original_loc:
+            print(f"  ✓ Location cleaned: '{original_loc}' → '{cleaned_loc}'")
+        final_data['current_location'] = cleaned_loc
+
+    schema_defaults = {
+        "gender": None, "date_of_birth": None, "age": None, "nationality": None,
+        "marital_status": None, "current_location": None, "permanent_address": None,
+        "hometown": None, "preferred_locations": [], "willing_to_relocate": None,
+        "work_authorization": None, "visa_status": None, "notice_period": None,
+        "availability_date": None, "current_ctc": None, "expected_ctc": None,
+        "current_salary": None, "expected_salary": None, "summary": None,
+        "objective": None, "career_objective": None, "tenth_marks": None,
+        "twelfth_marks": None, "graduation_year": None, "current_year_of_study": None,
+        "university_roll_number": None, "student_id": None, "derived_skills": [],
+        "internships": [], "achievements": [], "research": [], "awards": [],
+        "volunteer_work": [], "extracurricular_activities": [], "languages": [],
+        "interests": [], "hobbies": [], "references": [], "linkedin_url": None,
+        "github_url": None, "portfolio_url": None, "personal_website": None,
+        "placement_preferences": None, "preferred_job_role": None,
+        "preferred_industry": None, "extra_sections": {}
+    }
+
+    for field, default_value in schema_defaults.items():
+        if field not in final_data:
+            final_data[field] = default_value
+
+    list_fields = [
+        'education', 'skills', 'experience', 'projects', 'internships',
+        'achievements', 'publications', 'research', 'certifications',
+        'awards', 'volunteer_work', 'extracurricular_activities',
+        'languages', 'interests', 'hobbies', 'references',
+        'derived_skills', 'preferred_locations'
+    ]
+    for field in list_fields:
+        if final_data.get(field) is None:
+            final_data[field] = []
+
+    if final_data.get('extra_sections') is None:
+        final_data['extra_sections'] = {}
+
+    mode = prepared.get("parse_mode", "full")
+    if not final_data.get("field_confidence"):
+        final_data["field_confidence"] = full_parse_confidence(regex_data, final_data)
+    final_data["parse_mode"] = mode
+
+    await asyncio.to_thread(store_parsed, prepared["cache_key"], final_data, GROQ_PARSING_MODEL, cache_version(mode))
+    final_data["filename"] = prepared["filename"]
+
+    print(f"\n{'='*70}")
+    print("✅ PARSING COMPLETE - FINAL RESULT:")
+    print(f"   Name: {final_data.get('name', 'N/A')}")
+    print(f"   Email: {final_data.get('email', 'N/A')}")
+    print(f"   Phone: {final_data.get('phone', 'N/A')}")
+    print(f"   Gender: {final_data.get('gender', 'Not Found')}")
+    print(f"   DOB: {final_data.get('date_of_birth', 'Not Found')}")
+    print(f"   Age: {final_data.get('age', 'Not Found')}")
+    print(f"   Nationality: {final_data.get('nationality', 'Not Found')}")
+    print(f"   Marital Status: {final_data.get('marital_status', 'Not Found')}")
+    print(f"   Location: {final_data.get('current_location', 'Not Found')}")
+
+    education = final_data.get('education', []) or []
+    experience = final_data.get('experience', []) or []
+    skills = final_data.get('skills', []) or []
+    achievements = final_data.get('achievements', []) or []
+
+    print(f"   Education Entries: {len(education)}")
+    print(f"   Experience Entries: {len(experience)}")
+    print(f"   Skills: {len(skills)}")
+    print(f"   Achievements: {len(achievements)}")
+    print('='*70 + '\n')
+
+    return final_data
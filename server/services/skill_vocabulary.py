@@ -0,0 +1,93 @@
+"""
+Skill vocabulary shared by query understanding and the candidate index.
+
+extract_query_intent can only ever ask for the canonical skills below, so the
+candidate index precomputes, for each of them, where it occurs in a resume.
+Changing this vocabulary requires bumping FEATURE_VERSION in
+services/candidate_index.py so existing feature documents are rebuilt.
+"""
+from services.text_automaton import SubstringAutomaton
+
+# Canonical skill -> phrases that mention it in a recruiter query
+SKILL_DATABASE = {
+    'python': ['python', 'py', 'django', 'flask', 'fastapi', 'pandas', 'numpy'],
+    'javascript': ['javascript', 'js', 'ecmascript', 'es6', 'es2015'],
+    'typescript': ['typescript', 'ts'],
+    'java': ['java', 'jvm', 'spring boot', 'spring'],
+    'react': ['react', 'reactjs', 'react.js', 'react native'],
+    'angular': ['angular', 'angularjs', 'angular.js'],
+    'vue': ['vue', 'vuejs', 'vue.js', 'nuxt'],
+    'node': ['node', 'nodejs', 'node.js', 'express', 'expressjs'],
+    'dotnet': ['dotnet', '.net', 'c#', 'csharp', 'asp.net'],
+    'c++': ['c++', 'cpp', 'cplusplus'],
+    'ruby': ['ruby', 'rails', 'ruby on rails'],
+    'php': ['php', 'laravel', 'symfony', 'wordpress'],
+    'go': ['go', 'golang'],
+    'rust': ['rust'],
+    'swift': ['swift', 'ios'],
+    'kotlin': ['kotlin', 'android'],
+    'aws': ['aws', 'amazon web services', 'ec2', 's3', 'lambda', 'cloudformation'],
+    'azure': ['azure', 'microsoft azure'],
+    'gcp': ['gcp', 'google cloud', 'google cloud platform'],
+    'docker': ['docker', 'containerization', 'containers'],
+    'kubernetes': ['kubernetes', 'k8s', 'container orchestration'],
+    'sql': ['sql', 'database', 'rdbms'],
+    'postgresql': ['postgresql', 'postgres'],
+    'mysql': ['mysql'],
+    'mongodb': ['mongodb', 'mongo', 'nosql'],
+    'redis': ['redis', 'cache', 'caching'],
+    'machine learning': ['machine learning', 'ml', 'deep learning', 'neural network'],
+    'ai': ['ai', 'artificial intelligence', 'nlp', 'computer vision'],
+    'data science': ['data science', 'data analysis', 'analytics'],
+    'tensorflow': ['tensorflow', 'tf'],
+    'pytorch': ['pytorch', 'torch'],
+    'flutter': ['flutter', 'dart'],
+    'html': ['html', 'html5'],
+    'css': ['css', 'css3', 'sass', 'scss', 'tailwind'],
+    'graphql': ['graphql', 'gql'],
+    'rest': ['rest', 'restful', 'rest api'],
+    'api': ['api', 'apis'],
+    'git': ['git', 'github', 'gitlab', 'version control'],
+    'jenkins': ['jenkins', 'ci/cd', 'continuous integration'],
+    'linux': ['linux', 'unix', 'ubuntu', 'centos'],
+    'devops': ['devops', 'sre', 'site reliability'],
+    'testing': ['testing', 'test', 'unit test', 'integration test', 'qa', 'quality assurance'],
+    'agile': ['agile', 'scrum', 'kanban', 'sprint'],
+    'ui/ux': ['ui', 'ux', 'user interface', 'user experience', 'design'],
+    'frontend': ['frontend', 'front-end', 'front end'],
+    'backend': ['backend', 'back-end', 'back end'],
+    'fullstack': ['fullstack', 'full-stack', 'full stack'],
+    'microservices': ['microservices', 'microservice architecture'],
+    'blockchain': ['blockchain', 'crypto', 'web3', 'ethereum', 'solidity']
+}
+
+# Role phrases in a query -> skills they imply
+ROLE_SKILL_MAPPING = {
+    'web developer': ['javascript', 'html', 'css', 'react', 'node'],
+    'web development': ['javascript', 'html', 'css', 'react', 'node'],
+    'full stack': ['javascript', 'react', 'node', 'python', 'sql'],
+    'fullstack': ['javascript', 'react', 'node', 'python', 'sql'],
+    'frontend developer': ['javascript', 'react', 'html', 'css', 'typescript'],
+    'front end': ['javascript', 'react', 'html', 'css', 'typescript'],
+    'backend developer': ['python', 'java', 'node', 'sql', 'api'],
+    'back end': ['python', 'java', 'node', 'sql', 'api'],
+    'mobile developer': ['react', 'flutter', 'swift', 'kotlin'],
+    'ios developer': ['swift', 'ios'],
+    'android developer': ['kotlin', 'java', 'android'],
+    'data scientist': ['python', 'machine learning', 'tensorflow', 'sql'],
+    'data engineer': ['python', 'sql', 'spark', 'data science'],
+    'devops engineer': ['docker', 'kubernetes', 'aws', 'jenkins', 'linux'],
+    'ml engineer': ['python', 'machine learning', 'tensorflow', 'pytorch'],
+    'ai engineer': ['python', 'ai', 'machine learning', 'tensorflow'],
+    'software engineer': ['python', 'java', 'javascript'],
+    'qa engineer': ['testing', 'automation', 'selenium'],
+    'ui/ux designer': ['ui/ux', 'design', 'figma']
+}
+
+# Every skill a query intent can contain
+QUERY_SKILLS = sorted(
+    set(SKILL_DATABASE) | {skill for skills in ROLE_SKILL_MAPPING.values() for skill in skills}
+)
+
+# Matches all query skills as substrings of resume text in one pass
+query_skill_automaton = SubstringAutomaton(QUERY_SKILLS)
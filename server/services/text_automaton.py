@@ -0,0 +1,115 @@
+"""
+Multi-pattern matchers compiled once and reused.
+
+SubstringAutomaton (Aho-Corasick) finds every pattern that occurs as a
+substring of a text in a single pass, i.e. the same answer as
+`[p for p in patterns if p in text]` without rescanning the text once per
+pattern. TokenTrie matches multi-word phrases against tokenized text.
+"""
+from collections import deque
+from typing import Dict, Iterable, List, Set
+
+
+class SubstringAutomaton:
+    """Compiled automaton over a fixed set of (already normalized) patterns"""
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns: List[str] = [p for p in dict.fromkeys(patterns) if p]
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+
+        for pattern_id, pattern in enumerate(self.patterns):
+            node = 0
+            for ch in pattern:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            self._out[node].append(pattern_id)
+
+        # Breadth-first pass to fill failure links and merge outputs along them
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(ch, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def find_ids(self, text: str) -> Set[int]:
+        """Ids (indexes into self.patterns) of every pattern occurring in text"""
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        found: Set[int] = set()
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                found.update(out[node])
+        return found
+
+    def find(self, text: str) -> Set[str]:
+        """Every pattern occurring in text"""
+        return {self.patterns[i] for i in self.find_ids(text)}
+
+
+class TokenTrie:
+    """
+    Trie over multi-word phrases, keyed by word. Finds the longest phrase
+    starting at a given word of an already tokenized text, however many
+    words the phrases have.
+    """
+
+    _END = ""
+
+    def __init__(self, phrases: Iterable[str]):
+        self._root: Dict[str, dict] = {}
+        self.max_words = 0
+        for phrase in phrases:
+            words = phrase.split()
+            if not words:
+                continue
+            node = self._root
+            for word in words:
+                node = node.setdefault(word, {})
+            node[self._END] = {}
+            self.max_words = max(self.max_words, len(words))
+
+    def __contains__(self, phrase: str) -> bool:
+        words = phrase.split()
+        return bool(words) and self.match_at(words, 0) == len(words)
+
+    def phrase_starts(self, words: List[str]) -> List[int]:
+        """Positions of the words that begin at least one phrase"""
+        root = self._root
+        return [i for i, word in enumerate(words) if word in root]
+
+    def match_at(self, words: List[str], start: int) -> int:
+        """Word count of the longest phrase starting at words[start] (0 if none)"""
+        node = self._root
+        longest = 0
+        for offset in range(start, len(words)):
+            node = node.get(words[offset])
+            if node is None:
+                break
+            if self._END in node:
+                longest = offset - start + 1
+        return longest
+
+    def longest_match(self, words: List[str]):
+        """(start, end) of the longest phrase anywhere in words, earliest on ties"""
+        best = None
+        for start in self.phrase_starts(words):
+            length = self.match_at(words, start)
+            if length and (best is None or length > best[1] - best[0]):
+                best = (start, start + length)
+        return best
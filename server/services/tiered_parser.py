@@ -0,0 +1,499 @@
+"""
+Regex-first tiered resume parsing.
+
+Tier 1 is deterministic and runs on every resume: a section segmenter finds
+the usual headers (Education, Experience, Skills, Projects, ...) and regex /
+line extractors build a draft with a confidence flag per field:
+
+    high     value read from an unambiguous pattern or its own section
+    medium   plausible value the LLM is not asked to re-check
+    low      guess (e.g. an education entry rebuilt from loose lines)
+    llm      filled by the focused LLM call
+    absent   nothing in the text mentions the field (no section, no cue word)
+    missing  the text mentions it but no value was found
+
+Tier 2 (PARSE_MODE "tiered") asks the LLM only for the fields that are
+missing or low-confidence. The prompt carries just those fields' schema and
+the sections they live in, so both the prompt and the response shrink, and
+a resume with nothing left to ask costs no call at all. When fewer than
+MIN_SECTIONS_FOR_TIERED headers are found the segmentation is not trusted
+and the regular full prompt is used. PARSE_MODE "regex" stops after tier 1
+(no LLM call) for very high-volume ingestion.
+"""
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.personal_info_extractor import extract_personal_info
+
+CONFIDENCE_HIGH = "high"
+CONFIDENCE_MEDIUM = "medium"
+CONFIDENCE_LOW = "low"
+CONFIDENCE_LLM = "llm"
+CONFIDENCE_ABSENT = "absent"
+CONFIDENCE_MISSING = "missing"
+
+# Fields with these levels are sent to the LLM in tiered mode
+NEEDS_LLM = {CONFIDENCE_LOW, CONFIDENCE_MISSING}
+
+MIN_SECTIONS_FOR_TIERED = 2
+MAX_HEADER_LINE_CHARS = 45
+PREAMBLE_MAX_CHARS = 1500
+
+# Section key -> header spellings (compared after lowercasing and stripping punctuation)
+SECTION_HEADERS = {
+    "summary": ["summary", "profile", "professional summary", "profile summary", "about me",
+                "objective", "career objective", "professional profile", "executive summary"],
+    "education": ["education", "academic qualifications", "academic qualification", "academic details",
+                  "educational qualifications", "educational qualification", "qualifications",
+                  "academics", "academic background", "education and training", "educational background"],
+    "experience": ["experience", "work experience", "professional experience", "employment history",
+                   "work history", "employment", "career history", "relevant experience", "experience summary"],
+    "internships": ["internships", "internship", "internship experience", "industrial training", "trainings"],
+    "projects": ["projects", "academic projects", "personal projects", "key projects", "project work",
+                 "projects undertaken", "project details", "major projects"],
+    "skills": ["skills", "technical skills", "key skills", "core competencies", "skills and abilities",
+               "technologies", "technical proficiency", "tools and technologies", "competencies",
+               "skill set", "skillset", "it skills", "software skills", "technical expertise"],
+    "certifications": ["certifications", "certificates", "certification", "licenses and certifications",
+                       "courses", "courses and certifications", "certifications and courses"],
+    "achievements": ["achievements", "awards", "honors", "honours", "awards and achievements",
+                     "achievements and awards", "accomplishments", "awards and honors", "honors and awards"],
+    "publications": ["publications", "research", "research experience", "papers", "research work"],
+    "activities": ["extracurricular activities", "extra curricular activities", "extra-curricular activities",
+                   "co-curricular activities", "volunteer work", "volunteering", "volunteer experience",
+                   "positions of responsibility", "leadership", "activities"],
+    "languages": ["languages", "languages known", "language proficiency"],
+    "interests": ["interests", "hobbies", "hobbies and interests", "interests and hobbies"],
+    "references": ["references", "referees"],
+    "personal": ["personal details", "personal information", "personal profile", "personal data",
+                 "contact", "contact details", "contact information", "declaration"],
+}
+_HEADER_LOOKUP = {header: key for key, headers in SECTION_HEADERS.items() for header in headers}
+_HEADER_CLEAN = re.compile(r"[^a-z\s&/-]")
+
+# Fields filled from a section; the LLM gets that section's text when it needs them
+SECTION_FIELDS = {
+    "summary": ["summary"],
+    "education": ["education", "graduation_year"],
+    "experience": ["experience"],
+    "internships": ["internships"],
+    "projects": ["projects"],
+    "skills": ["skills"],
+    "certifications": ["certifications"],
+    "achievements": ["achievements", "awards"],
+    "publications": ["publications", "research"],
+    "activities": ["volunteer_work", "extracurricular_activities"],
+    "languages": ["languages"],
+    "interests": ["interests", "hobbies"],
+    "references": ["references"],
+}
+_FIELD_SECTION = {field: section for section, fields in SECTION_FIELDS.items() for field in fields}
+# derived_skills is read off the work described, so any of these sections is a place for it
+DERIVED_SKILL_SECTIONS = ("experience", "internships", "projects")
+
+# Fields without a section of their own: only asked for when a cue word occurs
+FIELD_CUES = {
+    "tenth_marks": ["10th", "class x", "class 10", "ssc", "matriculation", "secondary school"],
+    "twelfth_marks": ["12th", "class xii", "class 12", "hsc", "intermediate", "higher secondary"],
+    "objective": ["objective"],
+    "career_objective": ["career objective", "career goal"],
+    "current_year_of_study": ["year of study", "currently pursuing", "pursuing", "semester", "final year",
+                              "third year", "second year", "first year"],
+    "permanent_address": ["permanent address"],
+    "hometown": ["hometown", "home town", "native place"],
+    "preferred_locations": ["preferred location", "location preference"],
+    "willing_to_relocate": ["relocat"],
+    "work_authorization": ["work authori", "authorized to work", "authorised to work", "work permit"],
+    "visa_status": ["visa"],
+    "notice_period": ["notice period"],
+    "availability_date": ["available from", "availability", "joining date", "can join"],
+    "current_ctc": ["current ctc", "ctc"],
+    "expected_ctc": ["expected ctc"],
+    "current_salary": ["current salary"],
+    "expected_salary": ["expected salary"],
+    "university_roll_number": ["roll no", "roll number", "registration no"],
+    "student_id": ["student id"],
+    "placement_preferences": ["placement preference"],
+    "preferred_job_role": ["preferred role", "preferred job", "desired role", "looking for"],
+    "preferred_industry": ["preferred industry"],
+    "personal_website": ["website", "blog"],
+    "portfolio_url": ["portfolio", "behance", "dribbble"],
+}
+# Asked for whenever the draft has no value. The other personal fields come
+# from extract_personal_info's labelled patterns and links from _LINK_PATTERNS.
+ALWAYS_ASKED = ["name", "email", "phone", "current_location"]
+
+# Example values for the focused prompt; keep in step with the full schema in resume_parser
+FIELD_SCHEMA = {
+    "name": "Full Name",
+    "email": "email@example.com",
+    "phone": "+91XXXXXXXXXX or 10-digit number",
+    "gender": "Male/Female or null",
+    "date_of_birth": "DD/MM/YYYY or null",
+    "age": "number or null",
+    "nationality": "Indian/American/etc or null",
+    "marital_status": "Single/Married or null",
+    "current_location": "ONLY 'City, State'",
+    "permanent_address": "full address or null",
+    "hometown": "hometown or null",
+    "preferred_locations": ["city1", "city2"],
+    "willing_to_relocate": "true/false or null",
+    "work_authorization": "string or null",
+    "visa_status": "string or null",
+    "notice_period": "string or null",
+    "availability_date": "string or null",
+    "current_ctc": "string or null",
+    "expected_ctc": "string or null",
+    "current_salary": "string or null",
+    "expected_salary": "string or null",
+    "summary": "string or null",
+    "objective": "string or null",
+    "career_objective": "string or null",
+    "education": [{"Degree": "Ph.D./M.Tech/B.Tech/etc", "University": "University Name", "Grade": "CGPA or %", "Years": "2020-2024 or year"}],
+    "tenth_marks": "string or null",
+    "twelfth_marks": "string or null",
+    "graduation_year": "string or null",
+    "current_year_of_study": "string or null",
+    "university_roll_number": "string or null",
+    "student_id": "string or null",
+    "skills": ["skill1", "skill2"],
+    "derived_skills": ["skill the experience or projects show but the skills list does not name"],
+    "experience": [{"Company": "Company Name", "Role": "Job Title", "Years": "2020-2022", "Description": "brief description or null"}],
+    "projects": [{"Title": "Project Name", "Description": "what it does", "Technologies": "tech stack", "Duration": "time period"}],
+    "internships": [{"Company": "Company Name", "Role": "Intern Title", "Duration": "3 months", "Description": "what you did"}],
+    "achievements": [{"title": "Achievement name", "description": "Brief description", "year": "2024 or null"}],
+    "publications": [{"Title": "Paper Title", "Authors": "Author names or null", "Journal/Conference": "where published or null", "Date": "year or null", "DOI/Link": "link or null"}],
+    "research": [{"Title": "Research Title", "Description": "brief description", "Duration": "time period or null", "Institution": "where conducted or null"}],
+    "certifications": [{"Name": "Certification Name", "Issuer": "who issued", "Date": "when obtained or null", "Expiry": "if applicable or null"}],
+    "awards": [{"name": "Award name", "issuer": "Organization that gave award", "year": "2024 or null"}],
+    "volunteer_work": [{"organization": "Organization name", "role": "Your role", "duration": "Time period or null"}],
+    "extracurricular_activities": [{"activity": "Activity name", "role": "Your role or null", "duration": "Time period or null"}],
+    "languages": [{"Language": "English", "Proficiency": "Fluent/Native/Intermediate"}],
+    "interests": ["interest1"],
+    "hobbies": ["hobby1"],
+    "references": [{"Name": "Reference Name", "Title": "their title", "Contact": "email/phone", "Relationship": "Manager/Professor"}],
+    "linkedin_url": "url or null",
+    "github_url": "url or null",
+    "portfolio_url": "url or null",
+    "personal_website": "url or null",
+    "placement_preferences": "string or null",
+    "preferred_job_role": "string or null",
+    "preferred_industry": "string or null",
+}
+# Rough response budget per requested field (entries of object lists are long)
+_OBJECT_LIST_RESPONSE_TOKENS = 350
+_SCALAR_RESPONSE_TOKENS = 40
+_RESPONSE_BASE_TOKENS = 100
+
+_PERSONAL_CONFIDENCE = {
+    "email": CONFIDENCE_HIGH,
+    "phone": CONFIDENCE_HIGH,
+    "gender": CONFIDENCE_HIGH,
+    "date_of_birth": CONFIDENCE_HIGH,
+    "age": CONFIDENCE_MEDIUM,
+    "nationality": CONFIDENCE_HIGH,
+    "marital_status": CONFIDENCE_HIGH,
+    "current_location": CONFIDENCE_MEDIUM,
+}
+
+_LINK_PATTERNS = {
+    "linkedin_url": re.compile(r"(?:https?://)?(?:[a-z]{2,3}\.)?linkedin\.com/in/[A-Za-z0-9_%-]+/?", re.IGNORECASE),
+    "github_url": re.compile(r"(?:https?://)?(?:www\.)?github\.com/[A-Za-z0-9_-]+/?", re.IGNORECASE),
+}
+_LIST_SPLIT = re.compile(r"\s*(?:[,;|•·▪●◦■►➢✓]|\n|\s-\s|\t)\s*")
+_LIST_LABEL = re.compile(r"^[A-Za-z][A-Za-z /&+-]{1,30}:\s*")
+_BULLET_PREFIX = re.compile(r"^[\s•·▪●◦■►➢✓*\-–]+")
+_NAME_LINE = re.compile(r"^[A-Za-z][A-Za-z.'\-]*(?:\s+[A-Za-z][A-Za-z.'\-]*){1,3}$")
+_NOT_NAME_WORDS = {"resume", "curriculum", "vitae", "cv", "profile", "biodata", "email", "phone", "mobile", "address"}
+_YEAR_RANGE = re.compile(
+    r"((?:[A-Za-z]{3,9}\.?\s+)?(?:19|20)\d{2})\s*(?:-|–|—|to)\s*((?:[A-Za-z]{3,9}\.?\s+)?(?:19|20)\d{2}|present|current|now|till date|ongoing)",
+    re.IGNORECASE,
+)
+# Unlabelled mobile numbers in the header block (labelled ones come from extract_personal_info)
+_PHONE = re.compile(r"(?<![\d+])(?:\+?91[\s-]?)?[6-9]\d{4}[\s-]?\d{5}(?!\d)")
+_YEAR = re.compile(r"\b(?:19|20)\d{2}\b")
+_GRADE = re.compile(r"(?:cgpa|gpa|sgpa|cpi)\s*[:\-]?\s*(\d{1,2}(?:\.\d{1,2})?(?:\s*/\s*\d{1,2})?)|(\d{2}(?:\.\d{1,2})?\s*%)", re.IGNORECASE)
+_DEGREE_WORDS = re.compile(
+    r"\b(?:b\.?\s?tech|m\.?\s?tech|b\.?\s?e\b|m\.?\s?e\b|b\.?\s?sc|m\.?\s?sc|b\.?\s?com|m\.?\s?com|bca|mca|mba|bba|"
+    r"ph\.?\s?d|bachelor|master|diploma|intermediate|matriculation|secondary|higher secondary|hsc|ssc|class\s+(?:x|xii|10|12)|"
+    r"10th|12th|cbse|icse)",
+    re.IGNORECASE,
+)
+_INSTITUTION_WORDS = re.compile(r"\b(?:university|college|institute|school|academy|iit|nit|iiit)\b", re.IGNORECASE)
+_TENTH = re.compile(r"\b(?:10th|class\s+(?:x|10)|ssc|matriculation|secondary school)\b", re.IGNORECASE)
+_TWELFTH = re.compile(r"\b(?:12th|class\s+(?:xii|12)|hsc|intermediate|higher secondary)\b", re.IGNORECASE)
+
+
+def _header_key(line: str) -> Optional[str]:
+    stripped = line.strip()
+    if not stripped or len(stripped) > MAX_HEADER_LINE_CHARS:
+        return None
+    cleaned = " ".join(_HEADER_CLEAN.sub(" ", stripped.lower().rstrip(":")).split())
+    cleaned = cleaned.replace(" & ", " and ")
+    return _HEADER_LOOKUP.get(cleaned)
+
+
+def segment_sections(text: str) -> Tuple[str, Dict[str, str]]:
+    """
+    Split resume text at known section headers.
+    Returns (preamble before the first header, {section key: body}); a
+    repeated section key has its bodies concatenated.
+    """
+    preamble: List[str] = []
+    sections: Dict[str, List[str]] = {}
+    current: Optional[List[str]] = None
+    for line in text.splitlines():
+        key = _header_key(line)
+        if key is not None:
+            current = sections.setdefault(key, [])
+            continue
+        (preamble if current is None else current).append(line)
+    return "\n".join(preamble).strip(), {key: "\n".join(lines).strip() for key, lines in sections.items()}
+
+
+def _split_items(body: str, max_len: int = 60) -> List[str]:
+    items = []
+    for line in body.splitlines():
+        line = _LIST_LABEL.sub("", _BULLET_PREFIX.sub("", line.strip()))
+        for item in _LIST_SPLIT.split(line):
+            item = item.strip(" .")
+            if 1 < len(item) <= max_len and item.lower() not in (i.lower() for i in items):
+                items.append(item)
+    return items
+
+
+def _guess_name(preamble: str, email: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    for line in [line.strip() for line in preamble.splitlines() if line.strip()][:5]:
+        if not _NAME_LINE.match(line):
+            continue
+        tokens = [token.lower().strip(".'-") for token in line.split()]
+        if any(token in _NOT_NAME_WORDS for token in tokens) or _header_key(line):
+            continue
+        name = line.title() if line.isupper() else line
+        local_part = (email or "").split("@")[0].lower()
+        corroborated = any(len(token) >= 3 and token in local_part for token in tokens)
+        return name, CONFIDENCE_HIGH if corroborated else CONFIDENCE_LOW
+    return None, None
+
+
+def _draft_education(body: str) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Entries rebuilt from lines that name a degree, plus 10th/12th marks"""
+    entries: List[Dict[str, Any]] = []
+    extra: Dict[str, Any] = {}
+    lines = [_BULLET_PREFIX.sub("", line).strip() for line in body.splitlines() if line.strip()]
+    for index, line in enumerate(lines):
+        if not _DEGREE_WORDS.search(line):
+            continue
+        window = " ".join(lines[index:index + 3])
+        institution = next((l for l in lines[index:index + 3] if _INSTITUTION_WORDS.search(l)), None)
+        grade = _GRADE.search(window)
+        years = _YEAR_RANGE.search(window)
+        year = _YEAR.findall(window)
+        entry = {
+            "Degree": _GRADE.sub("", line).strip(" ,;|-–:")[:120] or line[:120],
+            "University": institution[:120] if institution and institution != line else None,
+            "Grade": (grade.group(1) or grade.group(2)).strip() if grade else None,
+            "Years": f"{years.group(1)}-{years.group(2)}" if years else (year[-1] if year else None),
+        }
+        entries.append(entry)
+        if grade and _TENTH.search(line) and "tenth_marks" not in extra:
+            extra["tenth_marks"] = entry["Grade"]
+        elif grade and _TWELFTH.search(line) and "twelfth_marks" not in extra:
+            extra["twelfth_marks"] = entry["Grade"]
+    return entries, extra
+
+
+def _draft_experience(body: str) -> List[Dict[str, Any]]:
+    """One low-confidence entry per line carrying a date range"""
+    entries: List[Dict[str, Any]] = []
+    lines = [_BULLET_PREFIX.sub("", line).strip() for line in body.splitlines() if line.strip()]
+    for index, line in enumerate(lines):
+        years = _YEAR_RANGE.search(line)
+        if not years:
+            if entries and len(entries[-1]["Description"] or "") < 300:
+                entries[-1]["Description"] = ((entries[-1]["Description"] or "") + " " + line).strip()[:300]
+            continue
+        title = (line[:years.start()] + line[years.end():]).strip(" ,|-–()")
+        if not title and index > 0:
+            title = lines[index - 1]
+        entries.append({
+            "Company": None,
+            "Role": title[:120] or None,
+            "Years": f"{years.group(1)}-{years.group(2)}",
+            "Description": None,
+        })
+    return entries
+
+
+def build_draft(text: str, personal_info: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Tier 1: deterministic draft of the parse.
+
+    Returns {"data": draft fields, "confidence": {field: level},
+    "sections": {key: body}, "preamble": str}.
+    """
+    personal_info = personal_info if personal_info is not None else extract_personal_info(text)
+    preamble, sections = segment_sections(text)
+    lowered = text.lower()
+    data: Dict[str, Any] = {}
+    confidence: Dict[str, str] = {}
+
+    def put(field, value, level):
+        if value not in (None, "", [], {}):
+            data[field] = value
+            confidence[field] = level
+
+    for field, value in personal_info.items():
+        put(field, value, _PERSONAL_CONFIDENCE.get(field, CONFIDENCE_MEDIUM))
+
+    if "phone" not in data:
+        phone = _PHONE.search(preamble or text[:PREAMBLE_MAX_CHARS])
+        put("phone", phone.group(0) if phone else None, CONFIDENCE_MEDIUM)
+
+    name, name_confidence = _guess_name(preamble or text[:PREAMBLE_MAX_CHARS], personal_info.get("email"))
+    put("name", name, name_confidence)
+
+    for field, pattern in _LINK_PATTERNS.items():
+        match = pattern.search(text)
+        if match:
+            url = match.group(0).rstrip("/")
+            put(field, url if url.lower().startswith("http") else f"https://{url}", CONFIDENCE_HIGH)
+
+    if "skills" in sections:
+        skills = _split_items(sections["skills"], max_len=40)
+        put("skills", skills, CONFIDENCE_HIGH if len(skills) >= 3 else CONFIDENCE_LOW)
+
+    if "summary" in sections:
+        summary = " ".join(sections["summary"].split())[:1000]
+        put("summary", summary, CONFIDENCE_HIGH)
+
+    if "languages" in sections:
+        languages = [{"Language": item, "Proficiency": None} for item in _split_items(sections["languages"], max_len=30)]
+        put("languages", languages, CONFIDENCE_MEDIUM)
+
+    if "interests" in sections:
+        put("interests", _split_items(sections["interests"], max_len=40), CONFIDENCE_MEDIUM)
+
+    if "education" in sections:
+        education, marks = _draft_education(sections["education"])
+        degrees = [entry for entry in education if not (_TENTH.search(entry["Degree"]) or _TWELFTH.search(entry["Degree"]))]
+        complete = bool(degrees) and all(entry["University"] and entry["Years"] for entry in degrees)
+        put("education", education, CONFIDENCE_MEDIUM if complete else CONFIDENCE_LOW)
+        for field, value in marks.items():
+            put(field, value, CONFIDENCE_MEDIUM)
+        end_years = [_YEAR.findall(entry["Years"] or "") for entry in degrees]
+        if complete and all(end_years):
+            put("graduation_year", max(years[-1] for years in end_years), CONFIDENCE_MEDIUM)
+
+    if "experience" in sections:
+        put("experience", _draft_experience(sections["experience"]), CONFIDENCE_LOW)
+
+    # The sections it is read from are sent along with their own (never high-confidence) fields
+    if any(section in sections for section in DERIVED_SKILL_SECTIONS):
+        confidence["derived_skills"] = CONFIDENCE_MISSING
+
+    # Everything else: missing when the text has a place for it, absent otherwise
+    for field in FIELD_SCHEMA:
+        if field in confidence:
+            continue
+        section = _FIELD_SECTION.get(field)
+        if section is not None:
+            mentioned = section in sections
+        elif field in FIELD_CUES:
+            mentioned = any(cue in lowered for cue in FIELD_CUES[field])
+        else:
+            mentioned = field in ALWAYS_ASKED
+        confidence[field] = CONFIDENCE_MISSING if mentioned else CONFIDENCE_ABSENT
+
+    return {"data": data, "confidence": confidence, "sections": sections, "preamble": preamble}
+
+
+def fields_for_llm(draft: Dict[str, Any]) -> List[str]:
+    """Fields tier 2 has to ask the LLM for, in schema order"""
+    return [field for field in FIELD_SCHEMA if draft["confidence"].get(field) in NEEDS_LLM]
+
+
+def segmentation_trusted(draft: Dict[str, Any]) -> bool:
+    return len([key for key in draft["sections"] if key != "personal"]) >= MIN_SECTIONS_FOR_TIERED
+
+
+def _cue_lines(text: str, fields: List[str]) -> List[str]:
+    cues = [cue for field in fields for cue in FIELD_CUES.get(field, [])]
+    if not cues:
+        return []
+    lines = text.splitlines()
+    picked = []
+    for index, line in enumerate(lines):
+        if any(cue in line.lower() for cue in cues):
+            picked.extend(lines[index:index + 2])
+    return list(dict.fromkeys(line for line in picked if line.strip()))
+
+
+def create_focused_parse_prompt(text: str, draft: Dict[str, Any], fields: List[str]) -> str:
+    """Tier 2 prompt: only the requested fields' schema and the text they live in"""
+    sections = draft["sections"]
+    excerpt_parts = [draft["preamble"][:PREAMBLE_MAX_CHARS]]
+    if "personal" in sections:
+        excerpt_parts.append(sections["personal"][:PREAMBLE_MAX_CHARS])
+    for section in dict.fromkeys(_FIELD_SECTION[field] for field in fields if field in _FIELD_SECTION):
+        if section in sections:
+            excerpt_parts.append(f"{section.upper()}:\n{sections[section]}")
+    cue_lines = _cue_lines(text, fields)
+    if cue_lines:
+        excerpt_parts.append("OTHER DETAILS:\n" + "\n".join(cue_lines))
+    excerpt = "\n\n".join(part for part in excerpt_parts if part)
+
+    known = {field: draft["data"][field] for field in ("name", "email", "phone") if field in draft["data"] and field not in fields}
+    known_context = f"\nALREADY EXTRACTED (context only, do not return): {json.dumps(known)}\n" if known else ""
+    schema = json.dumps({field: FIELD_SCHEMA[field] for field in fields}, indent=1, ensure_ascii=False)
+
+    return f"""Extract ONLY the fields below from this resume excerpt.
+{known_context}
+Return ONLY a valid JSON object with exactly these keys (no markdown, no explanations):
+{schema}
+
+RULES:
+1. Arrays of objects must stay arrays of objects, never arrays of strings
+2. If a field is not mentioned, use [] for arrays and null otherwise
+3. current_location must be ONLY "City, State"
+
+Resume excerpt:
+{excerpt[:12000]}
+"""
+
+
+def focused_response_tokens(fields: List[str]) -> int:
+    """max_tokens for a focused call asking for `fields`"""
+    budget = _RESPONSE_BASE_TOKENS
+    for field in fields:
+        example = FIELD_SCHEMA[field]
+        object_list = isinstance(example, list) and example and isinstance(example[0], dict)
+        budget += _OBJECT_LIST_RESPONSE_TOKENS if object_list else _SCALAR_RESPONSE_TOKENS
+    return min(2000, budget)
+
+
+def merge_draft(draft: Dict[str, Any], llm_data: Optional[Dict[str, Any]], fields: List[str]) -> Dict[str, Any]:
+    """Draft values plus the LLM's answers for the requested fields, with field_confidence"""
+    data = dict(draft["data"])
+    confidence = dict(draft["confidence"])
+    for field in fields:
+        value = (llm_data or {}).get(field)
+        if value not in (None, "", [], {}):
+            data[field] = value
+            confidence[field] = CONFIDENCE_LLM
+    data["field_confidence"] = confidence
+    return data
+
+
+def full_parse_confidence(regex_data: Dict[str, Any], final_data: Dict[str, Any]) -> Dict[str, str]:
+    """field_confidence for a full-prompt parse: regex fields keep their level, the rest came from the LLM"""
+    confidence = {}
+    for field in FIELD_SCHEMA:
+        if (regex_data or {}).get(field) not in (None, ""):
+            confidence[field] = _PERSONAL_CONFIDENCE.get(field, CONFIDENCE_MEDIUM)
+        elif final_data.get(field) not in (None, "", [], {}):
+            confidence[field] = CONFIDENCE_LLM
+        else:
+            confidence[field] = CONFIDENCE_ABSENT
+    return confidence
@@ -0,0 +1,48 @@
+import asyncio
+
+
+class InMemoryUpload:
+    """
+    Minimal stand-in for FastAPI's UploadFile backed by bytes already in memory.
+    Provides what the parser needs: .filename, async read() and async seek().
+    """
+    def __init__(self, filename: str, content: bytes):
+        self.filename = filename
+        self._content = content
+
+    @property
+    def size(self) -> int:
+        return len(self._content)
+
+    async def read(self) -> bytes:
+        return self._content
+
+    async def seek(self, offset: int = 0):
+        # read() always returns the full content, so there is no cursor to move
+        return None
+
+
+class SpooledUpload:
+    """
+    UploadFile stand-in whose content lives in a SpooledTemporaryFile: kept in
+    memory up to the spool threshold, written to a temp file beyond it.
+    """
+    def __init__(self, filename: str, spool):
+        self.filename = filename
+        self._spool = spool
+
+    @property
+    def on_disk(self) -> bool:
+        return bool(getattr(self._spool, "_rolled", False))
+
+    async def read(self) -> bytes:
+        self._spool.seek(0)
+        if self.on_disk:
+            return await asyncio.to_thread(self._spool.read)
+        return self._spool.read()
+
+    async def seek(self, offset: int = 0):
+        self._spool.seek(offset)
+
+    def close(self):
+        self._spool.close()